@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 import sys
 import typing as t
 
@@ -40,11 +41,51 @@ def cli_launcher(
         ]
         | None
     ) = None,
+    rpc_timeout: t.Annotated[
+        float | None,
+        Parameter(
+            "--rpc-timeout",
+            help="Initial Transmission RPC request timeout in seconds (adapts to observed latency). Overrides the config file.",
+        ),
+    ] = None,
+    rpc_retries: t.Annotated[
+        int | None,
+        Parameter(
+            "--rpc-retries",
+            help="Retries for idempotent Transmission RPC requests that fail with a connection error or timeout. Overrides the config file.",
+        ),
+    ] = None,
+    rpc_deadline: t.Annotated[
+        float | None,
+        Parameter(
+            "--rpc-deadline",
+            help="Max seconds for a single Transmission RPC request, including retries. Overrides the config file.",
+        ),
+    ] = None,
+    journal_dir: t.Annotated[
+        str | None,
+        Parameter(
+            "--journal-dir",
+            help="Directory bulk operations are journaled to, for 'transmission journal resume'. Default: $TRANSMISSION_JOURNAL_DIR, or $XDG_STATE_HOME/transmission_scripts/journals.",
+        ),
+    ] = None,
+    journal_retention: t.Annotated[
+        str | None,
+        Parameter(
+            "--journal-retention",
+            help="How long completed journals are kept, e.g. 30d. Default: $TRANSMISSION_JOURNAL_RETENTION, or 30d.",
+        ),
+    ] = None,
 ):
     """CLI entrypoint.
 
     Params:
         debug (bool): If `True`, enables debug logging.
+        rpc_timeout (float): Override the RPC request timeout from config files.
+        rpc_retries (int): Override the RPC retry count from config files.
+        rpc_deadline (float): Override the RPC request deadline from config files.
+        journal_dir (str): Directory bulk operations are journaled to.
+        journal_retention (str): How long completed journals are kept.
     """
     log.remove()
 
@@ -73,6 +114,21 @@ def cli_launcher(
             rotation="15MB",
         )
 
+    ## Read by the transmission subcommands when creating controllers (see
+    #  subcommands.transmission.methods.RPC_OVERRIDE_ENV) & journaling operations
+    for env_var, value in [
+        ("TRANSMISSION_RPC_TIMEOUT", rpc_timeout),
+        ("TRANSMISSION_RPC_RETRIES", rpc_retries),
+        ("TRANSMISSION_RPC_DEADLINE", rpc_deadline),
+        (
+            "TRANSMISSION_JOURNAL_DIR",
+            journal_dir and os.path.abspath(os.path.expanduser(journal_dir)),
+        ),
+        ("TRANSMISSION_JOURNAL_RETENTION", journal_retention),
+    ]:
+        if value is not None:
+            os.environ[env_var] = str(value)
+
     app(tokens)
 
 
@@ -1,4 +1,46 @@
 from __future__ import annotations
 
 from ._transmission import *
-from .methods import *
+
+## Names from .methods are resolved on first access, so importing the CLI
+#  does not import the transmission_lib/transmission_rpc stack.
+_LAZY_METHODS: list[str] = [
+    "return_controller",
+    "return_controllers",
+    "test_connection",
+    "count",
+    "delete",
+    "_list",
+    "export",
+    "bulk_action",
+    "verify_local",
+    "set_properties",
+    "relocate",
+    "prune",
+    "policy_run",
+    "policy_check",
+    "duplicates",
+    "search",
+    "orphans",
+    "torrent_index",
+    "add",
+    "watch_folder",
+    "watch",
+    "hooks_run",
+    "hooks_check",
+    "journal_list",
+    "journal_show",
+    "journal_resume",
+    "journal_prune",
+    "metrics",
+    "proxy",
+]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_METHODS:
+        from . import methods
+
+        return getattr(methods, name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
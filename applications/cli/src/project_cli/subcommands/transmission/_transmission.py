@@ -1,13 +1,18 @@
 from __future__ import annotations
 
+from pathlib import Path
 import typing as t
 
+from .agent import dispatch
+
 from cyclopts import App, Parameter
 from loguru import logger as log
-import transmission_lib
-import transmission_rpc
 
-from .methods import return_controller, test_connection, count, delete, _list
+## .methods (and through it transmission_lib & transmission_rpc) is only imported
+#  by dispatch() when a command runs in-process, so `--help`, argument parsing &
+#  commands forwarded to the agent never pay for the RPC stack. Command signatures
+#  are evaluated by cyclopts at runtime, so they must not reference types from
+#  those modules.
 
 __all__ = [
     "transmission_app",
@@ -15,6 +20,27 @@ __all__ = [
     "count_torrents",
     "delete_torrents",
     "list_torrents",
+    "export_torrents",
+    "start_torrents",
+    "stop_torrents",
+    "verify_torrents",
+    "reannounce_torrents",
+    "set_torrents",
+    "relocate_torrents",
+    "prune_torrents",
+    "find_duplicates",
+    "search_torrents",
+    "find_orphans",
+    "index_torrent_files",
+    "add_torrents",
+    "watch_torrent_folder",
+    "watch_torrents",
+    "export_metrics",
+    "rpc_proxy",
+    "policy_app",
+    "hooks_app",
+    "journal_app",
+    "agent_app",
 ]
 
 transmission_app = App(
@@ -45,7 +71,8 @@ def test_transmission_connection(
         str, Parameter(["--rpc-path"], show_default=True)
     ] = "/transmission/rpc/",
 ):
-    connect_success = test_connection(
+    connect_success = dispatch(
+        "test_connection",
         config_file=config_file,
         host=host,
         port=port,
@@ -83,7 +110,8 @@ def count_torrents(
     status: t.Annotated[str, Parameter(["--status"], help="Torrent status")] = "all",
 ):
     log.info("Counting torrents in remote Transmission")
-    num_torrents: int = count(
+    num_torrents: int = dispatch(
+        "count",
         config_file=config_file,
         host=host,
         port=port,
@@ -91,7 +119,7 @@ def count_torrents(
         password=password,
         protocol=protocol,
         path=path,
-        status=status
+        status=status,
     )
 
     if not status == "all":
@@ -142,9 +170,18 @@ def delete_torrents(
             help="Do a dry run, where no 'live' actions are taken (read-only operations permitted).",
         ),
     ] = False,
-) -> list[transmission_rpc.Torrent]:
+    chunk_size: t.Annotated[
+        int,
+        Parameter(
+            ["--chunk-size"],
+            show_default=True,
+            help="Number of torrents fetched per request.",
+        ),
+    ] = 500,
+) -> list:
     try:
-        deleted_torrents: list[transmission_rpc.Torrent] = delete(
+        deleted_torrents: list = dispatch(
+            "delete",
             config_file=config_file,
             host=host,
             port=port,
@@ -156,6 +193,7 @@ def delete_torrents(
             status=status,
             delete_data=delete_data,
             dry_run=dry_run,
+            chunk_size=chunk_size,
         )
 
         log.info(f"Deleted torrents ({len(deleted_torrents)}): {deleted_torrents}")
@@ -191,9 +229,18 @@ def list_torrents(
     status: t.Annotated[
         str, Parameter(["--status"], show_default=True, help="Torrent status")
     ] = "all",
-) -> list[transmission_rpc.Torrent]:
+    chunk_size: t.Annotated[
+        int,
+        Parameter(
+            ["--chunk-size"],
+            show_default=True,
+            help="Number of torrents fetched per request.",
+        ),
+    ] = 500,
+) -> int:
     try:
-        torrents = _list(
+        return dispatch(
+            "_list",
             config_file=config_file,
             host=host,
             port=port,
@@ -202,9 +249,2182 @@ def list_torrents(
             protocol=protocol,
             path=path,
             status=status,
+            chunk_size=chunk_size,
         )
-
-        return torrents
     except Exception as e:
         log.error(f"Error listing torrent(s): {e}")
+        return 0
+
+
+@transmission_app.command(
+    name="export",
+    group="transmission",
+    help="Export torrents as newline-delimited JSON. Torrents are fetched in chunks, so memory use stays bounded.",
+)
+def export_torrents(
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    status: t.Annotated[
+        str, Parameter(["--status"], show_default=True, help="Torrent status")
+    ] = "all",
+    output: t.Annotated[
+        str,
+        Parameter(
+            ["--output", "-o"],
+            show_default=True,
+            help="File to write to. Use '-' for stdout.",
+        ),
+    ] = "-",
+    streaming: t.Annotated[
+        bool,
+        Parameter(
+            ["--streaming"],
+            show_default=True,
+            help="Fetch all torrents in one request & decode the response as it arrives (for hosts with huge file lists).",
+        ),
+    ] = False,
+    chunk_size: t.Annotated[
+        int,
+        Parameter(
+            ["--chunk-size"],
+            show_default=True,
+            help="Number of torrents fetched per request.",
+        ),
+    ] = 500,
+):
+    try:
+        return dispatch(
+            "export",
+            forward=False,
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            status=status,
+            output=output,
+            chunk_size=chunk_size,
+            streaming=streaming,
+        )
+    except Exception as e:
+        log.error(f"Error exporting torrent(s): {e}")
+        return 0
+
+
+@transmission_app.command(
+    name="start",
+    group="transmission",
+    help="Start torrents matching a filter, in batched requests.",
+)
+def start_torrents(
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    status: t.Annotated[
+        str, Parameter(["--status"], show_default=True, help="Torrent status")
+    ] = "all",
+    where: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--where", "-w"],
+            help="Filter expression, e.g. 'ratio>=2', 'label=keep', 'added>30d'. Repeat to combine.",
+        ),
+    ] = None,
+    torrent_ids: t.Annotated[
+        list[int] | None,
+        Parameter(["--id"], help="Torrent ID. Repeat for multiple torrents."),
+    ] = None,
+    dry_run: t.Annotated[
+        bool,
+        Parameter(
+            ["--dry-run"],
+            show_default=True,
+            help="Do a dry run, where no 'live' actions are taken (read-only operations permitted).",
+        ),
+    ] = False,
+    batch_size: t.Annotated[
+        int,
+        Parameter(
+            ["--batch-size"],
+            show_default=True,
+            help="Max number of torrent IDs sent per request.",
+        ),
+    ] = 5000,
+    bypass_queue: t.Annotated[
+        bool,
+        Parameter(
+            ["--now"],
+            show_default=True,
+            help="Start immediately, bypassing the download queue.",
+        ),
+    ] = False,
+) -> list:
+    try:
+        return dispatch(
+            "bulk_action",
+            action="start",
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            status=status,
+            where=where,
+            torrent_ids=torrent_ids,
+            dry_run=dry_run,
+            batch_size=batch_size,
+            bypass_queue=bypass_queue,
+        )
+    except Exception as e:
+        log.error(f"Error running 'start' on torrent(s): {e}")
+        return []
+
+
+@transmission_app.command(
+    name="stop",
+    group="transmission",
+    help="Stop torrents matching a filter, in batched requests.",
+)
+def stop_torrents(
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    status: t.Annotated[
+        str, Parameter(["--status"], show_default=True, help="Torrent status")
+    ] = "all",
+    where: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--where", "-w"],
+            help="Filter expression, e.g. 'ratio>=2', 'label=keep', 'added>30d'. Repeat to combine.",
+        ),
+    ] = None,
+    torrent_ids: t.Annotated[
+        list[int] | None,
+        Parameter(["--id"], help="Torrent ID. Repeat for multiple torrents."),
+    ] = None,
+    dry_run: t.Annotated[
+        bool,
+        Parameter(
+            ["--dry-run"],
+            show_default=True,
+            help="Do a dry run, where no 'live' actions are taken (read-only operations permitted).",
+        ),
+    ] = False,
+    batch_size: t.Annotated[
+        int,
+        Parameter(
+            ["--batch-size"],
+            show_default=True,
+            help="Max number of torrent IDs sent per request.",
+        ),
+    ] = 5000,
+) -> list:
+    try:
+        return dispatch(
+            "bulk_action",
+            action="stop",
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            status=status,
+            where=where,
+            torrent_ids=torrent_ids,
+            dry_run=dry_run,
+            batch_size=batch_size,
+        )
+    except Exception as e:
+        log.error(f"Error running 'stop' on torrent(s): {e}")
+        return []
+
+
+@transmission_app.command(
+    name="verify",
+    group="transmission",
+    help="Verify the local data of torrents matching a filter, in batched requests. With --local, hash the data on this machine instead of on the daemon.",
+)
+def verify_torrents(
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    status: t.Annotated[
+        str, Parameter(["--status"], show_default=True, help="Torrent status")
+    ] = "all",
+    where: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--where", "-w"],
+            help="Filter expression, e.g. 'ratio>=2', 'label=keep', 'added>30d'. Repeat to combine.",
+        ),
+    ] = None,
+    torrent_ids: t.Annotated[
+        list[int] | None,
+        Parameter(["--id"], help="Torrent ID. Repeat for multiple torrents."),
+    ] = None,
+    dry_run: t.Annotated[
+        bool,
+        Parameter(
+            ["--dry-run"],
+            show_default=True,
+            help="Do a dry run, where no 'live' actions are taken (read-only operations permitted).",
+        ),
+    ] = False,
+    batch_size: t.Annotated[
+        int,
+        Parameter(
+            ["--batch-size"],
+            show_default=True,
+            help="Max number of torrent IDs sent per request.",
+        ),
+    ] = 5000,
+    local: t.Annotated[
+        bool,
+        Parameter(
+            ["--local"],
+            show_default=True,
+            help="Hash the data on this machine, against the piece hashes in each torrent's .torrent file, instead of sending 'verify' to the daemon.",
+        ),
+    ] = False,
+    workers: t.Annotated[
+        int | None,
+        Parameter(
+            ["--workers"],
+            help="With --local, processes hashing pieces. Defaults to the number of CPUs.",
+        ),
+    ] = None,
+    path_map: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--map"],
+            help="With --local, where a daemon path is mounted on this machine, as <remote>=<local>. Repeatable.",
+        ),
+    ] = None,
+) -> list:
+    try:
+        if local:
+            return dispatch(
+                "verify_local",
+                forward=False,
+                config_file=config_file,
+                host=host,
+                port=port,
+                username=username,
+                password=password,
+                protocol=protocol,
+                path=path,
+                status=status,
+                where=where,
+                torrent_ids=torrent_ids,
+                workers=workers,
+                path_map=path_map,
+            )
+
+        return dispatch(
+            "bulk_action",
+            action="verify",
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            status=status,
+            where=where,
+            torrent_ids=torrent_ids,
+            dry_run=dry_run,
+            batch_size=batch_size,
+        )
+    except Exception as e:
+        log.error(f"Error running 'verify' on torrent(s): {e}")
         return []
+
+
+@transmission_app.command(
+    name="reannounce",
+    group="transmission",
+    help="Reannounce torrents matching a filter to their trackers, in batched requests.",
+)
+def reannounce_torrents(
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    status: t.Annotated[
+        str, Parameter(["--status"], show_default=True, help="Torrent status")
+    ] = "all",
+    where: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--where", "-w"],
+            help="Filter expression, e.g. 'ratio>=2', 'label=keep', 'added>30d'. Repeat to combine.",
+        ),
+    ] = None,
+    torrent_ids: t.Annotated[
+        list[int] | None,
+        Parameter(["--id"], help="Torrent ID. Repeat for multiple torrents."),
+    ] = None,
+    dry_run: t.Annotated[
+        bool,
+        Parameter(
+            ["--dry-run"],
+            show_default=True,
+            help="Do a dry run, where no 'live' actions are taken (read-only operations permitted).",
+        ),
+    ] = False,
+    batch_size: t.Annotated[
+        int,
+        Parameter(
+            ["--batch-size"],
+            show_default=True,
+            help="Max number of torrent IDs sent per request.",
+        ),
+    ] = 5000,
+) -> list:
+    try:
+        return dispatch(
+            "bulk_action",
+            action="reannounce",
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            status=status,
+            where=where,
+            torrent_ids=torrent_ids,
+            dry_run=dry_run,
+            batch_size=batch_size,
+        )
+    except Exception as e:
+        log.error(f"Error running 'reannounce' on torrent(s): {e}")
+        return []
+
+
+@transmission_app.command(
+    name="set",
+    group="transmission",
+    help="Change properties (limits, seed ratio, labels, ...) of torrents matching a filter, with one request per distinct change.",
+)
+def set_torrents(
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    status: t.Annotated[
+        str, Parameter(["--status"], show_default=True, help="Torrent status")
+    ] = "all",
+    where: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--where", "-w"],
+            help="Filter expression, e.g. 'ratio>=2', 'label=keep', 'added>30d'. Repeat to combine.",
+        ),
+    ] = None,
+    torrent_ids: t.Annotated[
+        list[int] | None,
+        Parameter(["--id"], help="Torrent ID. Repeat for multiple torrents."),
+    ] = None,
+    upload_limit: t.Annotated[
+        int | None,
+        Parameter(["--upload-limit"], help="Upload limit in KB/s, -1 for unlimited."),
+    ] = None,
+    download_limit: t.Annotated[
+        int | None,
+        Parameter(
+            ["--download-limit"], help="Download limit in KB/s, -1 for unlimited."
+        ),
+    ] = None,
+    seed_ratio: t.Annotated[
+        str | None,
+        Parameter(
+            ["--seed-ratio"],
+            help="Seed ratio limit, 'global' to use the session's or 'unlimited'.",
+        ),
+    ] = None,
+    seed_idle: t.Annotated[
+        str | None,
+        Parameter(
+            ["--seed-idle"],
+            help="Seed idle limit in minutes, 'global' to use the session's or 'unlimited'.",
+        ),
+    ] = None,
+    queue_position: t.Annotated[
+        int | None, Parameter(["--queue-position"], help="Position in the queue.")
+    ] = None,
+    peer_limit: t.Annotated[
+        int | None, Parameter(["--peer-limit"], help="Max number of peers.")
+    ] = None,
+    labels: t.Annotated[
+        list[str] | None,
+        Parameter(["--label"], help="Replace all labels. Repeat for multiple labels."),
+    ] = None,
+    add_labels: t.Annotated[
+        list[str] | None,
+        Parameter(["--add-label"], help="Add a label. Repeatable."),
+    ] = None,
+    remove_labels: t.Annotated[
+        list[str] | None,
+        Parameter(["--remove-label"], help="Remove a label. Repeatable."),
+    ] = None,
+    dry_run: t.Annotated[
+        bool,
+        Parameter(
+            ["--dry-run"],
+            show_default=True,
+            help="Do a dry run, where no 'live' actions are taken (read-only operations permitted).",
+        ),
+    ] = False,
+    batch_size: t.Annotated[
+        int,
+        Parameter(
+            ["--batch-size"],
+            show_default=True,
+            help="Max number of torrent IDs sent per request.",
+        ),
+    ] = 5000,
+) -> int:
+    try:
+        return dispatch(
+            "set_properties",
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            status=status,
+            where=where,
+            torrent_ids=torrent_ids,
+            dry_run=dry_run,
+            batch_size=batch_size,
+            upload_limit=upload_limit,
+            download_limit=download_limit,
+            seed_ratio=seed_ratio,
+            seed_idle=seed_idle,
+            queue_position=queue_position,
+            peer_limit=peer_limit,
+            labels=labels,
+            add_labels=add_labels,
+            remove_labels=remove_labels,
+        )
+    except Exception as e:
+        log.error(f"Error setting torrent properties: {e}")
+        return 0
+
+
+@transmission_app.command(
+    name="relocate",
+    group="transmission",
+    help="Move the data of torrents matching a filter to destinations with enough free space, from a resumable plan.",
+)
+def relocate_torrents(
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    status: t.Annotated[
+        str, Parameter(["--status"], show_default=True, help="Torrent status")
+    ] = "all",
+    where: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--where", "-w"],
+            help="Filter expression, e.g. 'ratio>=2', 'label=keep', 'added>30d'. Repeat to combine.",
+        ),
+    ] = None,
+    torrent_ids: t.Annotated[
+        list[int] | None,
+        Parameter(["--id"], help="Torrent ID. Repeat for multiple torrents."),
+    ] = None,
+    destinations: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--dest", "-d"],
+            help="Destination path, as seen by the daemon. Repeat for multiple destinations.",
+        ),
+    ] = None,
+    headroom: t.Annotated[
+        str,
+        Parameter(
+            ["--headroom"],
+            show_default=True,
+            help="Free space to keep on each destination, e.g. 50G.",
+        ),
+    ] = "10G",
+    strategy: t.Annotated[
+        str,
+        Parameter(
+            ["--strategy"],
+            show_default=True,
+            help="'pack' fills the fullest destination that fits, 'spread' balances free space.",
+        ),
+    ] = "pack",
+    plan_file: t.Annotated[
+        str,
+        Parameter(["--plan"], show_default=True, help="Path to the plan file."),
+    ] = "relocation-plan.json",
+    resume: t.Annotated[
+        bool,
+        Parameter(
+            ["--resume"],
+            show_default=True,
+            help="Apply (or continue applying) the plan in --plan instead of making a new one.",
+        ),
+    ] = False,
+    dry_run: t.Annotated[
+        bool,
+        Parameter(
+            ["--dry-run"],
+            show_default=True,
+            help="Only write the plan file, do not move anything.",
+        ),
+    ] = False,
+    concurrency: t.Annotated[
+        int,
+        Parameter(
+            ["--concurrency"],
+            show_default=True,
+            help="Max number of torrents being moved at a time.",
+        ),
+    ] = 2,
+    poll_interval: t.Annotated[
+        float,
+        Parameter(
+            ["--poll-interval"],
+            show_default=True,
+            help="Seconds between checks of in-flight moves.",
+        ),
+    ] = 2.0,
+    move_timeout: t.Annotated[
+        float | None,
+        Parameter(
+            ["--move-timeout"],
+            help="Mark a move failed if it has not finished after this many seconds.",
+        ),
+    ] = None,
+    local: t.Annotated[
+        bool,
+        Parameter(
+            ["--local"],
+            show_default=True,
+            help="Copy files with this process instead of the daemon, which keeps seeding meanwhile. The daemon must run on this host.",
+        ),
+    ] = False,
+    copy_workers: t.Annotated[
+        int,
+        Parameter(
+            ["--copy-workers"],
+            show_default=True,
+            help="Files copied at a time, with --local.",
+        ),
+    ] = 4,
+    verify_copy: t.Annotated[
+        bool,
+        Parameter(
+            ["--verify-copy"],
+            show_default=True,
+            help="Checksum files while copying & verify the copies, with --local.",
+        ),
+    ] = False,
+) -> dict:
+    try:
+        return dispatch(
+            "relocate",
+            forward=False,
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            status=status,
+            where=where,
+            torrent_ids=torrent_ids,
+            destinations=destinations,
+            headroom=headroom,
+            strategy=strategy,
+            plan_file=plan_file,
+            resume=resume,
+            dry_run=dry_run,
+            concurrency=concurrency,
+            poll_interval=poll_interval,
+            move_timeout=move_timeout,
+            local=local,
+            copy_workers=copy_workers,
+            verify_copy=verify_copy,
+        )
+    except Exception as e:
+        log.error(f"Error relocating torrents: {e}")
+        return {}
+
+
+@transmission_app.command(
+    name="prune",
+    group="transmission",
+    help="Remove finished torrents & their data, lowest value first, until a target amount of disk space is freed.",
+)
+def prune_torrents(
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    where: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--where", "-w"],
+            help="Only consider torrents matching this filter expression, e.g. 'added>90d'. Repeat to combine.",
+        ),
+    ] = None,
+    free_target: t.Annotated[
+        str | None,
+        Parameter(["--free-target"], help="Amount of space to free, e.g. 500G."),
+    ] = None,
+    until_free: t.Annotated[
+        str | None,
+        Parameter(
+            ["--until-free"],
+            help="Free space to reach on --free-space-path instead, e.g. 1T.",
+        ),
+    ] = None,
+    free_space_path: t.Annotated[
+        str | None,
+        Parameter(
+            ["--free-space-path"],
+            help="Path checked with --until-free. Defaults to the daemon's download dir.",
+        ),
+    ] = None,
+    weights: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--weight"],
+            help="Score weight as <term>=<number>, terms: age, ratio, seeding, idle. Repeatable.",
+        ),
+    ] = None,
+    protected_labels: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--protect-label"],
+            help="Never remove torrents with this label. Repeatable.",
+        ),
+    ] = None,
+    protected_trackers: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--protect-tracker"],
+            help="Never remove torrents on this tracker host (or its subdomains). Repeatable.",
+        ),
+    ] = None,
+    dry_run: t.Annotated[
+        bool,
+        Parameter(
+            ["--dry-run"],
+            show_default=True,
+            help="Do a dry run, where no 'live' actions are taken (read-only operations permitted).",
+        ),
+    ] = False,
+    batch_size: t.Annotated[
+        int,
+        Parameter(
+            ["--batch-size"],
+            show_default=True,
+            help="Max number of torrent IDs sent per request.",
+        ),
+    ] = 5000,
+) -> list:
+    try:
+        return dispatch(
+            "prune",
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            where=where,
+            free_target=free_target,
+            until_free=until_free,
+            free_space_path=free_space_path,
+            weights=weights,
+            protected_labels=protected_labels,
+            protected_trackers=protected_trackers,
+            dry_run=dry_run,
+            batch_size=batch_size,
+        )
+    except Exception as e:
+        log.error(f"Error pruning torrents: {e}")
+        return []
+
+
+@transmission_app.command(
+    name="duplicates",
+    group="transmission",
+    help="Find torrents on more than one host in a multi-host config, and optionally remove the copies that are not on the preferred host.",
+)
+def find_duplicates(
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    hosts: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--only-host"],
+            help="Only compare these hosts of a multi-host config. Repeatable.",
+        ),
+    ] = None,
+    prefer: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--prefer"],
+            help="Keep finished copies on this host, most preferred first (a finished copy always wins over unfinished ones). Other hosts rank after, in config order. Repeatable.",
+        ),
+    ] = None,
+    fuzzy: t.Annotated[
+        bool,
+        Parameter(
+            ["--fuzzy"],
+            show_default=True,
+            help="Also match different torrents with the same normalized name & size (re-packs, re-uploads).",
+        ),
+    ] = True,
+    size_tolerance: t.Annotated[
+        float,
+        Parameter(
+            ["--size-tolerance"],
+            show_default=True,
+            help="Max relative size difference for fuzzy matches, e.g. 0.01 for 1%.",
+        ),
+    ] = 0.01,
+    resolve: t.Annotated[
+        bool,
+        Parameter(
+            ["--resolve"],
+            show_default=True,
+            help="Remove exact duplicates from every host but the preferred one.",
+        ),
+    ] = False,
+    include_fuzzy: t.Annotated[
+        bool,
+        Parameter(
+            ["--include-fuzzy"],
+            show_default=True,
+            help="With --resolve, also remove fuzzy matches.",
+        ),
+    ] = False,
+    delete_data: t.Annotated[
+        bool,
+        Parameter(
+            ["--delete-data"],
+            show_default=True,
+            help="Also delete the removed copies' data.",
+        ),
+    ] = False,
+    dry_run: t.Annotated[
+        bool,
+        Parameter(
+            ["--dry-run"],
+            show_default=True,
+            help="Do a dry run, where no 'live' actions are taken (read-only operations permitted).",
+        ),
+    ] = False,
+    batch_size: t.Annotated[
+        int,
+        Parameter(
+            ["--batch-size"],
+            show_default=True,
+            help="Max number of torrent IDs sent per request.",
+        ),
+    ] = 5000,
+) -> list:
+    try:
+        return dispatch(
+            "duplicates",
+            forward=False,
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            hosts=hosts,
+            prefer=prefer,
+            fuzzy=fuzzy,
+            size_tolerance=size_tolerance,
+            resolve=resolve,
+            include_fuzzy=include_fuzzy,
+            delete_data=delete_data,
+            dry_run=dry_run,
+            batch_size=batch_size,
+        )
+    except Exception as e:
+        log.error(f"Error finding duplicates: {e}")
+        return []
+
+
+@transmission_app.command(
+    name="search",
+    group="transmission",
+    help="Search torrent names (and file paths) on every host in the config, using a persistent, incrementally refreshed index.",
+)
+def search_torrents(
+    query: t.Annotated[
+        str,
+        Parameter(
+            help="Words that must all appear in a torrent's name, e.g. 's01e02 1080p'."
+        ),
+    ],
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    hosts: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--only-host"],
+            help="Only search these hosts of a multi-host config. Repeatable.",
+        ),
+    ] = None,
+    fuzzy: t.Annotated[
+        bool,
+        Parameter(
+            ["--fuzzy", "-f"],
+            show_default=True,
+            help="Rank approximate matches (typos, re-ordered words) instead of requiring every word.",
+        ),
+    ] = False,
+    paths: t.Annotated[
+        bool,
+        Parameter(
+            ["--paths"],
+            show_default=True,
+            help="Also index & search file paths inside torrents.",
+        ),
+    ] = False,
+    limit: t.Annotated[
+        int, Parameter(["--limit", "-n"], show_default=True, help="Max results.")
+    ] = 50,
+    index_file: t.Annotated[
+        str,
+        Parameter(["--index"], show_default=True, help="Search index database file."),
+    ] = "search-index.db",
+    max_age: t.Annotated[
+        str,
+        Parameter(
+            ["--max-age"],
+            show_default=True,
+            help="Refresh hosts indexed longer ago than this first, e.g. 30s. 0 always refreshes.",
+        ),
+    ] = "5m",
+    offline: t.Annotated[
+        bool,
+        Parameter(
+            ["--offline"],
+            show_default=True,
+            help="Only search the index, without contacting any host.",
+        ),
+    ] = False,
+) -> list:
+    try:
+        return dispatch(
+            "search",
+            query=query,
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            hosts=hosts,
+            fuzzy=fuzzy,
+            paths=paths,
+            limit=limit,
+            index_file=index_file,
+            max_age=max_age,
+            offline=offline,
+        )
+    except Exception as e:
+        log.error(f"Error searching torrents: {e}")
+        return []
+
+
+@transmission_app.command(
+    name="orphans",
+    group="transmission",
+    help="Find files & directories in the host's download dirs that no torrent references, and optionally delete them.",
+)
+def find_orphans(
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    download_dirs: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--download-dir", "-d"],
+            help="Also scan this dir (as seen by the daemon), i.e. one whose torrents were all removed. Repeatable.",
+        ),
+    ] = None,
+    path_map: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--map"],
+            help="Where a daemon path is mounted on this machine, as <remote>=<local>, e.g. /downloads=/mnt/nas/downloads. Repeatable.",
+        ),
+    ] = None,
+    exclude: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--exclude"],
+            help="Ignore files & dirs with names matching this glob, e.g. '.stfolder'. Repeatable.",
+        ),
+    ] = None,
+    min_age: t.Annotated[
+        str,
+        Parameter(
+            ["--min-age"],
+            show_default=True,
+            help="Ignore data modified more recently than this, e.g. 30m, so torrents added during the scan are safe.",
+        ),
+    ] = "1h",
+    workers: t.Annotated[
+        int,
+        Parameter(
+            ["--workers"], show_default=True, help="Directories scanned in parallel."
+        ),
+    ] = 8,
+    delete: t.Annotated[
+        bool,
+        Parameter(["--delete"], show_default=True, help="Delete the orphans found."),
+    ] = False,
+    dry_run: t.Annotated[
+        bool,
+        Parameter(
+            ["--dry-run"],
+            show_default=True,
+            help="Do a dry run, where no 'live' actions are taken (read-only operations permitted).",
+        ),
+    ] = False,
+    batch_size: t.Annotated[
+        int,
+        Parameter(
+            ["--batch-size"],
+            show_default=True,
+            help="Orphans deleted between progress reports.",
+        ),
+    ] = 100,
+) -> list:
+    try:
+        return dispatch(
+            "orphans",
+            forward=False,
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            download_dirs=download_dirs,
+            path_map=path_map,
+            exclude=exclude,
+            min_age=min_age,
+            workers=workers,
+            delete=delete,
+            dry_run=dry_run,
+            batch_size=batch_size,
+        )
+    except Exception as e:
+        log.error(f"Error finding orphaned data: {e}")
+        return []
+
+
+@transmission_app.command(
+    name="torrent-index",
+    group="transmission",
+    help="Catalog directories of .torrent files by info hash (incrementally), and look up info hashes in the catalog.",
+)
+def index_torrent_files(
+    directories: t.Annotated[
+        list[str] | None,
+        Parameter(help="Directories of .torrent files to (re)scan."),
+    ] = None,
+    index_file: t.Annotated[
+        str,
+        Parameter(["--index"], show_default=True, help="Catalog database file."),
+    ] = "torrent-index.db",
+    workers: t.Annotated[
+        int | None,
+        Parameter(
+            ["--workers"],
+            help="Processes reading .torrent files. Defaults to the number of CPUs.",
+        ),
+    ] = None,
+    recursive: t.Annotated[
+        bool,
+        Parameter(["--recursive"], show_default=True, help="Also scan subdirectories."),
+    ] = True,
+    hashes: t.Annotated[
+        list[str] | None,
+        Parameter(["--hash"], help="Info hash to look up. Repeatable."),
+    ] = None,
+) -> dict:
+    try:
+        return dispatch(
+            "torrent_index",
+            forward=False,
+            directories=directories,
+            index_file=index_file,
+            workers=workers,
+            recursive=recursive,
+            hashes=hashes,
+        )
+    except Exception as e:
+        log.error(f"Error indexing .torrent files: {e}")
+        return {}
+
+
+@transmission_app.command(
+    name="add",
+    group="transmission",
+    help="Add .torrent files, directories of them & magnet links, skipping torrents the host already has (by locally computed info hash).",
+)
+def add_torrents(
+    sources: t.Annotated[
+        list[str],
+        Parameter(
+            help="Magnet links, .torrent/.magnet files, and directories of them."
+        ),
+    ],
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    hosts: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--only-host"],
+            help="Host of a multi-host config to add to (default: the first). With --most-free-space, candidate hosts. Repeatable.",
+        ),
+    ] = None,
+    most_free_space: t.Annotated[
+        bool,
+        Parameter(
+            ["--most-free-space"],
+            show_default=True,
+            help="Add to the host with the most free space in its download dir.",
+        ),
+    ] = False,
+    download_dir: t.Annotated[
+        str | None,
+        Parameter(
+            ["--download-dir", "-d"], help="Download dir. Defaults to the daemon's."
+        ),
+    ] = None,
+    paused: t.Annotated[
+        bool,
+        Parameter(["--paused"], show_default=True, help="Add torrents stopped."),
+    ] = False,
+    labels: t.Annotated[
+        list[str] | None,
+        Parameter(["--label"], help="Label added torrents. Repeatable."),
+    ] = None,
+    recursive: t.Annotated[
+        bool,
+        Parameter(
+            ["--recursive"], show_default=True, help="Also add files in subdirectories."
+        ),
+    ] = True,
+    workers: t.Annotated[
+        int | None,
+        Parameter(
+            ["--workers"],
+            help="Processes reading .torrent files. Defaults to the number of CPUs.",
+        ),
+    ] = None,
+    concurrency: t.Annotated[
+        int,
+        Parameter(
+            ["--concurrency"],
+            show_default=True,
+            help="Add requests in flight.",
+        ),
+    ] = 4,
+    batch_size: t.Annotated[
+        int,
+        Parameter(
+            ["--batch-size"],
+            show_default=True,
+            help="Torrents added between progress updates.",
+        ),
+    ] = 100,
+    dry_run: t.Annotated[
+        bool,
+        Parameter(
+            ["--dry-run"],
+            show_default=True,
+            help="Do a dry run, where no 'live' actions are taken (read-only operations permitted).",
+        ),
+    ] = False,
+) -> dict:
+    try:
+        return dispatch(
+            "add",
+            forward=False,
+            sources=sources,
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            hosts=hosts,
+            most_free_space=most_free_space,
+            download_dir=download_dir,
+            paused=paused,
+            labels=labels,
+            recursive=recursive,
+            workers=workers,
+            concurrency=concurrency,
+            batch_size=batch_size,
+            dry_run=dry_run,
+        )
+    except Exception as e:
+        log.error(f"Error adding torrents: {e}")
+        return {}
+
+
+@transmission_app.command(
+    name="watch-folder",
+    group="transmission",
+    help="Watch a folder & add the .torrent and .magnet files dropped in it, skipping torrents the host already has. Runs until interrupted.",
+)
+def watch_torrent_folder(
+    directory: t.Annotated[
+        str,
+        Parameter(help="Folder to watch."),
+    ],
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    processed_dir: t.Annotated[
+        str | None,
+        Parameter(
+            ["--processed-dir"],
+            help="Where processed files are moved. Defaults to <folder>/processed.",
+        ),
+    ] = None,
+    failed_dir: t.Annotated[
+        str | None,
+        Parameter(
+            ["--failed-dir"],
+            help="Where unreadable & rejected files are moved. Defaults to <folder>/failed.",
+        ),
+    ] = None,
+    download_dir: t.Annotated[
+        str | None,
+        Parameter(
+            ["--download-dir", "-d"], help="Download dir. Defaults to the daemon's."
+        ),
+    ] = None,
+    paused: t.Annotated[
+        bool,
+        Parameter(["--paused"], show_default=True, help="Add torrents stopped."),
+    ] = False,
+    labels: t.Annotated[
+        list[str] | None,
+        Parameter(["--label"], help="Label added torrents. Repeatable."),
+    ] = None,
+    debounce: t.Annotated[
+        float,
+        Parameter(
+            ["--debounce"],
+            show_default=True,
+            help="Seconds without a new file before a batch is submitted.",
+        ),
+    ] = 1.0,
+    max_delay: t.Annotated[
+        float,
+        Parameter(
+            ["--max-delay"],
+            show_default=True,
+            help="Max seconds a file waits during a steady stream of new files.",
+        ),
+    ] = 10.0,
+    batch_size: t.Annotated[
+        int,
+        Parameter(
+            ["--batch-size"],
+            show_default=True,
+            help="Submit a batch as soon as this many files are waiting.",
+        ),
+    ] = 500,
+    concurrency: t.Annotated[
+        int,
+        Parameter(
+            ["--concurrency"],
+            show_default=True,
+            help="Add requests in flight.",
+        ),
+    ] = 4,
+    polling: t.Annotated[
+        bool,
+        Parameter(
+            ["--polling"],
+            show_default=True,
+            help="Poll the folder instead of using inotify, i.e. on network mounts.",
+        ),
+    ] = False,
+    poll_interval: t.Annotated[
+        float,
+        Parameter(
+            ["--poll-interval"], show_default=True, help="Seconds between polls."
+        ),
+    ] = 2.0,
+    refresh_interval: t.Annotated[
+        str,
+        Parameter(
+            ["--refresh-interval"],
+            show_default=True,
+            help="How often the host's info hashes are re-fetched, e.g. to notice removed torrents.",
+        ),
+    ] = "10m",
+) -> dict:
+    try:
+        return dispatch(
+            "watch_folder",
+            forward=False,
+            directory=directory,
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            processed_dir=processed_dir,
+            failed_dir=failed_dir,
+            download_dir=download_dir,
+            paused=paused,
+            labels=labels,
+            debounce=debounce,
+            max_delay=max_delay,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            polling=polling,
+            poll_interval=poll_interval,
+            refresh_interval=refresh_interval,
+        )
+    except Exception as e:
+        log.error(f"Error watching folder: {e}")
+        return {}
+
+
+@transmission_app.command(
+    name="watch",
+    group="transmission",
+    help="Emit torrent change events (added, removed, status, finished) as NDJSON, polling hosts with recently-active deltas. Runs until interrupted.",
+)
+def watch_torrents(
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    hosts: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--only-host"],
+            help="Only watch these hosts of a multi-host config. Repeatable.",
+        ),
+    ] = None,
+    output: t.Annotated[
+        str,
+        Parameter(
+            ["--output", "-o"],
+            show_default=True,
+            help="File events are appended to, as NDJSON. '-' for stdout.",
+        ),
+    ] = "-",
+    sink: t.Annotated[
+        str | None,
+        Parameter(
+            ["--sink"],
+            help="Python callable events are passed to instead, as 'module:callable'.",
+        ),
+    ] = None,
+    events: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--event"],
+            help="Only emit this event type (added, removed, status, finished). Repeatable.",
+        ),
+    ] = None,
+    min_interval: t.Annotated[
+        float,
+        Parameter(
+            ["--min-interval"],
+            show_default=True,
+            help="Seconds between polls while torrents are transitioning.",
+        ),
+    ] = 1.0,
+    max_interval: t.Annotated[
+        float,
+        Parameter(
+            ["--max-interval"],
+            show_default=True,
+            help="Seconds between polls while idle (at most 54).",
+        ),
+    ] = 30.0,
+    resync_interval: t.Annotated[
+        str,
+        Parameter(
+            ["--resync-interval"],
+            show_default=True,
+            help="How often every torrent is re-fetched, to catch changes recently-active deltas miss.",
+        ),
+    ] = "10m",
+) -> dict:
+    try:
+        return dispatch(
+            "watch",
+            forward=False,
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            hosts=hosts,
+            output=output,
+            sink=sink,
+            events=events,
+            min_interval=min_interval,
+            max_interval=max_interval,
+            resync_interval=resync_interval,
+        )
+    except Exception as e:
+        log.error(f"Error watching torrents: {e}")
+        return {}
+
+
+@transmission_app.command(
+    name="metrics",
+    group="transmission",
+    help="Export torrent & RPC metrics in Prometheus text format (stdout, a textfile-collector file, or an HTTP endpoint).",
+)
+def export_metrics(
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client. May define multiple hosts under a 'hosts' key.",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    textfile: t.Annotated[
+        str,
+        Parameter(
+            ["--textfile"],
+            show_default=True,
+            help="Write metrics to this file (atomically) for the node_exporter textfile collector.",
+        ),
+    ]
+    | None = None,
+    listen: t.Annotated[
+        str,
+        Parameter(
+            ["--listen"],
+            show_default=True,
+            help="Serve metrics over HTTP at /metrics on this address, e.g. '127.0.0.1:9190'.",
+        ),
+    ]
+    | None = None,
+):
+    try:
+        return dispatch(
+            "metrics",
+            forward=listen is None,
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            textfile=textfile,
+            listen=listen,
+        )
+    except Exception as e:
+        log.error(f"Error exporting metrics: {e}")
+        return None
+
+
+@transmission_app.command(
+    name="proxy",
+    group="transmission",
+    help="Run a caching, request-coalescing Transmission RPC proxy for local clients.",
+)
+def rpc_proxy(
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    listen: t.Annotated[
+        str,
+        Parameter(
+            ["--listen"],
+            show_default=True,
+            help="Address the proxy listens on. Point clients at http://<listen>/transmission/rpc.",
+        ),
+    ] = "127.0.0.1:9092",
+    cache_ttl: t.Annotated[
+        float,
+        Parameter(
+            ["--cache-ttl"],
+            show_default=True,
+            help="Seconds cached torrent fields are served before they are refetched.",
+        ),
+    ] = 5.0,
+    proxy_username: t.Annotated[
+        str,
+        Parameter(
+            ["--proxy-username"],
+            show_default=True,
+            help="Username clients must authenticate with. Required (with --proxy-password) to listen on a non-loopback address.",
+        ),
+    ] = None,
+    proxy_password: t.Annotated[
+        str,
+        Parameter(
+            ["--proxy-password"],
+            show_default=True,
+            help="Password clients must authenticate with.",
+        ),
+    ] = None,
+):
+    try:
+        return dispatch(
+            "proxy",
+            forward=False,
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            listen=listen,
+            cache_ttl=cache_ttl,
+            proxy_username=proxy_username,
+            proxy_password=proxy_password,
+        )
+    except Exception as e:
+        log.error(f"Error running RPC proxy: {e}")
+        return None
+
+
+policy_app = App(
+    name="policy",
+    group="transmission",
+    help="Evaluate declarative cleanup policies (delete, stop, start, move, relabel rules) against each host.",
+)
+transmission_app.command(policy_app)
+
+
+@policy_app.command(
+    name="run", help="Evaluate a policy on every host in the config & apply it."
+)
+def run_policy(
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    policy_file: t.Annotated[
+        str,
+        Parameter(
+            ["--policy", "-p"],
+            show_default=True,
+            help="Path to a JSON (or YAML, with PyYAML installed) policy file.",
+        ),
+    ] = "configs/policy.json",
+    hosts: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--only-host"],
+            help="Only evaluate the policy on this host of a multi-host config. Repeatable.",
+        ),
+    ] = None,
+    state_file: t.Annotated[
+        str,
+        Parameter(
+            ["--state-file"],
+            show_default=True,
+            help="Where grace period state is kept between runs.",
+        ),
+    ] = "policy-state.json",
+    audit_log: t.Annotated[
+        str,
+        Parameter(
+            ["--audit-log"],
+            show_default=True,
+            help="Newline-delimited JSON log every action is appended to.",
+        ),
+    ] = "policy-audit.ndjson",
+    dry_run: t.Annotated[
+        bool,
+        Parameter(
+            ["--dry-run"],
+            show_default=True,
+            help="Do a dry run, where no 'live' actions are taken (read-only operations permitted).",
+        ),
+    ] = False,
+    interval: t.Annotated[
+        str | None,
+        Parameter(
+            ["--interval"],
+            help="Keep evaluating the policy on this schedule, e.g. 15m.",
+        ),
+    ] = None,
+    batch_size: t.Annotated[
+        int,
+        Parameter(
+            ["--batch-size"],
+            show_default=True,
+            help="Max number of torrent IDs sent per request.",
+        ),
+    ] = 5000,
+    chunk_size: t.Annotated[
+        int,
+        Parameter(
+            ["--chunk-size"],
+            show_default=True,
+            help="Number of torrents fetched per request.",
+        ),
+    ] = 500,
+) -> dict:
+    try:
+        return dispatch(
+            "policy_run",
+            forward=False,
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            policy_file=policy_file,
+            hosts=hosts,
+            state_file=state_file,
+            audit_log=audit_log,
+            dry_run=dry_run,
+            interval=interval,
+            batch_size=batch_size,
+            chunk_size=chunk_size,
+        )
+    except Exception as e:
+        log.error(f"Error running policy: {e}")
+        return {}
+
+
+@policy_app.command(
+    name="check",
+    help="Validate a policy file & show the rules that apply to each host.",
+)
+def check_policy(
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    policy_file: t.Annotated[
+        str,
+        Parameter(
+            ["--policy", "-p"],
+            show_default=True,
+            help="Path to a JSON (or YAML, with PyYAML installed) policy file.",
+        ),
+    ] = "configs/policy.json",
+) -> dict:
+    try:
+        return dispatch(
+            "policy_check",
+            forward=False,
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            policy_file=policy_file,
+        )
+    except Exception as e:
+        log.error(f"Invalid policy: {e}")
+        return {}
+
+
+hooks_app = App(
+    name="hooks",
+    group="transmission",
+    help="Run post-processing commands or Python callables as torrents finish downloading.",
+)
+transmission_app.command(hooks_app)
+
+
+@hooks_app.command(
+    name="run",
+    help="Run hooks as torrents finish on every host in the config. Runs until interrupted.",
+)
+def run_hooks(
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+    hooks_file: t.Annotated[
+        str,
+        Parameter(
+            ["--hooks"],
+            show_default=True,
+            help="Path to a JSON (or YAML, with PyYAML installed) hooks file.",
+        ),
+    ] = "configs/hooks.json",
+    hosts: t.Annotated[
+        list[str] | None,
+        Parameter(
+            ["--only-host"],
+            help="Only watch this host of a multi-host config. Repeatable.",
+        ),
+    ] = None,
+    ledger_file: t.Annotated[
+        str,
+        Parameter(
+            ["--ledger"],
+            show_default=True,
+            help="Newline-delimited JSON record of hook runs, so restarts don't re-fire them.",
+        ),
+    ] = "hook-ledger.ndjson",
+    min_interval: t.Annotated[
+        float,
+        Parameter(
+            ["--min-interval"],
+            show_default=True,
+            help="Seconds between polls while torrents are transitioning.",
+        ),
+    ] = 1.0,
+    max_interval: t.Annotated[
+        float,
+        Parameter(
+            ["--max-interval"],
+            show_default=True,
+            help="Seconds between polls while idle (at most 54).",
+        ),
+    ] = 30.0,
+    resync_interval: t.Annotated[
+        str,
+        Parameter(
+            ["--resync-interval"],
+            show_default=True,
+            help="How often every torrent is re-fetched, to catch changes recently-active deltas miss.",
+        ),
+    ] = "10m",
+) -> dict:
+    try:
+        return dispatch(
+            "hooks_run",
+            forward=False,
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+            hooks_file=hooks_file,
+            hosts=hosts,
+            ledger_file=ledger_file,
+            min_interval=min_interval,
+            max_interval=max_interval,
+            resync_interval=resync_interval,
+        )
+    except Exception as e:
+        log.error(f"Error running hooks: {e}")
+        return {}
+
+
+@hooks_app.command(name="check", help="Validate a hooks file & show its hooks.")
+def check_hooks(
+    hooks_file: t.Annotated[
+        str,
+        Parameter(
+            ["--hooks"],
+            show_default=True,
+            help="Path to a JSON (or YAML, with PyYAML installed) hooks file.",
+        ),
+    ] = "configs/hooks.json",
+) -> list:
+    try:
+        return dispatch("hooks_check", forward=False, hooks_file=hooks_file)
+    except Exception as e:
+        log.error(f"Invalid hooks file: {e}")
+        return []
+
+
+journal_app = App(
+    name="journal",
+    group="transmission",
+    help="Inspect & resume journaled bulk operations (delete, prune, set, start/stop/verify/reannounce, policy actions). Journals are kept in --journal-dir.",
+)
+transmission_app.command(journal_app)
+
+
+@journal_app.command(name="list", help="List journaled operations, oldest first.")
+def list_journals(
+    pending: t.Annotated[
+        bool,
+        Parameter(
+            ["--pending"],
+            show_default=True,
+            help="Only list operations that were interrupted or failed.",
+        ),
+    ] = False,
+) -> list:
+    try:
+        return dispatch("journal_list", forward=False, pending=pending)
+    except Exception as e:
+        log.error(f"Error listing journals: {e}")
+        return []
+
+
+@journal_app.command(name="show", help="Show an operation's arguments & batches.")
+def show_journal(
+    operation_id: t.Annotated[
+        str, Parameter(help="Operation ID, or a unique prefix of one.")
+    ],
+) -> dict:
+    try:
+        return dispatch("journal_show", forward=False, operation_id=operation_id)
+    except Exception as e:
+        log.error(f"Error reading journal: {e}")
+        return {}
+
+
+@journal_app.command(
+    name="resume",
+    help="Resume an interrupted or failed operation. Confirmed batches are skipped, unconfirmed ones are re-checked against the daemon.",
+)
+def resume_journal(
+    operation_id: t.Annotated[
+        str, Parameter(help="Operation ID, or a unique prefix of one.")
+    ],
+    config_file: t.Annotated[
+        str,
+        Parameter(
+            ["--config-file", "-c"],
+            show_default=True,
+            help="Path to a JSON configuration file for the client",
+        ),
+    ] = "configs/default.json",
+    host: t.Annotated[str, Parameter(["--host"], show_default=True)] = "127.0.0.1",
+    port: t.Annotated[int, Parameter(["--port"], show_default=True)] = 9091,
+    username: t.Annotated[str, Parameter(["--username"], show_default=True)] = None,
+    password: t.Annotated[str, Parameter(["--password"], show_default=True)] = None,
+    protocol: t.Annotated[str, Parameter(["--protocol"], show_default=True)] = "http",
+    path: t.Annotated[
+        str, Parameter(["--rpc-path"], show_default=True)
+    ] = "/transmission/rpc",
+) -> int:
+    try:
+        return dispatch(
+            "journal_resume",
+            forward=False,
+            operation_id=operation_id,
+            config_file=config_file,
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            protocol=protocol,
+            path=path,
+        )
+    except Exception as e:
+        log.error(f"Error resuming operation: {e}")
+        return 0
+
+
+@journal_app.command(
+    name="prune",
+    help="Remove completed journals older than the retention period. Interrupted & failed journals are kept.",
+)
+def prune_journals(
+    older_than: t.Annotated[
+        str,
+        Parameter(
+            ["--older-than"],
+            show_default=True,
+            help="Retention, e.g. 30d. Default: --journal-retention, $TRANSMISSION_JOURNAL_RETENTION, or 30d.",
+        ),
+    ] = None,
+) -> int:
+    try:
+        return dispatch("journal_prune", forward=False, older_than=older_than)
+    except Exception as e:
+        log.error(f"Error pruning journals: {e}")
+        return 0
+
+
+agent_app = App(
+    name="agent",
+    group="transmission",
+    help="Manage the local agent that keeps warm RPC sessions & torrent caches. CLI commands are forwarded to it while it is running.",
+)
+transmission_app.command(agent_app)
+
+
+@agent_app.command(name="start", help="Start the agent.")
+def start_agent(
+    socket_path: t.Annotated[
+        str,
+        Parameter(
+            ["--socket"],
+            show_default=True,
+            help="Unix socket to listen on. Defaults to $TRANSMISSION_AGENT_SOCKET, or a per-user path in $XDG_RUNTIME_DIR.",
+        ),
+    ]
+    | None = None,
+    cache_ttl: t.Annotated[
+        float,
+        Parameter(
+            ["--cache-ttl"],
+            show_default=True,
+            help="Seconds a fetched torrent list is reused between commands.",
+        ),
+    ] = 5.0,
+    detach: t.Annotated[
+        bool,
+        Parameter(
+            ["--detach", "-d"],
+            show_default=True,
+            help="Run the agent in the background.",
+        ),
+    ] = False,
+):
+    import subprocess
+    import sys
+
+    from .agent import serve_agent
+
+    if detach:
+        cmd: list[str] = [
+            sys.executable,
+            sys.argv[0],
+            "transmission",
+            "agent",
+            "start",
+            "--cache-ttl",
+            str(cache_ttl),
+        ]
+        if socket_path:
+            cmd += ["--socket", socket_path]
+
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        log.info(f"Started agent in the background (pid {proc.pid})")
+
+        return proc.pid
+
+    serve_agent(Path(socket_path) if socket_path else None, cache_ttl=cache_ttl)
+
+
+@agent_app.command(name="stop", help="Stop a running agent.")
+def stop_agent(
+    socket_path: t.Annotated[
+        str, Parameter(["--socket"], show_default=True, help="Agent unix socket.")
+    ]
+    | None = None,
+):
+    from .agent import stop_agent as _stop_agent
+
+    stopped: bool = _stop_agent(Path(socket_path) if socket_path else None)
+
+    if stopped:
+        log.info("Agent stopped.")
+    else:
+        log.info("No agent running.")
+
+    return stopped
+
+
+@agent_app.command(name="status", help="Show whether the agent is running.")
+def agent_status(
+    socket_path: t.Annotated[
+        str, Parameter(["--socket"], show_default=True, help="Agent unix socket.")
+    ]
+    | None = None,
+):
+    from .agent import get_agent_socket_path, ping_agent
+
+    _socket_path: Path = Path(socket_path) if socket_path else get_agent_socket_path()
+    status: dict | None = ping_agent(_socket_path)
+
+    if status is None:
+        log.info(f"No agent running on '{_socket_path}'.")
+        return None
+
+    result: dict = status.get("result", {})
+    log.info(
+        f"Agent running on '{_socket_path}' (pid {result.get('pid')}, {result.get('requests')} request(s) served, {result.get('controllers')} warm controller(s))."
+    )
+
+    return result
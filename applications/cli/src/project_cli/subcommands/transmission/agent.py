@@ -0,0 +1,350 @@
+"""Opt-in local agent that runs CLI commands in a long-lived process.
+
+The agent keeps warm `TransmissionRPCController`s (with a short-lived torrent cache)
+for every host it has talked to, and listens on a unix socket. When the agent is
+running, CLI commands are forwarded to it with `dispatch()`, skipping interpreter
+startup, imports, config parsing & the RPC session handshake. When it is not
+running (or forwarding is disabled with `TRANSMISSION_AGENT=0`), commands run
+in-process as usual.
+
+Messages are msgpack-encoded, each prefixed with its length as a 4-byte big-endian
+unsigned int.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import os
+from pathlib import Path
+import socket
+import socketserver
+import struct
+import sys
+import tempfile
+import threading
+import typing as t
+
+from loguru import logger as log
+import msgpack
+
+__all__ = [
+    "AgentError",
+    "get_agent_socket_path",
+    "dispatch",
+    "ping_agent",
+    "stop_agent",
+    "serve_agent",
+]
+
+## Methods in .methods that may be forwarded to the agent
+AGENT_METHODS: list[str] = [
+    "test_connection",
+    "count",
+    "delete",
+    "_list",
+    "bulk_action",
+    "set_properties",
+    "prune",
+    "search",
+    "metrics",
+]
+## Seconds to wait for the agent to answer a request
+AGENT_TIMEOUT: float = 300.0
+## Default seconds a fetched torrent list is reused by the agent's controllers
+AGENT_CACHE_TTL: float = 5.0
+## Environment variables with this prefix are sent along with forwarded commands
+FORWARDED_ENV_PREFIX: str = "TRANSMISSION_RPC_"
+## Other environment variables sent along with forwarded commands
+FORWARDED_ENV_VARS: list[str] = [
+    "TRANSMISSION_JOURNAL_DIR",
+    "TRANSMISSION_JOURNAL_RETENTION",
+]
+
+_HEADER = struct.Struct(">I")
+
+
+class AgentError(Exception):
+    """Raised when the agent could not run a forwarded command."""
+
+
+def get_agent_socket_path() -> Path:
+    """Return the agent socket path.
+
+    Uses `$TRANSMISSION_AGENT_SOCKET` if set, otherwise a per-user path in
+    `$XDG_RUNTIME_DIR` (or the system temp dir).
+    """
+    if os.environ.get("TRANSMISSION_AGENT_SOCKET"):
+        return Path(os.environ["TRANSMISSION_AGENT_SOCKET"])
+
+    runtime_dir: str = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+
+    return Path(runtime_dir) / f"transmission_scripts-{os.getuid()}" / "agent.sock"
+
+
+def _send_msg(sock: socket.socket, payload: dict) -> None:
+    data: bytes = msgpack.packb(payload, default=_encode, use_bin_type=True)
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk: bytes = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("Agent connection closed mid-message")
+        buf += chunk
+
+    return bytes(buf)
+
+
+def _recv_msg(sock: socket.socket) -> dict:
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+
+    return msgpack.unpackb(_recv_exact(sock, size), raw=False)
+
+
+def _encode(obj: t.Any) -> t.Any:
+    """Fallback msgpack encoder for command results."""
+    ## transmission_rpc.Torrent & friends are sent as their raw RPC fields
+    if hasattr(obj, "fields") and isinstance(obj.fields, dict):
+        return obj.fields
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+
+    return str(obj)
+
+
+def _request(
+    payload: dict, socket_path: Path | None = None, timeout: float = AGENT_TIMEOUT
+) -> dict:
+    """Send a request to the agent & return its response.
+
+    Raises:
+        ConnectionError|FileNotFoundError|socket.timeout: If the agent could not be reached. Nothing was sent.
+        AgentError: If the connection failed once the request was being sent. The agent may have run it.
+
+    """
+    socket_path = socket_path or get_agent_socket_path()
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+
+        try:
+            _send_msg(sock, payload)
+
+            return _recv_msg(sock)
+        except OSError as exc:
+            raise AgentError(
+                f"Lost the agent connection during '{payload.get('method')}', it may have run. Details: {exc}"
+            ) from exc
+
+
+def _forwarded_env() -> dict[str, str]:
+    """Environment variables that change how a command runs (i.e. --rpc-* overrides, --journal-dir)."""
+    return {
+        k: v
+        for k, v in os.environ.items()
+        if k.startswith(FORWARDED_ENV_PREFIX) or k in FORWARDED_ENV_VARS
+    }
+
+
+def _agent_enabled() -> bool:
+    return os.environ.get("TRANSMISSION_AGENT", "1").lower() not in ("0", "false", "no")
+
+
+def dispatch(method: str, forward: bool = True, **kwargs: t.Any) -> t.Any:
+    """Run a function from `.methods`, on the agent if it is running.
+
+    Params:
+        method (str): Name of the function in `.methods`.
+        forward (bool): If `False`, always run in-process (i.e. for long-running commands).
+        kwargs: Arguments for the function.
+
+    Returns:
+        (Any): The function's return value. Results from the agent are plain data,
+            i.e. torrents are returned as dicts of their raw RPC fields.
+
+    """
+    socket_path: Path = get_agent_socket_path()
+
+    if (
+        forward
+        and method in AGENT_METHODS
+        and _agent_enabled()
+        and socket_path.exists()
+    ):
+        try:
+            response: dict = _request(
+                {
+                    "method": method,
+                    "kwargs": kwargs,
+                    "cwd": os.getcwd(),
+                    "env": _forwarded_env(),
+                },
+                socket_path,
+            )
+        except (ConnectionError, FileNotFoundError, socket.timeout) as exc:
+            ## Only raised before the request is sent, so running in-process can't run a command twice
+            log.debug(
+                f"Agent unavailable, running '{method}' in-process. Details: {exc}"
+            )
+        else:
+            ## Replay the agent's output as if the command ran here
+            for level, message in response.get("logs", []):
+                log.log(level, message)
+            if response.get("stdout"):
+                sys.stdout.write(response["stdout"])
+
+            if not response.get("ok"):
+                raise AgentError(response.get("error", "Unknown agent error"))
+
+            return response.get("result")
+
+    from . import methods
+
+    return getattr(methods, method)(**kwargs)
+
+
+def ping_agent(socket_path: Path | None = None) -> dict | None:
+    """Return the agent's status, or `None` if it is not running."""
+    try:
+        return _request({"method": "__status__"}, socket_path, timeout=5.0)
+    except (ConnectionError, FileNotFoundError, socket.timeout, AgentError):
+        return None
+
+
+def stop_agent(socket_path: Path | None = None) -> bool:
+    """Ask a running agent to shut down. Returns `False` if no agent was running."""
+    try:
+        _request({"method": "__shutdown__"}, socket_path, timeout=5.0)
+    except (ConnectionError, FileNotFoundError, socket.timeout, AgentError):
+        return False
+
+    return True
+
+
+class _AgentRequestHandler(socketserver.BaseRequestHandler):
+    server: _AgentServer
+
+    def handle(self) -> None:
+        try:
+            request: dict = _recv_msg(self.request)
+        except Exception as exc:
+            log.error(f"({type(exc)}) Error reading agent request. Details: {exc}")
+            return
+
+        method: str = request.get("method", "")
+
+        if method == "__status__":
+            response = {
+                "ok": True,
+                "result": {
+                    "pid": os.getpid(),
+                    "requests": self.server.requests_served,
+                    "controllers": len(self.server.methods.CONTROLLER_CACHE or {}),
+                },
+            }
+        elif method == "__shutdown__":
+            response = {"ok": True, "result": None}
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        elif method not in AGENT_METHODS:
+            response = {"ok": False, "error": f"Unknown agent method: '{method}'"}
+        else:
+            response = self.server.run_method(
+                method,
+                request.get("kwargs", {}),
+                request.get("cwd"),
+                request.get("env", {}),
+            )
+
+        _send_msg(self.request, response)
+
+
+class _AgentServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, cache_ttl: float) -> None:
+        from . import methods
+
+        self.methods = methods
+        self.methods.enable_controller_cache(cache_ttl=cache_ttl)
+        self.requests_served: int = 0
+        ## Commands chdir & capture stdout/logs, so they run one at a time
+        self._run_lock = threading.Lock()
+
+        super().__init__(str(socket_path), _AgentRequestHandler)
+
+    def run_method(
+        self, method: str, kwargs: dict, cwd: str | None, env: dict[str, str]
+    ) -> dict:
+        logs: list[tuple[str, str]] = []
+        stdout = io.StringIO()
+
+        with self._run_lock:
+            self.requests_served += 1
+            sink_id: int = log.add(
+                lambda msg: logs.append(
+                    (msg.record["level"].name, msg.record["message"])
+                ),
+                level="DEBUG",
+                format="{message}",
+            )
+            prev_cwd: str = os.getcwd()
+            ## Use the client's overrides, not ones left over from a previous command
+            prev_env: dict[str, str] = _forwarded_env()
+            for k in prev_env:
+                del os.environ[k]
+            os.environ.update(env)
+            try:
+                if cwd:
+                    os.chdir(cwd)
+                with contextlib.redirect_stdout(stdout):
+                    result = getattr(self.methods, method)(**kwargs)
+
+                response = {"ok": True, "result": result}
+            except Exception as exc:
+                response = {"ok": False, "error": f"({type(exc).__name__}) {exc}"}
+            finally:
+                os.chdir(prev_cwd)
+                for k in env:
+                    os.environ.pop(k, None)
+                os.environ.update(prev_env)
+                log.remove(sink_id)
+
+        response["logs"] = logs
+        response["stdout"] = stdout.getvalue()
+
+        return response
+
+
+def serve_agent(
+    socket_path: Path | None = None, cache_ttl: float = AGENT_CACHE_TTL
+) -> None:
+    """Run the agent in the foreground until stopped."""
+    socket_path = socket_path or get_agent_socket_path()
+
+    if socket_path.exists():
+        if ping_agent(socket_path) is not None:
+            raise AgentError(f"An agent is already listening on '{socket_path}'")
+
+        log.debug(f"Removing stale agent socket '{socket_path}'")
+        socket_path.unlink()
+
+    socket_path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+
+    server = _AgentServer(socket_path, cache_ttl=cache_ttl)
+    os.chmod(socket_path, 0o600)
+    log.info(f"Transmission agent listening on '{socket_path}' (pid {os.getpid()})")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path.exists():
+            socket_path.unlink()
+
+        log.info("Transmission agent stopped")
@@ -1,9 +1,144 @@
-from loguru import logger as log
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+import dataclasses
+import datetime
+import json
+import os
+from pathlib import Path
+import sys
+import time
+import typing as t
 
+from loguru import logger as log
 import transmission_lib
-import transmission_rpc
 
-__all__ = ["return_controller", "test_connection", "count", "delete", "_list"]
+if t.TYPE_CHECKING:
+    import transmission_rpc
+
+__all__ = [
+    "enable_controller_cache",
+    "return_controller",
+    "return_controllers",
+    "test_connection",
+    "count",
+    "delete",
+    "_list",
+    "export",
+    "bulk_action",
+    "verify_local",
+    "set_properties",
+    "relocate",
+    "prune",
+    "policy_run",
+    "policy_check",
+    "duplicates",
+    "search",
+    "orphans",
+    "torrent_index",
+    "add",
+    "watch_folder",
+    "watch",
+    "hooks_run",
+    "hooks_check",
+    "journal_list",
+    "journal_show",
+    "journal_resume",
+    "journal_prune",
+    "metrics",
+    "proxy",
+]
+
+## Warm controllers, keyed by connection settings. Only enabled in long-lived
+#  processes (i.e. the agent), see enable_controller_cache().
+CONTROLLER_CACHE: dict[tuple, transmission_lib.TransmissionRPCController] | None = None
+## Seconds cached controllers reuse a fetched torrent list
+CONTROLLER_CACHE_TTL: float = 0
+## Parsed config files, keyed by (absolute path, mtime)
+_SETTINGS_CACHE: dict[tuple[str, float], dict] = {}
+## Environment variables that override RPC settings from config files, set by the
+#  CLI's --rpc-* session parameters: {env var: (settings field, type)}
+RPC_OVERRIDE_ENV: dict[str, tuple[str, type]] = {
+    "TRANSMISSION_RPC_TIMEOUT": ("timeout", float),
+    "TRANSMISSION_RPC_RETRIES": ("retries", int),
+    "TRANSMISSION_RPC_DEADLINE": ("deadline", float),
+}
+
+
+def enable_controller_cache(cache_ttl: float = 5.0) -> None:
+    """Reuse controllers (and their RPC sessions) across calls in this process.
+
+    Params:
+        cache_ttl (float): Seconds each controller reuses a fetched torrent list.
+    """
+    global CONTROLLER_CACHE, CONTROLLER_CACHE_TTL
+
+    CONTROLLER_CACHE = {}
+    CONTROLLER_CACHE_TTL = cache_ttl
+
+
+def _load_hosts(
+    config_file: str,
+) -> dict[str, transmission_lib.TransmissionClientSettings]:
+    if CONTROLLER_CACHE is None:
+        return transmission_lib.get_transmission_hosts(config_file)
+
+    key: tuple[str, float] = (
+        os.path.abspath(config_file),
+        os.path.getmtime(config_file),
+    )
+    if key not in _SETTINGS_CACHE:
+        _SETTINGS_CACHE[key] = transmission_lib.get_transmission_hosts(config_file)
+
+    return _SETTINGS_CACHE[key]
+
+
+def _apply_rpc_overrides(
+    transmission_settings: transmission_lib.TransmissionClientSettings,
+) -> transmission_lib.TransmissionClientSettings:
+    overrides: dict[str, t.Any] = {
+        field_name: field_type(os.environ[env_var])
+        for env_var, (field_name, field_type) in RPC_OVERRIDE_ENV.items()
+        if os.environ.get(env_var)
+    }
+    if not overrides:
+        return transmission_settings
+
+    log.debug(f"Overriding RPC settings: {overrides}")
+
+    return dataclasses.replace(transmission_settings, **overrides)
+
+
+def _get_controller(
+    transmission_settings: transmission_lib.TransmissionClientSettings,
+) -> transmission_lib.TransmissionRPCController:
+    transmission_settings = _apply_rpc_overrides(transmission_settings)
+
+    if CONTROLLER_CACHE is None:
+        return transmission_lib.get_transmission_controller(
+            transmission_settings=transmission_settings
+        )
+
+    key: tuple = (
+        transmission_settings.host,
+        transmission_settings.port,
+        transmission_settings.username,
+        transmission_settings.password,
+        transmission_settings.path,
+        transmission_settings.protocol,
+        transmission_settings.timeout,
+        transmission_settings.retries,
+        transmission_settings.deadline,
+    )
+    if key not in CONTROLLER_CACHE:
+        log.debug(f"Creating cached controller for host '{transmission_settings.host}'")
+        CONTROLLER_CACHE[key] = transmission_lib.get_transmission_controller(
+            transmission_settings=transmission_settings,
+            cache_ttl=CONTROLLER_CACHE_TTL,
+        )
+
+    return CONTROLLER_CACHE[key]
 
 
 def return_controller(
@@ -18,8 +153,8 @@ def return_controller(
     if config_file:
         log.debug(f"Config file: {config_file}")
 
-        transmission_settings: transmission_lib.TransmissionClientSettings = (
-            transmission_lib.get_transmission_settings(config_file)
+        transmission_settings: transmission_lib.TransmissionClientSettings = next(
+            iter(_load_hosts(config_file).values())
         )
     else:
         transmission_settings: transmission_lib.TransmissionClientSettings = (
@@ -34,14 +169,61 @@ def return_controller(
         )
 
     transmission_controller: transmission_lib.TransmissionRPCController = (
-        transmission_lib.get_transmission_controller(
-            transmission_settings=transmission_settings
-        )
+        _get_controller(transmission_settings)
     )
 
     return transmission_controller
 
 
+def return_controllers(
+    config_file: str,
+    host: str,
+    port: int,
+    username: str,
+    password: str,
+    protocol: str,
+    path: str,
+) -> dict[str, transmission_lib.TransmissionRPCController]:
+    """Return a controller for every host in a (multi-host) config file, keyed by host name."""
+    if not config_file:
+        transmission_controller = return_controller(
+            config_file, host, port, username, password, protocol, path
+        )
+
+        return {str(transmission_controller.host): transmission_controller}
+
+    log.debug(f"Config file: {config_file}")
+    hosts: dict[str, transmission_lib.TransmissionClientSettings] = _load_hosts(
+        config_file
+    )
+
+    return {
+        name: _get_controller(transmission_settings)
+        for name, transmission_settings in hosts.items()
+    }
+
+
+def _log_operation(journal: transmission_lib.OperationJournal) -> None:
+    log.info(
+        f"Operation ID: {journal.operation_id} (resume with: transmission journal resume {journal.operation_id})"
+    )
+    ## Completed journals past their retention go when new ones are written,
+    #  so scheduled runs don't pile them up
+    transmission_lib.prune_journals()
+
+
+def _new_journal(
+    transmission_controller: transmission_lib.TransmissionRPCController,
+) -> transmission_lib.OperationJournal:
+    """Create a journal for a bulk mutation, in `$TRANSMISSION_JOURNAL_DIR` (see --journal-dir).
+
+    Nothing is written (or logged) unless the operation has torrents to act on.
+    """
+    return transmission_lib.OperationJournal.new(
+        host=str(transmission_controller.host), on_begin=_log_operation
+    )
+
+
 def test_connection(
     config_file: dict,
     host: str = "127.0.0.1",
@@ -134,6 +316,7 @@ def delete(
     status: str = "all",
     delete_data: bool = False,
     dry_run: bool = False,
+    chunk_size: int = 500,
 ) -> list[transmission_rpc.Torrent]:
     if not torrent_id:
         if (
@@ -164,23 +347,31 @@ def delete(
 
         if dry_run:
             log.info(
-                f"Dry run complete. {len(delete_torrents)} torrent(s) would have been deleted."
+                f"Dry run complete. Torrent with ID '{torrent_id}' would have been deleted."
             )
 
             return []
 
-        delete_torrents: list[transmission_rpc.Torrent] = (
-            transmission_controller.delete_torrent_by_id(
-                torrent_id=torrent_id, remove_files=delete_data
-            )
+        deleted: bool = transmission_controller.delete_torrent_by_id(
+            torrent_id=torrent_id, remove_files=delete_data
         )
 
-        return delete_torrents
+        return [torrent_id] if deleted else []
 
     log.debug(
         f"Deleting torrent(s){' with status: ' + status if not status == 'all' else ''} on host '{transmission_controller.host}'"
     )
 
+    delete_torrents: list[transmission_rpc.Torrent] = (
+        transmission_controller.delete_torrent_by_status(
+            status=status,
+            remove_files=delete_data,
+            dry_run=dry_run,
+            chunk_size=chunk_size,
+            journal=None if dry_run else _new_journal(transmission_controller),
+        )
+    )
+
     if dry_run:
         log.info(
             f"Dry run complete. {len(delete_torrents)} torrent(s) would have been deleted."
@@ -188,12 +379,6 @@ def delete(
 
         return []
 
-    delete_torrents: list[transmission_rpc.Torrent] = (
-        transmission_controller.delete_torrent_by_status(
-            status=status, remove_files=delete_data, dry_run=dry_run
-        )
-    )
-
     log.debug(
         f"Deleted {len(delete_torrents)}{f' with status: {status}' if not status == 'all' else ''} torrent(s)"
     )
@@ -210,7 +395,17 @@ def _list(
     protocol: str | None = "http",
     path: str = "/transmission/rpc",
     status: str = "all",
-) -> list[transmission_rpc.Torrent]:
+    chunk_size: int = 500,
+) -> int:
+    """Print the names of torrents, one per line, as each chunk is fetched.
+
+    Only the fields the filter & the output need are fetched, and nothing is
+    kept once printed, so memory use is bounded by `chunk_size`.
+
+    Returns:
+        (int): The number of torrents listed.
+
+    """
     if (
         not (status == "all" or status == "finished")
         and status not in transmission_lib.VALID_TORRENT_STATES
@@ -218,7 +413,7 @@ def _list(
         log.error(
             f"Invalid torrent status: {status}. Must be one of: {transmission_lib.VALID_TORRENT_STATES}"
         )
-        return []
+        return 0
 
     transmission_controller: transmission_lib.TransmissionRPCController = (
         return_controller(
@@ -236,26 +431,1627 @@ def _list(
         f"Getting torrent(s){' with status: ' + status if not status == 'all' else ''} from host '{transmission_controller.host}'"
     )
 
-    torrents: list[transmission_rpc.Torrent] = (
-        transmission_controller.get_all_torrents()
+    torrent_filter = transmission_lib.TorrentFilter(status=status)
+    fields: list[str] = sorted(set(torrent_filter.fields) | {"name"})
+
+    ## Rows are written as chunks arrive, instead of after collecting every torrent
+    listed: int = 0
+    for torrent in transmission_controller.iter_torrents(
+        fields=fields, chunk_size=chunk_size
+    ):
+        if torrent_filter.matches(torrent):
+            sys.stdout.write(f"{torrent.name}\n")
+            listed += 1
+
+    if listed == 0:
+        log.info(
+            f"No torrents{' with status: ' + status if not status == 'all' else ''} found on host '{transmission_controller.host}'"
+        )
+        return 0
+
+    log.info(
+        f"Torrent(s) {listed}{f' with status: {status}' if not status == 'all' else ''} on host '{transmission_controller.host}'"
+    )
+
+    return listed
+
+
+def _json_default(obj: t.Any) -> t.Any:
+    """json.dumps() fallback for values in prepare_torrent_dict() output."""
+    if isinstance(obj, datetime.datetime):
+        return obj.isoformat()
+    if isinstance(obj, datetime.timedelta):
+        return obj.total_seconds()
+    if hasattr(obj, "fields") and isinstance(obj.fields, dict):
+        return obj.fields
+
+    return str(obj)
+
+
+def export(
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+    status: str = "all",
+    output: str = "-",
+    chunk_size: int = 500,
+    streaming: bool = False,
+) -> int:
+    """Write torrents as newline-delimited JSON (one prepare_torrent_dict() per line).
+
+    With `streaming`, all torrents are fetched in a single request whose response
+    is decoded as it arrives, instead of in chunks of `chunk_size`.
+
+    Returns:
+        (int): The number of exported torrents.
+
+    """
+    if (
+        not (status == "all" or status == "finished")
+        and status not in transmission_lib.VALID_TORRENT_STATES
+    ):
+        log.error(
+            f"Invalid torrent status: {status}. Must be one of: {transmission_lib.VALID_TORRENT_STATES}"
+        )
+        return 0
+
+    transmission_controller: transmission_lib.TransmissionRPCController = (
+        return_controller(
+            config_file,
+            host,
+            port,
+            username,
+            password,
+            protocol,
+            path,
+        )
+    )
+
+    log.debug(
+        f"Exporting torrent(s){' with status: ' + status if not status == 'all' else ''} from host '{transmission_controller.host}' to '{output}'"
+    )
+
+    matches = transmission_lib.TorrentFilter(status=status).matches
+    exported: int = 0
+
+    torrents: t.Iterator[transmission_rpc.Torrent] = (
+        transmission_controller.stream_torrents()
+        if streaming
+        else transmission_controller.iter_torrents(chunk_size=chunk_size)
+    )
+
+    with contextlib.ExitStack() as stack:
+        if output == "-":
+            f: t.TextIO = sys.stdout
+        else:
+            Path(output).parent.mkdir(parents=True, exist_ok=True)
+            f = stack.enter_context(open(output, "w", encoding="utf-8"))
+
+        for torrent in torrents:
+            if not matches(torrent):
+                continue
+
+            try:
+                torrent_dict: dict = transmission_lib.prepare_torrent_dict(torrent)
+                ## transmission_rpc.File is a NamedTuple, export files as objects
+                torrent_dict["files"] = [f._asdict() for f in torrent_dict["files"]]
+            except Exception as exc:
+                log.warning(
+                    f"Could not prepare torrent '{torrent.id}', exporting its raw fields. Details: {exc}"
+                )
+                torrent_dict = torrent.fields
+
+            f.write(json.dumps(torrent_dict, default=_json_default) + "\n")
+            exported += 1
+
+    log.info(f"Exported {exported} torrent(s)")
+
+    return exported
+
+
+## {action: (controller method, predicate for torrents the action applies to)}
+BULK_ACTIONS: dict[str, tuple[str, t.Callable[[transmission_rpc.Torrent], bool]]] = {
+    "start": ("start_torrents", lambda torrent: torrent.status == "stopped"),
+    "stop": ("stop_torrents", lambda torrent: torrent.status != "stopped"),
+    "verify": ("verify_torrents", lambda torrent: True),
+    "reannounce": ("reannounce_torrents", lambda torrent: torrent.status != "stopped"),
+}
+
+
+def bulk_action(
+    action: str,
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+    status: str = "all",
+    where: list[str] | None = None,
+    torrent_ids: list[int] | None = None,
+    dry_run: bool = False,
+    batch_size: int = 5000,
+    bypass_queue: bool = False,
+) -> list[int]:
+    """Start, stop, verify or reannounce the torrents matching a filter, in batched RPCs.
+
+    Returns:
+        (list[int]): IDs of the torrents the action was sent for (or would be, on a dry run).
+
+    """
+    if action not in BULK_ACTIONS:
+        raise ValueError(
+            f"Invalid action: {action}. Must be one of: {list(BULK_ACTIONS)}"
+        )
+    controller_method, applies_to = BULK_ACTIONS[action]
+
+    torrent_filter = transmission_lib.TorrentFilter(
+        status=status, where=where or [], ids=torrent_ids or []
+    )
+
+    transmission_controller: transmission_lib.TransmissionRPCController = (
+        return_controller(
+            config_file,
+            host,
+            port,
+            username,
+            password,
+            protocol,
+            path,
+        )
     )
 
-    if not status == "all":
-        filtered_torrents = [t for t in torrents if t.status == status]
-        torrents = filtered_torrents
+    ## Skip torrents the action would be a no-op for, i.e. stopping stopped torrents
+    torrents: list[transmission_rpc.Torrent] = [
+        torrent
+        for torrent in transmission_lib.select_torrents(
+            transmission_controller, torrent_filter, fields=["name", "status"]
+        )
+        if applies_to(torrent)
+    ]
+
+    if not torrents:
+        log.info(f"No torrents to {action} on host '{transmission_controller.host}'")
+        return []
 
-    if status == "finished":
-        filtered_torrents = [t for t in torrents if t.done_date]
-        torrents = filtered_torrents
+    ids: list[int] = [t.id for t in torrents]
 
-    if len(torrents) == 0:
+    if dry_run:
         log.info(
-            f"No torrents{ ' with status: ' + status if not status == 'all' else ''} found on host '{transmission_controller.host}'"
+            f"Dry run complete. {len(ids)} torrent(s) would have been sent '{action}': {[t.name for t in torrents]}"
+        )
+        return ids
+
+    log.info(
+        f"Sending '{action}' for {len(ids)} torrent(s) on host '{transmission_controller.host}'"
+    )
+
+    def _progress(done: int, total: int) -> None:
+        log.info(f"[{action}] {done}/{total} torrent(s)")
+
+    kwargs: dict[str, t.Any] = (
+        {"bypass_queue": bypass_queue} if action == "start" else {}
+    )
+    ## Journaled by hash, torrent IDs change if the daemon restarts before a resume
+    getattr(transmission_controller, controller_method)(
+        [t.hashString for t in torrents],
+        batch_size=batch_size,
+        on_batch=_progress,
+        journal=_new_journal(transmission_controller),
+        **kwargs,
+    )
+
+    return ids
+
+
+def verify_local(
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+    status: str = "all",
+    where: list[str] | None = None,
+    torrent_ids: list[int] | None = None,
+    workers: int | None = None,
+    path_map: list[str] | None = None,
+) -> list[dict[str, t.Any]]:
+    """Verify the data of torrents matching a filter on this machine, against the piece hashes in their .torrent files.
+
+    The daemon is only asked for the torrents' `.torrent` file paths & download dirs,
+    which must be mounted here (at the same paths, or mapped with `path_map`).
+
+    Returns:
+        (list[dict]): A result per torrent.
+
+    """
+    torrent_filter = transmission_lib.TorrentFilter(
+        status=status, where=where or [], ids=torrent_ids or []
+    )
+
+    transmission_controller: transmission_lib.TransmissionRPCController = (
+        return_controller(
+            config_file,
+            host,
+            port,
+            username,
+            password,
+            protocol,
+            path,
         )
+    )
+
+    torrents: list[transmission_rpc.Torrent] = list(
+        transmission_lib.select_torrents(
+            transmission_controller,
+            torrent_filter,
+            fields=transmission_lib.VERIFY_FIELDS,
+        )
+    )
+    if not torrents:
+        log.info(f"No torrents to verify on host '{transmission_controller.host}'")
         return []
 
+    results: list[dict[str, t.Any]] = []
+    with transmission_lib.PieceVerifier(
+        workers=workers, path_map=transmission_lib.parse_path_map(path_map or [])
+    ) as verifier:
+        for torrent in torrents:
+            result: transmission_lib.VerifyResult = verifier.verify_torrent(torrent)
+
+            if result.error is not None:
+                log.error(f"[{torrent.id}] {result.name}: {result.error}")
+            elif result.ok:
+                log.info(
+                    f"[{torrent.id}] {result.name}: OK ({result.pieces} pieces, {result.bytes / 1024**2 / max(result.seconds, 1e-9):.0f} MiB/s)"
+                )
+            else:
+                log.warning(
+                    f"[{torrent.id}] {result.name}: {result.percent_done:.2f}% valid, {len(result.bad_pieces)}/{result.pieces} bad piece(s)"
+                    + (
+                        f", {len(result.missing_files)} missing file(s)"
+                        if result.missing_files
+                        else ""
+                    )
+                )
+
+            results.append(
+                {
+                    "id": torrent.id,
+                    **dataclasses.asdict(result),
+                    "ok": result.ok,
+                    "percent_done": result.percent_done,
+                }
+            )
+
+    failed: int = sum(not result["ok"] for result in results)
+    log.info(
+        f"Verified {len(results)} torrent(s) locally, {failed} with bad or missing data"
+    )
+
+    return results
+
+
+def set_properties(
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+    status: str = "all",
+    where: list[str] | None = None,
+    torrent_ids: list[int] | None = None,
+    dry_run: bool = False,
+    batch_size: int = 5000,
+    upload_limit: int | None = None,
+    download_limit: int | None = None,
+    seed_ratio: str | None = None,
+    seed_idle: str | None = None,
+    queue_position: int | None = None,
+    peer_limit: int | None = None,
+    labels: list[str] | None = None,
+    add_labels: list[str] | None = None,
+    remove_labels: list[str] | None = None,
+) -> int:
+    """Change properties of the torrents matching a filter, with one RPC per distinct change.
+
+    Returns:
+        (int): The number of torrents changed (or that would be, on a dry run).
+
+    """
+    change = transmission_lib.TorrentChange(
+        upload_limit=upload_limit,
+        download_limit=download_limit,
+        seed_ratio=seed_ratio,
+        seed_idle=seed_idle,
+        queue_position=queue_position,
+        peer_limit=peer_limit,
+        labels=labels,
+        add_labels=add_labels or [],
+        remove_labels=remove_labels or [],
+    )
+    torrent_filter = transmission_lib.TorrentFilter(
+        status=status, where=where or [], ids=torrent_ids or []
+    )
+
+    transmission_controller: transmission_lib.TransmissionRPCController = (
+        return_controller(
+            config_file,
+            host,
+            port,
+            username,
+            password,
+            protocol,
+            path,
+        )
+    )
+
+    torrents: list[transmission_rpc.Torrent] = transmission_lib.select_torrents(
+        transmission_controller, torrent_filter, fields=change.fields
+    )
+    plan: list[tuple[dict, list[int]]] = transmission_lib.plan_changes(torrents, change)
+    num_changed: int = sum(len(ids) for _, ids in plan)
+    hashes: dict[int, str] = {t.id: t.hashString for t in torrents}
+
     log.info(
-        f"Torrent(s) {len(torrents)}{f' with status: {status}' if not status == 'all' else ''}: {[t.name for t in torrents]}"
+        f"{num_changed}/{len(torrents)} matching torrent(s) need changes, in {len(plan)} request(s)"
     )
 
-    return torrents
+    for arguments, ids in plan:
+        if dry_run:
+            log.info(f"Would set {arguments} on {len(ids)} torrent(s): {ids}")
+            continue
+
+        log.info(f"Setting {arguments} on {len(ids)} torrent(s)")
+        transmission_controller.set_torrents(
+            [hashes[i] for i in ids],
+            arguments,
+            batch_size=batch_size,
+            journal=_new_journal(transmission_controller),
+        )
+
+    if dry_run:
+        log.info(f"Dry run complete. {num_changed} torrent(s) would have been changed.")
+
+    return num_changed
+
+
+def relocate(
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+    status: str = "all",
+    where: list[str] | None = None,
+    torrent_ids: list[int] | None = None,
+    destinations: list[str] | None = None,
+    headroom: str = "10G",
+    strategy: str = "pack",
+    plan_file: str = "relocation-plan.json",
+    resume: bool = False,
+    dry_run: bool = False,
+    concurrency: int = 2,
+    poll_interval: float = 2.0,
+    move_timeout: float | None = None,
+    local: bool = False,
+    copy_workers: int = 4,
+    verify_copy: bool = False,
+) -> dict[str, int]:
+    """Move the data of torrents matching a filter to destinations with enough free space.
+
+    A new plan is written to `plan_file` before any move is made. With `resume`, the
+    plan in `plan_file` is applied instead of making a new one. With `local`, files
+    are copied by this process instead of the daemon (which must run on this host).
+
+    Returns:
+        (dict[str, int]): The number of moves per state (pending on a dry run).
+
+    """
+    transmission_controller: transmission_lib.TransmissionRPCController = (
+        return_controller(
+            config_file,
+            host,
+            port,
+            username,
+            password,
+            protocol,
+            path,
+        )
+    )
+
+    copy_engine: transmission_lib.LocalCopyEngine | None = None
+    if local:
+        if not transmission_lib.is_local_host(transmission_controller.host):
+            raise ValueError(
+                f"--local needs the daemon to run on this host, '{transmission_controller.host}' is remote"
+            )
+        copy_engine = transmission_lib.LocalCopyEngine(
+            workers=copy_workers, checksum="blake2b" if verify_copy else None
+        )
+
+    if resume:
+        plan: transmission_lib.RelocationPlan = transmission_lib.RelocationPlan.load(
+            plan_file
+        )
+        if plan.host and plan.host != transmission_controller.host:
+            raise ValueError(
+                f"Plan '{plan_file}' was made for host '{plan.host}', not '{transmission_controller.host}'"
+            )
+        log.info(f"Resuming plan '{plan_file}': {plan.summary()}")
+    else:
+        if not destinations:
+            raise ValueError("At least one destination is required")
+
+        torrent_filter = transmission_lib.TorrentFilter(
+            status=status, where=where or [], ids=torrent_ids or []
+        )
+        free_space: dict[str, int] = transmission_lib.get_destination_free_space(
+            transmission_controller, destinations
+        )
+        plan = transmission_lib.plan_relocation(
+            transmission_lib.select_torrents(
+                transmission_controller,
+                torrent_filter,
+                fields=transmission_lib.RELOCATION_FIELDS,
+            ),
+            free_space,
+            headroom=int(transmission_lib.parse_size(headroom)),
+            strategy=strategy,
+            host=transmission_controller.host,
+        )
+        plan.save(plan_file)
+
+        planned: dict[str, int] = plan.planned_bytes()
+        for dest, free in free_space.items():
+            log.info(
+                f"'{dest}': {free / 1024**3:.2f} GiB free, {planned[dest] / 1024**3:.2f} GiB planned"
+            )
+        log.info(f"Planned {len(plan.moves)} move(s), written to '{plan_file}'")
+        if plan.unplaced:
+            log.warning(
+                f"{len(plan.unplaced)} torrent(s) do not fit on any destination: {[move.name for move in plan.unplaced]}"
+            )
+
+    if dry_run:
+        log.info(f"Dry run complete. Apply the plan with --resume --plan '{plan_file}'")
+        return plan.summary()
+
+    def _progress(move: transmission_lib.RelocationMove) -> None:
+        if move.state == "done":
+            log.info(f"Moved '{move.name}' to '{move.dest}'")
+        else:
+            log.error(f"Failed moving '{move.name}' to '{move.dest}': {move.error}")
+
+    transmission_lib.apply_plan(
+        transmission_controller,
+        plan,
+        plan_file=plan_file,
+        concurrency=concurrency,
+        poll_interval=poll_interval,
+        move_timeout=move_timeout,
+        on_progress=_progress,
+        copy_engine=copy_engine,
+    )
+    log.info(f"Relocation finished: {plan.summary()}")
+
+    return plan.summary()
+
+
+def prune(
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+    where: list[str] | None = None,
+    free_target: str | None = None,
+    until_free: str | None = None,
+    free_space_path: str | None = None,
+    weights: list[str] | None = None,
+    protected_labels: list[str] | None = None,
+    protected_trackers: list[str] | None = None,
+    dry_run: bool = False,
+    batch_size: int = 5000,
+) -> list[int]:
+    """Remove finished torrents & their data, lowest value first, until enough space is freed.
+
+    Give either `free_target` (bytes to free, e.g. `500G`) or `until_free` (free space
+    to reach on `free_space_path`, by default the daemon's download dir).
+
+    Returns:
+        (list[int]): IDs of the removed torrents (or that would be, on a dry run).
+
+    """
+    if (free_target is None) == (until_free is None):
+        raise ValueError("Give exactly one of --free-target or --until-free")
+
+    retention_weights = transmission_lib.RetentionWeights.parse(weights or [])
+    torrent_filter = transmission_lib.TorrentFilter(
+        status="finished", where=where or []
+    )
+
+    transmission_controller: transmission_lib.TransmissionRPCController = (
+        return_controller(
+            config_file,
+            host,
+            port,
+            username,
+            password,
+            protocol,
+            path,
+        )
+    )
+
+    if free_target is not None:
+        target: int = int(transmission_lib.parse_size(free_target))
+    else:
+        if free_space_path is None:
+            session: dict = transmission_controller.raw_request(
+                "session-get", {"fields": ["download-dir"]}
+            )
+            free_space_path = session["arguments"]["download-dir"]
+
+        free: int = transmission_controller.get_free_space(free_space_path)
+        target = max(0, int(transmission_lib.parse_size(until_free)) - free)
+        log.info(
+            f"'{free_space_path}' has {free / 1024**3:.2f} GiB free, {target / 1024**3:.2f} GiB to free"
+        )
+
+    if target == 0:
+        log.info("Nothing to free")
+        return []
+
+    plan: transmission_lib.RetentionPlan = transmission_lib.plan_retention(
+        transmission_lib.select_torrents(
+            transmission_controller,
+            torrent_filter,
+            fields=transmission_lib.RETENTION_FIELDS,
+        ),
+        target,
+        weights=retention_weights,
+        protected_labels=protected_labels,
+        protected_trackers=protected_trackers,
+    )
+
+    for candidate in plan.selected:
+        log.info(
+            f"[score {candidate.score:.2f}] {candidate.name} ({candidate.size / 1024**3:.2f} GiB, "
+            + ", ".join(
+                f"{term} {value:.1f}" for term, value in candidate.terms.items()
+            )
+            + ")"
+        )
+    log.info(
+        f"Selected {len(plan.selected)}/{plan.candidates} candidate(s) ({plan.protected} protected), freeing {plan.freed / 1024**3:.2f}/{target / 1024**3:.2f} GiB"
+    )
+    if not plan.reached:
+        log.warning("Removing every candidate does not reach the target")
+
+    ids: list[int] = [candidate.id for candidate in plan.selected]
+
+    if dry_run or not ids:
+        if dry_run:
+            log.info(
+                f"Dry run complete. {len(ids)} torrent(s) would have been removed."
+            )
+        return ids
+
+    def _progress(done: int, total: int) -> None:
+        log.info(f"[prune] {done}/{total} torrent(s)")
+
+    transmission_controller.remove_torrents(
+        [candidate.hash for candidate in plan.selected],
+        delete_data=True,
+        batch_size=batch_size,
+        on_batch=_progress,
+        journal=_new_journal(transmission_controller),
+    )
+
+    return ids
+
+
+def _select_hosts(
+    config_file: str,
+    host: str,
+    port: int,
+    username: str | None,
+    password: str | None,
+    protocol: str | None,
+    path: str,
+    hosts: list[str] | None,
+) -> dict[str, transmission_lib.TransmissionRPCController]:
+    controllers: dict[str, transmission_lib.TransmissionRPCController] = (
+        return_controllers(config_file, host, port, username, password, protocol, path)
+    )
+    if hosts:
+        unknown: set[str] = set(hosts) - set(controllers)
+        if unknown:
+            raise ValueError(
+                f"Unknown host(s): {sorted(unknown)}. Config has: {list(controllers)}"
+            )
+        controllers = {name: c for name, c in controllers.items() if name in hosts}
+
+    return controllers
+
+
+def policy_run(
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+    policy_file: str = "configs/policy.json",
+    hosts: list[str] | None = None,
+    state_file: str = "policy-state.json",
+    audit_log: str = "policy-audit.ndjson",
+    dry_run: bool = False,
+    interval: str | None = None,
+    batch_size: int = 5000,
+    chunk_size: int = 500,
+) -> dict[str, dict[str, int]]:
+    """Evaluate a cleanup policy on every host in the config & apply it.
+
+    With `interval` (e.g. `15m`), keep evaluating the policy on that schedule.
+
+    Returns:
+        (dict[str, dict[str, int]]): Torrents acted on per rule, per host, in the last evaluation.
+
+    """
+    policy: transmission_lib.Policy = transmission_lib.Policy.load(policy_file)
+    controllers: dict[str, transmission_lib.TransmissionRPCController] = _select_hosts(
+        config_file, host, port, username, password, protocol, path, hosts
+    )
+    state = transmission_lib.PolicyState(state_file)
+    audit = transmission_lib.AuditLog(audit_log)
+    seconds: float | None = (
+        transmission_lib.parse_duration(interval) if interval else None
+    )
+
+    def _run_host(name: str) -> dict[str, int]:
+        decisions: list[transmission_lib.PolicyDecision] = transmission_lib.run_policy(
+            controllers[name],
+            policy,
+            name,
+            state=state,
+            audit=audit,
+            dry_run=dry_run,
+            batch_size=batch_size,
+            chunk_size=chunk_size,
+        )
+
+        result: dict[str, int] = {}
+        for decision in decisions:
+            rule: transmission_lib.PolicyRule = decision.rule
+            log.info(
+                f"[{name}] {rule.name}: {decision.matched} matched, {decision.waiting} in grace period, "
+                f"{'would ' if dry_run else ''}{rule.action} {len(decision.ids)}"
+            )
+            result[rule.name] = len(decision.ids)
+
+        return result
+
+    while True:
+        if not dry_run:
+            ## Actions are journaled, drop completed journals past their retention
+            transmission_lib.prune_journals()
+
+        results: dict[str, dict[str, int]] = {}
+        ## Hosts are independent, evaluate them concurrently
+        with ThreadPoolExecutor(max_workers=max(1, len(controllers))) as pool:
+            futures = {name: pool.submit(_run_host, name) for name in controllers}
+            for name, future in futures.items():
+                try:
+                    results[name] = future.result()
+                except Exception as exc:
+                    log.error(f"Error evaluating policy on host '{name}': {exc}")
+
+        if seconds is None:
+            return results
+
+        log.info(f"Next evaluation in {interval}")
+        time.sleep(seconds)
+
+
+def policy_check(
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+    policy_file: str = "configs/policy.json",
+) -> dict[str, list[str]]:
+    """Validate a policy file & show the rules that apply to each host in the config.
+
+    Returns:
+        (dict[str, list[str]]): Rule names per host.
+
+    """
+    policy: transmission_lib.Policy = transmission_lib.Policy.load(policy_file)
+
+    if config_file:
+        names: list[str] = list(_load_hosts(config_file))
+    else:
+        names = [host]
+
+    rules: dict[str, list[str]] = {}
+    for name in names:
+        rules[name] = [rule.name for rule in policy.rules_for(name)]
+        log.info(f"[{name}] {len(rules[name])} rule(s):")
+        for rule in policy.rules_for(name):
+            log.info(
+                f"  {rule.name}: {rule.action} status={rule.status} where={rule.where}"
+                + (f" grace={rule.grace}" if rule.grace else "")
+            )
+
+    return rules
+
+
+def duplicates(
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+    hosts: list[str] | None = None,
+    prefer: list[str] | None = None,
+    fuzzy: bool = True,
+    size_tolerance: float = 0.01,
+    resolve: bool = False,
+    include_fuzzy: bool = False,
+    delete_data: bool = False,
+    dry_run: bool = False,
+    batch_size: int = 5000,
+) -> list[dict[str, t.Any]]:
+    """Find torrents on more than one host in the config, and optionally remove the extra copies.
+
+    Returns:
+        (list[dict]): The duplicate groups, with the copy kept & the copies to remove.
+
+    """
+    controllers: dict[str, transmission_lib.TransmissionRPCController] = _select_hosts(
+        config_file, host, port, username, password, protocol, path, hosts
+    )
+    unknown: set[str] = set(prefer or []) - set(controllers)
+    if unknown:
+        raise ValueError(
+            f"Unknown preferred host(s): {sorted(unknown)}. Config has: {list(controllers)}"
+        )
+
+    started: float = time.perf_counter()
+    torrents, errors = transmission_lib.fetch_host_torrents(controllers)
+    if errors and resolve:
+        ## A copy on an unreachable host could be the only other one
+        raise RuntimeError(
+            f"Not resolving duplicates, could not fetch host(s): {sorted(errors)}"
+        )
+
+    groups: list[transmission_lib.DuplicateGroup] = transmission_lib.find_duplicates(
+        torrents, preferred=prefer, fuzzy=fuzzy, size_tolerance=size_tolerance
+    )
+    log.info(
+        f"Indexed {sum(len(v) for v in torrents.values())} torrent(s) on {len(torrents)} host(s) in {time.perf_counter() - started:.2f}s"
+    )
+
+    for group in groups:
+        others: str = ", ".join(
+            f"'{copy.host}'" + (f" ({copy.name})" if group.kind == "fuzzy" else "")
+            for copy in group.remove
+        )
+        log.info(
+            f"[{group.kind}] {group.keep.name}: keep on '{group.keep.host}', duplicated on {others} ({group.wasted / 1024**3:.2f} GiB)"
+        )
+
+    num_hash: int = sum(1 for group in groups if group.kind == "hash")
+    log.info(
+        f"{num_hash} torrent(s) with exact duplicates ({sum(g.wasted for g in groups if g.kind == 'hash') / 1024**3:.2f} GiB), "
+        f"{len(groups) - num_hash} fuzzy match(es) ({sum(g.wasted for g in groups if g.kind == 'fuzzy') / 1024**3:.2f} GiB)"
+    )
+
+    if resolve:
+        removals: dict[str, list[transmission_lib.DuplicateCopy]] = (
+            transmission_lib.plan_duplicate_removals(
+                groups, include_fuzzy=include_fuzzy
+            )
+        )
+        for name, copies in removals.items():
+            if dry_run:
+                log.info(f"Would remove {len(copies)} torrent(s) from host '{name}'")
+                continue
+
+            log.info(f"Removing {len(copies)} torrent(s) from host '{name}'")
+            controllers[name].remove_torrents(
+                [copy.hash for copy in copies],
+                delete_data=delete_data,
+                batch_size=batch_size,
+                journal=_new_journal(controllers[name]),
+            )
+
+        if dry_run:
+            log.info("Dry run complete. No torrents were removed.")
+
+    return [
+        {
+            "kind": group.kind,
+            "key": group.key,
+            "keep": dataclasses.asdict(group.keep),
+            "remove": [dataclasses.asdict(copy) for copy in group.remove],
+            "wasted": group.wasted,
+        }
+        for group in groups
+    ]
+
+
+def search(
+    query: str,
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+    hosts: list[str] | None = None,
+    fuzzy: bool = False,
+    paths: bool = False,
+    limit: int = 50,
+    index_file: str = "search-index.db",
+    max_age: str = "5m",
+    offline: bool = False,
+) -> list[dict[str, t.Any]]:
+    """Search torrent names (and file paths) on every host in the config, using a persistent index.
+
+    Hosts indexed more than `max_age` ago are refreshed first (incrementally), unless `offline`.
+
+    Returns:
+        (list[dict]): Matching torrents.
+
+    """
+    with transmission_lib.SearchIndex(index_file) as index:
+        if not offline:
+            controllers: dict[str, transmission_lib.TransmissionRPCController] = (
+                _select_hosts(
+                    config_file, host, port, username, password, protocol, path, hosts
+                )
+            )
+            updates: dict[str, transmission_lib.IndexUpdate] = index.refresh(
+                controllers,
+                max_age=transmission_lib.parse_duration(max_age),
+                files=paths,
+            )
+            for name, update in updates.items():
+                log.debug(
+                    f"[{name}] Index refreshed in {update.seconds:.2f}s: {update.added} added, {update.updated} updated, {update.removed} removed"
+                )
+
+        started: float = time.perf_counter()
+        hits: list[transmission_lib.SearchHit] = index.search(
+            query, hosts=hosts, fuzzy=fuzzy, paths=paths, limit=limit
+        )
+        elapsed: float = time.perf_counter() - started
+
+    for hit in hits:
+        log.info(
+            f"[{hit.host}] {hit.name} (ID {hit.id}, {hit.size / 1024**3:.2f} GiB, {hit.download_dir})"
+            + (f" score {hit.score:.2f}" if fuzzy else "")
+        )
+    log.info(f"{len(hits)} match(es) in {elapsed * 1000:.1f}ms")
+
+    return [dataclasses.asdict(hit) for hit in hits]
+
+
+def orphans(
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+    download_dirs: list[str] | None = None,
+    path_map: list[str] | None = None,
+    exclude: list[str] | None = None,
+    min_age: str = "1h",
+    workers: int = 8,
+    delete: bool = False,
+    dry_run: bool = False,
+    batch_size: int = 100,
+) -> list[dict[str, t.Any]]:
+    """Find files & directories in the host's download dirs that no torrent references, and optionally delete them.
+
+    The download dirs must be mounted on this machine, at the same paths or mapped
+    with `path_map` (`remote=local` strings). `download_dirs` are scanned in addition
+    to the torrents' download dirs, i.e. a download dir whose torrents were all removed.
+
+    Returns:
+        (list[dict]): Orphans, largest first.
+
+    """
+    mappings: dict[str, str] = transmission_lib.parse_path_map(path_map or [])
+
+    transmission_controller: transmission_lib.TransmissionRPCController = (
+        return_controller(
+            config_file,
+            host,
+            port,
+            username,
+            password,
+            protocol,
+            path,
+        )
+    )
+    if not mappings and not transmission_lib.is_local_host(
+        str(transmission_controller.host)
+    ):
+        log.warning(
+            f"Host '{transmission_controller.host}' is not this machine, its download dirs must be mounted at the same paths (or use --map)"
+        )
+
+    trie, roots = transmission_lib.build_path_trie(
+        transmission_controller, path_map=mappings
+    )
+    roots.update(
+        transmission_lib.map_path(download_dir, mappings)
+        for download_dir in download_dirs or []
+    )
+
+    report: transmission_lib.OrphanReport = transmission_lib.scan_orphans(
+        trie,
+        roots,
+        workers=workers,
+        min_age=transmission_lib.parse_duration(min_age),
+        exclude=exclude,
+    )
+
+    for orphan in report.orphans:
+        log.info(
+            f"{orphan.path}{os.sep if orphan.is_dir else ''} ({orphan.size / 1024**3:.2f} GiB"
+            + (f", {orphan.files} file(s)" if orphan.is_dir else "")
+            + ")"
+        )
+    for error in report.errors:
+        log.warning(f"Could not scan {error}")
+    log.info(
+        f"{len(report.orphans)} orphan(s), {report.size / 1024**3:.2f} GiB, in {len(report.roots)} dir(s) "
+        f"({report.scanned} entries scanned, {report.referenced} files referenced, {report.recent} recently modified skipped) in {report.seconds:.2f}s"
+    )
+
+    if delete and report.orphans:
+        if dry_run:
+            log.info(
+                f"Dry run complete. {len(report.orphans)} orphan(s) would have been deleted."
+            )
+        else:
+
+            def _progress(done: int, total: int) -> None:
+                log.info(f"[orphans] {done}/{total} deleted")
+
+            freed, errors = transmission_lib.delete_orphans(
+                report.orphans, batch_size=batch_size, on_batch=_progress
+            )
+            for error in errors:
+                log.error(f"Could not delete {error}")
+            log.info(f"Freed {freed / 1024**3:.2f} GiB")
+
+    return [dataclasses.asdict(orphan) for orphan in report.orphans]
+
+
+def torrent_index(
+    directories: list[str] | None = None,
+    index_file: str = "torrent-index.db",
+    workers: int | None = None,
+    recursive: bool = True,
+    hashes: list[str] | None = None,
+) -> dict[str, t.Any]:
+    """Catalog directories of .torrent files by info hash, and look hashes up in the catalog.
+
+    Only new & changed .torrent files are read on each scan.
+
+    Returns:
+        (dict): `scans` per directory, and `matches` (.torrent files) per looked up hash.
+
+    """
+    scans: dict[str, dict[str, t.Any]] = {}
+    matches: dict[str, list[dict[str, t.Any]]] = {}
+
+    with transmission_lib.TorrentFileIndex(index_file) as index:
+        for directory in directories or []:
+
+            def _progress(done: int, total: int) -> None:
+                log.debug(f"[{directory}] {done}/{total} .torrent file(s) read")
+
+            scan: transmission_lib.TorrentFileScan = index.scan(
+                directory, recursive=recursive, workers=workers, on_progress=_progress
+            )
+            for path, error in scan.errors.items():
+                log.warning(f"Could not read '{path}'. Details: {error}")
+            log.info(
+                f"[{directory}] {scan.scanned} .torrent file(s) in {scan.seconds:.2f}s: {scan.added} added, {scan.updated} updated, {scan.removed} removed, {len(scan.errors)} unreadable"
+            )
+            scans[directory] = dataclasses.asdict(scan)
+
+        for info_hash in hashes or []:
+            metas: list[transmission_lib.TorrentMeta] = index.lookup(info_hash)
+            if not metas:
+                log.info(f"{info_hash}: not found")
+            for meta in metas:
+                log.info(
+                    f"{info_hash}: {meta.path} ({meta.name}, {meta.size / 1024**3:.2f} GiB, {meta.files} file(s))"
+                )
+            matches[info_hash] = [dataclasses.asdict(meta) for meta in metas]
+
+        log.info(f"{len(index)} .torrent file(s) in the index")
+
+    return {"scans": scans, "matches": matches}
+
+
+def add(
+    sources: list[str],
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+    hosts: list[str] | None = None,
+    most_free_space: bool = False,
+    download_dir: str | None = None,
+    paused: bool = False,
+    labels: list[str] | None = None,
+    recursive: bool = True,
+    workers: int | None = None,
+    concurrency: int = 4,
+    batch_size: int = 100,
+    dry_run: bool = False,
+) -> dict[str, t.Any]:
+    """Add .torrent files, directories of them & magnet links, skipping torrents the host already has.
+
+    Info hashes are computed locally & checked against the host's torrents before
+    anything is sent. The host is the first in the config (or the only one in
+    `hosts`), or with `most_free_space`, the one of `hosts` (default: all) with the
+    most free space in its download dir.
+
+    Returns:
+        (dict): The chosen `host`, and the `added`, `skipped`, `existing` & `failed` sources.
+
+    """
+    sources_found, errors = transmission_lib.collect_sources(
+        sources, recursive=recursive, workers=workers
+    )
+    for source, error in errors.items():
+        log.warning(f"Could not read '{source}'. Details: {error}")
+    if not sources_found:
+        log.warning("Nothing to add")
+        return {
+            "host": None,
+            "added": [],
+            "skipped": [],
+            "existing": [],
+            "failed": errors,
+        }
+
+    controllers: dict[str, transmission_lib.TransmissionRPCController] = _select_hosts(
+        config_file, host, port, username, password, protocol, path, hosts
+    )
+    if most_free_space:
+        name, free = transmission_lib.pick_host_with_most_free_space(controllers)
+        log.info(f"Adding to '{name}', {free / 1024**3:.2f} GiB free")
+    elif hosts and len(controllers) > 1:
+        raise ValueError(
+            f"Pick a single host to add to, or use --most-free-space. Got: {list(controllers)}"
+        )
+    else:
+        name = next(iter(controllers))
+
+    transmission_controller: transmission_lib.TransmissionRPCController = controllers[
+        name
+    ]
+    existing: set[str] = transmission_lib.fetch_hashes(transmission_controller)
+    log.debug(f"'{name}' has {len(existing)} torrent(s)")
+
+    def _progress(done: int, total: int) -> None:
+        log.info(f"[{name}] {done}/{total} torrent(s) submitted")
+
+    result: transmission_lib.AddResult = transmission_lib.add_sources(
+        transmission_controller,
+        sources_found,
+        existing=existing,
+        concurrency=concurrency,
+        batch_size=batch_size,
+        download_dir=download_dir,
+        paused=paused or None,
+        labels=labels,
+        dry_run=dry_run,
+        on_batch=_progress,
+    )
+    result.failed.update(result.rejected)
+    for source, error in result.failed.items():
+        log.error(f"Could not add '{source}'. Details: {error}")
+    result.failed.update(errors)
+    size: int = sum(source.size for source in result.added)
+    if dry_run:
+        log.info(
+            f"Dry run complete. {len(result.added)} torrent(s) ({size / 1024**3:.2f} GiB) would have been added to '{name}', {len(result.skipped)} already present or duplicated"
+        )
+    else:
+        log.info(
+            f"Added {len(result.added)} torrent(s) ({size / 1024**3:.2f} GiB) to '{name}' in {result.seconds:.2f}s: "
+            f"{len(result.skipped)} skipped (already present or duplicated), {len(result.existing)} reported as duplicates, {len(result.failed)} failed"
+        )
+
+    return {
+        "host": name,
+        "added": [dataclasses.asdict(source) for source in result.added],
+        "skipped": [dataclasses.asdict(source) for source in result.skipped],
+        "existing": [dataclasses.asdict(source) for source in result.existing],
+        "failed": result.failed,
+    }
+
+
+def watch_folder(
+    directory: str,
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+    processed_dir: str | None = None,
+    failed_dir: str | None = None,
+    download_dir: str | None = None,
+    paused: bool = False,
+    labels: list[str] | None = None,
+    debounce: float = 1.0,
+    max_delay: float = 10.0,
+    batch_size: int = 500,
+    concurrency: int = 4,
+    polling: bool = False,
+    poll_interval: float = 2.0,
+    refresh_interval: str = "10m",
+) -> dict[str, int]:
+    """Add .torrent & .magnet files dropped in a folder, until interrupted.
+
+    Returns:
+        (dict): Counters of files processed.
+
+    """
+    transmission_controller: transmission_lib.TransmissionRPCController = (
+        return_controller(
+            config_file,
+            host,
+            port,
+            username,
+            password,
+            protocol,
+            path,
+        )
+    )
+
+    service = transmission_lib.WatchFolderService(
+        transmission_controller,
+        directory,
+        processed_dir=processed_dir,
+        failed_dir=failed_dir,
+        refresh_interval=transmission_lib.parse_duration(refresh_interval),
+        concurrency=concurrency,
+        download_dir=download_dir,
+        paused=paused or None,
+        labels=labels,
+        debounce=debounce,
+        max_delay=max_delay,
+        batch_size=batch_size,
+        poll_interval=poll_interval,
+        use_inotify=False if polling else None,
+    )
+
+    def _batch(result: transmission_lib.AddResult) -> None:
+        log.info(
+            f"{len(result.added)} added, {len(result.skipped) + len(result.existing)} skipped, "
+            f"{len(result.rejected)} rejected, {len(result.failed)} to retry in {result.seconds:.2f}s"
+        )
+
+    stats: transmission_lib.WatchFolderStats = service.run(on_batch=_batch)
+    log.info(
+        f"Processed {stats.files} file(s) in {stats.batches} batch(es): {stats.added} added, {stats.skipped} skipped, {stats.failed} failed"
+    )
+
+    return dataclasses.asdict(stats)
+
+
+def watch(
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+    hosts: list[str] | None = None,
+    output: str = "-",
+    sink: str | None = None,
+    events: list[str] | None = None,
+    min_interval: float = 1.0,
+    max_interval: float = 30.0,
+    resync_interval: str = "10m",
+) -> dict[str, dict[str, int]]:
+    """Emit torrent change events (added, removed, status, finished) from every host, until interrupted.
+
+    Events are written as NDJSON to `output` (`-` for stdout), or passed to a
+    `module:callable` `sink`.
+
+    Returns:
+        (dict): Polls, full syncs, events & errors per host.
+
+    """
+    controllers: dict[str, transmission_lib.TransmissionRPCController] = _select_hosts(
+        config_file, host, port, username, password, protocol, path, hosts
+    )
+    resync_seconds: float = transmission_lib.parse_duration(resync_interval)
+    trackers: list[transmission_lib.TorrentStateTracker] = [
+        transmission_lib.TorrentStateTracker(
+            controller, host=name, resync_interval=resync_seconds
+        )
+        for name, controller in controllers.items()
+    ]
+
+    if sink:
+        event_sink: t.Callable[[transmission_lib.TorrentEvent], None] = (
+            transmission_lib.load_callable(sink)
+        )
+    else:
+        event_sink = transmission_lib.NDJSONSink(output)
+
+    watcher = transmission_lib.TorrentWatcher(
+        trackers,
+        event_sink,
+        min_interval=min_interval,
+        max_interval=max_interval,
+        events=events,
+    )
+    log.debug(f"Watching {len(trackers)} host(s): {list(controllers)}")
+    try:
+        stats: dict[str, transmission_lib.WatchStats] = watcher.run()
+    finally:
+        close = getattr(event_sink, "close", None)
+        if close is not None:
+            close()
+
+    for name, host_stats in stats.items():
+        log.info(
+            f"[{name}] {host_stats.events} event(s) from {host_stats.polls} poll(s) ({host_stats.syncs} full sync(s), {host_stats.errors} failed)"
+        )
+
+    return {name: dataclasses.asdict(host_stats) for name, host_stats in stats.items()}
+
+
+def hooks_run(
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+    hooks_file: str = "configs/hooks.json",
+    hosts: list[str] | None = None,
+    ledger_file: str = "hook-ledger.ndjson",
+    min_interval: float = 1.0,
+    max_interval: float = 30.0,
+    resync_interval: str = "10m",
+) -> dict[str, int]:
+    """Run hooks as torrents finish on every host, until interrupted.
+
+    Completions are detected from `recently-active` deltas (see `watch`). Runs
+    still queued when interrupted are resumed on the next start.
+
+    Returns:
+        (dict[str, int]): Runs per outcome (`done`, `failed`, `timeout`).
+
+    """
+    config: transmission_lib.HookConfig = transmission_lib.HookConfig.load(hooks_file)
+    controllers: dict[str, transmission_lib.TransmissionRPCController] = _select_hosts(
+        config_file, host, port, username, password, protocol, path, hosts
+    )
+
+    def _result(result: transmission_lib.HookResult) -> None:
+        if result.state == "done":
+            log.info(f"[{result.hook}] '{result.name}' done in {result.seconds:.2f}s")
+        else:
+            log.error(
+                f"[{result.hook}] '{result.name}' {result.state} after {result.seconds:.2f}s"
+                + (f". Details: {result.error}" if result.error else "")
+            )
+
+    runner = transmission_lib.HookRunner(
+        config, transmission_lib.HookLedger(ledger_file), on_result=_result
+    )
+    resync_seconds: float = transmission_lib.parse_duration(resync_interval)
+    watcher = transmission_lib.TorrentWatcher(
+        [
+            transmission_lib.TorrentStateTracker(
+                controller, host=name, resync_interval=resync_seconds
+            )
+            for name, controller in controllers.items()
+        ],
+        runner,
+        min_interval=min_interval,
+        max_interval=max_interval,
+        events=["finished", "status"],
+    )
+    log.info(
+        f"Running {len(config.hooks)} hook(s) for {len(controllers)} host(s): {list(controllers)}"
+    )
+    try:
+        watcher.run()
+    finally:
+        if runner.pending:
+            log.info(
+                f"Waiting for running hooks, {runner.pending} queued or running run(s) will resume on the next start"
+            )
+        runner.shutdown(wait=True)
+
+    log.info(
+        f"{runner.results['done']} hook run(s) done, {runner.results['failed']} failed, {runner.results['timeout']} timed out"
+    )
+
+    return dict(runner.results)
+
+
+def hooks_check(hooks_file: str = "configs/hooks.json") -> list[dict[str, t.Any]]:
+    """Validate a hooks file & show its hooks.
+
+    Returns:
+        (list[dict]): The hooks.
+
+    """
+    config: transmission_lib.HookConfig = transmission_lib.HookConfig.load(hooks_file)
+
+    log.info(f"{len(config.hooks)} hook(s), up to {config.workers} run(s) at a time:")
+    for hook in config.hooks:
+        log.info(
+            f"  {hook.name}{'' if hook.enabled else ' (disabled)'}: "
+            + (
+                f"command={hook.args}"
+                if hook.args is not None
+                else f"function={hook.function} executor={hook.executor}"
+            )
+            + f" concurrency={hook.concurrency}"
+            + (f" timeout={hook.timeout}" if hook.timeout else "")
+            + (f" labels={hook.labels}" if hook.labels else "")
+            + (f" hosts={hook.hosts}" if hook.hosts is not None else "")
+        )
+
+    return [dataclasses.asdict(hook) for hook in config.hooks]
+
+
+def journal_list(pending: bool = False) -> list[dict[str, t.Any]]:
+    """List journaled operations, oldest first. With `pending`, only those that did not complete.
+
+    Returns:
+        (list[dict]): One summary per operation.
+
+    """
+    summaries: list[dict[str, t.Any]] = []
+    for replay in transmission_lib.list_journals():
+        if pending and replay.state == "done":
+            continue
+
+        summary: dict[str, t.Any] = {
+            "operation_id": replay.operation_id,
+            "host": replay.host,
+            "method": replay.method,
+            "state": replay.state,
+            "started_at": replay.started_at,
+            "planned": len(replay.ids),
+            "confirmed": len(replay.confirmed),
+        }
+        summaries.append(summary)
+        log.info(
+            f"{replay.operation_id} [{replay.state}] {replay.method} on '{replay.host}': {summary['confirmed']}/{summary['planned']} confirmed (started {replay.started_at})"
+        )
+
+    if not summaries:
+        log.info("No journaled operations")
+
+    return summaries
+
+
+def journal_show(operation_id: str) -> dict[str, t.Any]:
+    """Show an operation's arguments & batches.
+
+    Returns:
+        (dict): The operation, as rebuilt from its journal.
+
+    """
+    replay: transmission_lib.JournalReplay = transmission_lib.find_journal(operation_id)
+
+    log.info(
+        f"{replay.operation_id} [{replay.state}] {replay.method} on '{replay.host}' with {replay.arguments}, started {replay.started_at}"
+    )
+    for index, batch in sorted(replay.batches.items()):
+        log.info(
+            f"  batch {index}: {len(batch['ids'])} torrent(s) {batch['state']}"
+            + (f" ({batch['error']})" if batch["error"] else "")
+        )
+    log.info(f"  {len(replay.unsent)} torrent(s) not sent")
+
+    return {
+        **dataclasses.asdict(replay),
+        "path": str(replay.path),
+    }
+
+
+def journal_resume(
+    operation_id: str,
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+) -> int:
+    """Resume an interrupted or failed operation from its journal.
+
+    Returns:
+        (int): The number of torrents the operation was sent for on this run.
+
+    """
+    replay: transmission_lib.JournalReplay = transmission_lib.find_journal(operation_id)
+    if replay.state == "done":
+        log.info(f"Operation '{replay.operation_id}' already completed")
+        return 0
+
+    if config_file:
+        hosts: dict[str, transmission_lib.TransmissionClientSettings] = _load_hosts(
+            config_file
+        )
+        ## Operations are journaled with the controller's host, match it in multi-host configs
+        transmission_settings = next(
+            (s for s in hosts.values() if str(s.host) == replay.host),
+            next(iter(hosts.values())),
+        )
+        transmission_controller: transmission_lib.TransmissionRPCController = (
+            _get_controller(transmission_settings)
+        )
+    else:
+        transmission_controller = return_controller(
+            config_file, host, port, username, password, protocol, path
+        )
+
+    if replay.host and str(transmission_controller.host) != replay.host:
+        raise ValueError(
+            f"Operation '{replay.operation_id}' ran on host '{replay.host}', not '{transmission_controller.host}'"
+        )
+
+    def _progress(done: int, total: int) -> None:
+        log.info(f"[{replay.method}] {done}/{total} torrent(s)")
+
+    return transmission_lib.resume_operation(
+        transmission_controller, replay.path, on_batch=_progress
+    )
+
+
+def journal_prune(older_than: str | None = None) -> int:
+    """Remove completed journals older than `older_than` (default: `$TRANSMISSION_JOURNAL_RETENTION`, or 30d).
+
+    Returns:
+        (int): The number of journals removed.
+
+    """
+    removed: int = transmission_lib.prune_journals(max_age=older_than)
+    log.info(
+        f"Removed {removed} completed journal(s) from '{transmission_lib.get_journal_dir()}'"
+    )
+
+    return removed
+
+
+def metrics(
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+    textfile: str | None = None,
+    listen: str | None = None,
+) -> str | None:
+    transmission_controllers: dict[str, transmission_lib.TransmissionRPCController] = (
+        return_controllers(
+            config_file,
+            host,
+            port,
+            username,
+            password,
+            protocol,
+            path,
+        )
+    )
+
+    def collect() -> list[transmission_lib.HostMetrics]:
+        return [
+            transmission_lib.collect_host_metrics(controller, host=name)
+            for name, controller in transmission_controllers.items()
+        ]
+
+    if listen:
+        listen_host, _, listen_port = listen.rpartition(":")
+        transmission_lib.serve_metrics(
+            collect, host=listen_host or "127.0.0.1", port=int(listen_port)
+        )
+
+        return None
+
+    text: str = transmission_lib.render_prometheus(collect())
+
+    if textfile:
+        log.debug(f"Writing metrics to textfile '{textfile}'")
+        transmission_lib.write_textfile(text, textfile)
+    else:
+        print(text, end="")
+
+    return text
+
+
+def proxy(
+    config_file: str = "configs/default.json",
+    host: str = "127.0.0.1",
+    port: int = 9091,
+    username: str | None = None,
+    password: str | None = None,
+    protocol: str | None = "http",
+    path: str = "/transmission/rpc",
+    listen: str = "127.0.0.1:9092",
+    cache_ttl: float = 5.0,
+    proxy_username: str | None = None,
+    proxy_password: str | None = None,
+) -> None:
+    transmission_controller: transmission_lib.TransmissionRPCController = (
+        return_controller(
+            config_file,
+            host,
+            port,
+            username,
+            password,
+            protocol,
+            path,
+        )
+    )
+
+    rpc_proxy = transmission_lib.RPCProxy(transmission_controller, cache_ttl=cache_ttl)
+
+    listen_host, _, listen_port = listen.rpartition(":")
+    transmission_lib.serve_proxy(
+        rpc_proxy,
+        host=listen_host or "127.0.0.1",
+        port=int(listen_port),
+        username=proxy_username,
+        password=proxy_password,
+    )
+
+    log.info(
+        f"Proxy served {rpc_proxy.requests_served} request(s) with {rpc_proxy.upstream_requests} upstream request(s)"
+    )
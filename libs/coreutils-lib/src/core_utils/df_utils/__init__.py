@@ -1,29 +1,71 @@
+"""Utilities for working with `pandas` DataFrames.
+
+Submodules that need `pandas`/`pyarrow`/`SQLAlchemy` are imported on first access
+of one of their names (PEP 562), so importing `core_utils.df_utils` (i.e. for
+`constants` or `validators`) does not import `pandas`.
+"""
+
 from __future__ import annotations
 
-from . import constants  # , validators
-
-# from .methods import (
-#     convert_csv_to_pq,
-#     convert_df_col_dtypes,
-#     convert_df_datetimes_to_timestamp,
-#     convert_pq_to_csv,
-#     count_df_rows,
-#     get_oldest_newest,
-#     hide_df_index,
-#     load_csv,
-#     load_json,
-#     load_pq,
-#     load_pqs_to_df,
-#     rename_df_cols,
-#     save_csv,
-#     save_json,
-#     save_pq,
-#     set_pandas_display_opts,
-#     sort_df_by_col,
-# )
-
-from .pd_config import *
-from .io import *
-from .convert import *
-from .utils import *
-from .validators import *
+import importlib
+import typing as t
+
+from . import constants
+
+## Map each public name to the submodule that defines it
+_LAZY_IMPORTS: dict[str, str] = {
+    ## pd_config
+    "set_pandas_display_opts": "pd_config",
+    ## io
+    "load_pqs_to_df": "io",
+    "load_pq": "io",
+    "load_csv": "io",
+    "load_json": "io",
+    "load_sql": "io",
+    "save_pq": "io",
+    "save_csv": "io",
+    "save_json": "io",
+    ## convert
+    "convert_csv_to_pq": "convert",
+    "convert_pq_to_csv": "convert",
+    "convert_df_col_dtypes": "convert",
+    "convert_df_datetimes_to_timestamp": "convert",
+    ## utils
+    "hide_df_index": "utils",
+    "rename_df_cols": "utils",
+    "sort_df_by_col": "utils",
+    "get_oldest_newest": "utils",
+    ## validators
+    "VALID_COL_TYPES": "validators",
+    "validate_df_col_type": "validators",
+}
+
+_SUBMODULES: list[str] = ["pd_config", "io", "convert", "utils", "validators"]
+
+__all__ = ["constants"] + list(_LAZY_IMPORTS)
+
+if t.TYPE_CHECKING:
+    from .convert import *
+    from .io import *
+    from .pd_config import *
+    from .utils import *
+    from .validators import *
+
+
+def __getattr__(name: str) -> t.Any:
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+
+    module_name: str | None = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    ## Cache on the package so __getattr__ is only hit once per name
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__ + _SUBMODULES)
@@ -5,7 +5,10 @@ from pathlib import Path
 import typing as t
 
 import pandas as pd
-import sqlalchemy as sa
+
+if t.TYPE_CHECKING:
+    ## pandas imports SQLAlchemy itself when load_sql() reads a table
+    import sqlalchemy as sa
 
 log = logging.getLogger(__name__)
 
@@ -1,4 +1,239 @@
-from .constants import *
-from .settings import *
-from .methods import *
-from .controllers import *
+"""Library for controlling Transmission remotes.
+
+Public names are imported lazily from their submodules on first access (PEP 562),
+so `import transmission_lib` does not import `transmission_rpc` until a name that
+needs it (i.e. `TransmissionRPCController`) is used.
+"""
+
+from __future__ import annotations
+
+import importlib
+import typing as t
+
+## Map each public name to the submodule that defines it
+_LAZY_IMPORTS: dict[str, str] = {
+    ## bencode
+    "BencodeError": "bencode",
+    "BencodeView": "bencode",
+    "bdecode": "bencode",
+    ## constants
+    "TORRENT_STATES": "constants",
+    "VALID_TORRENT_STATES": "constants",
+    ## settings
+    "TransmissionClientSettings": "settings",
+    "get_transmission_settings": "settings",
+    "get_transmission_hosts": "settings",
+    ## methods
+    "debug_print_torrent": "methods",
+    "extract_fields": "methods",
+    "prepare_torrent_dict": "methods",
+    "select_random_torrent": "methods",
+    "select_random_for_delete": "methods",
+    "remove_finished": "methods",
+    "select_finished": "methods",
+    "get_transmission_controller": "methods",
+    "get_transmission_client": "methods",
+    "get_torrents": "methods",
+    ## controllers
+    "TransmissionRPCController": "controllers",
+    "READ_ONLY_RPC_METHODS": "controllers",
+    "DEFAULT_CHUNK_SIZE": "controllers",
+    "DEFAULT_BATCH_SIZE": "controllers",
+    ## metainfo
+    "TorrentMeta": "metainfo",
+    "TorrentFileScan": "metainfo",
+    "TorrentFileIndex": "metainfo",
+    "read_torrent_meta": "metainfo",
+    "read_torrent_metas": "metainfo",
+    "iter_torrent_files": "metainfo",
+    ## metrics
+    "DEFAULT_LATENCY_BUCKETS": "metrics",
+    "METRICS_TORRENT_FIELDS": "metrics",
+    "LatencyHistogram": "metrics",
+    "RPCStats": "metrics",
+    "HostMetrics": "metrics",
+    "collect_host_metrics": "metrics",
+    "render_prometheus": "metrics",
+    "write_textfile": "metrics",
+    "serve_metrics": "metrics",
+    ## retry
+    "IDEMPOTENT_RPC_METHODS": "retry",
+    "RETRYABLE_EXCEPTIONS": "retry",
+    "CircuitOpenError": "retry",
+    "RetryPolicy": "retry",
+    "CircuitBreaker": "retry",
+    "AdaptiveTimeout": "retry",
+    ## streaming
+    "DEFAULT_READ_SIZE": "streaming",
+    "TorrentStreamDecoder": "streaming",
+    "StreamingTransport": "streaming",
+    ## duplicates
+    "DUPLICATE_FIELDS": "duplicates",
+    "DuplicateCopy": "duplicates",
+    "DuplicateGroup": "duplicates",
+    "normalize_name": "duplicates",
+    "fetch_host_torrents": "duplicates",
+    "find_duplicates": "duplicates",
+    "plan_duplicate_removals": "duplicates",
+    ## filters
+    "FILTER_PROPERTIES": "filters",
+    "WhereClause": "filters",
+    "TorrentFilter": "filters",
+    "parse_size": "filters",
+    "parse_duration": "filters",
+    "select_torrents": "filters",
+    ## changes
+    "LIMIT_MODES": "changes",
+    "TorrentChange": "changes",
+    "plan_changes": "changes",
+    ## ingest
+    "MAGNET_SUFFIX": "ingest",
+    "AddSource": "ingest",
+    "AddResult": "ingest",
+    "parse_magnet": "ingest",
+    "collect_sources": "ingest",
+    "fetch_hashes": "ingest",
+    "pick_host_with_most_free_space": "ingest",
+    "add_sources": "ingest",
+    ## journal
+    "DEFAULT_JOURNAL_DIR": "journal",
+    "DEFAULT_JOURNAL_RETENTION": "journal",
+    "get_journal_dir": "journal",
+    "OperationJournal": "journal",
+    "JournalReplay": "journal",
+    "list_journals": "journal",
+    "find_journal": "journal",
+    "prune_journals": "journal",
+    "resume_operation": "journal",
+    ## localcopy
+    "LOCAL_COPY_FIELDS": "localcopy",
+    "CopyStats": "localcopy",
+    "LocalCopyEngine": "localcopy",
+    "is_local_host": "localcopy",
+    "local_move_torrent": "localcopy",
+    ## orphans
+    "ORPHAN_FIELDS": "orphans",
+    "Orphan": "orphans",
+    "OrphanReport": "orphans",
+    "PathTrie": "orphans",
+    "parse_path_map": "orphans",
+    "map_path": "orphans",
+    "build_path_trie": "orphans",
+    "scan_orphans": "orphans",
+    "delete_orphans": "orphans",
+    ## relocate
+    "PLAN_STRATEGIES": "relocate",
+    "RELOCATION_FIELDS": "relocate",
+    "RelocationMove": "relocate",
+    "RelocationPlan": "relocate",
+    "get_destination_free_space": "relocate",
+    "plan_relocation": "relocate",
+    "apply_plan": "relocate",
+    ## retention
+    "RETENTION_FIELDS": "retention",
+    "RetentionWeights": "retention",
+    "RetentionCandidate": "retention",
+    "RetentionPlan": "retention",
+    "score_torrent": "retention",
+    "plan_retention": "retention",
+    ## search
+    "SEARCH_FIELDS": "search",
+    "SearchHit": "search",
+    "IndexUpdate": "search",
+    "SearchIndex": "search",
+    ## singleflight
+    "SingleFlight": "singleflight",
+    ## snapshot
+    "TorrentSnapshot": "snapshot",
+    ## policy
+    "POLICY_ACTIONS": "policy",
+    "PolicyRule": "policy",
+    "Policy": "policy",
+    "PolicyDecision": "policy",
+    "PolicyState": "policy",
+    "AuditLog": "policy",
+    "evaluate_policy": "policy",
+    "apply_decisions": "policy",
+    "run_policy": "policy",
+    ## verify
+    "VERIFY_FIELDS": "verify",
+    "PieceLayout": "verify",
+    "VerifyResult": "verify",
+    "PieceVerifier": "verify",
+    ## proxy
+    "TorrentFieldCache": "proxy",
+    "RPCProxy": "proxy",
+    "serve_proxy": "proxy",
+    ## watchfolder
+    "WATCH_SUFFIXES": "watchfolder",
+    "FolderWatcher": "watchfolder",
+    "WatchFolderStats": "watchfolder",
+    "WatchFolderService": "watchfolder",
+    ## events
+    "RECENTLY_ACTIVE_SECONDS": "events",
+    "EVENT_TYPES": "events",
+    "TRANSITIONAL_STATUSES": "events",
+    "WATCH_FIELDS": "events",
+    "TorrentEvent": "events",
+    "TorrentStateTracker": "events",
+    "AdaptiveInterval": "events",
+    "NDJSONSink": "events",
+    "load_callable": "events",
+    "WatchStats": "events",
+    "TorrentWatcher": "events",
+    ## hooks
+    "HOOK_EXECUTORS": "hooks",
+    "Hook": "hooks",
+    "HookConfig": "hooks",
+    "HookResult": "hooks",
+    "HookLedger": "hooks",
+    "HookRunner": "hooks",
+    "is_completion": "hooks",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+if t.TYPE_CHECKING:
+    from .bencode import *
+    from .changes import *
+    from .constants import *
+    from .controllers import *
+    from .duplicates import *
+    from .events import *
+    from .filters import *
+    from .hooks import *
+    from .ingest import *
+    from .journal import *
+    from .localcopy import *
+    from .metainfo import *
+    from .methods import *
+    from .metrics import *
+    from .orphans import *
+    from .policy import *
+    from .proxy import *
+    from .relocate import *
+    from .retention import *
+    from .retry import *
+    from .search import *
+    from .settings import *
+    from .singleflight import *
+    from .snapshot import *
+    from .streaming import *
+    from .verify import *
+    from .watchfolder import *
+
+
+def __getattr__(name: str) -> t.Any:
+    module_name: str | None = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    ## Cache on the package so __getattr__ is only hit once per name
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
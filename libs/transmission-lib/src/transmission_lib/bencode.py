@@ -0,0 +1,389 @@
+"""Decode bencoded data, i.e. `.torrent` files.
+
+Strings decode to `bytes` (paths in torrents are not always valid UTF-8),
+dictionary keys included.
+
+`bdecode()` decodes everything. `BencodeView` is lazy & zero-copy instead: it
+works on the original buffer (`bytes`, `bytearray` or an `mmap`), and only
+decodes the values that are accessed. Containers are returned as views of their
+span, which are walked once, on first access, to find their keys' offsets;
+values that are never accessed (i.e. a torrent's `pieces`) are skipped by their
+length prefix, without being read or copied. `BencodeView.raw()` is the exact
+encoded span, so an info hash is a hash of `view["info"].raw()`.
+"""
+
+from __future__ import annotations
+
+import typing as t
+
+__all__ = [
+    "BencodeError",
+    "BencodeView",
+    "bdecode",
+]
+
+_DIGITS: bytes = b"0123456789"
+
+
+class BencodeError(ValueError):
+    """Raised for malformed bencoded data."""
+
+
+def _decode(data: bytes, i: int) -> tuple[t.Any, int]:
+    """Decode the value at `data[i]`, return it & the index after it."""
+    try:
+        token: int = data[i]
+    except IndexError:
+        raise BencodeError(f"Unexpected end of data at offset {i}") from None
+
+    if token == 0x69:  # i<int>e
+        end: int = data.index(b"e", i)
+        try:
+            return int(data[i + 1 : end]), end + 1
+        except ValueError:
+            raise BencodeError(f"Invalid integer at offset {i}") from None
+
+    if token == 0x6C:  # l<values>e
+        values: list[t.Any] = []
+        i += 1
+        while data[i] != 0x65:
+            value, i = _decode(data, i)
+            values.append(value)
+        return values, i + 1
+
+    if token == 0x64:  # d<key><value>...e
+        values: dict[bytes, t.Any] = {}
+        i += 1
+        while data[i] != 0x65:
+            key, i = _decode(data, i)
+            if not isinstance(key, bytes):
+                raise BencodeError(f"Dictionary key is not a string at offset {i}")
+            values[key], i = _decode(data, i)
+        return values, i + 1
+
+    if token in _DIGITS:  # <length>:<bytes>
+        colon: int = data.index(b":", i)
+        try:
+            length: int = int(data[i:colon])
+        except ValueError:
+            raise BencodeError(f"Invalid string length at offset {i}") from None
+        end = colon + 1 + length
+        if end > len(data):
+            raise BencodeError(f"String at offset {i} runs past the end of data")
+        return data[colon + 1 : end], end
+
+    raise BencodeError(f"Invalid token {bytes([token])!r} at offset {i}")
+
+
+def bdecode(data: bytes) -> t.Any:
+    """Decode bencoded `data`.
+
+    Raises:
+        BencodeError: If `data` is not a single, well-formed bencoded value.
+
+    """
+    data = bytes(data)
+    try:
+        value, end = _decode(data, 0)
+    except (IndexError, ValueError) as exc:
+        if isinstance(exc, BencodeError):
+            raise
+        raise BencodeError(f"Malformed bencoded data. Details: {exc}") from None
+
+    if end != len(data):
+        raise BencodeError(f"Trailing data after offset {end}")
+
+    return value
+
+
+def _skip(data: t.Any, i: int) -> int:
+    """Return the index after the value at `data[i]`, without decoding it."""
+    find = data.find
+    depth: int = 0
+
+    while True:
+        token: int = data[i]
+        if token == 0x64 or token == 0x6C:
+            depth += 1
+            i += 1
+            continue
+
+        if token == 0x65:
+            depth -= 1
+            i += 1
+        elif token == 0x69:
+            end: int = find(b"e", i)
+            if end < 0:
+                raise BencodeError(f"Unterminated integer at offset {i}")
+            i = end + 1
+        else:
+            colon: int = find(b":", i)
+            if colon < 0 or token not in _DIGITS:
+                raise BencodeError(f"Invalid token {bytes([token])!r} at offset {i}")
+            i = colon + 1 + int(data[i:colon])
+
+        if depth <= 0:
+            if depth < 0:
+                raise BencodeError(f"Unexpected end of container at offset {i - 1}")
+            return i
+
+
+class BencodeView:
+    """Lazy, zero-copy view of a bencoded dictionary or list.
+
+    Dictionary keys can be given as `str` or `bytes`. Integers decode to `int`,
+    strings to `bytes` (see `buffer()` for a zero-copy `memoryview`), and
+    dictionaries & lists to nested views.
+
+    Entries are indexed incrementally, only as far as the key looked up. A nested
+    view hands its end back to its parent once walked, so iterating a list of
+    dictionaries & reading a key of each walks every token once.
+
+    Params:
+        data (bytes|bytearray|mmap): Buffer holding the bencoded data. A `memoryview` is copied to `bytes`.
+        start (int): Offset of the dictionary or list in `data`.
+    """
+
+    __slots__ = (
+        "data",
+        "start",
+        "is_dict",
+        "_end",
+        "_offsets",
+        "_keys",
+        "_cursor",
+        "_open",
+        "_open_view",
+    )
+
+    def __init__(self, data: t.Any, start: int = 0) -> None:
+        if isinstance(data, memoryview):
+            ## No find() on memoryviews
+            data = data.tobytes()
+        try:
+            token: int = data[start]
+        except IndexError:
+            raise BencodeError("Empty data") from None
+        if token != 0x64 and token != 0x6C:
+            raise BencodeError(f"Expected a dictionary or list at offset {start}")
+
+        self.data: t.Any = data
+        self.start: int = start
+        self.is_dict: bool = token == 0x64
+        self._end: int | None = None
+        ## Value offsets, by key for dictionaries & by position for lists
+        self._offsets: dict[bytes, int] | list[int] = {} if self.is_dict else []
+        ## Dictionary keys in order, by position
+        self._keys: list[bytes] = []
+        ## Offset of the next entry to index, `None` once every entry is
+        self._cursor: int | None = start + 1
+        ## Offset & view of the last indexed container, whose end isn't known yet
+        self._open: int | None = None
+        self._open_view: BencodeView | None = None
+
+    def _advance(self) -> bool:
+        """Index the next entry. Return `False` once every entry is indexed."""
+        if self._cursor is None:
+            return False
+
+        data: t.Any = self.data
+        try:
+            if self._open is not None:
+                view: BencodeView | None = self._open_view
+                self._cursor = view.end if view is not None else _skip(data, self._open)
+                self._open = self._open_view = None
+
+            i: int = self._cursor
+            if data[i] == 0x65:
+                self._end = i + 1
+                self._cursor = None
+                return False
+
+            if self.is_dict:
+                colon: int = data.find(b":", i)
+                if colon < 0 or data[i] not in _DIGITS:
+                    raise BencodeError(f"Dictionary key is not a string at offset {i}")
+                i = colon + 1 + int(data[i:colon])
+                key: bytes = bytes(data[colon + 1 : i])
+                self._offsets[key] = i
+                self._keys.append(key)
+            else:
+                self._offsets.append(i)
+
+            token: int = data[i]
+            if token == 0x64 or token == 0x6C:
+                ## Left open: skipped later, unless a view of it is walked first
+                self._open = i
+            else:
+                self._cursor = _skip(data, i)
+        except (IndexError, ValueError) as exc:
+            if isinstance(exc, BencodeError):
+                raise
+            raise BencodeError(f"Malformed bencoded data. Details: {exc}") from None
+
+        return True
+
+    @property
+    def end(self) -> int:
+        """Offset after the dictionary or list (indexes every entry)."""
+        while self._advance():
+            pass
+
+        return self._end
+
+    def _offset(self, key: str | bytes | int) -> int:
+        if isinstance(key, str):
+            key = key.encode()
+
+        if self.is_dict:
+            if not isinstance(key, bytes):
+                raise KeyError(key)
+            while key not in self._offsets:
+                if not self._advance():
+                    raise KeyError(key)
+        else:
+            if not isinstance(key, int):
+                raise KeyError(key)
+            if key < 0:
+                self.end
+            while key >= len(self._offsets):
+                if not self._advance():
+                    raise KeyError(key)
+
+        try:
+            return self._offsets[key]
+        except IndexError:
+            raise KeyError(key) from None
+
+    def _value(self, i: int) -> t.Any:
+        data: t.Any = self.data
+        token: int = data[i]
+
+        if token == 0x64 or token == 0x6C:
+            view = BencodeView(data, i)
+            if i == self._open:
+                self._open_view = view
+            return view
+        if token == 0x69:
+            return int(data[i + 1 : data.find(b"e", i)])
+
+        colon: int = data.find(b":", i)
+        return bytes(data[colon + 1 : colon + 1 + int(data[i:colon])])
+
+    def __getitem__(self, key: str | bytes | int) -> t.Any:
+        return self._value(self._offset(key))
+
+    def get(self, key: str | bytes | int, default: t.Any = None) -> t.Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str | bytes) -> bool:
+        if not self.is_dict:
+            return False
+        try:
+            self._offset(key)
+        except KeyError:
+            return False
+
+        return True
+
+    def __len__(self) -> int:
+        self.end
+
+        return len(self._offsets)
+
+    def _entries(self) -> t.Iterator[int | bytes]:
+        """Keys of a dictionary, positions of a list, indexed as they are reached."""
+        indexed: list = self._keys if self.is_dict else self._offsets
+        position: int = 0
+
+        while position < len(indexed) or self._advance():
+            yield self._keys[position] if self.is_dict else position
+            position += 1
+
+    def __iter__(self) -> t.Iterator[t.Any]:
+        """Keys of a dictionary, values of a list."""
+        for entry in self._entries():
+            yield entry if self.is_dict else self._value(self._offsets[entry])
+
+    def items(self) -> t.Iterator[tuple[bytes, t.Any]]:
+        """(key, value) pairs of a dictionary, in one pass."""
+        if not self.is_dict:
+            raise TypeError("items() of a bencoded list")
+
+        for key in self._entries():
+            yield key, self._value(self._offsets[key])
+
+    def column(self, key: str | bytes, default: t.Any = None) -> list[t.Any]:
+        """The value of `key` (an integer or string) in each dictionary of a list, i.e. every file's `length`.
+
+        Walks the list in a single tight pass, without creating a view per dictionary.
+        """
+        if self.is_dict:
+            raise TypeError("column() of a bencoded dictionary")
+        if self._cursor != self.start + 1 or self._open is not None:
+            ## Partly indexed already
+            return [item.get(key, default) for item in self]
+
+        if isinstance(key, str):
+            key = key.encode()
+        data: t.Any = self.data
+        find = data.find
+        offsets: list[int] = self._offsets
+        values: list[t.Any] = []
+        i: int = self.start + 1
+
+        try:
+            while data[i] != 0x65:
+                if data[i] != 0x64:
+                    raise BencodeError(f"Expected a dictionary at offset {i}")
+                offsets.append(i)
+                value: t.Any = default
+                i += 1
+                while data[i] != 0x65:
+                    colon: int = find(b":", i)
+                    i = colon + 1 + int(data[i:colon])
+                    if data[colon + 1 : i] == key:
+                        token: int = data[i]
+                        if token == 0x69:
+                            end: int = find(b"e", i)
+                            value = int(data[i + 1 : end])
+                            i = end + 1
+                            continue
+                        if token in _DIGITS:
+                            colon = find(b":", i)
+                            end = colon + 1 + int(data[i:colon])
+                            value = bytes(data[colon + 1 : end])
+                            i = end
+                            continue
+                    i = _skip(data, i)
+                values.append(value)
+                i += 1
+        except (IndexError, ValueError) as exc:
+            if isinstance(exc, BencodeError):
+                raise
+            raise BencodeError(f"Malformed bencoded data. Details: {exc}") from None
+
+        self._end = i + 1
+        self._cursor = None
+
+        return values
+
+    def buffer(self, key: str | bytes | int) -> memoryview:
+        """A string value, as a `memoryview` of the underlying buffer (no copy). Release it before closing an mmap."""
+        i: int = self._offset(key)
+        colon: int = self.data.find(b":", i)
+        if colon < 0 or self.data[i] not in _DIGITS:
+            raise BencodeError(f"Value at offset {i} is not a string")
+
+        return memoryview(self.data)[colon + 1 : colon + 1 + int(self.data[i:colon])]
+
+    def raw(self) -> memoryview:
+        """The encoded dictionary or list, as a `memoryview` of the underlying buffer (no copy)."""
+        return memoryview(self.data)[self.start : self.end]
+
+    def decode(self) -> t.Any:
+        """Fully decode the dictionary or list, like `bdecode()`."""
+        return _decode(bytes(self.raw()), 0)[0]
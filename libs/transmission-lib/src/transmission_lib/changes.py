@@ -0,0 +1,217 @@
+"""Plan grouped `torrent-set` requests for bulk property updates.
+
+`TorrentChange` describes target values for torrent properties. `plan_changes()`
+compares them with each torrent's current values, skips torrents that are
+already at the target, and groups the rest by the exact `torrent-set` arguments
+they need, so a fleet-wide change costs one request per distinct change instead
+of one per torrent.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import json
+import logging
+import typing as t
+
+if t.TYPE_CHECKING:
+    from transmission_rpc.torrent import Torrent
+
+log = logging.getLogger(__name__)
+
+__all__ = ["LIMIT_MODES", "TorrentChange", "plan_changes"]
+
+## seedRatioMode/seedIdleMode values, by name
+LIMIT_MODES: dict[str, int] = {"global": 0, "single": 1, "unlimited": 2}
+
+
+def _parse_limit(value: str | float | int, name: str) -> tuple[int, float | None]:
+    """Parse a seed limit (`global`, `unlimited` or a number) to (mode, limit)."""
+    if isinstance(value, str) and value.lower() in ("global", "unlimited"):
+        return LIMIT_MODES[value.lower()], None
+
+    try:
+        limit = float(value)
+    except ValueError:
+        raise ValueError(
+            f"Invalid {name}: '{value}'. Must be a number, 'global' or 'unlimited'"
+        )
+
+    return LIMIT_MODES["single"], limit
+
+
+@dataclass
+class TorrentChange:
+    """Target values for torrent properties. `None` leaves a property unchanged.
+
+    Attributes:
+        upload_limit (int): Upload limit in KB/s, `-1` to remove the limit.
+        download_limit (int): Download limit in KB/s, `-1` to remove the limit.
+        seed_ratio (str|float): Seed ratio limit, `global` (use the session's) or `unlimited`.
+        seed_idle (str|int): Seed idle limit in minutes, `global` or `unlimited`.
+        queue_position (int): Position in the queue.
+        peer_limit (int): Max number of peers.
+        labels (list[str]): Replace all labels.
+        add_labels (list[str]): Labels to add.
+        remove_labels (list[str]): Labels to remove.
+
+    """
+
+    upload_limit: int | None = field(default=None)
+    download_limit: int | None = field(default=None)
+    seed_ratio: str | float | None = field(default=None)
+    seed_idle: str | int | None = field(default=None)
+    queue_position: int | None = field(default=None)
+    peer_limit: int | None = field(default=None)
+    labels: list[str] | None = field(default=None)
+    add_labels: list[str] = field(default_factory=list)
+    remove_labels: list[str] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self._seed_ratio = (
+            None
+            if self.seed_ratio is None
+            else _parse_limit(self.seed_ratio, "seed ratio")
+        )
+        self._seed_idle = (
+            None
+            if self.seed_idle is None
+            else _parse_limit(self.seed_idle, "seed idle limit")
+        )
+
+        if self.is_empty:
+            raise ValueError("No properties to change")
+
+    @property
+    def is_empty(self) -> bool:
+        return all(
+            v is None
+            for v in [
+                self.upload_limit,
+                self.download_limit,
+                self.seed_ratio,
+                self.seed_idle,
+                self.queue_position,
+                self.peer_limit,
+                self.labels,
+            ]
+        ) and not (self.add_labels or self.remove_labels)
+
+    @property
+    def fields(self) -> list[str]:
+        """RPC fields needed to compare torrents with the target values."""
+        fields: list[str] = []
+        if self.upload_limit is not None:
+            fields += ["uploadLimit", "uploadLimited"]
+        if self.download_limit is not None:
+            fields += ["downloadLimit", "downloadLimited"]
+        if self._seed_ratio is not None:
+            fields += ["seedRatioLimit", "seedRatioMode"]
+        if self._seed_idle is not None:
+            fields += ["seedIdleLimit", "seedIdleMode"]
+        if self.queue_position is not None:
+            fields.append("queuePosition")
+        if self.peer_limit is not None:
+            fields.append("peer-limit")
+        if self.labels is not None or self.add_labels or self.remove_labels:
+            fields.append("labels")
+
+        return fields
+
+    def arguments_for(self, current: dict[str, t.Any]) -> dict[str, t.Any]:
+        """Return the `torrent-set` arguments needed to bring a torrent to the target values.
+
+        Params:
+            current (dict): The torrent's raw RPC fields.
+
+        Returns:
+            (dict): RPC arguments, empty if the torrent is already at the target values.
+
+        """
+        target: dict[str, t.Any] = {}
+
+        for limit, prefix in [
+            (self.upload_limit, "upload"),
+            (self.download_limit, "download"),
+        ]:
+            if limit is None:
+                continue
+            if limit < 0:
+                target[f"{prefix}Limited"] = False
+            else:
+                target[f"{prefix}Limited"] = True
+                target[f"{prefix}Limit"] = int(limit)
+
+        for parsed, prefix in [
+            (self._seed_ratio, "seedRatio"),
+            (self._seed_idle, "seedIdle"),
+        ]:
+            if parsed is None:
+                continue
+            mode, limit = parsed
+            target[f"{prefix}Mode"] = mode
+            if limit is not None:
+                target[f"{prefix}Limit"] = (
+                    limit if prefix == "seedRatio" else int(limit)
+                )
+
+        if self.queue_position is not None:
+            target["queuePosition"] = self.queue_position
+        if self.peer_limit is not None:
+            target["peer-limit"] = self.peer_limit
+
+        if self.labels is not None or self.add_labels or self.remove_labels:
+            labels: list[str] = list(
+                self.labels if self.labels is not None else current.get("labels", [])
+            )
+            labels += [label for label in self.add_labels if label not in labels]
+            target["labels"] = [
+                label for label in labels if label not in self.remove_labels
+            ]
+
+        ## Send a property (i.e. both uploadLimit & uploadLimited) if any part of it differs,
+        #  so torrents needing the same change end up in the same request
+        arguments: dict[str, t.Any] = {}
+        for group in _PROPERTY_GROUPS:
+            keys = [k for k in group if k in target]
+            if any(current.get(k) != target[k] for k in keys):
+                arguments.update({k: target[k] for k in keys})
+
+        return arguments
+
+
+## RPC arguments that are sent together
+_PROPERTY_GROUPS: list[tuple[str, ...]] = [
+    ("uploadLimit", "uploadLimited"),
+    ("downloadLimit", "downloadLimited"),
+    ("seedRatioLimit", "seedRatioMode"),
+    ("seedIdleLimit", "seedIdleMode"),
+    ("queuePosition",),
+    ("peer-limit",),
+    ("labels",),
+]
+
+
+def plan_changes(
+    torrents: t.Iterable[Torrent], change: TorrentChange
+) -> list[tuple[dict[str, t.Any], list[int]]]:
+    """Group torrents by the `torrent-set` arguments they need.
+
+    Torrents that are already at the target values are left out.
+
+    Returns:
+        (list[tuple[dict, list[int]]]): `(arguments, torrent ids)` for each distinct change,
+            largest groups first.
+
+    """
+    groups: dict[str, tuple[dict[str, t.Any], list[int]]] = {}
+
+    for torrent in torrents:
+        arguments: dict[str, t.Any] = change.arguments_for(torrent.fields)
+        if not arguments:
+            continue
+
+        key: str = json.dumps(arguments, sort_keys=True)
+        groups.setdefault(key, (arguments, []))[1].append(torrent.id)
+
+    return sorted(groups.values(), key=lambda group: len(group[1]), reverse=True)
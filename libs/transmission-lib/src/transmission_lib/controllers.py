@@ -1,19 +1,79 @@
 from __future__ import annotations
 
-from contextlib import AbstractContextManager
+import base64
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import AbstractContextManager, contextmanager
+import json
 import logging
 from pathlib import Path
+import queue
+import threading
+import time
 import typing as t
 
+from .constants import VALID_TORRENT_STATES
+from .metrics import RPCStats
+from .retry import (
+    IDEMPOTENT_RPC_METHODS,
+    RETRYABLE_EXCEPTIONS,
+    AdaptiveTimeout,
+    CircuitBreaker,
+    RetryPolicy,
+)
+from .singleflight import SingleFlight
+from .streaming import StreamingTransport
+
 from transmission_rpc.client import Client
+from transmission_rpc.error import TransmissionTimeoutError
 from transmission_rpc.torrent import Torrent
+from transmission_rpc.utils import get_torrent_arguments
+
+if t.TYPE_CHECKING:
+    from .journal import OperationJournal
 
 log = logging.getLogger(__name__)
 
-__all__ = ["TransmissionRPCController"]
+__all__ = [
+    "TransmissionRPCController",
+    "READ_ONLY_RPC_METHODS",
+    "DEFAULT_CHUNK_SIZE",
+    "DEFAULT_BATCH_SIZE",
+]
+
+## Default number of torrents fetched per request by iter_torrents()
+DEFAULT_CHUNK_SIZE: int = 500
+
+## Default number of torrent ids sent per request by bulk actions
+DEFAULT_BATCH_SIZE: int = 5000
+
+## RPC methods that never change torrent state
+READ_ONLY_RPC_METHODS: frozenset[str] = frozenset(
+    [
+        "torrent-get",
+        "session-get",
+        "session-stats",
+        "free-space",
+        "port-test",
+        "group-get",
+    ]
+)
 
 
 class TransmissionRPCController(AbstractContextManager):
+    """Controller for a single Transmission host.
+
+    Controllers are safe to share between threads. RPC calls borrow a client from a
+    bounded pool (each client has its own HTTP session), so up to `pool_size`
+    requests run against the host concurrently, and concurrent `get_all_torrents()`
+    calls for the same fields are coalesced into a single request.
+
+    Idempotent calls that fail with a connection error or timeout are retried
+    according to `retry_policy`, and a per-host circuit breaker fails calls fast
+    while the host keeps failing. Unless `timeout` is a `(connect, read)` tuple or
+    `adaptive_timeout` is `False`, request timeouts adapt to observed latencies,
+    starting from `timeout` (30s if `None`).
+    """
+
     def __init__(
         self,
         host: str | None = None,
@@ -23,6 +83,11 @@ class TransmissionRPCController(AbstractContextManager):
         path: str = None,
         protocol: str = None,
         timeout: int | float | tuple[int | float, int | float] | None = None,
+        cache_ttl: float = 0,
+        pool_size: int = 4,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        adaptive_timeout: bool = True,
     ) -> None:
         self.host: str | None = host
         self.port: int | None = port
@@ -32,12 +97,43 @@ class TransmissionRPCController(AbstractContextManager):
         self.protocol: str | None = protocol
         self.timeout: int | float | tuple[int | float, int | float] | None = timeout
 
-        self.client: Client | None = None
+        self.retry_policy: RetryPolicy = retry_policy or RetryPolicy()
+        self.circuit_breaker: CircuitBreaker = circuit_breaker or CircuitBreaker()
+        ## None when timeouts are fixed
+        self.adaptive_timeout: AdaptiveTimeout | None = (
+            AdaptiveTimeout(base=float(timeout or 30.0))
+            if adaptive_timeout and not isinstance(timeout, tuple)
+            else None
+        )
+
+        ## Max number of clients (and concurrent requests) for this host
+        self.pool_size: int = max(1, pool_size)
+        self._idle_clients: queue.LifoQueue[Client] = queue.LifoQueue()
+        self._clients_created: int = 0
+        self._pool_lock = threading.Lock()
+        ## Client handed out by the `client` property, for callers using transmission_rpc directly
+        self._client: Client | None = None
+
+        ## Per-RPC-method latency histograms & error counters
+        self.rpc_stats: RPCStats = RPCStats()
+
+        ## Seconds a torrent list fetched by get_all_torrents() is reused. 0 disables the cache.
+        self.cache_ttl: float = cache_ttl
+        ## {requested fields (None for all fields): (fetched at, torrents)}
+        self._torrent_cache: dict[
+            frozenset[str] | None, tuple[float, list[Torrent]]
+        ] = {}
+        ## Bumped by invalidate_cache(), so fetches that raced a mutation are not cached
+        self._cache_generation: int = 0
+        self._cache_lock = threading.Lock()
+        self._flight: SingleFlight = SingleFlight()
 
         self.logger: logging.Logger = log.getChild("TransmissionRPCController")
 
     def __enter__(self) -> "TransmissionRPCController":
-        self.client = self._create_client()
+        ## Make sure the host is reachable
+        with self._borrow_client():
+            pass
 
         return self
 
@@ -64,7 +160,8 @@ class TransmissionRPCController(AbstractContextManager):
         _conf = {k: v for k, v in _conf.items() if v is not None}
 
         try:
-            client = Client(**_conf)
+            ## Client() sends a session-get to negotiate the RPC version
+            client = self._call("session-get", Client, **_conf)
         except Exception as exc:
             raise Exception(
                 f"Unhandled exception getting Transmission RPC Client. Details: {exc}"
@@ -72,16 +169,178 @@ class TransmissionRPCController(AbstractContextManager):
 
         return client
 
+    @property
+    def client(self) -> Client:
+        """A dedicated client for callers that use transmission_rpc directly.
+
+        It is not part of the pool, so it must not be shared between threads.
+        """
+        with self._pool_lock:
+            if self._client is None:
+                self._client = self._create_client()
+
+        return self._client
+
+    def _acquire_client(self) -> Client:
+        while True:
+            try:
+                return self._idle_clients.get_nowait()
+            except queue.Empty:
+                pass
+
+            with self._pool_lock:
+                create: bool = self._clients_created < self.pool_size
+                if create:
+                    self._clients_created += 1
+
+            if create:
+                try:
+                    return self._create_client()
+                except Exception:
+                    with self._pool_lock:
+                        self._clients_created -= 1
+                    raise
+
+            ## Pool is full, wait for a client to be returned. The timeout re-checks
+            #  the pool size in case a client failed to connect in another thread.
+            try:
+                return self._idle_clients.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+    @contextmanager
+    def _borrow_client(self) -> t.Iterator[Client]:
+        """Borrow a client from the pool, creating one if the pool is not full yet."""
+        client: Client = self._acquire_client()
+        try:
+            yield client
+        finally:
+            self._idle_clients.put(client)
+
+    def _timeout_for(
+        self, method: str
+    ) -> int | float | tuple[int | float, int | float]:
+        if self.adaptive_timeout is None:
+            return self.timeout
+
+        return self.adaptive_timeout.timeout(method)
+
+    def _call(
+        self, method: str, func: t.Callable[..., t.Any], *args, **kwargs
+    ) -> t.Any:
+        """Call `func` with a timeout & retries, recording its latency & failures under the RPC `method` name.
+
+        A `timeout` keyword argument is passed to `func` unless one is given.
+        """
+        attempts: int = 1 + (
+            self.retry_policy.retries if method in IDEMPOTENT_RPC_METHODS else 0
+        )
+        deadline: float | None = (
+            None
+            if self.retry_policy.deadline is None
+            else time.monotonic() + self.retry_policy.deadline
+        )
+        timeout = kwargs.pop("timeout", None) or self._timeout_for(method)
+
+        for attempt in range(attempts):
+            probe: bool = self.circuit_breaker.before_call()
+
+            if deadline is not None and not isinstance(timeout, tuple):
+                remaining: float = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TransmissionTimeoutError(
+                        f"Deadline of {self.retry_policy.deadline}s exceeded for '{method}'"
+                    )
+                timeout = remaining if timeout is None else min(timeout, remaining)
+
+            start: float = time.perf_counter()
+            try:
+                result: t.Any = func(*args, timeout=timeout, **kwargs)
+            except RETRYABLE_EXCEPTIONS as exc:
+                self.rpc_stats.observe(method, time.perf_counter() - start)
+                self.rpc_stats.record_error(method)
+                self.circuit_breaker.record_failure()
+
+                timed_out: bool = isinstance(exc, TransmissionTimeoutError)
+                if timed_out and self.adaptive_timeout is not None:
+                    ## Timeouts count as (at least) the timeout's latency
+                    self.adaptive_timeout.observe(method, timeout)
+
+                delay: float = self.retry_policy.delay(attempt)
+                if attempt + 1 >= attempts or (
+                    deadline is not None and time.monotonic() + delay >= deadline
+                ):
+                    raise
+
+                self.logger.warning(
+                    f"RPC call '{method}' failed, retrying in {delay:.2f}s (attempt {attempt + 2}/{attempts}). Details: {exc}"
+                )
+                time.sleep(delay)
+
+                if timed_out and self.adaptive_timeout is not None:
+                    timeout = self.adaptive_timeout.escalate(timeout)
+            except Exception:
+                self.rpc_stats.observe(method, time.perf_counter() - start)
+                self.rpc_stats.record_error(method)
+                raise
+            else:
+                elapsed: float = time.perf_counter() - start
+                self.rpc_stats.observe(method, elapsed)
+                self.circuit_breaker.record_success()
+                if self.adaptive_timeout is not None:
+                    self.adaptive_timeout.observe(method, elapsed)
+
+                return result
+            finally:
+                if probe:
+                    ## A no-op after record_success/record_failure; frees the probe after non-retryable errors & interrupts
+                    self.circuit_breaker.release()
+
+    def _cached_torrents(self, fields: list[str] | None) -> list[Torrent] | None:
+        """Return a cached torrent list that includes `fields`, if one is still fresh."""
+        if self.cache_ttl <= 0:
+            return None
+
+        now: float = time.monotonic()
+        wanted: frozenset[str] | None = None if fields is None else frozenset(fields)
+
+        with self._cache_lock:
+            entries = list(self._torrent_cache.items())
+
+        for cached_fields, (fetched_at, torrents) in entries:
+            if now - fetched_at > self.cache_ttl:
+                continue
+
+            if cached_fields is None or (
+                wanted is not None and wanted <= cached_fields
+            ):
+                return torrents
+
+        return None
+
+    def invalidate_cache(self) -> None:
+        """Drop cached torrent lists, i.e. after a mutation."""
+        with self._cache_lock:
+            self._cache_generation += 1
+            self._torrent_cache.clear()
+
     def _move_or_copy(
         self,
         ids: int | str | list[int] | list[str] = None,
         dest: str | Path = None,
         move: bool = False,
     ) -> bool:
+        self.invalidate_cache()
+
         try:
-            self.client.move_torrent_data(
-                ids=ids, location=dest, timeout=self.timeout, move=move
-            )
+            with self._borrow_client() as client:
+                self._call(
+                    "torrent-set-location",
+                    client.move_torrent_data,
+                    ids=ids,
+                    location=dest,
+                    move=move,
+                )
 
             return True
         except Exception as exc:
@@ -92,6 +351,38 @@ class TransmissionRPCController(AbstractContextManager):
 
             raise exc
 
+    def raw_request(self, method: str, arguments: dict | None = None) -> dict:
+        """Send an RPC request & return the decoded response body as-is.
+
+        Unlike the typed methods, nothing is converted to transmission_rpc objects,
+        which lets callers (i.e. the RPC proxy) relay responses verbatim.
+
+        Params:
+            method (str): RPC method name, e.g. `torrent-get`.
+            arguments (dict|None): The request's `arguments` object.
+
+        Returns:
+            (dict): The response, i.e. `{"result": "success", "arguments": {...}}`.
+
+        """
+        if method not in READ_ONLY_RPC_METHODS:
+            self.invalidate_cache()
+
+        query: dict[str, t.Any] = {"method": method, "arguments": arguments or {}}
+        try:
+            ## Client._http_query() handles the session-id handshake & returns the raw body
+            with self._borrow_client() as client:
+                body: str = self._call(method, client._http_query, query)
+        except Exception as exc:
+            msg = Exception(
+                f"Unhandled exception sending '{method}' request. Details: {exc}"
+            )
+            self.logger.error(msg)
+
+            raise exc
+
+        return json.loads(body)
+
     def test_connection(self) -> bool:
         try:
             with self as conn:
@@ -108,36 +399,50 @@ class TransmissionRPCController(AbstractContextManager):
 
     def get_client(self) -> Client:
         """Return the Transmission RPC client."""
-        if self.client is None:
-            self.client = self._create_client()
-
         return self.client
 
-    def get_all_torrents(self) -> list[Torrent]:
-        if self.client is None:
-            self.client = self._create_client()
+    def get_all_torrents(self, fields: list[str] | None = None) -> list[Torrent]:
+        """Return all torrents on the remote.
 
-        try:
-            _torrents: list[Torrent] = self.client.get_torrents()
+        Params:
+            fields (list[str]|None): RPC field names to request (e.g. `["status", "doneDate"]`).
+                When `None`, every field is requested.
+        """
+        cached: list[Torrent] | None = self._cached_torrents(fields)
+        if cached is not None:
+            return cached
 
-            return _torrents
+        key: frozenset[str] | None = None if fields is None else frozenset(fields)
+
+        try:
+            ## Threads asking for the same fields at the same time share one request
+            return self._flight.do(key, lambda: self._fetch_all_torrents(fields, key))
         except Exception as exc:
             msg = Exception(f"Unhandled exception getting all torrents. Details: {exc}")
             self.logger.error(msg)
 
             raise exc
 
-    def count_torrents(self, status: str = "all") -> int:
-        if self.client is None:
-            self.client = self._create_client()
+    def _fetch_all_torrents(
+        self, fields: list[str] | None, key: frozenset[str] | None
+    ) -> list[Torrent]:
+        with self._cache_lock:
+            generation: int = self._cache_generation
 
-        try:
-            _torrents: list[Torrent] = self.client.get_torrents()
-        except Exception as exc:
-            msg = Exception(f"Unhandled exception getting all torrents. Details: {exc}")
-            self.logger.error(msg)
+        with self._borrow_client() as client:
+            _torrents: list[Torrent] = self._call(
+                "torrent-get", client.get_torrents, arguments=fields
+            )
 
-            raise exc
+        if self.cache_ttl > 0:
+            with self._cache_lock:
+                if generation == self._cache_generation:
+                    self._torrent_cache[key] = (time.monotonic(), _torrents)
+
+        return _torrents
+
+    def count_torrents(self, status: str = "all") -> int:
+        _torrents: list[Torrent] = self.get_all_torrents(fields=["status", "doneDate"])
 
         if status == "all":
             return len(_torrents)
@@ -178,11 +483,137 @@ class TransmissionRPCController(AbstractContextManager):
                 case _:
                     raise ValueError(f"Invalid state: {status}")
 
-    def get_multiple_torrents(self, ids: list[str | int] = None) -> list[Torrent]:
+    def get_torrent_ids(self) -> list[int]:
+        """Return the ids of all torrents on the remote."""
         try:
-            _torrents: list[Torrent] = self.client.get_torrents(
-                ids=ids, timeout=self.timeout
+            with self._borrow_client() as client:
+                _torrents: list[Torrent] = self._call(
+                    "torrent-get", client.get_torrents, arguments=["id"]
+                )
+        except Exception as exc:
+            msg = Exception(f"Unhandled exception getting torrent IDs. Details: {exc}")
+            self.logger.error(msg)
+
+            raise exc
+
+        return [_torrent.id for _torrent in _torrents]
+
+    def iter_torrents(
+        self,
+        fields: list[str] | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        prefetch: bool = True,
+        ids: list[int] | None = None,
+    ) -> t.Iterator[Torrent]:
+        """Yield all torrents on the remote, fetching them in chunks.
+
+        Only the id list is fetched up front, then full records are requested
+        `chunk_size` ids at a time, so memory use is bounded by the chunk size
+        instead of the number of torrents on the remote. Torrents removed while
+        iterating are skipped.
+
+        Params:
+            fields (list[str]|None): RPC field names to request. When `None`, every field is requested.
+            chunk_size (int): Number of torrents to request at a time.
+            prefetch (bool): Fetch the next chunk on a background thread while the
+                current one is consumed.
+            ids (list[int]|None): Only iterate these torrents.
+        """
+        if chunk_size < 1:
+            raise ValueError(
+                f"Invalid chunk size: {chunk_size}. Must be a positive integer"
+            )
+
+        if ids is None:
+            ids = self.get_torrent_ids()
+        chunks: list[list[int]] = [
+            ids[i : i + chunk_size] for i in range(0, len(ids), chunk_size)
+        ]
+
+        if not prefetch or len(chunks) < 2:
+            for chunk in chunks:
+                yield from self.get_multiple_torrents(ids=chunk, fields=fields)
+
+            return
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future: Future = executor.submit(
+                self.get_multiple_torrents, ids=chunks[0], fields=fields
             )
+            for next_chunk in chunks[1:] + [None]:
+                _torrents: list[Torrent] = future.result()
+                if next_chunk is not None:
+                    future = executor.submit(
+                        self.get_multiple_torrents, ids=next_chunk, fields=fields
+                    )
+
+                yield from _torrents
+                del _torrents
+
+    def stream_torrents(
+        self, fields: list[str] | None = None, ids: list[int | str] | None = None
+    ) -> t.Iterator[Torrent]:
+        """Yield torrents as they are decoded from a single, streamed `torrent-get` response.
+
+        The response body is never fully buffered, which keeps memory use flat
+        for responses with huge `files`/`fileStats` lists. Calls are not retried.
+
+        Params:
+            fields (list[str]|None): RPC field names to request. When `None`, every field is requested.
+            ids (list[int|str]|None): Only fetch these torrents.
+        """
+        if fields is None:
+            with self._borrow_client() as client:
+                fields = get_torrent_arguments(client.rpc_version)
+        else:
+            fields = list(set(fields) | {"id", "hashString"})
+
+        timeout = self._timeout_for("torrent-get") or 30.0
+        transport = StreamingTransport(
+            host=self.host or "127.0.0.1",
+            port=self.port or 9091,
+            path=self.path or "/transmission/rpc",
+            protocol=self.protocol or "http",
+            username=self.username,
+            password=self.password,
+            ## Streaming reads use the read timeout of a (connect, read) tuple
+            timeout=timeout[1] if isinstance(timeout, tuple) else timeout,
+        )
+
+        probe: bool = self.circuit_breaker.before_call()
+        start: float = time.perf_counter()
+        try:
+            for record in transport.iter_torrents(fields, ids=ids):
+                yield Torrent(fields=record)
+        except RETRYABLE_EXCEPTIONS:
+            self.rpc_stats.record_error("torrent-get")
+            self.circuit_breaker.record_failure()
+            raise
+        except Exception as exc:
+            self.rpc_stats.record_error("torrent-get")
+            msg = Exception(f"Unhandled exception streaming torrents. Details: {exc}")
+            self.logger.error(msg)
+
+            raise exc
+        else:
+            self.circuit_breaker.record_success()
+        finally:
+            self.rpc_stats.observe("torrent-get", time.perf_counter() - start)
+            if probe:
+                ## Frees the probe after non-retryable errors, or a stream abandoned by its consumer
+                self.circuit_breaker.release()
+
+    def get_multiple_torrents(
+        self, ids: list[str | int] = None, fields: list[str] | None = None
+    ) -> list[Torrent]:
+        try:
+            with self._borrow_client() as client:
+                _torrents: list[Torrent] = self._call(
+                    "torrent-get",
+                    client.get_torrents,
+                    ids=ids,
+                    arguments=fields,
+                )
 
             return _torrents
         except Exception as exc:
@@ -193,9 +624,12 @@ class TransmissionRPCController(AbstractContextManager):
 
     def get_single_torrent(self, torrent_id: str | int = None):
         try:
-            _torrent: Torrent = self.client.get_torrent(
-                torrent_id=torrent_id, timeout=self.timeout
-            )
+            with self._borrow_client() as client:
+                _torrent: Torrent = self._call(
+                    "torrent-get",
+                    client.get_torrent,
+                    torrent_id=torrent_id,
+                )
 
             return _torrent
         except Exception as exc:
@@ -255,7 +689,10 @@ class TransmissionRPCController(AbstractContextManager):
 
     def get_free_space(self, remote_path: str = "/") -> int | None:
         try:
-            free_space: int | None = self.client.free_space(path=remote_path)
+            with self._borrow_client() as client:
+                free_space: int | None = self._call(
+                    "free-space", client.free_space, path=remote_path
+                )
 
             return free_space
         except Exception as exc:
@@ -266,16 +703,262 @@ class TransmissionRPCController(AbstractContextManager):
 
             raise exc
 
-    def get_recently_active(self) -> t.Tuple[t.List[Torrent] | t.List[int]]:
-        recently_active: t.Tuple[t.List[Torrent] | t.List[int]] = (
-            self.client.get_recently_active_torrents()
-        )
+    def add_torrent(
+        self,
+        torrent: bytes | str,
+        download_dir: str | None = None,
+        paused: bool | None = None,
+        labels: list[str] | None = None,
+    ) -> tuple[dict[str, t.Any], bool]:
+        """Add a torrent from `.torrent` file contents, or a magnet link/URL.
+
+        Params:
+            torrent (bytes|str): `.torrent` file contents, or a magnet link or URL the daemon can fetch.
+            download_dir (str|None): Download dir. Defaults to the daemon's.
+            paused (bool|None): Add the torrent stopped.
+            labels (list[str]|None): Labels to set.
+
+        Returns:
+            (tuple[dict, bool]): The torrent's `id`, `name` & `hashString`, and whether the daemon already had it.
+
+        """
+        arguments: dict[str, t.Any] = {}
+        if isinstance(torrent, bytes):
+            arguments["metainfo"] = base64.b64encode(torrent).decode()
+        else:
+            arguments["filename"] = torrent
+        if download_dir is not None:
+            arguments["download-dir"] = download_dir
+        if paused is not None:
+            arguments["paused"] = paused
+        if labels:
+            arguments["labels"] = list(labels)
+
+        response: dict[str, t.Any] = self.raw_request("torrent-add", arguments)
+        if response.get("result") != "success":
+            raise ValueError(
+                f"Could not add torrent. Details: {response.get('result')}"
+            )
+
+        added: dict[str, t.Any] = response.get("arguments") or {}
+        if "torrent-duplicate" in added:
+            return added["torrent-duplicate"], True
+
+        return added["torrent-added"], False
+
+    def get_recently_active(
+        self, fields: list[str] | None = None
+    ) -> t.Tuple[t.List[Torrent] | t.List[int]]:
+        """Torrents active in the last minute, and ids of torrents removed in the last minute.
+
+        Params:
+            fields (list[str]|None): RPC field names to request. When `None`, every field is requested.
+        """
+        with self._borrow_client() as client:
+            recently_active: t.Tuple[t.List[Torrent] | t.List[int]] = self._call(
+                "torrent-get", client.get_recently_active_torrents, arguments=fields
+            )
 
         return recently_active
 
+    def _bulk_action(
+        self,
+        method: str,
+        client_method: str,
+        ids: list[int | str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        on_batch: t.Callable[[int, int], None] | None = None,
+        journal: OperationJournal | None = None,
+        **kwargs,
+    ) -> int:
+        """Call `client_method` for `ids`, sending up to `batch_size` ids per request.
+
+        Params:
+            on_batch (Callable[[int, int], None]|None): Called with (done, total) after each batch.
+            journal (OperationJournal|None): Record the planned ids, & each batch before it is sent and once it is confirmed.
+
+        Returns:
+            (int): The number of torrents the action was sent for.
+
+        """
+        if batch_size < 1:
+            raise ValueError(
+                f"Invalid batch size: {batch_size}. Must be a positive integer"
+            )
+        if not ids:
+            ## Nothing to send, or to journal
+            return 0
+
+        self.invalidate_cache()
+        if journal is not None:
+            journal.begin(method, client_method, list(ids), batch_size, kwargs)
+
+        done: int = 0
+        for i in range(0, len(ids), batch_size):
+            batch: list[int | str] = ids[i : i + batch_size]
+            index: int | None = journal.batch(batch) if journal is not None else None
+            try:
+                with self._borrow_client() as client:
+                    self._call(method, getattr(client, client_method), batch, **kwargs)
+            except Exception as exc:
+                msg = f"({type(exc)}) Error sending '{method}' for {len(batch)} torrent(s). Details: {exc}"
+                self.logger.error(msg)
+                if journal is not None:
+                    journal.batch_failed(index, str(exc))
+                    journal.end("failed", error=str(exc))
+
+                raise exc
+
+            if journal is not None:
+                journal.batch_done(index)
+
+            done += len(batch)
+            if on_batch is not None:
+                on_batch(done, len(ids))
+
+        if journal is not None:
+            journal.end()
+
+        return done
+
+    def start_torrents(
+        self,
+        ids: list[int | str],
+        bypass_queue: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        on_batch: t.Callable[[int, int], None] | None = None,
+        journal: OperationJournal | None = None,
+    ) -> int:
+        """Start torrents in batched requests. With `bypass_queue`, start them immediately."""
+        return self._bulk_action(
+            "torrent-start-now" if bypass_queue else "torrent-start",
+            "start_torrent",
+            ids,
+            batch_size=batch_size,
+            on_batch=on_batch,
+            journal=journal,
+            bypass_queue=bypass_queue,
+        )
+
+    def stop_torrents(
+        self,
+        ids: list[int | str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        on_batch: t.Callable[[int, int], None] | None = None,
+        journal: OperationJournal | None = None,
+    ) -> int:
+        """Stop torrents in batched requests."""
+        return self._bulk_action(
+            "torrent-stop",
+            "stop_torrent",
+            ids,
+            batch_size=batch_size,
+            on_batch=on_batch,
+            journal=journal,
+        )
+
+    def verify_torrents(
+        self,
+        ids: list[int | str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        on_batch: t.Callable[[int, int], None] | None = None,
+        journal: OperationJournal | None = None,
+    ) -> int:
+        """Queue torrents for verification in batched requests."""
+        return self._bulk_action(
+            "torrent-verify",
+            "verify_torrent",
+            ids,
+            batch_size=batch_size,
+            on_batch=on_batch,
+            journal=journal,
+        )
+
+    def reannounce_torrents(
+        self,
+        ids: list[int | str],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        on_batch: t.Callable[[int, int], None] | None = None,
+        journal: OperationJournal | None = None,
+    ) -> int:
+        """Reannounce torrents to their trackers in batched requests."""
+        return self._bulk_action(
+            "torrent-reannounce",
+            "reannounce_torrent",
+            ids,
+            batch_size=batch_size,
+            on_batch=on_batch,
+            journal=journal,
+        )
+
+    def remove_torrents(
+        self,
+        ids: list[int | str],
+        delete_data: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        on_batch: t.Callable[[int, int], None] | None = None,
+        journal: OperationJournal | None = None,
+    ) -> int:
+        """Remove torrents in batched requests. With `delete_data`, also delete their downloaded files."""
+        return self._bulk_action(
+            "torrent-remove",
+            "remove_torrent",
+            ids,
+            batch_size=batch_size,
+            on_batch=on_batch,
+            journal=journal,
+            delete_data=delete_data,
+        )
+
+    def move_torrents(
+        self,
+        ids: list[int | str],
+        dest: str | Path,
+        move: bool = True,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        on_batch: t.Callable[[int, int], None] | None = None,
+        journal: OperationJournal | None = None,
+    ) -> int:
+        """Set the download dir of torrents in batched requests. With `move`, the daemon also moves their data."""
+        return self._bulk_action(
+            "torrent-set-location",
+            "move_torrent_data",
+            ids,
+            batch_size=batch_size,
+            on_batch=on_batch,
+            journal=journal,
+            location=str(dest),
+            move=move,
+        )
+
+    def set_torrents(
+        self,
+        ids: list[int | str],
+        arguments: dict[str, t.Any],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        on_batch: t.Callable[[int, int], None] | None = None,
+        journal: OperationJournal | None = None,
+    ) -> int:
+        """Apply the same `torrent-set` arguments (RPC names, e.g. `uploadLimit`) to torrents in batched requests."""
+        if not arguments:
+            raise ValueError("No arguments to set")
+
+        return self._bulk_action(
+            "torrent-set",
+            "change_torrent",
+            ids,
+            batch_size=batch_size,
+            on_batch=on_batch,
+            journal=journal,
+            **arguments,
+        )
+
     def start_torrent(self, torrent: Torrent):
+        self.invalidate_cache()
+
         try:
-            self.client.start_torrent(torrent.id)
+            with self._borrow_client() as client:
+                self._call("torrent-start", client.start_torrent, torrent.id)
         except Exception as exc:
             msg = (
                 f"({type(exc)}) Error starting torrent '{torrent.name}'. Details: {exc}"
@@ -285,8 +968,11 @@ class TransmissionRPCController(AbstractContextManager):
             raise exc
 
     def start_torrent_by_id(self, torrent_id: int):
+        self.invalidate_cache()
+
         try:
-            self.client.start_torrent(torrent_id)
+            with self._borrow_client() as client:
+                self._call("torrent-start", client.start_torrent, torrent_id)
         except Exception as exc:
             msg = f"({type(exc)}) Error starting torrent '{torrent_id}'. Details: {exc}"
             log.error(msg)
@@ -294,8 +980,11 @@ class TransmissionRPCController(AbstractContextManager):
             raise exc
 
     def stop_torrent(self, torrent: Torrent):
+        self.invalidate_cache()
+
         try:
-            self.client.stop_torrent(torrent.id)
+            with self._borrow_client() as client:
+                self._call("torrent-stop", client.stop_torrent, torrent.id)
         except Exception as exc:
             msg = (
                 f"({type(exc)}) Error stopping torrent '{torrent.name}'. Details: {exc}"
@@ -305,8 +994,11 @@ class TransmissionRPCController(AbstractContextManager):
             raise exc
 
     def stop_torrent_by_id(self, torrent_id: int):
+        self.invalidate_cache()
+
         try:
-            self.client.stop_torrent(torrent_id)
+            with self._borrow_client() as client:
+                self._call("torrent-stop", client.stop_torrent, torrent_id)
         except Exception as exc:
             msg = f"({type(exc)}) Error stopping torrent '{torrent_id}'. Details: {exc}"
             log.error(msg)
@@ -338,12 +1030,17 @@ class TransmissionRPCController(AbstractContextManager):
         try:
             self.logger.info(f"Deleting torrent with ID '{torrent_id}'")
 
-            # Assuming `self.client.remove_torrent()` is the method to delete torrents
+            # Assuming `client.remove_torrent()` is the method to delete torrents
             # If 'remove_files' is True, pass that flag to remove the data
+            self.invalidate_cache()
             try:
-                result = self.client.remove_torrent(
-                    torrent_id, delete_data=remove_files
-                )
+                with self._borrow_client() as client:
+                    result = self._call(
+                        "torrent-remove",
+                        client.remove_torrent,
+                        torrent_id,
+                        delete_data=remove_files,
+                    )
 
                 self.logger.info(f"Successfully deleted torrent with ID '{torrent_id}'")
                 return True
@@ -359,62 +1056,53 @@ class TransmissionRPCController(AbstractContextManager):
             raise exc
 
     def delete_torrent_by_status(
-        self, status: str, remove_files: bool = False, dry_run: bool = False
+        self,
+        status: str,
+        remove_files: bool = False,
+        dry_run: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        journal: OperationJournal | None = None,
     ):
-        """Remove torrents by status (i.e. 'downloading', 'seeding', etc.)"""
+        """Remove torrents by status (i.e. 'downloading', 'seeding', etc.)
+
+        With a `journal`, torrents are removed by hash, so an interrupted run can be
+        resumed even if the daemon restarted (and renumbered its torrents) since.
+        """
         if status is None:
             raise ValueError(
                 "Missing a status argument, e.g. 'downloading', 'seeding', etc."
             )
 
-        if self.client is None:
-            self.client = self._create_client()
-
-        try:
-            _torrents: list[Torrent] = self.client.get_torrents()
-        except Exception as exc:
-            msg = Exception(f"Unhandled exception getting all torrents. Details: {exc}")
-            self.logger.error(msg)
-
-            raise exc
-
+        status = status.lower()
         if status == "all":
             log.warning(f"Status 'all' will delete all torrents in any state.")
+        elif status not in VALID_TORRENT_STATES:
+            raise ValueError(f"Invalid state: {status}")
 
-            delete_torrents = _torrents
-        else:
-            match status.lower():
-                case "check pending":
-                    delete_torrents = [
-                        t for t in _torrents if t.status == "check pending"
-                    ]
-                case "checking":
-                    delete_torrents = [t for t in _torrents if t.status == "checking"]
-                case "downloading":
-                    delete_torrents = [
-                        t for t in _torrents if t.status == "downloading"
-                    ]
-                case "download pending":
-                    delete_torrents = [
-                        t for t in _torrents if t.status == "download pending"
-                    ]
-                case "seeding":
-                    delete_torrents = [t for t in _torrents if t.status == "seeding"]
-                case "seed pending":
-                    delete_torrents = [
-                        t for t in _torrents if t.status == "seed pending"
-                    ]
-                case "stopped":
-                    delete_torrents = [t for t in _torrents if t.status == "stopped"]
+        def _matches(_torrent: Torrent) -> bool:
+            match status:
+                case "all":
+                    return True
                 case "finished" | "completed":
-                    delete_torrents = [t for t in _torrents if t.done_date]
+                    return bool(_torrent.done_date)
                 case _:
-                    raise ValueError(f"Invalid state: {status}")
+                    return _torrent.status == status
+
+        delete_torrents: list[Torrent] = [
+            _torrent
+            for _torrent in self.iter_torrents(
+                fields=["name", "hashString", "status", "doneDate"],
+                chunk_size=chunk_size,
+            )
+            if _matches(_torrent)
+        ]
 
         log.debug(
             f"[{len(delete_torrents)}] queued for deletion. Remove files: {remove_files}."
         )
-        delete_ids = [t.id for t in delete_torrents]
+        delete_ids: list[int | str] = [
+            t.hashString if journal is not None else t.id for t in delete_torrents
+        ]
 
         if dry_run:
             log.warning("Dry run enabled, no torrents will be deleted.")
@@ -424,7 +1112,12 @@ class TransmissionRPCController(AbstractContextManager):
 
         log.debug(f"Deleting {len(delete_ids)} torrent(s)")
         try:
-            self.delete_torrent_by_id(delete_ids, remove_files)
+            self.remove_torrents(
+                delete_ids,
+                delete_data=remove_files,
+                batch_size=chunk_size,
+                journal=journal,
+            )
 
             return delete_torrents
         except Exception as exc:
@@ -0,0 +1,308 @@
+"""Find torrents that are on more than one host.
+
+Every host is fetched concurrently, with a single `torrent-get` for only the
+fields in `DUPLICATE_FIELDS`. Torrents are then indexed by info hash, so exact
+duplicates are found with one dict lookup per torrent.
+
+A secondary, fuzzy index groups torrents with the same normalized name (case,
+separators, extensions & release tags like `REPACK`/`PROPER` ignored) and sizes
+within a tolerance, to find re-packs & re-uploads of the same content, which
+have different info hashes.
+
+In each group, a finished copy is always kept over unfinished ones, so the only
+complete copy is never removed; among the finished copies (or the unfinished
+ones, if none is finished) the one on the most preferred host is kept. Hosts are
+ranked by the `preferred` list, then by config order.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import logging
+import typing as t
+
+if t.TYPE_CHECKING:
+    from .controllers import TransmissionRPCController
+
+    from transmission_rpc.torrent import Torrent
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "DUPLICATE_FIELDS",
+    "DuplicateCopy",
+    "DuplicateGroup",
+    "normalize_name",
+    "fetch_host_torrents",
+    "find_duplicates",
+    "plan_duplicate_removals",
+]
+
+## RPC fields needed to index torrents
+DUPLICATE_FIELDS: list[str] = [
+    "id",
+    "hashString",
+    "name",
+    "totalSize",
+    "leftUntilDone",
+    "downloadDir",
+]
+
+_EXTENSIONS: frozenset[str] = frozenset(
+    [
+        "mkv",
+        "mp4",
+        "m4v",
+        "avi",
+        "iso",
+        "img",
+        "zip",
+        "rar",
+        "7z",
+        "tar",
+        "gz",
+        "flac",
+        "mp3",
+        "epub",
+        "pdf",
+    ]
+)
+_SEPARATORS: dict[int, str] = str.maketrans({c: " " for c in "._-[](){}+"})
+## Tags that differ between re-packs of the same release
+_RELEASE_TAGS: frozenset[str] = frozenset(
+    ["repack", "proper", "rerip", "real", "internal", "dirfix", "nfofix"]
+    + [f"repack{i}" for i in range(1, 10)]
+    + [f"v{i}" for i in range(2, 10)]
+)
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a torrent name for fuzzy matching, i.e. `Show.S01E01.REPACK.1080p.mkv` -> `show s01e01 1080p`."""
+    name = name.lower()
+    head, dot, extension = name.rpartition(".")
+    if dot and extension in _EXTENSIONS:
+        name = head
+
+    return " ".join(
+        word
+        for word in name.translate(_SEPARATORS).split()
+        if word not in _RELEASE_TAGS
+    )
+
+
+@dataclass
+class DuplicateCopy:
+    """A torrent on one host.
+
+    Attributes:
+        host (str): Host name.
+        id (int): Torrent ID on the host.
+        hash (str): Info hash.
+        name (str): Torrent name.
+        size (int): Total size in bytes.
+        finished (bool): Whether the torrent is fully downloaded.
+        download_dir (str): Download dir on the host.
+
+    """
+
+    host: str = field(default=None)
+    id: int = field(default=None)
+    hash: str = field(default=None)
+    name: str = field(default=None)
+    size: int = field(default=0)
+    finished: bool = field(default=False)
+    download_dir: str = field(default=None)
+
+    @classmethod
+    def from_fields(cls, host: str, fields: dict[str, t.Any]) -> "DuplicateCopy":
+        """Build a copy from a torrent's raw RPC fields."""
+        return cls(
+            host=host,
+            id=fields["id"],
+            hash=fields["hashString"],
+            name=fields["name"],
+            size=fields["totalSize"],
+            finished=not fields["leftUntilDone"],
+            download_dir=fields["downloadDir"],
+        )
+
+
+@dataclass
+class DuplicateGroup:
+    """Copies of the same torrent (`hash`) or content (`fuzzy`) on several hosts.
+
+    Attributes:
+        kind (str): `hash` for the same info hash, `fuzzy` for the same normalized name & size.
+        key (str): The info hash, or normalized name.
+        keep (DuplicateCopy): The copy to keep.
+        remove (list[DuplicateCopy]): Copies on other hosts.
+
+    """
+
+    kind: str = field(default="hash")
+    key: str = field(default=None)
+    keep: DuplicateCopy = field(default=None)
+    remove: list[DuplicateCopy] = field(default_factory=list)
+
+    @property
+    def copies(self) -> list[DuplicateCopy]:
+        return [self.keep] + self.remove
+
+    @property
+    def wasted(self) -> int:
+        """Bytes used by the copies that would be removed."""
+        return sum(copy.size for copy in self.remove)
+
+
+def fetch_host_torrents(
+    controllers: dict[str, TransmissionRPCController],
+    fields: list[str] | None = None,
+) -> tuple[dict[str, list[Torrent]], dict[str, str]]:
+    """Fetch torrents from every host concurrently, with one projected `torrent-get` each.
+
+    Returns:
+        (tuple[dict[str, list[Torrent]], dict[str, str]]): Torrents per host, and errors per host that could not be fetched.
+
+    """
+    fields = fields or DUPLICATE_FIELDS
+    torrents: dict[str, list[Torrent]] = {}
+    errors: dict[str, str] = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, len(controllers))) as pool:
+        futures = {
+            name: pool.submit(controller.get_all_torrents, fields=fields)
+            for name, controller in controllers.items()
+        }
+        for name, future in futures.items():
+            try:
+                torrents[name] = future.result()
+            except Exception as exc:
+                log.error(
+                    f"Could not fetch torrents from host '{name}'. Details: {exc}"
+                )
+                errors[name] = str(exc)
+
+    return torrents, errors
+
+
+## (host, raw torrent fields), copies are only built for torrents in a group
+_Entry = tuple[str, dict[str, t.Any]]
+
+
+def _size_clusters(entries: list[_Entry], tolerance: float) -> t.Iterator[list[_Entry]]:
+    """Split entries into runs of sizes within `tolerance` (a fraction) of the run's smallest."""
+    entries = sorted(entries, key=lambda entry: entry[1]["totalSize"])
+    cluster: list[_Entry] = [entries[0]]
+
+    for entry in entries[1:]:
+        if entry[1]["totalSize"] > cluster[0][1]["totalSize"] * (1 + tolerance):
+            yield cluster
+            cluster = []
+        cluster.append(entry)
+
+    yield cluster
+
+
+def find_duplicates(
+    torrents: dict[str, t.Iterable[Torrent]],
+    preferred: list[str] | None = None,
+    fuzzy: bool = True,
+    size_tolerance: float = 0.01,
+) -> list[DuplicateGroup]:
+    """Find torrents on more than one host.
+
+    Params:
+        torrents (dict[str, Iterable[Torrent]]): Torrents per host, with `DUPLICATE_FIELDS`, in config order.
+        preferred (list[str]|None): Hosts to keep finished copies on, most preferred first. Other hosts rank after, in config order.
+        fuzzy (bool): Also group different torrents with the same normalized name & size.
+        size_tolerance (float): Max relative size difference within a fuzzy group, i.e. `0.01` for 1%.
+
+    Returns:
+        (list[DuplicateGroup]): Hash groups, then fuzzy groups, most wasted space first.
+
+    """
+    order: list[str] = [host for host in preferred or [] if host in torrents]
+    order += [host for host in torrents if host not in order]
+    rank: dict[str, int] = {host: i for i, host in enumerate(order)}
+
+    def _keep_key(entry: _Entry) -> tuple[bool, int]:
+        ## Completeness before host rank: never keep an unfinished copy over a finished one
+        return bool(entry[1]["leftUntilDone"]), rank[entry[0]]
+
+    def _group(kind: str, key: str, entries: list[_Entry]) -> DuplicateGroup:
+        copies: list[DuplicateCopy] = [
+            DuplicateCopy.from_fields(*entry) for entry in entries
+        ]
+
+        return DuplicateGroup(kind=kind, key=key, keep=copies[0], remove=copies[1:])
+
+    by_hash: dict[str, list[_Entry]] = {}
+    for host, host_torrents in torrents.items():
+        for torrent in host_torrents:
+            fields: dict[str, t.Any] = torrent.fields
+            by_hash.setdefault(fields["hashString"], []).append((host, fields))
+
+    groups: list[DuplicateGroup] = [
+        _group("hash", info_hash, sorted(entries, key=_keep_key))
+        for info_hash, entries in by_hash.items()
+        if len(entries) > 1
+    ]
+    groups.sort(key=lambda group: group.wasted, reverse=True)
+
+    if not fuzzy:
+        return groups
+
+    by_name: dict[str, list[_Entry]] = {}
+    for entries in by_hash.values():
+        ## Copies of a hash share a name, normalize it once
+        by_name.setdefault(normalize_name(entries[0][1]["name"]), []).extend(entries)
+
+    fuzzy_groups: list[DuplicateGroup] = []
+    for name, entries in by_name.items():
+        ## Names with one hash are exact duplicates (or none), handled above
+        if len(entries) < 2 or len({entry[1]["hashString"] for entry in entries}) < 2:
+            continue
+
+        for cluster in _size_clusters(entries, size_tolerance):
+            if len({entry[1]["hashString"] for entry in cluster}) < 2:
+                continue
+
+            ## The best copy per host, same-host variants are left alone
+            best: dict[str, _Entry] = {}
+            for entry in sorted(cluster, key=_keep_key):
+                best.setdefault(entry[0], entry)
+            if len(best) > 1:
+                fuzzy_groups.append(_group("fuzzy", name, list(best.values())))
+    fuzzy_groups.sort(key=lambda group: group.wasted, reverse=True)
+
+    return groups + fuzzy_groups
+
+
+def plan_duplicate_removals(
+    groups: t.Iterable[DuplicateGroup], include_fuzzy: bool = False
+) -> dict[str, list[DuplicateCopy]]:
+    """Copies to remove, per host. A copy in several groups is listed once.
+
+    Params:
+        groups (Iterable[DuplicateGroup]): Groups from `find_duplicates()`.
+        include_fuzzy (bool): Also remove copies from fuzzy groups, not only exact duplicates.
+    """
+    keep: set[tuple[str, str]] = set()
+    removals: dict[str, dict[str, DuplicateCopy]] = {}
+
+    for group in groups:
+        if group.kind == "fuzzy" and not include_fuzzy:
+            continue
+
+        keep.add((group.keep.host, group.keep.hash))
+        for copy in group.remove:
+            removals.setdefault(copy.host, {})[copy.hash] = copy
+
+    ## Never remove a copy another group keeps
+    return {
+        host: [
+            copy for info_hash, copy in copies.items() if (host, info_hash) not in keep
+        ]
+        for host, copies in removals.items()
+    }
@@ -0,0 +1,465 @@
+"""Live torrent state per host, and change events derived from it.
+
+A `TorrentStateTracker` fetches a few fields of every torrent once, then keeps
+its state current with `recently-active` deltas: the daemon only returns the
+torrents active in the last minute, and the ids of torrents removed in the last
+minute, so an idle host costs one near-empty `torrent-get` per poll instead of a
+full refetch. Since the daemon forgets activity after `RECENTLY_ACTIVE_SECONDS`,
+a poll that comes later than that does a full resync instead, as does every
+`resync_interval` (catching changes that don't count as activity).
+
+Each change is a `TorrentEvent`:
+
+- `added`: a torrent new to the host.
+- `removed`: a torrent no longer on the host.
+- `status`: a status change, i.e. `downloading` to `seeding`, with the previous status.
+- `finished`: a torrent done downloading (`leftUntilDone` dropped to 0).
+
+`AdaptiveInterval` polls fast while torrents are transitioning (checking,
+queued, or events were just seen) and backs off exponentially while idle.
+`TorrentWatcher` polls hosts concurrently & hands events to a sink: any callable
+taking a `TorrentEvent`, i.e. `NDJSONSink`, or one loaded with `load_callable()`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+import importlib
+import json
+import logging
+import sys
+import threading
+import time
+import typing as t
+
+if t.TYPE_CHECKING:
+    from .controllers import TransmissionRPCController
+
+    from transmission_rpc.torrent import Torrent
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "RECENTLY_ACTIVE_SECONDS",
+    "EVENT_TYPES",
+    "TRANSITIONAL_STATUSES",
+    "WATCH_FIELDS",
+    "TorrentEvent",
+    "TorrentStateTracker",
+    "AdaptiveInterval",
+    "NDJSONSink",
+    "load_callable",
+    "WatchStats",
+    "TorrentWatcher",
+]
+
+## How long the daemon reports a torrent as recently active (or removed)
+RECENTLY_ACTIVE_SECONDS: float = 60.0
+EVENT_TYPES: list[str] = ["added", "removed", "status", "finished"]
+## Statuses a torrent doesn't stay in for long
+TRANSITIONAL_STATUSES: set[str] = {
+    "check pending",
+    "checking",
+    "download pending",
+    "seed pending",
+}
+WATCH_FIELDS: list[str] = [
+    "id",
+    "hashString",
+    "name",
+    "status",
+    "leftUntilDone",
+    "downloadDir",
+    "labels",
+]
+
+
+@dataclass
+class TorrentEvent:
+    """A change to a torrent on a host.
+
+    Attributes:
+        event (str): One of `EVENT_TYPES`.
+        host (str): Host name.
+        hash (str): Info hash.
+        id (int): Torrent ID on the host.
+        name (str): Torrent name.
+        status (str|None): Status after the change (`None` for `removed`).
+        previous (str|None): Status before the change (`status` events only).
+        download_dir (str|None): Download dir.
+        labels (list[str]): Labels.
+        time (float): Unix time the change was seen.
+
+    """
+
+    event: str = field(default=None)
+    host: str = field(default=None)
+    hash: str = field(default=None)
+    id: int = field(default=None)
+    name: str = field(default=None)
+    status: str | None = field(default=None)
+    previous: str | None = field(default=None)
+    download_dir: str | None = field(default=None)
+    labels: list[str] = field(default_factory=list)
+    time: float = field(default=0.0)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+
+@dataclass
+class _TorrentState:
+    hash: str
+    name: str
+    status: str
+    left: int
+    download_dir: str | None
+    labels: list[str]
+
+    @classmethod
+    def from_torrent(cls, torrent: Torrent) -> "_TorrentState":
+        fields: dict[str, t.Any] = torrent.fields
+
+        return cls(
+            hash=fields.get("hashString", ""),
+            name=fields.get("name", ""),
+            status=str(torrent.status) if "status" in fields else "",
+            left=fields.get("leftUntilDone", 0),
+            download_dir=fields.get("downloadDir"),
+            labels=list(fields.get("labels") or []),
+        )
+
+
+class TorrentStateTracker:
+    """Live state of a host's torrents, kept current with `recently-active` deltas.
+
+    Params:
+        controller (TransmissionRPCController): The host.
+        host (str|None): Host name for events. Defaults to the controller's host.
+        resync_interval (float): Seconds between full resyncs.
+    """
+
+    def __init__(
+        self,
+        controller: TransmissionRPCController,
+        host: str | None = None,
+        resync_interval: float = 600.0,
+    ) -> None:
+        self.controller: TransmissionRPCController = controller
+        self.host: str = host or str(controller.host)
+        self.resync_interval: float = resync_interval
+
+        self.torrents: dict[int, _TorrentState] = {}
+        ## Ids of torrents in a TRANSITIONAL_STATUSES status
+        self.transitional: set[int] = set()
+        self.synced: bool = False
+        self.last_poll: float | None = None
+        self.last_sync: float | None = None
+        self._stale: bool = False
+
+    def __len__(self) -> int:
+        return len(self.torrents)
+
+    def invalidate(self) -> None:
+        """Resync on the next poll, i.e. after a failed poll, whose delta is lost."""
+        self._stale = True
+
+    def _event(
+        self,
+        event: str,
+        torrent_id: int,
+        state: _TorrentState,
+        now: float,
+        previous: str | None = None,
+    ) -> TorrentEvent:
+        return TorrentEvent(
+            event=event,
+            host=self.host,
+            hash=state.hash,
+            id=torrent_id,
+            name=state.name,
+            status=None if event == "removed" else state.status,
+            previous=previous,
+            download_dir=state.download_dir,
+            labels=state.labels,
+            time=now,
+        )
+
+    def _update(self, torrent: Torrent, now: float) -> list[TorrentEvent]:
+        torrent_id: int = torrent.fields["id"]
+        state: _TorrentState = _TorrentState.from_torrent(torrent)
+        old: _TorrentState | None = self.torrents.get(torrent_id)
+        self.torrents[torrent_id] = state
+
+        if state.status in TRANSITIONAL_STATUSES:
+            self.transitional.add(torrent_id)
+        else:
+            self.transitional.discard(torrent_id)
+
+        if old is None:
+            return [self._event("added", torrent_id, state, now)] if self.synced else []
+
+        events: list[TorrentEvent] = []
+        if old.status != state.status:
+            events.append(
+                self._event("status", torrent_id, state, now, previous=old.status)
+            )
+        if old.left > 0 and state.left == 0:
+            events.append(self._event("finished", torrent_id, state, now))
+
+        return events
+
+    def _remove(self, torrent_id: int, now: float) -> list[TorrentEvent]:
+        state: _TorrentState | None = self.torrents.pop(torrent_id, None)
+        self.transitional.discard(torrent_id)
+        if state is None:
+            return []
+
+        return [self._event("removed", torrent_id, state, now)]
+
+    def sync(self) -> list[TorrentEvent]:
+        """Fetch every torrent & diff against the known state. The first sync is a baseline, without events."""
+        now: float = time.time()
+        torrents: list[Torrent] = self.controller.get_all_torrents(fields=WATCH_FIELDS)
+
+        events: list[TorrentEvent] = []
+        seen: set[int] = set()
+        for torrent in torrents:
+            seen.add(torrent.fields["id"])
+            events.extend(self._update(torrent, now))
+        for torrent_id in set(self.torrents) - seen:
+            events.extend(self._remove(torrent_id, now))
+
+        self.synced = True
+        self._stale = False
+        self.last_sync = self.last_poll = time.monotonic()
+        log.debug(f"[{self.host}] Synced {len(self.torrents)} torrent(s)")
+
+        return events
+
+    def poll(self) -> list[TorrentEvent]:
+        """Apply the `recently-active` delta, or resync if it could have missed changes."""
+        monotonic: float = time.monotonic()
+        if (
+            not self.synced
+            or self._stale
+            ## Leave a margin for the request's own latency
+            or monotonic - self.last_poll > RECENTLY_ACTIVE_SECONDS * 0.9
+            or monotonic - self.last_sync > self.resync_interval
+        ):
+            return self.sync()
+
+        now: float = time.time()
+        active, removed = self.controller.get_recently_active(fields=WATCH_FIELDS)
+        self.last_poll = monotonic
+
+        events: list[TorrentEvent] = []
+        for torrent in active:
+            events.extend(self._update(torrent, now))
+        for torrent_id in removed:
+            events.extend(self._remove(torrent_id, now))
+
+        return events
+
+
+class AdaptiveInterval:
+    """A poll interval that drops to `minimum` on activity & doubles (up to `maximum`) while idle.
+
+    Params:
+        minimum (float): Seconds between polls while torrents are transitioning.
+        maximum (float): Seconds between polls while idle. Capped below `RECENTLY_ACTIVE_SECONDS`.
+        factor (float): Growth per idle poll.
+    """
+
+    def __init__(
+        self, minimum: float = 1.0, maximum: float = 30.0, factor: float = 2.0
+    ) -> None:
+        if maximum > RECENTLY_ACTIVE_SECONDS * 0.9:
+            log.warning(
+                f"Max poll interval {maximum}s would miss activity, capped at {RECENTLY_ACTIVE_SECONDS * 0.9:.0f}s"
+            )
+            maximum = RECENTLY_ACTIVE_SECONDS * 0.9
+        self.minimum: float = minimum
+        self.maximum: float = max(minimum, maximum)
+        self.factor: float = factor
+        self.current: float = minimum
+
+    def next(self, active: bool) -> float:
+        """Seconds until the next poll, after a poll that did (or didn't) see activity."""
+        self.current = (
+            self.minimum if active else min(self.maximum, self.current * self.factor)
+        )
+
+        return self.current
+
+
+class NDJSONSink:
+    """Write events as newline-delimited JSON, to stdout or a file (appended).
+
+    Params:
+        path (str|None): File to append to. `None` or `-` for stdout.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path: str | None = None if path in (None, "-") else path
+        self._stream: t.TextIO = (
+            sys.stdout if self.path is None else open(self.path, "a", encoding="utf-8")
+        )
+
+    def __call__(self, event: TorrentEvent) -> None:
+        self._stream.write(event.to_json() + "\n")
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+    def close(self) -> None:
+        if self.path is not None:
+            self._stream.close()
+        else:
+            self._stream.flush()
+
+
+def load_callable(spec: str) -> t.Callable[..., t.Any]:
+    """Import a callable from a `module:attribute` spec, i.e. `mypackage.sinks:to_kafka`.
+
+    Raises:
+        ValueError: If the spec is malformed, or the attribute is not callable.
+
+    """
+    module_name, _, attribute = spec.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Invalid callable '{spec}', expected 'module:attribute'")
+
+    value: t.Any = importlib.import_module(module_name)
+    for part in attribute.split("."):
+        value = getattr(value, part)
+    if not callable(value):
+        raise ValueError(f"'{spec}' is not callable")
+
+    return value
+
+
+@dataclass
+class WatchStats:
+    """RPC traffic & events of a watched host.
+
+    Attributes:
+        polls (int): Polls, deltas & full syncs.
+        syncs (int): Full syncs.
+        events (int): Events seen, before filtering.
+        errors (int): Failed polls.
+
+    """
+
+    polls: int = field(default=0)
+    syncs: int = field(default=0)
+    events: int = field(default=0)
+    errors: int = field(default=0)
+
+
+class TorrentWatcher:
+    """Poll hosts concurrently (a thread each) & hand their events to a sink, until stopped.
+
+    Params:
+        trackers (list[TorrentStateTracker]): One per host.
+        sink (Callable[[TorrentEvent], None]): Called with each event, from one thread at a time.
+            Its `flush()`, if any, is called after each poll with events.
+        min_interval (float): Seconds between polls while torrents are transitioning.
+        max_interval (float): Seconds between polls while idle.
+        events (Iterable[str]|None): Only emit these event types. Defaults to all.
+    """
+
+    def __init__(
+        self,
+        trackers: list[TorrentStateTracker],
+        sink: t.Callable[[TorrentEvent], None],
+        min_interval: float = 1.0,
+        max_interval: float = 30.0,
+        events: t.Iterable[str] | None = None,
+    ) -> None:
+        self.trackers: list[TorrentStateTracker] = trackers
+        self.sink: t.Callable[[TorrentEvent], None] = sink
+        self.min_interval: float = min_interval
+        self.max_interval: float = max_interval
+        self.events: set[str] = set(events or EVENT_TYPES)
+        unknown: set[str] = self.events - set(EVENT_TYPES)
+        if unknown:
+            raise ValueError(
+                f"Unknown event type(s): {sorted(unknown)}. Valid: {EVENT_TYPES}"
+            )
+
+        self.stats: dict[str, WatchStats] = {
+            tracker.host: WatchStats() for tracker in trackers
+        }
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _emit(self, events: list[TorrentEvent]) -> None:
+        events = [event for event in events if event.event in self.events]
+        if not events:
+            return
+
+        with self._lock:
+            for event in events:
+                try:
+                    self.sink(event)
+                except Exception as exc:
+                    log.error(
+                        f"Sink failed on {event.event} event for '{event.name}'. Details: {exc}"
+                    )
+            flush = getattr(self.sink, "flush", None)
+            if flush is not None:
+                flush()
+
+    def _watch(self, tracker: TorrentStateTracker) -> None:
+        interval = AdaptiveInterval(self.min_interval, self.max_interval)
+        stats: WatchStats = self.stats[tracker.host]
+
+        while not self._stop.is_set():
+            syncs: float | None = tracker.last_sync
+            try:
+                events: list[TorrentEvent] = tracker.poll()
+            except Exception as exc:
+                stats.errors += 1
+                log.error(f"[{tracker.host}] Poll failed. Details: {exc}")
+                tracker.invalidate()
+                self._stop.wait(interval.maximum)
+                continue
+
+            stats.polls += 1
+            if tracker.last_sync != syncs:
+                stats.syncs += 1
+            stats.events += len(events)
+            self._emit(events)
+
+            self._stop.wait(interval.next(bool(events) or bool(tracker.transitional)))
+
+    def run(self) -> dict[str, WatchStats]:
+        """Watch until `stop()` is called (or interrupted). Returns poll & event counts per host."""
+        threads: list[threading.Thread] = [
+            threading.Thread(
+                target=self._watch,
+                args=(tracker,),
+                name=f"watch-{tracker.host}",
+                daemon=True,
+            )
+            for tracker in self.trackers
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while any(thread.is_alive() for thread in threads):
+                for thread in threads:
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+        return self.stats
@@ -0,0 +1,297 @@
+"""Select torrents by status, id & `--where` expressions.
+
+A `--where` expression compares a torrent property to a value:
+
+    ratio>=2            name~S01E0[1-3]     label=keep
+    size>10G            added>30d           tracker!~example.org
+
+Operators are `=`/`==`, `!=`, `>`, `>=`, `<`, `<=`, `~` (regex search) and `!~`.
+Sizes accept K/M/G/T suffixes (powers of 1024), durations & ages accept s/m/h/d/w
+suffixes. Ages (`added`, `done`, `active`) are how long ago the event happened.
+List properties (`label`, `tracker`) match if any element matches.
+
+`TorrentFilter.fields` lists the RPC fields the filter needs, so targets can be
+resolved with a small, projected `torrent-get`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import logging
+import re
+import time
+import typing as t
+from urllib.parse import urlparse
+
+from .constants import VALID_TORRENT_STATES
+
+if t.TYPE_CHECKING:
+    from .controllers import TransmissionRPCController
+
+    from transmission_rpc.torrent import Torrent
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "FILTER_PROPERTIES",
+    "WhereClause",
+    "TorrentFilter",
+    "parse_size",
+    "parse_duration",
+    "select_torrents",
+]
+
+_SIZE_UNITS: dict[str, int] = {
+    "": 1,
+    "k": 1024,
+    "m": 1024**2,
+    "g": 1024**3,
+    "t": 1024**4,
+}
+_DURATION_UNITS: dict[str, int] = {
+    "": 1,
+    "s": 1,
+    "m": 60,
+    "h": 3600,
+    "d": 86400,
+    "w": 604800,
+}
+_SIZE_PATTERN = re.compile(
+    r"^\s*([0-9]*\.?[0-9]+)\s*([kmgt]?)(?:i?b)?\s*$", re.IGNORECASE
+)
+_DURATION_PATTERN = re.compile(r"^\s*([0-9]*\.?[0-9]+)\s*([smhdw]?)\s*$", re.IGNORECASE)
+_CLAUSE_PATTERN = re.compile(r"^\s*([a-z_]+)\s*(==|!=|>=|<=|!~|=|>|<|~)\s*(.*?)\s*$")
+
+
+def parse_size(value: str) -> float:
+    """Parse a size like `10G` or `512MiB` to bytes."""
+    match = _SIZE_PATTERN.match(value)
+    if match is None:
+        raise ValueError(f"Invalid size: '{value}'. Expected e.g. 500M, 10G")
+
+    return float(match.group(1)) * _SIZE_UNITS[match.group(2).lower()]
+
+
+def parse_duration(value: str) -> float:
+    """Parse a duration like `30d` or `12h` to seconds."""
+    match = _DURATION_PATTERN.match(value)
+    if match is None:
+        raise ValueError(f"Invalid duration: '{value}'. Expected e.g. 90m, 12h, 30d")
+
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2).lower()]
+
+
+def _age(timestamp: int) -> float | None:
+    ## Transmission reports unset dates as 0
+    return time.time() - timestamp if timestamp else None
+
+
+def _tracker_hosts(trackers: list[dict]) -> list[str]:
+    return [
+        urlparse(tracker.get("announce", "")).hostname or "" for tracker in trackers
+    ]
+
+
+@dataclass(frozen=True)
+class _Property:
+    fields: tuple[str, ...]
+    kind: str
+    get: t.Callable[[dict[str, t.Any]], t.Any]
+
+
+## {property name: (RPC fields, value kind, getter on the raw RPC fields)}
+FILTER_PROPERTIES: dict[str, _Property] = {
+    "id": _Property(("id",), "number", lambda f: f["id"]),
+    "hash": _Property(("hashString",), "text", lambda f: f["hashString"]),
+    "name": _Property(("name",), "text", lambda f: f["name"]),
+    "dir": _Property(("downloadDir",), "text", lambda f: f["downloadDir"]),
+    "error": _Property(("errorString",), "text", lambda f: f["errorString"]),
+    "label": _Property(("labels",), "list", lambda f: f["labels"]),
+    "tracker": _Property(
+        ("trackers",), "list", lambda f: _tracker_hosts(f["trackers"])
+    ),
+    "ratio": _Property(("uploadRatio",), "number", lambda f: f["uploadRatio"]),
+    "progress": _Property(("percentDone",), "number", lambda f: f["percentDone"] * 100),
+    "size": _Property(("totalSize",), "size", lambda f: f["totalSize"]),
+    "uploaded": _Property(("uploadedEver",), "size", lambda f: f["uploadedEver"]),
+    "downloaded": _Property(("downloadedEver",), "size", lambda f: f["downloadedEver"]),
+    "rate_up": _Property(("rateUpload",), "size", lambda f: f["rateUpload"]),
+    "rate_down": _Property(("rateDownload",), "size", lambda f: f["rateDownload"]),
+    "seeding": _Property(
+        ("secondsSeeding",), "duration", lambda f: f["secondsSeeding"]
+    ),
+    "added": _Property(("addedDate",), "duration", lambda f: _age(f["addedDate"])),
+    "done": _Property(("doneDate",), "duration", lambda f: _age(f["doneDate"])),
+    "active": _Property(
+        ("activityDate",), "duration", lambda f: _age(f["activityDate"])
+    ),
+}
+
+
+@dataclass
+class WhereClause:
+    """A single parsed `--where` expression.
+
+    Attributes:
+        prop (str): Property name, see `FILTER_PROPERTIES`.
+        op (str): Comparison operator.
+        value (Any): Parsed value to compare with (float, str, or compiled regex).
+        expression (str): The original expression.
+
+    """
+
+    prop: str = field(default=None)
+    op: str = field(default=None)
+    value: t.Any = field(default=None)
+    expression: str = field(default=None)
+
+    @classmethod
+    def parse(cls, expression: str) -> "WhereClause":
+        match = _CLAUSE_PATTERN.match(expression)
+        if match is None:
+            raise ValueError(
+                f"Invalid filter expression: '{expression}'. Expected <property><op><value>, e.g. ratio>=2"
+            )
+
+        prop, op, raw = match.groups()
+        if prop not in FILTER_PROPERTIES:
+            raise ValueError(
+                f"Unknown filter property: '{prop}'. Must be one of: {list(FILTER_PROPERTIES)}"
+            )
+        op = "=" if op == "==" else op
+        kind: str = FILTER_PROPERTIES[prop].kind
+
+        if op in ("~", "!~"):
+            if kind not in ("text", "list"):
+                raise ValueError(
+                    f"Operator '{op}' only applies to text properties, not '{prop}'"
+                )
+            value = re.compile(raw, re.IGNORECASE)
+        elif kind in ("text", "list"):
+            if op not in ("=", "!="):
+                raise ValueError(
+                    f"Operator '{op}' does not apply to text property '{prop}'"
+                )
+            value = raw.lower()
+        elif kind == "size":
+            value = parse_size(raw)
+        elif kind == "duration":
+            value = parse_duration(raw)
+        else:
+            value = float(raw)
+
+        return cls(prop=prop, op=op, value=value, expression=expression)
+
+    def matches(self, fields: dict[str, t.Any]) -> bool:
+        actual: t.Any = FILTER_PROPERTIES[self.prop].get(fields)
+        if actual is None:
+            return False
+
+        if self.op in ("~", "!~"):
+            values = actual if isinstance(actual, list) else [actual]
+            found: bool = any(self.value.search(str(v)) for v in values)
+            return found if self.op == "~" else not found
+
+        if isinstance(self.value, str):
+            values = actual if isinstance(actual, list) else [actual]
+            found = any(str(v).lower() == self.value for v in values)
+            return found if self.op == "=" else not found
+
+        match self.op:
+            case "=":
+                return actual == self.value
+            case "!=":
+                return actual != self.value
+            case ">":
+                return actual > self.value
+            case ">=":
+                return actual >= self.value
+            case "<":
+                return actual < self.value
+            case "<=":
+                return actual <= self.value
+
+        return False
+
+
+@dataclass
+class TorrentFilter:
+    """Match torrents by status, id & `--where` expressions (all must match).
+
+    Attributes:
+        status (str): `all`, `finished`/`completed`, or a torrent status (e.g. `seeding`).
+        where (list[str]): `--where` expressions, see the module docstring.
+        ids (list[int|str]): Only match these torrent ids or hash strings. Empty for any torrent.
+
+    """
+
+    status: str = field(default="all")
+    where: list[str] = field(default_factory=list)
+    ids: list[int | str] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self.status = (self.status or "all").lower()
+        if self.status != "all" and self.status not in VALID_TORRENT_STATES:
+            raise ValueError(
+                f"Invalid torrent status: {self.status}. Must be one of: {VALID_TORRENT_STATES}"
+            )
+
+        self.clauses: list[WhereClause] = [
+            WhereClause.parse(w) for w in self.where or []
+        ]
+        self._ids: set[int | str] = set(self.ids or [])
+
+    @property
+    def fields(self) -> list[str]:
+        """RPC fields needed to evaluate this filter."""
+        fields: set[str] = {"id", "hashString"}
+        if self.status in ("finished", "completed"):
+            fields.add("doneDate")
+        elif self.status != "all":
+            fields.add("status")
+        for clause in self.clauses:
+            fields.update(FILTER_PROPERTIES[clause.prop].fields)
+
+        return sorted(fields)
+
+    def matches(self, torrent: Torrent) -> bool:
+        if self._ids and not (
+            torrent.id in self._ids or torrent.hashString in self._ids
+        ):
+            return False
+
+        match self.status:
+            case "all":
+                pass
+            case "finished" | "completed":
+                if not torrent.done_date:
+                    return False
+            case _:
+                if torrent.status != self.status:
+                    return False
+
+        return all(clause.matches(torrent.fields) for clause in self.clauses)
+
+
+def select_torrents(
+    controller: TransmissionRPCController,
+    torrent_filter: TorrentFilter,
+    fields: list[str] | None = None,
+) -> list[Torrent]:
+    """Return the torrents matching `torrent_filter`, using a projected fetch.
+
+    Params:
+        controller (TransmissionRPCController): Controller for the host.
+        torrent_filter (TorrentFilter): The filter to apply.
+        fields (list[str]|None): Extra RPC fields to fetch for the matching torrents.
+    """
+    request_fields: list[str] = sorted(set(torrent_filter.fields) | set(fields or []))
+
+    if torrent_filter.ids:
+        torrents: list[Torrent] = controller.get_multiple_torrents(
+            ids=list(torrent_filter.ids), fields=request_fields
+        )
+    else:
+        torrents = controller.get_all_torrents(fields=request_fields)
+
+    return [torrent for torrent in torrents if torrent_filter.matches(torrent)]
@@ -0,0 +1,517 @@
+"""Run post-processing hooks when torrents finish downloading.
+
+A hooks file (JSON, or YAML if PyYAML is installed) lists hooks:
+
+    {
+        "hooks": [
+            {
+                "name": "unpack",
+                "command": ["unpack-all", "{download_dir}/{name}"],
+                "labels": ["tv", "movies"],
+                "timeout": "2h",
+                "concurrency": 2
+            },
+            {
+                "name": "index",
+                "function": "media_index.hooks:on_finished",
+                "executor": "process",
+                "timeout": "5m",
+                "concurrency": 4
+            }
+        ],
+        "workers": 8
+    }
+
+A hook fires once per torrent, when it finishes downloading: on a `finished`
+event (or a `status` change from downloading to seeding) from a
+`TorrentStateTracker`, so detection costs `recently-active` deltas rather than
+full refetches.
+
+Commands are run without a shell. Each argument is formatted with the torrent's
+`{name}`, `{hash}`, `{id}`, `{download_dir}`, `{host}` & `{labels}`, and the
+environment has the same `TR_TORRENT_*` variables as Transmission's own
+`script-torrent-done`. On timeout, a command is killed along with every
+process it started. Functions (`module:callable`) are called with the
+`TorrentEvent`, in a worker thread, or with `"executor": "process"` in a
+separate process, which is killed on timeout (a thread can't be, it is only
+reported as timed out & left to finish).
+
+Runs share a pool of `workers` threads, and each hook runs at most
+`concurrency` at a time; queued runs wait per hook, without holding a worker.
+Every run is recorded in an append-only ledger (`HookLedger`): when it is queued,
+and when it is done, failed or timed out. Finished runs are never fired again,
+and runs that were queued but not finished when the process stopped are resumed
+on the next start.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+import json
+import logging
+import multiprocessing
+import os
+from pathlib import Path
+import shlex
+import signal
+import subprocess
+import threading
+import time
+import typing as t
+
+from .events import TorrentEvent, load_callable
+from .filters import parse_duration
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "HOOK_EXECUTORS",
+    "Hook",
+    "HookConfig",
+    "HookResult",
+    "HookLedger",
+    "HookRunner",
+    "is_completion",
+]
+
+HOOK_EXECUTORS: list[str] = ["thread", "process"]
+## Statuses a torrent finishing its download goes to seeding from
+_DOWNLOAD_STATUSES: set[str] = {"downloading", "download pending"}
+## Characters of a failed command's output kept in results
+_OUTPUT_TAIL: int = 2000
+
+
+def is_completion(event: TorrentEvent) -> bool:
+    """Whether an event is a torrent finishing its download."""
+    if event.event == "finished":
+        return True
+
+    return (
+        event.event == "status"
+        and event.status == "seeding"
+        and event.previous in _DOWNLOAD_STATUSES
+    )
+
+
+@dataclass
+class Hook:
+    """A command or Python callable run when a torrent finishes.
+
+    Attributes:
+        name (str): Unique hook name, used in the ledger.
+        command (list[str]|str|None): Command to run, as a list of arguments or a string split like a shell would.
+        function (str|None): `module:callable` called with the `TorrentEvent`, instead of a command.
+        executor (str): For functions, `thread` or `process` (killed on timeout). Commands always run as processes.
+        timeout (str|None): Max run time, e.g. `30m`. `None` for no limit.
+        concurrency (int): Max runs of this hook at a time.
+        labels (list[str]): Only fire for torrents with one of these labels.
+        hosts (list[str]|None): Only fire for torrents on these hosts. `None` for every host.
+        enabled (bool): Disabled hooks never fire.
+
+    """
+
+    name: str = field(default=None)
+    command: list[str] | str | None = field(default=None)
+    function: str | None = field(default=None)
+    executor: str = field(default="thread")
+    timeout: str | None = field(default=None)
+    concurrency: int = field(default=1)
+    labels: list[str] = field(default_factory=list)
+    hosts: list[str] | None = field(default=None)
+    enabled: bool = field(default=True)
+
+    def __post_init__(self) -> None:
+        if not self.name:
+            raise ValueError("Hooks need a name")
+        if (self.command is None) == (self.function is None):
+            raise ValueError(
+                f"Hook '{self.name}' needs exactly one of 'command' or 'function'"
+            )
+        if self.executor not in HOOK_EXECUTORS:
+            raise ValueError(
+                f"Invalid executor for hook '{self.name}': {self.executor}. Must be one of: {HOOK_EXECUTORS}"
+            )
+        if self.concurrency < 1:
+            raise ValueError(f"Hook '{self.name}' needs a concurrency of at least 1")
+
+        self.timeout_seconds: float | None = (
+            parse_duration(self.timeout) if self.timeout else None
+        )
+        self.args: list[str] | None = (
+            shlex.split(self.command) if isinstance(self.command, str) else self.command
+        )
+
+    def matches(self, event: TorrentEvent) -> bool:
+        if not self.enabled:
+            return False
+        if self.hosts is not None and event.host not in self.hosts:
+            return False
+        if self.labels and not set(self.labels) & set(event.labels or []):
+            return False
+
+        return True
+
+    def command_for(self, event: TorrentEvent) -> list[str]:
+        values: dict[str, t.Any] = {
+            "name": event.name,
+            "hash": event.hash,
+            "id": event.id,
+            "download_dir": event.download_dir or "",
+            "host": event.host,
+            "labels": ",".join(event.labels or []),
+        }
+
+        return [arg.format(**values) for arg in self.args]
+
+
+@dataclass
+class HookConfig:
+    """Hooks, and the size of the pool they share.
+
+    Attributes:
+        hooks (list[Hook]): Hooks.
+        workers (int): Max runs at a time, across hooks.
+
+    """
+
+    hooks: list[Hook] = field(default_factory=list)
+    workers: int = field(default=4)
+
+    def __post_init__(self) -> None:
+        names: list[str] = [hook.name for hook in self.hooks]
+        duplicates: set[str] = {name for name in names if names.count(name) > 1}
+        if duplicates:
+            raise ValueError(f"Duplicate hook names: {sorted(duplicates)}")
+
+    @classmethod
+    def from_dict(cls, data: dict[str, t.Any]) -> "HookConfig":
+        return cls(
+            hooks=[Hook(**hook) for hook in data.get("hooks", [])],
+            workers=data.get("workers", 4),
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "HookConfig":
+        """Load hooks from a `.json`, `.yaml` or `.yml` file."""
+        path = Path(path)
+        text: str = path.read_text(encoding="utf-8")
+
+        if path.suffix.lower() in (".yaml", ".yml"):
+            if yaml is None:
+                raise ImportError(
+                    f"Reading '{path}' needs PyYAML (pip install pyyaml), or use a JSON hooks file"
+                )
+            data: dict[str, t.Any] = yaml.safe_load(text) or {}
+        else:
+            data = json.loads(text)
+
+        return cls.from_dict(data)
+
+
+@dataclass
+class HookResult:
+    """Outcome of a hook run.
+
+    Attributes:
+        hook (str): Hook name.
+        hash (str): Info hash of the torrent.
+        name (str): Torrent name.
+        state (str): `done`, `failed` or `timeout`.
+        seconds (float): Run time.
+        returncode (int|None): Exit code of a command or process.
+        error (str|None): Error, or the tail of a failed command's output.
+
+    """
+
+    hook: str = field(default=None)
+    hash: str = field(default=None)
+    name: str = field(default=None)
+    state: str = field(default=None)
+    seconds: float = field(default=0.0)
+    returncode: int | None = field(default=None)
+    error: str | None = field(default=None)
+
+
+class HookLedger:
+    """Append-only, newline-delimited JSON record of hook runs, so restarts neither re-fire nor drop runs.
+
+    Params:
+        path (str|Path|None): Ledger file. `None` to keep it in memory only.
+    """
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path: Path | None = Path(path) if path else None
+        ## (hook, hash) of runs that ended
+        self.processed: set[tuple[str, str]] = set()
+        ## Queued runs that didn't end: {(hook, hash): event}
+        self.unfinished: dict[tuple[str, str], dict[str, t.Any]] = {}
+        self._lock = threading.Lock()
+
+        if self.path is not None and self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry: dict[str, t.Any] = json.loads(line)
+                    except json.JSONDecodeError:
+                        ## A line cut short by a crash
+                        continue
+                    key: tuple[str, str] = (entry["hook"], entry["hash"])
+                    if entry["state"] == "queued":
+                        self.unfinished[key] = entry["event"]
+                    else:
+                        self.processed.add(key)
+                        self.unfinished.pop(key, None)
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return key in self.processed
+
+    def _append(self, entry: dict[str, t.Any]) -> None:
+        if self.path is None:
+            return
+
+        line: str = json.dumps({"time": time.time(), **entry}) + "\n"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+    def queued(self, hook: str, event: TorrentEvent) -> None:
+        with self._lock:
+            self.unfinished[(hook, event.hash)] = asdict(event)
+            self._append(
+                {
+                    "hook": hook,
+                    "hash": event.hash,
+                    "state": "queued",
+                    "event": asdict(event),
+                }
+            )
+
+    def ended(self, result: HookResult) -> None:
+        with self._lock:
+            key: tuple[str, str] = (result.hook, result.hash)
+            self.processed.add(key)
+            self.unfinished.pop(key, None)
+            self._append(asdict(result))
+
+
+def _call_function(spec: str, event: dict[str, t.Any]) -> None:
+    """Entry point of `process` executor runs: the callable is loaded in the child."""
+    ## Ctrl-C stops the runner, which lets running hooks finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    load_callable(spec)(TorrentEvent(**event))
+
+
+def _kill_session(process: subprocess.Popen) -> None:
+    """Kill a command started with `start_new_session=True`, with every process it started."""
+    try:
+        ## The session leader's pid is its process group id
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+class HookRunner:
+    """Queue & run hooks for completion events, with per-hook concurrency on a shared pool.
+
+    Params:
+        config (HookConfig): Hooks & pool size.
+        ledger (HookLedger): Record of runs. Unfinished runs in it are queued again.
+        on_result (Callable[[HookResult], None]|None): Called after each run, from a worker thread.
+    """
+
+    def __init__(
+        self,
+        config: HookConfig,
+        ledger: HookLedger | None = None,
+        on_result: t.Callable[[HookResult], None] | None = None,
+    ) -> None:
+        self.hooks: dict[str, Hook] = {hook.name: hook for hook in config.hooks}
+        self.ledger: HookLedger = ledger or HookLedger()
+        self.on_result: t.Callable[[HookResult], None] | None = on_result
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, config.workers), thread_name_prefix="hook"
+        )
+        self._lock = threading.Lock()
+        self._queues: dict[str, deque[TorrentEvent]] = {
+            name: deque() for name in self.hooks
+        }
+        self._running: dict[str, int] = {name: 0 for name in self.hooks}
+        ## (hook, hash) queued or running
+        self._active: set[tuple[str, str]] = set()
+        self._idle = threading.Condition(self._lock)
+        ## Process runs: spawned, so children don't inherit this process' threads
+        self._mp = multiprocessing.get_context("spawn")
+
+        self.results: dict[str, int] = {"done": 0, "failed": 0, "timeout": 0}
+
+        for (name, _), event in list(self.ledger.unfinished.items()):
+            if name in self.hooks:
+                log.info(f"Resuming hook '{name}' for '{event.get('name')}'")
+                self._queue(self.hooks[name], TorrentEvent(**event), record=False)
+
+    def __call__(self, event: TorrentEvent) -> None:
+        """Queue the hooks an event fires. Cheap, so it can be a `TorrentWatcher` sink."""
+        if not is_completion(event):
+            return
+
+        for hook in self.hooks.values():
+            if hook.matches(event):
+                self._queue(hook, event)
+
+    def _queue(self, hook: Hook, event: TorrentEvent, record: bool = True) -> None:
+        key: tuple[str, str] = (hook.name, event.hash)
+        with self._lock:
+            if key in self._active or key in self.ledger:
+                return
+            self._active.add(key)
+            self._queues[hook.name].append(event)
+
+        if record:
+            self.ledger.queued(hook.name, event)
+        self._schedule()
+
+    def _schedule(self) -> None:
+        with self._lock:
+            for name, queue in self._queues.items():
+                while queue and self._running[name] < self.hooks[name].concurrency:
+                    self._running[name] += 1
+                    self._pool.submit(self._run, self.hooks[name], queue.popleft())
+
+    def _execute(self, hook: Hook, event: TorrentEvent) -> HookResult:
+        result = HookResult(
+            hook=hook.name, hash=event.hash, name=event.name, state="done"
+        )
+        timeout: float | None = hook.timeout_seconds
+
+        if hook.args is not None:
+            env: dict[str, str] = {
+                **os.environ,
+                "TR_TORRENT_DIR": event.download_dir or "",
+                "TR_TORRENT_HASH": event.hash,
+                "TR_TORRENT_ID": str(event.id),
+                "TR_TORRENT_LABELS": ",".join(event.labels or []),
+                "TR_TORRENT_NAME": event.name,
+                "TR_HOST": event.host,
+            }
+            process = subprocess.Popen(
+                hook.command_for(event),
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors="replace",
+                ## Out of the terminal's process group, so Ctrl-C lets it finish, and
+                #  in a group of its own, so a timeout can kill everything it started
+                start_new_session=True,
+            )
+            try:
+                output, _ = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                _kill_session(process)
+                process.communicate()
+                result.state = "timeout"
+                return result
+            result.returncode = process.returncode
+            if process.returncode != 0:
+                result.state = "failed"
+                result.error = (output or "")[-_OUTPUT_TAIL:].strip()
+
+            return result
+
+        if hook.executor == "process":
+            process = self._mp.Process(
+                target=_call_function,
+                args=(hook.function, asdict(event)),
+                name=f"hook-{hook.name}",
+            )
+            process.start()
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+                process.join()
+                result.state = "timeout"
+                return result
+            result.returncode = process.exitcode
+            if process.exitcode != 0:
+                result.state = "failed"
+                result.error = f"Process exited with code {process.exitcode}"
+
+            return result
+
+        function: t.Callable[[TorrentEvent], t.Any] = load_callable(hook.function)
+        if timeout is None:
+            function(event)
+            return result
+
+        errors: list[Exception] = []
+
+        def _target() -> None:
+            try:
+                function(event)
+            except Exception as exc:
+                errors.append(exc)
+
+        thread = threading.Thread(target=_target, name=f"hook-{hook.name}", daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            ## Threads can't be killed, it keeps running but no longer counts against the hook
+            result.state = "timeout"
+        elif errors:
+            raise errors[0]
+
+        return result
+
+    def _run(self, hook: Hook, event: TorrentEvent) -> None:
+        started: float = time.perf_counter()
+        try:
+            result: HookResult = self._execute(hook, event)
+        except Exception as exc:
+            result = HookResult(
+                hook=hook.name,
+                hash=event.hash,
+                name=event.name,
+                state="failed",
+                error=str(exc),
+            )
+        result.seconds = time.perf_counter() - started
+
+        self.ledger.ended(result)
+        if self.on_result is not None:
+            try:
+                self.on_result(result)
+            except Exception as exc:
+                log.error(f"Hook result callback failed. Details: {exc}")
+
+        with self._lock:
+            self.results[result.state] += 1
+            self._running[hook.name] -= 1
+            self._active.discard((hook.name, event.hash))
+            self._idle.notify_all()
+        self._schedule()
+
+    @property
+    def pending(self) -> int:
+        """Runs queued or running."""
+        with self._lock:
+            return len(self._active)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait until no run is queued or running. Returns `False` on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._active, timeout)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop starting runs. Runs still queued stay unfinished in the ledger & are resumed on the next start."""
+        with self._lock:
+            for queue in self._queues.values():
+                queue.clear()
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,346 @@
+"""Add torrents in bulk, skipping the ones a host already has.
+
+Info hashes are computed locally before anything is sent: from `.torrent` files
+(with `read_torrent_metas()`, across a process pool) and from magnet links'
+`xt=urn:btih:` parameter. The host's torrents are fetched once, with only
+`hashString`, into a set, so inputs it already has (and duplicate inputs) cost
+no request at all.
+
+`torrent-add` takes one torrent per request, so the rest are sent
+`concurrency` at a time (bounded by the controller's client pool), in batches of
+`batch_size` between progress callbacks. Re-running an interrupted import is
+safe: whatever was added is skipped.
+
+`pick_host_with_most_free_space()` chooses the host to add to, by the free
+space in each host's default download dir.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import logging
+import os
+import time
+import typing as t
+from urllib.parse import parse_qs, urlsplit
+
+from .metainfo import iter_torrent_files, read_torrent_metas
+
+if t.TYPE_CHECKING:
+    from .controllers import TransmissionRPCController
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "MAGNET_SUFFIX",
+    "AddSource",
+    "AddResult",
+    "parse_magnet",
+    "collect_sources",
+    "fetch_hashes",
+    "pick_host_with_most_free_space",
+    "add_sources",
+]
+
+## Files holding a single magnet link, i.e. dropped in a watch folder
+MAGNET_SUFFIX: str = ".magnet"
+
+
+def parse_magnet(uri: str) -> tuple[str | None, str | None]:
+    """Return the (lowercase hex) v1 info hash & display name of a magnet link.
+
+    The hash is `None` if the link has no `urn:btih:` topic (i.e. v2-only links).
+
+    Raises:
+        ValueError: If `uri` is not a magnet link, or its `btih` is malformed.
+
+    """
+    parts = urlsplit(uri.strip())
+    if parts.scheme.lower() != "magnet":
+        raise ValueError(f"Not a magnet link: '{uri}'")
+
+    query: dict[str, list[str]] = parse_qs(parts.query)
+    name: str | None = (query.get("dn") or [None])[0]
+
+    for topic in query.get("xt", []):
+        if not topic.lower().startswith("urn:btih:"):
+            continue
+
+        value: str = topic[len("urn:btih:") :]
+        if len(value) == 40:
+            try:
+                bytes.fromhex(value)
+            except ValueError:
+                raise ValueError(
+                    f"Invalid info hash in magnet link: '{value}'"
+                ) from None
+            return value.lower(), name
+        if len(value) == 32:
+            try:
+                return base64.b32decode(value.upper()).hex(), name
+            except binascii.Error:
+                raise ValueError(
+                    f"Invalid info hash in magnet link: '{value}'"
+                ) from None
+
+        raise ValueError(f"Invalid info hash in magnet link: '{value}'")
+
+    return None, name
+
+
+@dataclass
+class AddSource:
+    """A torrent to add.
+
+    Attributes:
+        source (str): A `.torrent` file path, or a magnet link.
+        kind (str): `torrent` or `magnet`.
+        hash (str|None): Info hash, if known (`None` for v2-only magnet links).
+        name (str|None): Torrent name, if known.
+        size (int): Total size, 0 if unknown.
+        path (str|None): The file the source was read from (a `.torrent` or `.magnet` file).
+
+    """
+
+    source: str = field(default=None)
+    kind: str = field(default="torrent")
+    hash: str | None = field(default=None)
+    name: str | None = field(default=None)
+    size: int = field(default=0)
+    path: str | None = field(default=None)
+
+    def payload(self) -> bytes | str:
+        """What to send to `torrent-add`: the `.torrent` contents, or the magnet link."""
+        if self.kind == "magnet":
+            return self.source
+
+        with open(self.source, "rb") as f:
+            return f.read()
+
+
+@dataclass
+class AddResult:
+    """Outcome of adding sources to a host.
+
+    Attributes:
+        added (list[AddSource]): Sources the host did not have, now added.
+        skipped (list[AddSource]): Sources skipped without a request: already on the host, or duplicate inputs.
+        existing (list[AddSource]): Sources the host reported as duplicates when added (i.e. v2-only magnet links).
+        rejected (dict[str, str]): Sources the host refused (i.e. invalid `.torrent` files), with the error.
+        failed (dict[str, str]): Sources that could not be sent (i.e. the host was unreachable), with the error.
+        seconds (float): Time taken.
+
+    """
+
+    added: list[AddSource] = field(default_factory=list)
+    skipped: list[AddSource] = field(default_factory=list)
+    existing: list[AddSource] = field(default_factory=list)
+    rejected: dict[str, str] = field(default_factory=dict)
+    failed: dict[str, str] = field(default_factory=dict)
+    seconds: float = field(default=0.0)
+
+
+def collect_sources(
+    inputs: t.Iterable[str],
+    recursive: bool = True,
+    workers: int | None = None,
+) -> tuple[list[AddSource], dict[str, str]]:
+    """Turn magnet links, `.torrent`/`.magnet` files & directories of them into sources, with their info hashes.
+
+    Params:
+        inputs (Iterable[str]): Magnet links, files & directories.
+        recursive (bool): Also collect files in subdirectories.
+        workers (int|None): Processes reading `.torrent` files. Defaults to the number of CPUs.
+
+    Returns:
+        (tuple[list[AddSource], dict[str, str]]): Magnet links, then `.torrent` files, and errors for inputs that could not be read.
+
+    """
+    sources: list[AddSource] = []
+    errors: dict[str, str] = {}
+    torrent_files: list[str] = []
+
+    def _add_magnet(uri: str, path: str | None = None) -> None:
+        try:
+            info_hash, name = parse_magnet(uri)
+        except ValueError as exc:
+            errors[path or uri] = str(exc)
+            return
+        sources.append(
+            AddSource(
+                source=uri.strip(), kind="magnet", hash=info_hash, name=name, path=path
+            )
+        )
+
+    def _add_file(path: str) -> None:
+        if path.lower().endswith(MAGNET_SUFFIX):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    _add_magnet(f.read(), path=path)
+            except OSError as exc:
+                errors[path] = str(exc)
+        else:
+            torrent_files.append(path)
+
+    for item in inputs:
+        if item.lower().startswith("magnet:"):
+            _add_magnet(item)
+        elif os.path.isdir(item):
+            for path, _, _ in iter_torrent_files(
+                item, recursive=recursive, suffixes=(".torrent", MAGNET_SUFFIX)
+            ):
+                _add_file(path)
+        elif os.path.isfile(item):
+            _add_file(item)
+        else:
+            errors[item] = "Not a magnet link, file or directory"
+
+    metas, read_errors = read_torrent_metas(torrent_files, workers=workers)
+    errors.update(read_errors)
+    sources.extend(
+        AddSource(
+            source=meta.path,
+            kind="torrent",
+            hash=meta.hash,
+            name=meta.name,
+            size=meta.size,
+            path=meta.path,
+        )
+        for meta in metas
+    )
+
+    return sources, errors
+
+
+def fetch_hashes(controller: TransmissionRPCController) -> set[str]:
+    """Info hashes of every torrent on a host, from a single `torrent-get` of only `hashString`."""
+    return {
+        torrent.hashString.lower()
+        for torrent in controller.get_all_torrents(fields=["hashString"])
+    }
+
+
+def pick_host_with_most_free_space(
+    controllers: dict[str, TransmissionRPCController],
+) -> tuple[str, int]:
+    """Choose the host with the most free space in its default download dir, querying hosts concurrently.
+
+    Raises:
+        ValueError: If no host could report its free space.
+
+    """
+
+    def _free_space(controller: TransmissionRPCController) -> int:
+        session: dict = controller.raw_request(
+            "session-get", {"fields": ["download-dir"]}
+        )
+
+        return controller.get_free_space(session["arguments"]["download-dir"]) or 0
+
+    free: dict[str, int] = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(controllers))) as pool:
+        futures = {
+            name: pool.submit(_free_space, controller)
+            for name, controller in controllers.items()
+        }
+        for name, future in futures.items():
+            try:
+                free[name] = future.result()
+            except Exception as exc:
+                log.warning(
+                    f"Could not get free space of host '{name}'. Details: {exc}"
+                )
+
+    if not free:
+        raise ValueError("No host could report its free space")
+
+    name: str = max(free, key=lambda host: free[host])
+
+    return name, free[name]
+
+
+def add_sources(
+    controller: TransmissionRPCController,
+    sources: list[AddSource],
+    existing: set[str] | None = None,
+    concurrency: int = 4,
+    batch_size: int = 100,
+    download_dir: str | None = None,
+    paused: bool | None = None,
+    labels: list[str] | None = None,
+    dry_run: bool = False,
+    on_batch: t.Callable[[int, int], None] | None = None,
+) -> AddResult:
+    """Add sources to a host, skipping ones it already has.
+
+    Params:
+        controller (TransmissionRPCController): The host to add to.
+        sources (list[AddSource]): Sources from `collect_sources()`.
+        existing (set[str]|None): Info hashes already on the host. Fetched with `fetch_hashes()` if `None`.
+        concurrency (int): `torrent-add` requests in flight.
+        batch_size (int): Sources added between progress callbacks.
+        download_dir (str|None): Download dir. Defaults to the daemon's.
+        paused (bool|None): Add torrents stopped.
+        labels (list[str]|None): Labels to set on added torrents.
+        dry_run (bool): Only sort sources into `added` (would be) & `skipped`.
+        on_batch (Callable[[int, int], None]|None): Called with (done, total) after each batch.
+
+    """
+    started: float = time.perf_counter()
+    result = AddResult()
+    known: set[str] = (
+        set(existing) if existing is not None else fetch_hashes(controller)
+    )
+
+    pending: list[AddSource] = []
+    for source in sources:
+        if source.hash is not None:
+            if source.hash in known:
+                result.skipped.append(source)
+                continue
+            known.add(source.hash)
+        pending.append(source)
+
+    if dry_run:
+        result.added = pending
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def _add(source: AddSource) -> tuple[AddSource, bool | None, Exception | None]:
+        try:
+            _, duplicate = controller.add_torrent(
+                source.payload(),
+                download_dir=download_dir,
+                paused=paused,
+                labels=labels,
+            )
+        except Exception as exc:
+            return source, None, exc
+
+        return source, duplicate, None
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for i in range(0, len(pending), batch_size):
+            for source, duplicate, error in pool.map(_add, pending[i : i + batch_size]):
+                if error is not None:
+                    ## add_torrent() raises ValueError for a non-success result
+                    failures: dict[str, str] = (
+                        result.rejected
+                        if isinstance(error, ValueError)
+                        else result.failed
+                    )
+                    failures[source.path or source.source] = str(error)
+                elif duplicate:
+                    result.existing.append(source)
+                else:
+                    result.added.append(source)
+
+            if on_batch is not None:
+                on_batch(min(i + batch_size, len(pending)), len(pending))
+
+    result.seconds = time.perf_counter() - started
+
+    return result
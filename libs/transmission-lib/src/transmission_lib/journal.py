@@ -0,0 +1,501 @@
+"""Durable, append-only journals for bulk mutations, so interrupted runs can be resumed.
+
+A journal is a newline-delimited JSON file per operation, named after its
+operation id. `TransmissionRPCController._bulk_action()` records the planned
+torrent ids and arguments, then each batch before it is sent and once it is
+confirmed (or failed). Every record is flushed & fsynced before the RPC it
+describes is sent.
+
+`resume_operation()` replays a journal: confirmed batches are skipped, batches
+that were sent but never confirmed are re-verified against the daemon (i.e.
+torrents that are already gone are not removed again), and the rest is sent.
+
+Journal ids should be hash strings rather than torrent ids, which change when
+the daemon restarts.
+
+Journals live in `get_journal_dir()`, a per-user state dir unless
+`$TRANSMISSION_JOURNAL_DIR` is set. `prune_journals()` removes completed ones
+once they are older than the retention period; failed & interrupted journals
+are kept until they are resumed.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import datetime
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+import typing as t
+
+from .filters import parse_duration
+
+from core_utils.uuid_utils import get_rand_uuid
+
+if t.TYPE_CHECKING:
+    from .controllers import TransmissionRPCController
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "DEFAULT_JOURNAL_DIR",
+    "DEFAULT_JOURNAL_RETENTION",
+    "get_journal_dir",
+    "OperationJournal",
+    "JournalReplay",
+    "list_journals",
+    "find_journal",
+    "prune_journals",
+    "resume_operation",
+]
+
+## Used when TRANSMISSION_JOURNAL_DIR is not set
+DEFAULT_JOURNAL_DIR: Path = (
+    Path(os.environ.get("XDG_STATE_HOME") or Path.home() / ".local" / "state")
+    / "transmission_scripts"
+    / "journals"
+)
+## How long completed journals are kept, when TRANSMISSION_JOURNAL_RETENTION is not set
+DEFAULT_JOURNAL_RETENTION: str = "30d"
+
+## Batch & operation states
+SENT: str = "sent"
+DONE: str = "done"
+FAILED: str = "failed"
+INTERRUPTED: str = "interrupted"
+
+
+def get_journal_dir(directory: str | Path | None = None) -> Path:
+    """Return the (absolute) journal directory: `directory`, `$TRANSMISSION_JOURNAL_DIR`, or `DEFAULT_JOURNAL_DIR`."""
+    directory = Path(
+        directory or os.environ.get("TRANSMISSION_JOURNAL_DIR") or DEFAULT_JOURNAL_DIR
+    )
+
+    return directory.expanduser().absolute()
+
+
+class OperationJournal:
+    """Append-only journal of a single bulk operation.
+
+    The file is only created once the operation begins, so operations with
+    nothing to do leave no journal behind.
+
+    Params:
+        path (str|Path): Journal file.
+        operation_id (str): The operation's id.
+        host (str|None): Host the operation runs against.
+        on_begin (Callable[[OperationJournal], None]|None): Called once the planned operation is recorded, i.e. to log its id.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        operation_id: str,
+        host: str | None = None,
+        on_begin: t.Callable[["OperationJournal"], None] | None = None,
+    ) -> None:
+        self.path: Path = Path(path)
+        self.operation_id: str = operation_id
+        self.host: str | None = host
+        self.on_begin: t.Callable[[OperationJournal], None] | None = on_begin
+        self.begun: bool = self.path.exists()
+        self._next_batch: int = 0
+        self._lock = threading.Lock()
+
+        if self.begun:
+            replay: JournalReplay = JournalReplay.load(self.path)
+            self._next_batch = max(replay.batches, default=-1) + 1
+
+    @classmethod
+    def new(
+        cls,
+        directory: str | Path | None = None,
+        host: str | None = None,
+        on_begin: t.Callable[["OperationJournal"], None] | None = None,
+    ) -> "OperationJournal":
+        """Create a journal with a new operation id in `directory`.
+
+        Params:
+            directory (str|Path|None): Journal directory. Defaults to `get_journal_dir()`.
+            host (str|None): Host the operation runs against.
+            on_begin (Callable[[OperationJournal], None]|None): Called once the planned operation is recorded.
+        """
+        operation_id: str = get_rand_uuid(as_hex=True)
+
+        return cls(
+            get_journal_dir(directory) / f"{operation_id}.ndjson",
+            operation_id,
+            host=host,
+            on_begin=on_begin,
+        )
+
+    def _write(self, event: str, **record: t.Any) -> None:
+        record = {
+            "event": event,
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            **record,
+        }
+
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def begin(
+        self,
+        method: str,
+        client_method: str,
+        ids: list[int | str],
+        batch_size: int,
+        arguments: dict[str, t.Any],
+    ) -> None:
+        """Record the planned operation. Does nothing if the journal has already begun."""
+        if self.begun:
+            return
+
+        self._write(
+            "begin",
+            operation_id=self.operation_id,
+            host=self.host,
+            method=method,
+            client_method=client_method,
+            batch_size=batch_size,
+            arguments=arguments,
+            ids=ids,
+        )
+        self.begun = True
+
+        if self.on_begin is not None:
+            self.on_begin(self)
+
+    def batch(self, ids: list[int | str]) -> int:
+        """Record a batch about to be sent & return its index."""
+        with self._lock:
+            index: int = self._next_batch
+            self._next_batch += 1
+
+        self._write("batch", index=index, state=SENT, ids=ids)
+
+        return index
+
+    def batch_done(self, index: int) -> None:
+        self._write("batch", index=index, state=DONE)
+
+    def batch_failed(self, index: int, error: str) -> None:
+        self._write("batch", index=index, state=FAILED, error=error)
+
+    def resume(self) -> None:
+        self._write("resume")
+
+    def end(self, state: str = DONE, error: str | None = None) -> None:
+        self._write("end", state=state, error=error)
+
+
+@dataclass
+class JournalReplay:
+    """The state of an operation, rebuilt from its journal.
+
+    Attributes:
+        path (Path): Journal file.
+        operation_id (str): The operation's id.
+        host (str|None): Host the operation ran against.
+        method (str): RPC method, e.g. `torrent-remove`.
+        client_method (str): `transmission_rpc.Client` method used to send it.
+        arguments (dict): Extra arguments sent with every batch.
+        batch_size (int): Max ids per request.
+        ids (list[int|str]): Planned ids.
+        batches (dict[int, dict]): `{index: {"ids": [...], "state": ..., "error": ...}}`.
+        state (str): `done`, `failed`, or `interrupted` if the journal has no end record.
+        started_at (str|None): Timestamp of the begin record.
+
+    """
+
+    path: Path = field(default=None)
+    operation_id: str = field(default=None)
+    host: str | None = field(default=None)
+    method: str = field(default=None)
+    client_method: str = field(default=None)
+    arguments: dict[str, t.Any] = field(default_factory=dict)
+    batch_size: int = field(default=0)
+    ids: list[int | str] = field(default_factory=list)
+    batches: dict[int, dict[str, t.Any]] = field(default_factory=dict)
+    state: str = field(default=INTERRUPTED)
+    started_at: str | None = field(default=None)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "JournalReplay":
+        replay = cls(path=Path(path))
+
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record: dict[str, t.Any] = json.loads(line)
+                except json.JSONDecodeError:
+                    ## A record torn by a crash can only be the last one
+                    log.warning(f"Skipping a truncated record in journal '{path}'")
+                    continue
+
+                match record["event"]:
+                    case "begin":
+                        replay.operation_id = record["operation_id"]
+                        replay.host = record.get("host")
+                        replay.method = record["method"]
+                        replay.client_method = record["client_method"]
+                        replay.arguments = record.get("arguments") or {}
+                        replay.batch_size = record["batch_size"]
+                        replay.ids = record["ids"]
+                        replay.started_at = record["timestamp"]
+                    case "batch":
+                        batch: dict[str, t.Any] = replay.batches.setdefault(
+                            record["index"], {"ids": [], "state": SENT, "error": None}
+                        )
+                        if "ids" in record:
+                            batch["ids"] = record["ids"]
+                        batch["state"] = record["state"]
+                        batch["error"] = record.get("error")
+                    case "resume":
+                        replay.state = INTERRUPTED
+                    case "end":
+                        replay.state = record["state"]
+
+        if replay.operation_id is None:
+            raise ValueError(f"Journal '{path}' has no begin record")
+
+        return replay
+
+    @property
+    def confirmed(self) -> set[int | str]:
+        """Ids in batches the daemon confirmed."""
+        return {
+            i
+            for batch in self.batches.values()
+            if batch["state"] == DONE
+            for i in batch["ids"]
+        }
+
+    @property
+    def unconfirmed(self) -> list[int | str]:
+        """Ids in batches that were sent, but not confirmed (by that batch, or a later one from a resumed run)."""
+        confirmed: set[int | str] = self.confirmed
+
+        return [
+            i
+            for batch in self.batches.values()
+            if batch["state"] != DONE
+            for i in batch["ids"]
+            if i not in confirmed
+        ]
+
+    @property
+    def unsent(self) -> list[int | str]:
+        """Planned ids that were never sent."""
+        sent: set[int | str] = {
+            i for batch in self.batches.values() for i in batch["ids"]
+        }
+
+        return [i for i in self.ids if i not in sent]
+
+
+def list_journals(directory: str | Path | None = None) -> list[JournalReplay]:
+    """Return the operations journaled in `directory` (default: `get_journal_dir()`), oldest first."""
+    directory = get_journal_dir(directory)
+    if not directory.is_dir():
+        return []
+
+    replays: list[JournalReplay] = []
+    for path in directory.glob("*.ndjson"):
+        try:
+            replays.append(JournalReplay.load(path))
+        except Exception as exc:
+            log.warning(f"Could not read journal '{path}'. Details: {exc}")
+
+    return sorted(replays, key=lambda replay: replay.started_at or "")
+
+
+def find_journal(
+    operation_id: str, directory: str | Path | None = None
+) -> JournalReplay:
+    """Load the journal of an operation, by its id or a unique prefix of it.
+
+    Only the matching journal is read, since journals are named after their operation id.
+
+    Raises:
+        ValueError: If no journal, or more than one, matches.
+
+    """
+    paths: list[Path] = sorted(
+        get_journal_dir(directory).glob(f"{operation_id}*.ndjson")
+    )
+    if not paths:
+        raise ValueError(f"No journal found for operation '{operation_id}'")
+    if len(paths) > 1:
+        raise ValueError(
+            f"Operation ID '{operation_id}' is ambiguous, matches: {[p.stem for p in paths]}"
+        )
+
+    return JournalReplay.load(paths[0])
+
+
+def _last_record(path: Path) -> dict[str, t.Any] | None:
+    """Read only the last record of a journal."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        ## Records are small, except begin records (with every planned id), which are never last in a completed journal
+        f.seek(max(0, f.tell() - 4096))
+        lines: list[bytes] = f.read().splitlines()
+
+    try:
+        return json.loads(lines[-1]) if lines else None
+    except json.JSONDecodeError:
+        return None
+
+
+def prune_journals(
+    directory: str | Path | None = None, max_age: str | None = None
+) -> int:
+    """Remove completed journals older than `max_age`. Failed & interrupted journals are kept.
+
+    Only journals last modified before the cutoff are opened, and only their last record is read.
+
+    Params:
+        directory (str|Path|None): Journal directory. Defaults to `get_journal_dir()`.
+        max_age (str|None): Retention, e.g. `30d`. Defaults to `$TRANSMISSION_JOURNAL_RETENTION`, or `DEFAULT_JOURNAL_RETENTION`.
+
+    Returns:
+        (int): The number of journals removed.
+
+    """
+    directory = get_journal_dir(directory)
+    max_age = (
+        max_age
+        or os.environ.get("TRANSMISSION_JOURNAL_RETENTION")
+        or DEFAULT_JOURNAL_RETENTION
+    )
+    cutoff: float = time.time() - parse_duration(max_age)
+    if not directory.is_dir():
+        return 0
+
+    removed: int = 0
+    for path in directory.glob("*.ndjson"):
+        try:
+            if path.stat().st_mtime >= cutoff:
+                continue
+
+            record: dict[str, t.Any] | None = _last_record(path)
+            if (
+                record is None
+                or record.get("event") != "end"
+                or record.get("state") != DONE
+            ):
+                continue
+
+            path.unlink()
+            removed += 1
+        except OSError as exc:
+            log.warning(f"Could not prune journal '{path}'. Details: {exc}")
+
+    if removed:
+        log.info(
+            f"Pruned {removed} completed journal(s) older than {max_age} from '{directory}'"
+        )
+
+    return removed
+
+
+def _still_needed(
+    controller: TransmissionRPCController, replay: JournalReplay, ids: list[int | str]
+) -> list[int | str]:
+    """Filter unconfirmed ids down to those the operation still has to be sent for."""
+    if not ids or replay.method not in (
+        "torrent-remove",
+        "torrent-stop",
+        "torrent-start",
+        "torrent-start-now",
+        "torrent-set-location",
+    ):
+        ## Sending the rest again is harmless
+        return ids
+
+    torrents = controller.get_multiple_torrents(
+        ids=ids, fields=["id", "hashString", "status", "downloadDir"]
+    )
+    by_key: dict[int | str, t.Any] = {}
+    for torrent in torrents:
+        by_key[torrent.id] = torrent
+        by_key[torrent.hashString] = torrent
+
+    needed: list[int | str] = []
+    for i in ids:
+        torrent = by_key.get(i)
+        if torrent is None:
+            ## Removed (by this operation, or since)
+            continue
+
+        match replay.method:
+            case "torrent-remove":
+                needed.append(i)
+            case "torrent-stop":
+                if torrent.status != "stopped":
+                    needed.append(i)
+            case "torrent-start" | "torrent-start-now":
+                if torrent.status == "stopped":
+                    needed.append(i)
+            case "torrent-set-location":
+                if torrent.download_dir.rstrip("/") != str(
+                    replay.arguments.get("location", "")
+                ).rstrip("/"):
+                    needed.append(i)
+
+    return needed
+
+
+def resume_operation(
+    controller: TransmissionRPCController,
+    path: str | Path,
+    on_batch: t.Callable[[int, int], None] | None = None,
+) -> int:
+    """Resume an interrupted or failed operation from its journal.
+
+    Params:
+        controller (TransmissionRPCController): Controller for the operation's host.
+        path (str|Path): The operation's journal.
+        on_batch (Callable[[int, int], None]|None): Called with (done, total) after each batch.
+
+    Returns:
+        (int): The number of torrents the operation was sent for on this run.
+
+    """
+    replay: JournalReplay = JournalReplay.load(path)
+    if replay.state == DONE:
+        log.info(f"Operation '{replay.operation_id}' already completed")
+        return 0
+
+    ## Confirmed batches are skipped, unconfirmed ones are checked against the daemon
+    remaining: list[int | str] = _still_needed(
+        controller, replay, list(dict.fromkeys(replay.unconfirmed))
+    ) + [i for i in replay.unsent if i not in replay.confirmed]
+    log.info(
+        f"Resuming operation '{replay.operation_id}' ({replay.method}): {len(replay.confirmed)} confirmed, {len(remaining)} remaining"
+    )
+
+    journal = OperationJournal(replay.path, replay.operation_id, host=replay.host)
+    journal.resume()
+
+    if not remaining:
+        journal.end(DONE)
+        return 0
+
+    return controller._bulk_action(
+        replay.method,
+        replay.client_method,
+        remaining,
+        batch_size=replay.batch_size,
+        on_batch=on_batch,
+        journal=journal,
+        **replay.arguments,
+    )
@@ -0,0 +1,404 @@
+"""Copy torrent data locally instead of with a daemon-side move.
+
+`torrent-set-location` with `move=True` copies files single-threaded inside the
+daemon, and blocks its event loop (and so seeding) until every file is moved.
+When running on the daemon's host, `LocalCopyEngine` copies the torrent's files
+itself, then `local_move_torrent()` points the torrent at the copy with
+`move=False`, which only changes the torrent's download dir.
+
+Files are copied in parallel, by the kernel where possible: a reflink (`FICLONE`)
+on filesystems that support it (btrfs, xfs, ...), then `os.copy_file_range()`,
+then `os.sendfile()`, then a plain read/write loop. With `checksum`, files are
+copied through a buffer & hashed on the fly, and the copy is hashed again to
+verify it.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import errno
+import hashlib
+import ipaddress
+import logging
+import os
+from pathlib import Path
+import shutil
+import socket
+import threading
+import time
+import typing as t
+
+try:
+    import fcntl
+except ImportError:
+    ## Windows
+    fcntl = None
+
+if t.TYPE_CHECKING:
+    from .controllers import TransmissionRPCController
+
+    from transmission_rpc.torrent import Torrent
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "LOCAL_COPY_FIELDS",
+    "CopyStats",
+    "LocalCopyEngine",
+    "is_local_host",
+    "local_move_torrent",
+]
+
+## linux/fs.h: _IOW(0x94, 9, int)
+_FICLONE: int = 0x40049409
+## Bytes per copy_file_range()/sendfile()/read() call
+_COPY_CHUNK: int = 64 * 1024 * 1024
+_BUFFER_SIZE: int = 1024 * 1024
+## Errors that mean a copy method is not supported for this pair of files
+_UNSUPPORTED_ERRNOS: frozenset[int] = frozenset(
+    [
+        errno.EXDEV,
+        errno.ENOSYS,
+        errno.EINVAL,
+        errno.EOPNOTSUPP,
+        errno.EBADF,
+        errno.EPERM,
+    ]
+)
+## RPC fields needed to copy a torrent's data
+LOCAL_COPY_FIELDS: list[str] = [
+    "id",
+    "hashString",
+    "name",
+    "downloadDir",
+    "files",
+    "status",
+    "leftUntilDone",
+]
+
+
+def is_local_host(host: str) -> bool:
+    """Return `True` if `host` is this machine (a loopback address or one of its hostnames)."""
+    try:
+        addresses: set[str] = {
+            info[4][0]
+            for info in socket.getaddrinfo(host, None, proto=socket.IPPROTO_TCP)
+        }
+    except socket.gaierror:
+        return False
+
+    if all(ipaddress.ip_address(address).is_loopback for address in addresses):
+        return True
+
+    try:
+        local: set[str] = {
+            info[4][0]
+            for info in socket.getaddrinfo(
+                socket.gethostname(), None, proto=socket.IPPROTO_TCP
+            )
+        }
+    except socket.gaierror:
+        return False
+
+    return bool(addresses & local)
+
+
+@dataclass
+class CopyStats:
+    """Totals for a copy.
+
+    Attributes:
+        files (int): Files copied.
+        bytes (int): Bytes copied.
+        reflinked (int): Files cloned with a reflink (no data copied).
+        skipped (int): Files already at the destination (same size & mtime).
+        seconds (float): Wall time.
+
+    """
+
+    files: int = field(default=0)
+    bytes: int = field(default=0)
+    reflinked: int = field(default=0)
+    skipped: int = field(default=0)
+    seconds: float = field(default=0.0)
+
+    def add(self, other: "CopyStats") -> None:
+        self.files += other.files
+        self.bytes += other.bytes
+        self.reflinked += other.reflinked
+        self.skipped += other.skipped
+
+
+def _unsupported(exc: OSError) -> bool:
+    return exc.errno in _UNSUPPORTED_ERRNOS
+
+
+class LocalCopyEngine:
+    """Copy files in parallel with the fastest method the filesystems support.
+
+    Params:
+        workers (int): Files copied at a time.
+        reflink (bool): Try to clone files with `FICLONE` before copying data.
+        checksum (str|None): A `hashlib` algorithm (e.g. `blake2b`) to verify copies with. `None` to not verify.
+    """
+
+    def __init__(
+        self, workers: int = 4, reflink: bool = True, checksum: str | None = None
+    ) -> None:
+        if checksum is not None and checksum not in hashlib.algorithms_available:
+            raise ValueError(
+                f"Invalid checksum algorithm: {checksum}. Must be one of: {sorted(hashlib.algorithms_available)}"
+            )
+
+        self.workers: int = max(1, workers)
+        self.reflink: bool = reflink and fcntl is not None
+        self.checksum: str | None = checksum
+
+        ## Kernel copy methods that failed as unsupported once are not tried again
+        self._use_copy_file_range: bool = hasattr(os, "copy_file_range")
+        self._use_sendfile: bool = hasattr(os, "sendfile")
+        self._lock = threading.Lock()
+
+    def _disable(self, method: str, exc: OSError) -> None:
+        with self._lock:
+            if getattr(self, f"_use_{method}"):
+                log.debug(
+                    f"{method}() is not supported here, falling back. Details: {exc}"
+                )
+            setattr(self, f"_use_{method}", False)
+
+    def _kernel_copy(self, src_fd: int, dst_fd: int, size: int) -> bool:
+        """Copy with copy_file_range()/sendfile(). Return `False` if neither is supported.
+
+        Raises:
+            OSError: If a copy ended short of `size` bytes (i.e. the source was truncated).
+
+        """
+        if self._use_copy_file_range:
+            copied: int = 0
+            try:
+                while copied < size:
+                    n: int = os.copy_file_range(
+                        src_fd, dst_fd, min(_COPY_CHUNK, size - copied)
+                    )
+                    if n == 0:
+                        break
+                    copied += n
+            except OSError as exc:
+                ## Only fall back if nothing was written, positions are unknown otherwise
+                if copied or not _unsupported(exc):
+                    raise
+                self._disable("copy_file_range", exc)
+            else:
+                if copied == size:
+                    return True
+                if copied:
+                    raise OSError(
+                        f"Short copy: copy_file_range() stopped at {copied} of {size} bytes"
+                    )
+                ## Nothing copied, some filesystems report EOF instead of an error
+
+        if self._use_sendfile:
+            offset: int = 0
+            try:
+                while offset < size:
+                    n = os.sendfile(
+                        dst_fd, src_fd, offset, min(_COPY_CHUNK, size - offset)
+                    )
+                    if n == 0:
+                        break
+                    offset += n
+            except OSError as exc:
+                if offset or not _unsupported(exc):
+                    raise
+                self._disable("sendfile", exc)
+            else:
+                if offset == size:
+                    return True
+                raise OSError(
+                    f"Short copy: sendfile() stopped at {offset} of {size} bytes"
+                )
+
+        return False
+
+    def _hashing_copy(self, src: t.BinaryIO, dst: t.BinaryIO) -> str:
+        digest = hashlib.new(self.checksum)
+        buffer = bytearray(_BUFFER_SIZE)
+        view = memoryview(buffer)
+
+        while True:
+            n: int = src.readinto(buffer)
+            if not n:
+                break
+            digest.update(view[:n])
+            dst.write(view[:n])
+
+        return digest.hexdigest()
+
+    def copy_file(self, src: str | Path, dst: str | Path) -> CopyStats:
+        """Copy a single file, keeping its mtime & permissions.
+
+        Files already at `dst` with the same size & mtime are skipped, so an
+        interrupted copy can be resumed.
+        """
+        src, dst = Path(src), Path(dst)
+        src_stat: os.stat_result = src.stat()
+
+        try:
+            dst_stat: os.stat_result = dst.stat()
+            if dst_stat.st_size == src_stat.st_size and int(dst_stat.st_mtime) == int(
+                src_stat.st_mtime
+            ):
+                return CopyStats(skipped=1)
+        except FileNotFoundError:
+            pass
+
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        stats = CopyStats(files=1, bytes=src_stat.st_size)
+
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            if self.checksum is not None:
+                src_digest: str = self._hashing_copy(fsrc, fdst)
+            else:
+                cloned: bool = False
+                if self.reflink:
+                    try:
+                        fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+                        cloned = True
+                    except OSError:
+                        pass
+
+                if cloned:
+                    stats.reflinked = 1
+                    stats.bytes = 0
+                elif not self._kernel_copy(
+                    fsrc.fileno(), fdst.fileno(), src_stat.st_size
+                ):
+                    shutil.copyfileobj(fsrc, fdst, _BUFFER_SIZE)
+
+        ## Sources are removed after copying, so never let a short copy through
+        dst_size: int = dst.stat().st_size
+        if dst_size != src_stat.st_size:
+            raise OSError(
+                f"Size mismatch copying '{src}' to '{dst}': {dst_size} of {src_stat.st_size} bytes"
+            )
+
+        if self.checksum is not None:
+            with open(dst, "rb") as f:
+                dst_digest: str = hashlib.file_digest(f, self.checksum).hexdigest()
+            if dst_digest != src_digest:
+                raise OSError(f"Checksum mismatch copying '{src}' to '{dst}'")
+
+        shutil.copystat(src, dst)
+
+        return stats
+
+    def copy_files(self, pairs: list[tuple[Path, Path]]) -> CopyStats:
+        """Copy `(src, dst)` pairs with `workers` files in flight, largest first."""
+        started: float = time.monotonic()
+        total = CopyStats()
+
+        ## Start big files first, so one isn't left copying alone at the end
+        pairs = sorted(pairs, key=lambda pair: pair[0].stat().st_size, reverse=True)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for stats in pool.map(lambda pair: self.copy_file(*pair), pairs):
+                total.add(stats)
+
+        total.seconds = time.monotonic() - started
+
+        return total
+
+
+def _torrent_file_pairs(torrent: Torrent, dest: str | Path) -> list[tuple[Path, Path]]:
+    source: Path = Path(torrent.download_dir)
+    pairs: list[tuple[Path, Path]] = []
+
+    ## Raw records, Torrent.get_files() needs more fields than the names
+    for torrent_file in torrent.fields["files"]:
+        src: Path = source / torrent_file["name"]
+        if not src.exists():
+            ## Incomplete files, with rename-partial-files enabled
+            partial: Path = src.with_name(src.name + ".part")
+            if not partial.exists():
+                ## Not downloaded (yet), or unwanted
+                continue
+            src = partial
+
+        pairs.append((src, Path(dest) / src.relative_to(source)))
+
+    return pairs
+
+
+def _remove_source(pairs: list[tuple[Path, Path]], source: Path) -> None:
+    for src, _ in pairs:
+        src.unlink(missing_ok=True)
+
+    ## Remove directories the torrent's files were in, if they are now empty
+    dirs: set[Path] = {parent for src, _ in pairs for parent in src.parents}
+    for directory in sorted(dirs, key=lambda d: len(d.parts), reverse=True):
+        if directory == source or source not in directory.parents:
+            continue
+        try:
+            directory.rmdir()
+        except OSError:
+            pass
+
+
+def local_move_torrent(
+    controller: TransmissionRPCController,
+    torrent: Torrent,
+    dest: str | Path,
+    engine: LocalCopyEngine,
+    move: bool = True,
+) -> CopyStats:
+    """Copy a torrent's files to `dest` locally, then point the torrent at the copy.
+
+    The torrent keeps seeding from its old location while files are copied. Torrents
+    that are still downloading are stopped during the copy, and started again after.
+
+    Params:
+        controller (TransmissionRPCController): Controller for the daemon on this host.
+        torrent (Torrent): The torrent, with `LOCAL_COPY_FIELDS`.
+        dest (str|Path): New download dir.
+        engine (LocalCopyEngine): Engine to copy files with.
+        move (bool): Remove the source files once the torrent points at `dest`.
+
+    Returns:
+        (CopyStats): Copy totals.
+
+    """
+    source: Path = Path(torrent.download_dir)
+    if source.resolve() == Path(dest).resolve():
+        return CopyStats()
+
+    pairs: list[tuple[Path, Path]] = _torrent_file_pairs(torrent, dest)
+    if not pairs and any(f["bytesCompleted"] for f in torrent.fields["files"]):
+        raise FileNotFoundError(
+            f"None of the files of torrent '{torrent.name}' were found in '{source}'. The daemon's download dirs must be visible at the same paths on this host."
+        )
+    ## Files being downloaded would change under the copy
+    pause: bool = torrent.status != "stopped" and torrent.left_until_done > 0
+
+    if pause:
+        controller.stop_torrents([torrent.id])
+    try:
+        stats: CopyStats = engine.copy_files(pairs)
+
+        if not controller.copy_torrent_data(ids=[torrent.id], dest=str(dest)):
+            raise OSError(
+                f"Could not set the location of torrent '{torrent.name}' to '{dest}'"
+            )
+    finally:
+        if pause:
+            controller.start_torrents([torrent.id])
+
+    if move:
+        _remove_source(pairs, source)
+
+    log.info(
+        f"Copied '{torrent.name}' to '{dest}': {stats.files} file(s), {stats.bytes} byte(s), {stats.reflinked} reflinked, {stats.skipped} skipped in {stats.seconds:.1f}s"
+    )
+
+    return stats
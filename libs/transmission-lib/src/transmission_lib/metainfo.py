@@ -0,0 +1,438 @@
+"""Read `.torrent` metadata, and catalog directories of `.torrent` files by info hash.
+
+`read_torrent_meta()` reads only what it needs from a `.torrent` file with a
+lazy `BencodeView`: the info dictionary's name, sizes & file count, and the
+info hash (a hash of its exact encoded span). Piece hashes, the bulk of most
+`.torrent` files, are skipped without being decoded or copied. Large files are
+memory-mapped instead of read.
+
+`TorrentFileIndex` keeps that metadata in a SQLite database, keyed by path &
+indexed by info hash. `scan()` is incremental: files are listed with
+`os.scandir()` and only new or changed ones (by size & mtime) are read, in
+parallel across a process pool.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import hashlib
+import logging
+import mmap
+import os
+from pathlib import Path
+import sqlite3
+import time
+import typing as t
+
+from .bencode import BencodeView
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "TorrentMeta",
+    "TorrentFileScan",
+    "TorrentFileIndex",
+    "read_torrent_meta",
+    "read_torrent_metas",
+    "iter_torrent_files",
+]
+
+## Files larger than this are memory-mapped instead of read
+_MMAP_THRESHOLD: int = 4 * 1024 * 1024
+## Files read per process pool task
+_READ_CHUNK_SIZE: int = 256
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS torrent_files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    file_size INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    files INTEGER NOT NULL,
+    piece_length INTEGER NOT NULL,
+    private INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS torrent_files_hash ON torrent_files (hash);
+"""
+_COLUMNS: str = (
+    "path, mtime_ns, file_size, hash, name, size, files, piece_length, private"
+)
+
+
+@dataclass
+class TorrentMeta:
+    """Metadata of a `.torrent` file.
+
+    Attributes:
+        path (str): The `.torrent` file.
+        hash (str): Info hash: SHA-1 (hex) for v1 & hybrid torrents, SHA-256 for v2-only torrents.
+        name (str): Torrent name.
+        size (int): Total size of the torrent's files, in bytes.
+        files (int): Number of files (pad files included).
+        piece_length (int): Bytes per piece.
+        private (bool): Whether the torrent is private (no DHT/PEX).
+        mtime_ns (int): Modification time of the `.torrent` file.
+        file_size (int): Size of the `.torrent` file.
+
+    """
+
+    path: str = field(default=None)
+    hash: str = field(default=None)
+    name: str = field(default=None)
+    size: int = field(default=0)
+    files: int = field(default=0)
+    piece_length: int = field(default=0)
+    private: bool = field(default=False)
+    mtime_ns: int = field(default=0)
+    file_size: int = field(default=0)
+
+    def row(self) -> tuple:
+        return (
+            self.path,
+            self.mtime_ns,
+            self.file_size,
+            self.hash,
+            self.name,
+            self.size,
+            self.files,
+            self.piece_length,
+            int(self.private),
+        )
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "TorrentMeta":
+        (
+            path,
+            mtime_ns,
+            file_size,
+            info_hash,
+            name,
+            size,
+            files,
+            piece_length,
+            private,
+        ) = row
+
+        return cls(
+            path=path,
+            hash=info_hash,
+            name=name,
+            size=size,
+            files=files,
+            piece_length=piece_length,
+            private=bool(private),
+            mtime_ns=mtime_ns,
+            file_size=file_size,
+        )
+
+
+def _file_tree_sizes(tree: BencodeView) -> tuple[int, int]:
+    """Total size & file count of a v2 `file tree`."""
+    size: int = 0
+    files: int = 0
+    for name, node in tree.items():
+        if name == b"":
+            size += node.get("length", 0)
+            files += 1
+        else:
+            node_size, node_files = _file_tree_sizes(node)
+            size += node_size
+            files += node_files
+
+    return size, files
+
+
+def _meta_from_view(root: BencodeView, path: str) -> TorrentMeta:
+    info: BencodeView = root["info"]
+    meta = TorrentMeta(path=path)
+    name: bytes | None = None
+    name_utf8: bytes | None = None
+    file_tree: bool = False
+    v1: bool = False
+
+    ## One pass over the info dictionary, the file list is walked as it is reached
+    for key, value in info.items():
+        if key == b"files":
+            lengths: list[int] = value.column("length", 0)
+            meta.size, meta.files = sum(lengths), len(lengths)
+        elif key == b"length":
+            meta.size, meta.files = value, 1
+        elif key == b"file tree":
+            file_tree = True
+            tree_size, tree_files = _file_tree_sizes(value)
+        elif key == b"name":
+            name = value
+        elif key == b"name.utf-8":
+            name_utf8 = value
+        elif key == b"piece length":
+            meta.piece_length = value
+        elif key == b"pieces":
+            v1 = True
+        elif key == b"private":
+            meta.private = bool(value)
+
+    if name is None and name_utf8 is None:
+        raise KeyError("name")
+    meta.name = (name_utf8 or name).decode("utf-8", "replace")
+    if file_tree and not v1:
+        meta.size, meta.files = tree_size, tree_files
+
+    with info.raw() as raw:
+        meta.hash = (hashlib.sha1 if v1 or not file_tree else hashlib.sha256)(
+            raw
+        ).hexdigest()
+
+    return meta
+
+
+def read_torrent_meta(path: str | os.PathLike) -> TorrentMeta:
+    """Read a `.torrent` file's metadata, decoding only the keys needed.
+
+    Raises:
+        BencodeError: If the file is not valid bencoded data.
+        KeyError: If the file has no info dictionary, or it lacks a name.
+
+    """
+    path = os.fspath(path)
+    with open(path, "rb") as f:
+        stat: os.stat_result = os.fstat(f.fileno())
+
+        if stat.st_size > _MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                meta: TorrentMeta = _meta_from_view(BencodeView(data), path)
+        else:
+            meta = _meta_from_view(BencodeView(f.read()), path)
+
+    meta.mtime_ns = stat.st_mtime_ns
+    meta.file_size = stat.st_size
+
+    return meta
+
+
+def _read_many(paths: list[str]) -> list[TorrentMeta | tuple[str, str]]:
+    """Read a chunk of `.torrent` files (in a worker process). Errors are returned as (path, error)."""
+    results: list[TorrentMeta | tuple[str, str]] = []
+    for path in paths:
+        try:
+            results.append(read_torrent_meta(path))
+        except Exception as exc:
+            results.append((path, f"{type(exc).__name__}: {exc}"))
+
+    return results
+
+
+def read_torrent_metas(
+    paths: list[str],
+    workers: int | None = None,
+    on_progress: t.Callable[[int, int], None] | None = None,
+) -> tuple[list[TorrentMeta], dict[str, str]]:
+    """Read many `.torrent` files, in chunks across a process pool.
+
+    Params:
+        paths (list[str]): `.torrent` files.
+        workers (int|None): Processes. Defaults to the number of CPUs; with 1 (or a single chunk), files are read in this process.
+        on_progress (Callable[[int, int], None]|None): Called with (files read, files) after each chunk.
+
+    Returns:
+        (tuple[list[TorrentMeta], dict[str, str]]): Metadata of the files read, and errors for files that could not be.
+
+    """
+    metas: list[TorrentMeta] = []
+    errors: dict[str, str] = {}
+    chunks: list[list[str]] = [
+        paths[i : i + _READ_CHUNK_SIZE] for i in range(0, len(paths), _READ_CHUNK_SIZE)
+    ]
+
+    def _collect(results: list[TorrentMeta | tuple[str, str]]) -> None:
+        for result in results:
+            if isinstance(result, TorrentMeta):
+                metas.append(result)
+            else:
+                errors[result[0]] = result[1]
+        if on_progress is not None:
+            on_progress(len(metas) + len(errors), len(paths))
+
+    if len(chunks) > 1 and (workers is None or workers > 1):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for results in pool.map(_read_many, chunks):
+                _collect(results)
+    else:
+        for chunk in chunks:
+            _collect(_read_many(chunk))
+
+    return metas, errors
+
+
+def iter_torrent_files(
+    directory: str | os.PathLike,
+    recursive: bool = True,
+    suffixes: tuple[str, ...] = (".torrent",),
+) -> t.Iterator[tuple[str, int, int]]:
+    """Yield `(path, mtime_ns, size)` of every `.torrent` file (or file ending in one of `suffixes`) in a directory."""
+    stack: list[str] = [os.fspath(directory)]
+
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                stack.append(entry.path)
+                        elif entry.name.lower().endswith(suffixes):
+                            stat: os.stat_result = entry.stat()
+                            yield entry.path, stat.st_mtime_ns, stat.st_size
+                    except OSError:
+                        continue
+        except OSError as exc:
+            log.warning(f"Could not list directory. Details: {exc}")
+
+
+@dataclass
+class TorrentFileScan:
+    """Changes written to the index by a scan.
+
+    Attributes:
+        scanned (int): `.torrent` files found.
+        added (int): Files new to the index.
+        updated (int): Files whose size or mtime changed, read again.
+        removed (int): Indexed files that no longer exist.
+        errors (dict[str, str]): Files that could not be read, with the reason.
+        seconds (float): Time taken.
+
+    """
+
+    scanned: int = field(default=0)
+    added: int = field(default=0)
+    updated: int = field(default=0)
+    removed: int = field(default=0)
+    errors: dict[str, str] = field(default_factory=dict)
+    seconds: float = field(default=0.0)
+
+
+class TorrentFileIndex:
+    """Persistent catalog of `.torrent` files, by info hash.
+
+    Params:
+        path (str|Path): SQLite database file, created if missing.
+    """
+
+    def __init__(self, path: str | Path = "torrent-index.db") -> None:
+        self.path: Path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn: sqlite3.Connection = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> "TorrentFileIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM torrent_files").fetchone()[0]
+
+    def __contains__(self, info_hash: str) -> bool:
+        return (
+            self.conn.execute(
+                "SELECT 1 FROM torrent_files WHERE hash = ? LIMIT 1",
+                (info_hash.lower(),),
+            ).fetchone()
+            is not None
+        )
+
+    def lookup(self, info_hash: str) -> list[TorrentMeta]:
+        """`.torrent` files with an info hash."""
+        return [
+            TorrentMeta.from_row(row)
+            for row in self.conn.execute(
+                f"SELECT {_COLUMNS} FROM torrent_files WHERE hash = ? ORDER BY path",
+                (info_hash.lower(),),
+            )
+        ]
+
+    def hashes(self) -> set[str]:
+        """Every indexed info hash."""
+        return {
+            row[0]
+            for row in self.conn.execute("SELECT DISTINCT hash FROM torrent_files")
+        }
+
+    def scan(
+        self,
+        directory: str | Path,
+        recursive: bool = True,
+        workers: int | None = None,
+        on_progress: t.Callable[[int, int], None] | None = None,
+    ) -> TorrentFileScan:
+        """Bring the index in line with the `.torrent` files in `directory`.
+
+        Params:
+            directory (str|Path): Directory to catalog.
+            recursive (bool): Also catalog subdirectories.
+            workers (int|None): Processes reading files. Defaults to the number of CPUs.
+            on_progress (Callable[[int, int], None]|None): Called with (files read, files to read) after each chunk.
+
+        """
+        started: float = time.perf_counter()
+        scan = TorrentFileScan()
+        directory = os.path.abspath(directory)
+        prefix: str = directory.rstrip(os.sep) + os.sep
+
+        stored: dict[str, tuple[int, int]] = {
+            path: (mtime_ns, file_size)
+            for path, mtime_ns, file_size in self.conn.execute(
+                "SELECT path, mtime_ns, file_size FROM torrent_files WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix),
+            )
+        }
+
+        seen: set[str] = set()
+        changed: list[str] = []
+        for path, mtime_ns, file_size in iter_torrent_files(
+            directory, recursive=recursive
+        ):
+            scan.scanned += 1
+            seen.add(path)
+            previous: tuple[int, int] | None = stored.get(path)
+            if previous is None:
+                scan.added += 1
+                changed.append(path)
+            elif previous != (mtime_ns, file_size):
+                scan.updated += 1
+                changed.append(path)
+
+        removed: list[tuple[str]] = [
+            (path,)
+            for path in stored
+            if path not in seen and (recursive or os.path.dirname(path) == directory)
+        ]
+        scan.removed = len(removed)
+
+        metas, scan.errors = read_torrent_metas(
+            changed, workers=workers, on_progress=on_progress
+        )
+        failed: list[tuple[str]] = [(path,) for path in scan.errors]
+
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO torrent_files ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [meta.row() for meta in metas],
+            )
+            ## Unreadable files are dropped, so a fixed file is read again on the next scan
+            self.conn.executemany(
+                "DELETE FROM torrent_files WHERE path = ?", removed + failed
+            )
+
+        scan.seconds = time.perf_counter() - started
+
+        return scan
@@ -4,6 +4,7 @@ import random
 import typing as t
 
 from .controllers import TransmissionRPCController
+from .retry import RetryPolicy
 from .settings import TransmissionClientSettings
 
 from loguru import logger as log
@@ -94,9 +95,9 @@ def prepare_torrent_dict(torrent: Torrent = None) -> dict:
         "id": torrent.id,
         "name": torrent.name,
         "activity_date": torrent.activity_date,
-        "date_active": torrent.date_active,
-        "date_added": torrent.date_added,
-        "date_started": torrent.date_started,
+        "date_active": torrent.activity_date,
+        "date_added": torrent.added_date,
+        "date_started": torrent.start_date,
         "done_date": torrent.done_date or None,
         "is_finished": torrent.is_finished,
         "corrupt_ever": torrent.corrupt_ever,
@@ -116,7 +117,7 @@ def prepare_torrent_dict(torrent: Torrent = None) -> dict:
         # "file_stats": torrent.file_stats,
         # "file_stats": extract_fields(torrent.file_stats),
         # "files": torrent.files(),
-        "files": torrent.files(),
+        "files": torrent.get_files(),
         "hashString": torrent.hashString,
         "have_unchecked": torrent.have_unchecked,
         "have_valid": torrent.have_valid,
@@ -162,6 +163,13 @@ def get_transmission_controller(
     password: str | None = None,
     protocol: str | None = "http",
     path: str | None = "/transmission/rpc",
+    cache_ttl: float = 0,
+    pool_size: int = 4,
+    timeout: float | None = None,
+    adaptive_timeout: bool = True,
+    retries: int = 2,
+    retry_backoff: float = 0.5,
+    deadline: float | None = None,
 ):
     if transmission_settings is None:
         if any(
@@ -182,6 +190,12 @@ def get_transmission_controller(
             "password": transmission_settings.password,
             "path": transmission_settings.path,
             "protocol": transmission_settings.protocol,
+            "pool_size": transmission_settings.pool_size,
+            "timeout": transmission_settings.timeout,
+            "adaptive_timeout": transmission_settings.adaptive_timeout,
+            "retries": transmission_settings.retries,
+            "retry_backoff": transmission_settings.retry_backoff,
+            "deadline": transmission_settings.deadline,
         }
 
     else:
@@ -192,6 +206,12 @@ def get_transmission_controller(
             "password": password,
             "path": path,
             "protocol": protocol,
+            "pool_size": pool_size,
+            "timeout": timeout,
+            "adaptive_timeout": adaptive_timeout,
+            "retries": retries,
+            "retry_backoff": retry_backoff,
+            "deadline": deadline,
         }
 
     try:
@@ -202,6 +222,15 @@ def get_transmission_controller(
             password=_conf["password"],
             path=_conf["path"],
             protocol=_conf["protocol"],
+            cache_ttl=cache_ttl,
+            pool_size=_conf["pool_size"],
+            timeout=_conf["timeout"],
+            adaptive_timeout=_conf["adaptive_timeout"],
+            retry_policy=RetryPolicy(
+                retries=_conf["retries"],
+                backoff=_conf["retry_backoff"],
+                deadline=_conf["deadline"],
+            ),
         )
 
         return _controller
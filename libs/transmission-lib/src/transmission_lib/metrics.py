@@ -0,0 +1,420 @@
+"""Prometheus metrics for Transmission hosts & the RPC controller.
+
+Torrent gauges are computed from a single projected `torrent-get` per host
+(only the fields in `METRICS_TORRENT_FIELDS` are requested). RPC latency
+histograms & error counters are recorded by `TransmissionRPCController`
+on every call, see `RPCStats`.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+import typing as t
+
+if t.TYPE_CHECKING:
+    from .controllers import TransmissionRPCController
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "DEFAULT_LATENCY_BUCKETS",
+    "METRICS_TORRENT_FIELDS",
+    "LatencyHistogram",
+    "RPCStats",
+    "HostMetrics",
+    "collect_host_metrics",
+    "render_prometheus",
+    "write_textfile",
+    "serve_metrics",
+]
+
+## Upper bounds (in seconds) of the RPC latency histogram buckets
+DEFAULT_LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+## RPC fields requested when collecting torrent metrics
+METRICS_TORRENT_FIELDS: list[str] = [
+    "status",
+    "error",
+    "doneDate",
+    "rateDownload",
+    "rateUpload",
+    "totalSize",
+    "leftUntilDone",
+    "uploadedEver",
+    "downloadedEver",
+]
+
+## Raw RPC status codes => transmission_rpc.Status values
+_STATUS_NAMES: dict[int, str] = {
+    0: "stopped",
+    1: "check pending",
+    2: "checking",
+    3: "download pending",
+    4: "downloading",
+    5: "seed pending",
+    6: "seeding",
+}
+
+
+class LatencyHistogram:
+    """Thread-safe, Prometheus-style cumulative latency histogram.
+
+    Params:
+        buckets (tuple[float]): Sorted bucket upper bounds, in seconds.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+        ## One extra slot for observations above the last bucket (+Inf)
+        self._counts: list[int] = [0] * (len(self.buckets) + 1)
+        self._sum: float = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        idx: int = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[idx] += 1
+            self._sum += seconds
+
+    def snapshot(self) -> tuple[list[tuple[float, int]], float, int]:
+        """Return `([(upper_bound, cumulative_count), ...], sum, count)`.
+
+        The last bucket's upper bound is `float("inf")`.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total_sum = self._sum
+
+        cumulative: list[tuple[float, int]] = []
+        running: int = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            cumulative.append((bound, running))
+
+        return cumulative, total_sum, running
+
+
+class RPCStats:
+    """Latency histograms & error counters, keyed by RPC method name."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self.buckets: tuple[float, ...] = buckets
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self.errors: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, method: str) -> LatencyHistogram:
+        histogram = self.histograms.get(method)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(
+                    method, LatencyHistogram(self.buckets)
+                )
+
+        return histogram
+
+    def observe(self, method: str, seconds: float) -> None:
+        self._histogram(method).observe(seconds)
+
+    def record_error(self, method: str) -> None:
+        with self._lock:
+            self.errors[method] = self.errors.get(method, 0) + 1
+
+
+@dataclass
+class HostMetrics:
+    """Metrics collected from a single Transmission host.
+
+    Attributes:
+        host (str): Host label used in the exported metrics.
+        up (bool): `False` if the scrape failed.
+        scrape_duration (float): Seconds spent collecting this host's metrics.
+        torrents_by_status (dict[str, int]): Torrent count per status.
+        finished (int): Torrents with a `doneDate`.
+        errored (int): Torrents reporting a non-zero `error`.
+        rate_download (int): Aggregate download rate (bytes/s).
+        rate_upload (int): Aggregate upload rate (bytes/s).
+        total_size (int): Sum of all torrent sizes (bytes).
+        left_until_done (int): Bytes left to download across all torrents.
+        uploaded_ever (int): Bytes uploaded across all torrents.
+        downloaded_ever (int): Bytes downloaded across all torrents.
+        rpc_stats (RPCStats|None): The controller's RPC latency/error stats.
+
+    """
+
+    host: str
+    up: bool = field(default=True)
+    scrape_duration: float = field(default=0.0)
+    torrents_by_status: dict[str, int] = field(default_factory=dict)
+    finished: int = field(default=0)
+    errored: int = field(default=0)
+    rate_download: int = field(default=0)
+    rate_upload: int = field(default=0)
+    total_size: int = field(default=0)
+    left_until_done: int = field(default=0)
+    uploaded_ever: int = field(default=0)
+    downloaded_ever: int = field(default=0)
+    rpc_stats: RPCStats | None = field(default=None, repr=False)
+
+
+def collect_host_metrics(
+    controller: TransmissionRPCController, host: str | None = None
+) -> HostMetrics:
+    """Collect torrent metrics for a host using one projected `torrent-get`.
+
+    Params:
+        controller (TransmissionRPCController): Controller for the host to scrape.
+        host (str|None): Label for the host. Defaults to `controller.host`.
+
+    Returns:
+        (HostMetrics): The collected metrics. A failed scrape returns `up=False`
+            instead of raising, so other hosts can still be exported.
+
+    """
+    metrics = HostMetrics(
+        host=host or str(controller.host),
+        torrents_by_status={name: 0 for name in _STATUS_NAMES.values()},
+        rpc_stats=controller.rpc_stats,
+    )
+
+    start: float = time.perf_counter()
+    try:
+        torrents = controller.get_all_torrents(fields=METRICS_TORRENT_FIELDS)
+    except Exception as exc:
+        log.error(f"({type(exc)}) Error scraping metrics from '{metrics.host}': {exc}")
+        metrics.up = False
+        metrics.scrape_duration = time.perf_counter() - start
+
+        return metrics
+
+    for torrent in torrents:
+        fields: dict[str, t.Any] = torrent.fields
+        status: str = _STATUS_NAMES.get(fields.get("status"), "unknown")
+
+        metrics.torrents_by_status[status] = (
+            metrics.torrents_by_status.get(status, 0) + 1
+        )
+        if fields.get("doneDate"):
+            metrics.finished += 1
+        if fields.get("error"):
+            metrics.errored += 1
+
+        metrics.rate_download += fields.get("rateDownload", 0)
+        metrics.rate_upload += fields.get("rateUpload", 0)
+        metrics.total_size += fields.get("totalSize", 0)
+        metrics.left_until_done += fields.get("leftUntilDone", 0)
+        metrics.uploaded_ever += fields.get("uploadedEver", 0)
+        metrics.downloaded_ever += fields.get("downloadedEver", 0)
+
+    metrics.scrape_duration = time.perf_counter() - start
+
+    return metrics
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels: t.Any) -> str:
+    return ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+def render_prometheus(hosts: list[HostMetrics]) -> str:
+    """Render a list of `HostMetrics` in the Prometheus text exposition format."""
+    lines: list[str] = []
+
+    def metric(name: str, _type: str, _help: str, samples: list[tuple[str, t.Any]]):
+        lines.append(f"# HELP {name} {_help}")
+        lines.append(f"# TYPE {name} {_type}")
+        for labels, value in samples:
+            lines.append(f"{name}{{{labels}}} {value}")
+
+    metric(
+        "transmission_up",
+        "gauge",
+        "Whether the last scrape of the host succeeded.",
+        [(_labels(host=h.host), int(h.up)) for h in hosts],
+    )
+    metric(
+        "transmission_scrape_duration_seconds",
+        "gauge",
+        "Seconds spent collecting metrics from the host.",
+        [(_labels(host=h.host), f"{h.scrape_duration:.6f}") for h in hosts],
+    )
+
+    up_hosts: list[HostMetrics] = [h for h in hosts if h.up]
+    metric(
+        "transmission_torrents",
+        "gauge",
+        "Number of torrents by status.",
+        [
+            (_labels(host=h.host, status=status), count)
+            for h in up_hosts
+            for status, count in h.torrents_by_status.items()
+        ],
+    )
+
+    for name, attr, _help in [
+        ("transmission_torrents_finished", "finished", "Torrents with a done date."),
+        ("transmission_torrents_errored", "errored", "Torrents reporting an error."),
+        (
+            "transmission_download_rate_bytes",
+            "rate_download",
+            "Aggregate download rate in bytes per second.",
+        ),
+        (
+            "transmission_upload_rate_bytes",
+            "rate_upload",
+            "Aggregate upload rate in bytes per second.",
+        ),
+        ("transmission_size_bytes", "total_size", "Total size of all torrents."),
+        (
+            "transmission_left_until_done_bytes",
+            "left_until_done",
+            "Bytes left to download across all torrents.",
+        ),
+        (
+            "transmission_uploaded_bytes",
+            "uploaded_ever",
+            "Bytes uploaded across all torrents.",
+        ),
+        (
+            "transmission_downloaded_bytes",
+            "downloaded_ever",
+            "Bytes downloaded across all torrents.",
+        ),
+    ]:
+        metric(
+            name,
+            "gauge",
+            _help,
+            [(_labels(host=h.host), getattr(h, attr)) for h in up_hosts],
+        )
+
+    hist_name: str = "transmission_rpc_request_duration_seconds"
+    lines.append(f"# HELP {hist_name} Latency of RPC requests by method.")
+    lines.append(f"# TYPE {hist_name} histogram")
+    for h in hosts:
+        if h.rpc_stats is None:
+            continue
+
+        for method, histogram in sorted(h.rpc_stats.histograms.items()):
+            cumulative, total_sum, count = histogram.snapshot()
+            for bound, bucket_count in cumulative:
+                labels = _labels(host=h.host, method=method, le=_format_bound(bound))
+                lines.append(f"{hist_name}_bucket{{{labels}}} {bucket_count}")
+
+            labels = _labels(host=h.host, method=method)
+            lines.append(f"{hist_name}_sum{{{labels}}} {total_sum:.6f}")
+            lines.append(f"{hist_name}_count{{{labels}}} {count}")
+
+    metric(
+        "transmission_rpc_errors_total",
+        "counter",
+        "Failed RPC requests by method.",
+        [
+            (_labels(host=h.host, method=method), count)
+            for h in hosts
+            if h.rpc_stats is not None
+            for method, count in sorted(h.rpc_stats.errors.items())
+        ],
+    )
+
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(text: str, path: str | Path) -> Path:
+    """Atomically write metrics for the node_exporter textfile collector.
+
+    The collector may read the file at any moment, so the metrics are written
+    to a temporary file in the same directory & renamed over `path`.
+    """
+    path = Path(path)
+    if not path.parent.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_path: Path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_text(text)
+        os.replace(tmp_path, path)
+    except Exception as exc:
+        msg = Exception(
+            f"Unhandled exception writing metrics to '{path}'. Details: {exc}"
+        )
+        log.error(msg)
+
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+        raise exc
+
+    return path
+
+
+def serve_metrics(
+    collect: t.Callable[[], list[HostMetrics]],
+    host: str = "127.0.0.1",
+    port: int = 9190,
+) -> None:
+    """Serve metrics over HTTP at `/metrics` until interrupted.
+
+    Each scrape calls `collect()`. Scrapes are serialized so a slow host
+    never has two fetches in flight.
+
+    Params:
+        collect (Callable): Returns the `HostMetrics` to render for a scrape.
+        host (str): Address to bind.
+        port (int): Port to bind.
+    """
+    scrape_lock = threading.Lock()
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+
+            with scrape_lock:
+                body: bytes = render_prometheus(collect()).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: t.Any) -> None:
+            log.debug(f"{self.address_string()} - {format % args}")
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    log.info(f"Serving metrics on http://{host}:{port}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,438 @@
+"""Find (and delete) data in download dirs that no torrent on the daemon references.
+
+Torrents removed without deleting their data leave files behind. To find them,
+every file of every torrent is added to a trie of path components (from a
+projected, chunked `files` fetch), so millions of referenced paths cost one dict
+entry per distinct component instead of one full path string each. Download
+dirs are then walked with `os.scandir()` by a pool of worker threads, following
+the trie: entries missing from it are orphans. An unreferenced directory is
+reported once, with the total size of everything under it.
+
+The daemon's download dirs must be visible on this host, at the same paths or
+mapped with `path_map` (i.e. `{"/downloads": "/mnt/nas/downloads"}`).
+
+Files modified less than `min_age` ago are never reported, so data of torrents
+added after the torrent list was fetched is not mistaken for an orphan.
+
+Unfinished torrents keep their data in the daemon's `incomplete-dir` when it is
+enabled, so their files are also added under it, and the incomplete dir itself
+(and every directory above it) is always referenced: it is never reported, even
+when it sits inside a download dir and holds nothing yet.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import fnmatch
+import logging
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+import typing as t
+
+if t.TYPE_CHECKING:
+    from .controllers import TransmissionRPCController
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "ORPHAN_FIELDS",
+    "Orphan",
+    "OrphanReport",
+    "PathTrie",
+    "parse_path_map",
+    "map_path",
+    "build_path_trie",
+    "scan_orphans",
+    "delete_orphans",
+]
+
+## RPC fields needed to know every file a torrent references
+ORPHAN_FIELDS: list[str] = ["id", "downloadDir", "leftUntilDone", "files"]
+## Suffix of incomplete files, with rename-partial-files enabled
+_PARTIAL_SUFFIX: str = ".part"
+## Trie lookup default, files are `None`
+_MISSING: object = object()
+
+
+def parse_path_map(mappings: list[str]) -> dict[str, str]:
+    """Build a path map from `remote=local` strings, i.e. `["/downloads=/mnt/nas/downloads"]`."""
+    path_map: dict[str, str] = {}
+    for mapping in mappings:
+        remote, sep, local = mapping.partition("=")
+        if not sep or not remote.strip() or not local.strip():
+            raise ValueError(
+                f"Invalid path mapping: '{mapping}'. Expected <remote path>=<local path>"
+            )
+        path_map[remote.strip()] = local.strip()
+
+    return path_map
+
+
+def map_path(path: str, path_map: dict[str, str] | None) -> str:
+    """Translate a path as seen by the daemon to this host, with the longest matching prefix of `path_map`."""
+    path = os.path.normpath(path)
+    for remote in sorted(path_map or {}, key=len, reverse=True):
+        remote_norm: str = os.path.normpath(remote)
+        if path == remote_norm or path.startswith(remote_norm.rstrip(os.sep) + os.sep):
+            return os.path.normpath(path_map[remote] + path[len(remote_norm) :])
+
+    return path
+
+
+class PathTrie:
+    """Referenced paths, as nested dicts of interned path components.
+
+    A directory is a dict of its children, a file is `None`.
+    """
+
+    def __init__(self) -> None:
+        self.root: dict[str, t.Any] = {}
+        self.files: int = 0
+
+    def _dir(self, parts: list[str]) -> dict[str, t.Any]:
+        node: dict[str, t.Any] = self.root
+        for part in parts:
+            child = node.get(part)
+            if child is None:
+                child = node[sys.intern(part)] = {}
+            node = child
+
+        return node
+
+    def add(self, path: str) -> None:
+        parts: list[str] = [part for part in path.split(os.sep) if part]
+        node: dict[str, t.Any] = self._dir(parts[:-1])
+
+        if parts and parts[-1] not in node:
+            node[sys.intern(parts[-1])] = None
+            self.files += 1
+
+    def add_dir(self, path: str) -> None:
+        """Reference a directory (and every directory above it), even if no file in it is referenced."""
+        self._dir([part for part in path.split(os.sep) if part])
+
+    def node(self, path: str) -> dict[str, t.Any] | None:
+        """The node of a directory, or `None` if nothing under it is referenced."""
+        node: dict[str, t.Any] | None = self.root
+        for part in path.split(os.sep):
+            if not part:
+                continue
+            node = node.get(part) if node else None
+            if node is None:
+                return None
+
+        return node
+
+
+@dataclass
+class Orphan:
+    """An unreferenced file or directory.
+
+    Attributes:
+        path (str): Local path.
+        is_dir (bool): Whether it is a directory (everything under it is unreferenced).
+        size (int): Bytes, including everything under a directory.
+        files (int): Number of files, including everything under a directory.
+        newest (float): Latest modification time (epoch seconds) of anything in it.
+
+    """
+
+    path: str = field(default=None)
+    is_dir: bool = field(default=False)
+    size: int = field(default=0)
+    files: int = field(default=0)
+    newest: float = field(default=0.0)
+
+
+@dataclass
+class OrphanReport:
+    """Result of a scan.
+
+    Attributes:
+        orphans (list[Orphan]): Unreferenced files & directories, largest first.
+        recent (int): Orphans skipped because something in them changed within `min_age`.
+        roots (list[str]): Local directories scanned.
+        referenced (int): Files referenced by torrents.
+        scanned (int): Directory entries scanned.
+        errors (list[str]): Directories that could not be read.
+        seconds (float): Scan time.
+
+    """
+
+    orphans: list[Orphan] = field(default_factory=list)
+    recent: int = field(default=0)
+    roots: list[str] = field(default_factory=list)
+    referenced: int = field(default=0)
+    scanned: int = field(default=0)
+    errors: list[str] = field(default_factory=list)
+    seconds: float = field(default=0.0)
+
+    @property
+    def size(self) -> int:
+        return sum(orphan.size for orphan in self.orphans)
+
+
+def build_path_trie(
+    controller: TransmissionRPCController,
+    path_map: dict[str, str] | None = None,
+    chunk_size: int = 200,
+) -> tuple[PathTrie, set[str]]:
+    """Add every file of every torrent on the daemon to a trie of local paths.
+
+    Torrents are fetched `chunk_size` at a time, with only `ORPHAN_FIELDS`. If the
+    daemon's `incomplete-dir` is enabled, it is referenced as a directory and the
+    files of unfinished torrents are also added under it.
+
+    Returns:
+        (tuple[PathTrie, set[str]]): The trie, and the torrents' download dirs (local paths).
+
+    """
+    trie = PathTrie()
+    download_dirs: set[str] = set()
+
+    session: dict = controller.raw_request(
+        "session-get", {"fields": ["incomplete-dir", "incomplete-dir-enabled"]}
+    )
+    incomplete_dir: str | None = None
+    if session["arguments"].get("incomplete-dir-enabled") and session["arguments"].get(
+        "incomplete-dir"
+    ):
+        incomplete_dir = map_path(session["arguments"]["incomplete-dir"], path_map)
+        trie.add_dir(incomplete_dir)
+
+    for torrent in controller.iter_torrents(
+        fields=ORPHAN_FIELDS, chunk_size=chunk_size
+    ):
+        download_dir: str = map_path(torrent.fields["downloadDir"], path_map)
+        download_dirs.add(download_dir)
+        ## Unfinished data is in the incomplete dir, or already in the download dir
+        #  if it was there when the torrent was added: reference both
+        dirs: list[str] = [download_dir]
+        if incomplete_dir is not None and torrent.fields.get("leftUntilDone", 0) > 0:
+            dirs.append(incomplete_dir)
+        ## Raw records, Torrent.get_files() needs more fields than the names
+        for torrent_file in torrent.fields.get("files", []):
+            for directory in dirs:
+                trie.add(os.path.join(directory, torrent_file["name"]))
+
+    return trie, download_dirs
+
+
+class _Scanner:
+    def __init__(self, exclude: list[str], workers: int) -> None:
+        self.exclude: list[str] = exclude
+        self.workers: int = max(1, workers)
+        self.queue: queue.Queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.orphans: list[Orphan] = []
+        self.errors: list[str] = []
+        self.scanned: int = 0
+
+    def _excluded(self, name: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.exclude)
+
+    def _scan(
+        self, path: str, node: dict[str, t.Any] | None, orphan: Orphan | None
+    ) -> None:
+        """Scan a directory. `node` is its trie node, or `orphan` the unreferenced directory it is in."""
+        size: int = 0
+        files: int = 0
+        newest: float = 0.0
+        scanned: int = 0
+        found: list[Orphan] = []
+
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    scanned += 1
+                    if orphan is None and self._excluded(entry.name):
+                        continue
+                    try:
+                        is_dir: bool = entry.is_dir(follow_symlinks=False)
+                        stat: os.stat_result = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+
+                    if orphan is not None:
+                        ## Inside an unreferenced directory, only totals are needed
+                        if is_dir:
+                            self.queue.put((entry.path, None, orphan))
+                        else:
+                            size += stat.st_size
+                            files += 1
+                            newest = max(newest, stat.st_mtime)
+                        continue
+
+                    name: str = entry.name
+                    if name not in node and name.endswith(_PARTIAL_SUFFIX):
+                        name = name[: -len(_PARTIAL_SUFFIX)]
+                    child = node.get(name, _MISSING)
+
+                    if child is _MISSING:
+                        ## Directory mtimes change when anything is deleted from them, so a
+                        #  directory's age is that of its newest file (its own if it has none)
+                        new = Orphan(
+                            path=entry.path, is_dir=is_dir, newest=stat.st_mtime
+                        )
+                        if is_dir:
+                            self.queue.put((entry.path, None, new))
+                        else:
+                            new.size, new.files = stat.st_size, 1
+                        found.append(new)
+                    elif is_dir and isinstance(child, dict):
+                        self.queue.put((entry.path, child, None))
+        except OSError as exc:
+            with self.lock:
+                self.errors.append(f"{path}: {exc}")
+
+        with self.lock:
+            self.scanned += scanned
+            self.orphans.extend(found)
+            if orphan is not None and files:
+                orphan.newest = (
+                    newest if not orphan.files else max(orphan.newest, newest)
+                )
+                orphan.size += size
+                orphan.files += files
+
+    def _worker(self) -> None:
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                self._scan(*item)
+            finally:
+                self.queue.task_done()
+
+    def run(self, roots: list[tuple[str, dict[str, t.Any]]]) -> None:
+        for root, node in roots:
+            self.queue.put((root, node, None))
+
+        threads: list[threading.Thread] = [
+            threading.Thread(target=self._worker, daemon=True)
+            for _ in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        self.queue.join()
+        for _ in threads:
+            self.queue.put(None)
+        for thread in threads:
+            thread.join()
+
+
+def scan_orphans(
+    trie: PathTrie,
+    roots: t.Iterable[str],
+    workers: int = 8,
+    min_age: float = 3600,
+    exclude: list[str] | None = None,
+) -> OrphanReport:
+    """Walk `roots` in parallel & report everything in them that is not in `trie`.
+
+    Params:
+        trie (PathTrie): Files referenced by torrents, see `build_path_trie()`.
+        roots (Iterable[str]): Local directories to scan. Roots inside other roots are skipped.
+        workers (int): Directories scanned at a time.
+        min_age (float): Skip orphans with anything modified less than this many seconds ago.
+        exclude (list[str]|None): Glob patterns of names to ignore, i.e. `.stfolder`.
+
+    """
+    started: float = time.perf_counter()
+    report = OrphanReport(referenced=trie.files)
+
+    ## Scanning a root also scans roots inside it
+    normalized: list[str] = sorted({os.path.normpath(root) for root in roots})
+    for root in normalized:
+        if any(
+            root.startswith(other.rstrip(os.sep) + os.sep) for other in report.roots
+        ):
+            continue
+        if not os.path.isdir(root):
+            report.errors.append(f"{root}: not a directory on this host")
+            continue
+        report.roots.append(root)
+
+    scanner = _Scanner(exclude or [], workers)
+    scan_roots: list[tuple[str, dict[str, t.Any]]] = []
+    for root in report.roots:
+        node: dict[str, t.Any] | None = trie.node(root)
+        if node is None:
+            ## No torrent references anything under this root: report its contents, not the root
+            node = {}
+        scan_roots.append((root, node))
+    scanner.run(scan_roots)
+
+    cutoff: float = time.time() - min_age
+    for orphan in scanner.orphans:
+        if orphan.newest > cutoff:
+            report.recent += 1
+        else:
+            report.orphans.append(orphan)
+    report.orphans.sort(key=lambda orphan: orphan.size, reverse=True)
+
+    report.scanned = scanner.scanned
+    report.errors.extend(scanner.errors)
+    report.seconds = time.perf_counter() - started
+
+    return report
+
+
+def _delete(orphan: Orphan) -> None:
+    if orphan.is_dir:
+        shutil.rmtree(orphan.path)
+    else:
+        os.unlink(orphan.path)
+
+
+def delete_orphans(
+    orphans: list[Orphan],
+    batch_size: int = 100,
+    workers: int = 4,
+    on_batch: t.Callable[[int, int], None] | None = None,
+) -> tuple[int, list[str]]:
+    """Delete orphans in batches, `workers` at a time.
+
+    Params:
+        orphans (list[Orphan]): Orphans from `scan_orphans()`.
+        batch_size (int): Orphans deleted between progress callbacks.
+        workers (int): Orphans deleted at a time.
+        on_batch (Callable[[int, int], None]|None): Called with (done, total) after each batch.
+
+    Returns:
+        (tuple[int, list[str]]): Bytes freed, and errors for orphans that could not be deleted.
+
+    """
+    freed: int = 0
+    errors: list[str] = []
+
+    def _try_delete(orphan: Orphan) -> str | None:
+        try:
+            _delete(orphan)
+        except FileNotFoundError:
+            pass
+        except OSError as exc:
+            return f"{orphan.path}: {exc}"
+
+        return None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for i in range(0, len(orphans), batch_size):
+            batch: list[Orphan] = orphans[i : i + batch_size]
+            for orphan, error in zip(batch, pool.map(_try_delete, batch)):
+                if error is None:
+                    freed += orphan.size
+                else:
+                    errors.append(error)
+
+            if on_batch is not None:
+                on_batch(min(i + batch_size, len(orphans)), len(orphans))
+
+    return freed, errors
@@ -0,0 +1,566 @@
+"""Declarative cleanup policies, evaluated against a columnar snapshot per host.
+
+A policy file (JSON, or YAML if PyYAML is installed) lists rules, in order:
+
+    {
+        "rules": [
+            {
+                "name": "public-seeded",
+                "status": "finished",
+                "where": ["tracker~public", "ratio>=1"],
+                "grace": "2d",
+                "action": "delete",
+                "delete_data": true
+            },
+            {"name": "archive", "where": ["label=archive"], "action": "move", "dest": "/mnt/archive"}
+        ],
+        "hosts": {
+            "seedbox2": {"disabled": ["archive"], "rules": {"public-seeded": {"grace": "7d"}}}
+        }
+    }
+
+Actions are `delete`, `stop`, `start`, `move` (`dest`) and `label` (`labels`,
+`add_labels`, `remove_labels`). A torrent belongs to the first rule it matches,
+so later rules never act on it. With a `grace` period, a torrent must keep
+matching its rule for that long (tracked in a state file between runs) before
+the action is applied. `hosts` overrides rule settings per host, or disables
+rules on a host; a rule with `hosts` only applies to those hosts.
+
+All rules for a host are evaluated against a single projected fetch (see
+`TorrentSnapshot`), then applied with one batched RPC per rule, and every action
+is appended to an audit log. Actions are journaled by hash (see
+`OperationJournal`), so an interrupted one can be resumed.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field, replace
+import datetime
+from itertools import repeat
+import json
+import logging
+import operator
+import os
+from pathlib import Path
+import tempfile
+import threading
+import time
+import typing as t
+
+from .changes import TorrentChange
+from .filters import TorrentFilter, parse_duration
+from .journal import OperationJournal
+from .snapshot import TorrentSnapshot
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+if t.TYPE_CHECKING:
+    from .controllers import TransmissionRPCController
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "POLICY_ACTIONS",
+    "PolicyRule",
+    "Policy",
+    "PolicyDecision",
+    "PolicyState",
+    "AuditLog",
+    "evaluate_policy",
+    "apply_decisions",
+    "run_policy",
+]
+
+POLICY_ACTIONS: list[str] = ["delete", "stop", "start", "move", "label"]
+
+
+@dataclass
+class PolicyRule:
+    """A single policy rule.
+
+    Attributes:
+        name (str): Unique rule name, used in overrides, state & the audit log.
+        action (str): One of `POLICY_ACTIONS`.
+        status (str): Torrent status to match, see `TorrentFilter`.
+        where (list[str]): `--where` expressions, all must match.
+        grace (str|None): How long a torrent must keep matching before the action is applied, e.g. `2d`.
+        delete_data (bool): With `delete`, also delete the torrent's data.
+        dest (str|None): With `move`, the new download dir.
+        labels (list[str]|None): With `label`, replace all labels.
+        add_labels (list[str]): With `label`, labels to add.
+        remove_labels (list[str]): With `label`, labels to remove.
+        hosts (list[str]|None): Only apply the rule on these hosts. `None` for every host.
+        enabled (bool): Disabled rules are skipped.
+
+    """
+
+    name: str = field(default=None)
+    action: str = field(default=None)
+    status: str = field(default="all")
+    where: list[str] = field(default_factory=list)
+    grace: str | None = field(default=None)
+    delete_data: bool = field(default=False)
+    dest: str | None = field(default=None)
+    labels: list[str] | None = field(default=None)
+    add_labels: list[str] = field(default_factory=list)
+    remove_labels: list[str] = field(default_factory=list)
+    hosts: list[str] | None = field(default=None)
+    enabled: bool = field(default=True)
+
+    def __post_init__(self) -> None:
+        if not self.name:
+            raise ValueError("Policy rules need a name")
+        if self.action not in POLICY_ACTIONS:
+            raise ValueError(
+                f"Invalid action for rule '{self.name}': {self.action}. Must be one of: {POLICY_ACTIONS}"
+            )
+        if self.action == "move" and not self.dest:
+            raise ValueError(f"Rule '{self.name}' moves torrents, but has no 'dest'")
+
+        self.filter: TorrentFilter = TorrentFilter(status=self.status, where=self.where)
+        self.grace_seconds: float = parse_duration(self.grace) if self.grace else 0.0
+        self.change: TorrentChange | None = (
+            TorrentChange(
+                labels=self.labels,
+                add_labels=self.add_labels,
+                remove_labels=self.remove_labels,
+            )
+            if self.action == "label"
+            else None
+        )
+
+    @property
+    def properties(self) -> set[str]:
+        """Filter properties the rule needs in a snapshot."""
+        properties: set[str] = {clause.prop for clause in self.filter.clauses}
+        if self.action == "move":
+            properties.add("dir")
+
+        return properties
+
+    @property
+    def extra_fields(self) -> set[str]:
+        return {"labels"} if self.action == "label" else set()
+
+
+@dataclass
+class Policy:
+    """An ordered list of rules, with per-host overrides.
+
+    Attributes:
+        rules (list[PolicyRule]): Rules, in order. A torrent belongs to the first rule it matches.
+        hosts (dict[str, dict]): Per-host `{"disabled": [rule names], "rules": {rule name: {setting: value}}}`.
+
+    """
+
+    rules: list[PolicyRule] = field(default_factory=list)
+    hosts: dict[str, dict[str, t.Any]] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        names: list[str] = [rule.name for rule in self.rules]
+        duplicates: set[str] = {name for name in names if names.count(name) > 1}
+        if duplicates:
+            raise ValueError(f"Duplicate rule names: {sorted(duplicates)}")
+
+        for host, overrides in self.hosts.items():
+            unknown: set[str] = (
+                set(overrides.get("disabled", [])) | set(overrides.get("rules", {}))
+            ) - set(names)
+            if unknown:
+                raise ValueError(
+                    f"Overrides for host '{host}' name unknown rules: {sorted(unknown)}"
+                )
+
+    @classmethod
+    def from_dict(cls, data: dict[str, t.Any]) -> "Policy":
+        return cls(
+            rules=[PolicyRule(**rule) for rule in data.get("rules", [])],
+            hosts=data.get("hosts") or {},
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Policy":
+        """Load a policy from a `.json`, `.yaml` or `.yml` file."""
+        path = Path(path)
+        text: str = path.read_text(encoding="utf-8")
+
+        if path.suffix.lower() in (".yaml", ".yml"):
+            if yaml is None:
+                raise ImportError(
+                    f"Reading '{path}' needs PyYAML (pip install pyyaml), or use a JSON policy file"
+                )
+            data: dict[str, t.Any] = yaml.safe_load(text) or {}
+        else:
+            data = json.loads(text)
+
+        return cls.from_dict(data)
+
+    def rules_for(self, host: str) -> list[PolicyRule]:
+        """Return the enabled rules for `host`, with its overrides applied."""
+        overrides: dict[str, t.Any] = self.hosts.get(host, {})
+        disabled: set[str] = set(overrides.get("disabled", []))
+        rule_overrides: dict[str, dict[str, t.Any]] = overrides.get("rules", {})
+
+        rules: list[PolicyRule] = []
+        for rule in self.rules:
+            if rule.name in rule_overrides:
+                rule = replace(rule, **rule_overrides[rule.name])
+            if not rule.enabled or rule.name in disabled:
+                continue
+            if rule.hosts is not None and host not in rule.hosts:
+                continue
+            rules.append(rule)
+
+        return rules
+
+
+@dataclass
+class PolicyDecision:
+    """What a rule does on a host in one evaluation.
+
+    Attributes:
+        rule (PolicyRule): The rule.
+        matched (int): Torrents that belong to the rule.
+        waiting (int): Matched torrents still within the rule's grace period.
+        ids (list[int]): Torrents the action is applied to.
+        hashes (list[str]): Their hash strings.
+        names (list[str]): Their names.
+        labels (list[list[str]]): Their labels, for `label` rules.
+
+    """
+
+    rule: PolicyRule = field(default=None)
+    matched: int = field(default=0)
+    waiting: int = field(default=0)
+    ids: list[int] = field(default_factory=list)
+    hashes: list[str] = field(default_factory=list)
+    names: list[str] = field(default_factory=list)
+    labels: list[list[str]] = field(default_factory=list)
+
+
+class PolicyState:
+    """When torrents first matched each rule, per host, persisted between runs for grace periods.
+
+    Safe to share between threads evaluating different hosts.
+
+    Params:
+        path (str|Path|None): JSON state file. `None` to keep state in memory only.
+    """
+
+    def __init__(self, path: str | Path | None = None) -> None:
+        self.path: Path | None = Path(path) if path else None
+        ## {host: {rule name: {hash: first matched (unix time)}}}
+        self.first_matched: dict[str, dict[str, dict[str, float]]] = {}
+        self._lock = threading.Lock()
+
+        if self.path is not None and self.path.exists():
+            self.first_matched = json.loads(self.path.read_text(encoding="utf-8"))
+
+    def for_host(self, host: str) -> dict[str, dict[str, float]]:
+        with self._lock:
+            return self.first_matched.get(host, {})
+
+    def update(self, host: str, rules: dict[str, dict[str, float]]) -> None:
+        """Replace a host's state. Rules that are gone drop their state."""
+        with self._lock:
+            self.first_matched[host] = rules
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            text: str = json.dumps(self.first_matched)
+            ## Unique per writer, so concurrent runs never replace each other's half-written file
+            fd, tmp = tempfile.mkstemp(
+                dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(text)
+                os.replace(tmp, self.path)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+
+
+class AuditLog:
+    """Append-only, newline-delimited JSON log of policy actions.
+
+    Params:
+        path (str|Path): Log file.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path: Path = Path(path)
+        self._lock = threading.Lock()
+
+    def record(self, **entry: t.Any) -> None:
+        entry = {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            **entry,
+        }
+        line: str = json.dumps(entry) + "\n"
+
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+def _applies_mask(snapshot: TorrentSnapshot, rule: PolicyRule) -> int:
+    """Mask of rows the rule's action would change, i.e. not stopping stopped torrents."""
+    match rule.action:
+        case "stop":
+            return snapshot.status_mask("stopped") ^ snapshot.all
+        case "start":
+            return snapshot.status_mask("stopped")
+        case "move":
+            dirs = map(operator.methodcaller("rstrip", "/"), snapshot.columns["dir"])
+            return int.from_bytes(
+                bytes(map(operator.ne, dirs, repeat(rule.dest.rstrip("/")))), "little"
+            )
+
+    return snapshot.all
+
+
+def evaluate_policy(
+    snapshot: TorrentSnapshot,
+    rules: list[PolicyRule],
+    first_matched: dict[str, dict[str, float]] | None = None,
+    now: float | None = None,
+) -> tuple[list[PolicyDecision], dict[str, dict[str, float]]]:
+    """Evaluate rules against a snapshot.
+
+    Params:
+        snapshot (TorrentSnapshot): Snapshot with every rule's `properties` & `extra_fields`.
+        rules (list[PolicyRule]): Rules, in order.
+        first_matched (dict|None): `{rule name: {hash: first matched}}` from earlier runs.
+        now (float|None): Current unix time.
+
+    Returns:
+        (tuple[list[PolicyDecision], dict]): A decision per rule, and the updated `first_matched`.
+
+    """
+    now = time.time() if now is None else now
+    first_matched = first_matched or {}
+    state: dict[str, dict[str, float]] = {}
+    decisions: list[PolicyDecision] = []
+
+    ## Rows already claimed by an earlier rule
+    claimed: int = 0
+
+    for rule in rules:
+        mask: int = snapshot.filter_mask(rule.filter) & ~claimed
+        claimed |= mask
+        decision = PolicyDecision(rule=rule, matched=snapshot.count(mask))
+        decisions.append(decision)
+
+        if rule.grace_seconds:
+            previous: dict[str, float] = first_matched.get(rule.name, {})
+            rule_state: dict[str, float] = {}
+            state[rule.name] = rule_state
+            due: list[int] = []
+            for i in snapshot.indices(mask):
+                since: float = previous.get(snapshot.hashes[i], now)
+                rule_state[snapshot.hashes[i]] = since
+                if now - since >= rule.grace_seconds:
+                    due.append(i)
+            decision.waiting = decision.matched - len(due)
+
+            rows = bytearray(len(snapshot))
+            for i in due:
+                rows[i] = 1
+            mask = int.from_bytes(rows, "little")
+
+        mask &= _applies_mask(snapshot, rule)
+
+        for i in snapshot.indices(mask):
+            if rule.action == "label":
+                labels: list[str] = snapshot.extra["labels"][i] or []
+                ## Skip torrents that already have the wanted labels
+                if not rule.change.arguments_for({"labels": labels}):
+                    continue
+                decision.labels.append(labels)
+
+            decision.ids.append(snapshot.ids[i])
+            decision.hashes.append(snapshot.hashes[i])
+            decision.names.append(snapshot.names[i])
+
+    return decisions, state
+
+
+def apply_decisions(
+    controller: TransmissionRPCController,
+    decisions: list[PolicyDecision],
+    host: str,
+    audit: AuditLog | None = None,
+    dry_run: bool = False,
+    batch_size: int = 5000,
+    journal_dir: str | Path | None = None,
+) -> dict[str, int]:
+    """Apply decisions with batched, journaled RPCs, recording each in the audit log.
+
+    Params:
+        journal_dir (str|Path|None): Directory actions are journaled to. Defaults to `get_journal_dir()`.
+
+    Returns:
+        (dict[str, int]): Torrents acted on (or that would be, on a dry run) per rule.
+
+    """
+    applied: dict[str, int] = {}
+
+    for decision in decisions:
+        rule: PolicyRule = decision.rule
+        if not decision.ids:
+            continue
+
+        error: str | None = None
+        operations: list[str] = []
+        if not dry_run:
+            try:
+                _apply(controller, decision, batch_size, journal_dir, operations)
+            except Exception as exc:
+                error = str(exc)
+                log.error(
+                    f"({type(exc)}) Error applying rule '{rule.name}' on host '{host}'. Details: {exc}"
+                )
+
+        if audit is not None:
+            audit.record(
+                host=host,
+                rule=rule.name,
+                action=rule.action,
+                dry_run=dry_run,
+                error=error,
+                operations=operations,
+                settings={
+                    k: v
+                    for k, v in asdict(rule).items()
+                    if k
+                    in ("delete_data", "dest", "labels", "add_labels", "remove_labels")
+                },
+                torrents=[
+                    {"id": i, "hash": h, "name": n}
+                    for i, h, n in zip(decision.ids, decision.hashes, decision.names)
+                ],
+            )
+
+        if error is None:
+            applied[rule.name] = len(decision.ids)
+
+    return applied
+
+
+def _apply(
+    controller: TransmissionRPCController,
+    decision: PolicyDecision,
+    batch_size: int,
+    journal_dir: str | Path | None,
+    operations: list[str],
+) -> None:
+    """Apply a decision by hash, journaling each bulk action & appending its operation id to `operations`."""
+    rule: PolicyRule = decision.rule
+
+    def _journal() -> OperationJournal:
+        journal: OperationJournal = OperationJournal.new(
+            journal_dir, host=str(controller.host)
+        )
+        operations.append(journal.operation_id)
+
+        return journal
+
+    match rule.action:
+        case "delete":
+            controller.remove_torrents(
+                decision.hashes,
+                delete_data=rule.delete_data,
+                batch_size=batch_size,
+                journal=_journal(),
+            )
+        case "stop":
+            controller.stop_torrents(
+                decision.hashes, batch_size=batch_size, journal=_journal()
+            )
+        case "start":
+            controller.start_torrents(
+                decision.hashes, batch_size=batch_size, journal=_journal()
+            )
+        case "move":
+            controller.move_torrents(
+                decision.hashes, rule.dest, batch_size=batch_size, journal=_journal()
+            )
+        case "label":
+            ## Group torrents by the labels they end up with, one request per group
+            groups: dict[str, tuple[dict[str, t.Any], list[str]]] = {}
+            for torrent_hash, labels in zip(decision.hashes, decision.labels):
+                arguments: dict[str, t.Any] = rule.change.arguments_for(
+                    {"labels": labels}
+                )
+                if arguments:
+                    key: str = json.dumps(arguments, sort_keys=True)
+                    groups.setdefault(key, (arguments, []))[1].append(torrent_hash)
+
+            for arguments, hashes in groups.values():
+                controller.set_torrents(
+                    hashes, arguments, batch_size=batch_size, journal=_journal()
+                )
+
+
+def run_policy(
+    controller: TransmissionRPCController,
+    policy: Policy,
+    host: str,
+    state: PolicyState | None = None,
+    audit: AuditLog | None = None,
+    dry_run: bool = False,
+    batch_size: int = 5000,
+    chunk_size: int = 500,
+    journal_dir: str | Path | None = None,
+) -> list[PolicyDecision]:
+    """Evaluate a policy on one host with a single snapshot, then apply it.
+
+    On a dry run, nothing is changed and grace period state is not saved.
+
+    Returns:
+        (list[PolicyDecision]): A decision per rule that applies to the host.
+
+    """
+    rules: list[PolicyRule] = policy.rules_for(host)
+    if not rules:
+        return []
+
+    properties: set[str] = set().union(*(rule.properties for rule in rules))
+    extra_fields: set[str] = set().union(*(rule.extra_fields for rule in rules))
+
+    snapshot: TorrentSnapshot = TorrentSnapshot.collect(
+        controller.iter_torrents(
+            fields=TorrentSnapshot.fields_for(properties, extra_fields),
+            chunk_size=chunk_size,
+        ),
+        properties,
+        extra_fields,
+    )
+
+    state = state or PolicyState()
+    decisions, first_matched = evaluate_policy(snapshot, rules, state.for_host(host))
+
+    apply_decisions(
+        controller,
+        decisions,
+        host,
+        audit=audit,
+        dry_run=dry_run,
+        batch_size=batch_size,
+        journal_dir=journal_dir,
+    )
+
+    if not dry_run:
+        state.update(host, first_matched)
+        state.save()
+
+    return decisions
@@ -0,0 +1,441 @@
+"""Caching, request-coalescing Transmission RPC proxy.
+
+Local clients (dashboards, scripts) talk to the proxy exactly like they would to
+a Transmission daemon. `torrent-get` requests are answered from a short-TTL,
+field-level cache: each torrent's fields are cached individually, so a request
+for `["name", "status"]` followed by one for `["status", "rateUpload"]` only
+fetches `rateUpload` from the daemon. Identical upstream fetches that are in
+flight at the same time are coalesced (single-flight). Every other method is
+passed through, and mutations invalidate the torrents they touch.
+
+Since passed-through mutations use the upstream credentials, `serve_proxy()`
+only listens on loopback addresses unless clients must authenticate.
+"""
+
+from __future__ import annotations
+
+import base64
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import ipaddress
+import json
+import logging
+import secrets
+import threading
+import time
+import typing as t
+
+from .controllers import READ_ONLY_RPC_METHODS, TransmissionRPCController
+from .singleflight import SingleFlight
+
+log = logging.getLogger(__name__)
+
+__all__ = ["TorrentFieldCache", "RPCProxy", "serve_proxy"]
+
+_SESSION_HEADER: str = "X-Transmission-Session-Id"
+
+
+class TorrentFieldCache:
+    """Field-level cache of `torrent-get` data for a single daemon.
+
+    Params:
+        ttl (float): Seconds a cached field value is served before it is refetched.
+    """
+
+    def __init__(self, ttl: float = 5.0) -> None:
+        self.ttl: float = ttl
+        ## {torrent id: {field: value}}
+        self.records: dict[int, dict[str, t.Any]] = {}
+        ## {torrent id: {field: fetched at}}, for fields fetched per-torrent
+        self._torrent_fetched_at: dict[int, dict[str, float]] = {}
+        ## {field: fetched at}, for fields fetched for the whole torrent list
+        self._field_fetched_at: dict[str, float] = {}
+        ## {torrent id: fields ever fetched}, since torrents new to a full-list
+        #  fetch only have the fields it requested
+        self._fetched_fields: dict[int, set[str]] = {}
+        ## When the set of torrent ids was last fetched
+        self._members_fetched_at: float = float("-inf")
+        ## Torrents changed by a mutation since the last full-list fetch
+        self._dirty: set[int] = set()
+        self._hash_to_id: dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def _fresh(self, fetched_at: float | None, now: float) -> bool:
+        return fetched_at is not None and now - fetched_at <= self.ttl
+
+    def stale_list_fields(self, fields: list[str]) -> list[str]:
+        """Return the fields that must be fetched for every torrent to serve a full-list request (empty if none)."""
+        now: float = time.monotonic()
+        with self._lock:
+            if not self._fresh(self._members_fetched_at, now):
+                return list(fields)
+
+            return [
+                f for f in fields if not self._fresh(self._field_fetched_at.get(f), now)
+            ]
+
+    def incomplete(self, fields: list[str]) -> list[int]:
+        """Return ids of torrents to refetch with all of `fields` before serving a full-list request.
+
+        These are torrents changed by a mutation, and torrents missing some of
+        `fields` (i.e. new torrents, first seen by a fetch of other fields).
+        """
+        wanted: set[str] = set(fields)
+        with self._lock:
+            return sorted(
+                torrent_id
+                for torrent_id in self.records
+                if torrent_id in self._dirty
+                or not wanted <= self._fetched_fields.get(torrent_id, set())
+            )
+
+    def stale_torrent_fields(self, ids: list[int], fields: list[str]) -> list[str]:
+        """Return the fields that must be fetched to serve a request for `ids`."""
+        now: float = time.monotonic()
+        stale: set[str] = set()
+        with self._lock:
+            for torrent_id in ids:
+                if torrent_id not in self.records or torrent_id in self._dirty:
+                    return list(fields)
+
+                fetched_fields: set[str] = self._fetched_fields.get(torrent_id, set())
+                fetched_at: dict[str, float] = self._torrent_fetched_at.get(
+                    torrent_id, {}
+                )
+                for f in fields:
+                    if f not in fetched_fields or not (
+                        self._fresh(self._field_fetched_at.get(f), now)
+                        or self._fresh(fetched_at.get(f), now)
+                    ):
+                        stale.add(f)
+
+        return [f for f in fields if f in stale]
+
+    def merge(
+        self,
+        torrents: list[dict[str, t.Any]],
+        fields: list[str],
+        full_list: bool = False,
+    ) -> None:
+        """Merge fetched torrent records into the cache.
+
+        Params:
+            torrents (list[dict]): `torrents` from a `torrent-get` response (object format).
+            fields (list[str]): The fields that were requested.
+            full_list (bool): `True` if `torrents` is the daemon's complete torrent list.
+        """
+        now: float = time.monotonic()
+        with self._lock:
+            if full_list:
+                seen: set[int] = {record["id"] for record in torrents}
+                for torrent_id in [i for i in self.records if i not in seen]:
+                    self._forget(torrent_id)
+
+                self._members_fetched_at = now
+                for f in fields:
+                    self._field_fetched_at[f] = now
+
+            for record in torrents:
+                torrent_id: int = record["id"]
+                self.records.setdefault(torrent_id, {}).update(record)
+                ## Requested fields, whether or not the daemon returned them
+                self._fetched_fields.setdefault(torrent_id, set()).update(fields)
+                if "hashString" in record:
+                    self._hash_to_id[record["hashString"]] = torrent_id
+
+                if not full_list:
+                    ## A full-list fetch may only cover some fields, so changed
+                    #  torrents stay dirty until they are refetched by id
+                    fetched_at = self._torrent_fetched_at.setdefault(torrent_id, {})
+                    for f in record:
+                        fetched_at[f] = now
+                    self._dirty.discard(torrent_id)
+
+    def _forget(self, torrent_id: int) -> None:
+        record: dict[str, t.Any] = self.records.pop(torrent_id, {})
+        self._torrent_fetched_at.pop(torrent_id, None)
+        self._fetched_fields.pop(torrent_id, None)
+        self._hash_to_id.pop(record.get("hashString"), None)
+        self._dirty.discard(torrent_id)
+
+    def resolve_ids(self, ids: t.Any) -> list[int] | None:
+        """Map RPC `ids` (ints, hash strings or a mix) to cached torrent ids.
+
+        Returns `None` if any id is unknown to the cache.
+        """
+        if isinstance(ids, (int, str)):
+            ids = [ids]
+
+        resolved: list[int] = []
+        with self._lock:
+            for torrent_id in ids:
+                if isinstance(torrent_id, str):
+                    torrent_id = self._hash_to_id.get(torrent_id)
+                if torrent_id is None or torrent_id not in self.records:
+                    return None
+
+                resolved.append(torrent_id)
+
+        return resolved
+
+    def get(
+        self, fields: list[str], ids: list[int] | None = None
+    ) -> list[dict[str, t.Any]]:
+        """Build `torrent-get` records for `ids` (all torrents if `None`) from the cache."""
+        with self._lock:
+            selected: list[int] = sorted(self.records) if ids is None else ids
+
+            return [
+                {f: self.records[i][f] for f in fields if f in self.records[i]}
+                for i in selected
+                if i in self.records
+            ]
+
+    def invalidate(self, method: str, ids: t.Any = None) -> None:
+        """Invalidate cache entries affected by a mutation."""
+        with self._lock:
+            if method == "torrent-add":
+                ## New torrents only show up in a full-list fetch
+                self._members_fetched_at = float("-inf")
+                return
+
+            resolved: list[int] | None = None if ids is None else self.resolve_ids(ids)
+            if resolved is None:
+                ## Mutation of all (or unknown) torrents
+                self.clear()
+                return
+
+            for torrent_id in resolved:
+                if method == "torrent-remove":
+                    self._forget(torrent_id)
+                else:
+                    self._dirty.add(torrent_id)
+                    self._torrent_fetched_at.pop(torrent_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.records.clear()
+            self._torrent_fetched_at.clear()
+            self._field_fetched_at.clear()
+            self._fetched_fields.clear()
+            self._hash_to_id.clear()
+            self._dirty.clear()
+            self._members_fetched_at = float("-inf")
+
+
+class RPCProxy:
+    """Serve Transmission RPC requests through a cache & a single upstream controller.
+
+    Params:
+        controller (TransmissionRPCController): Controller for the upstream daemon.
+        cache_ttl (float): Seconds cached torrent fields are served before refetching.
+    """
+
+    def __init__(
+        self, controller: TransmissionRPCController, cache_ttl: float = 5.0
+    ) -> None:
+        self.controller: TransmissionRPCController = controller
+        self.cache: TorrentFieldCache = TorrentFieldCache(ttl=cache_ttl)
+        self.flight: SingleFlight = SingleFlight()
+        self._counter_lock = threading.Lock()
+
+        self.requests_served: int = 0
+        self.upstream_requests: int = 0
+
+    def _upstream(self, method: str, arguments: dict[str, t.Any]) -> dict[str, t.Any]:
+        with self._counter_lock:
+            self.upstream_requests += 1
+
+        ## The controller's client pool bounds concurrent upstream requests
+        return self.controller.raw_request(method, arguments)
+
+    def _fetch_torrents(self, fields: list[str], ids: t.Any = None) -> dict[str, t.Any]:
+        """Fetch torrents upstream, coalescing identical concurrent fetches."""
+        fields = sorted(set(fields) | {"id", "hashString"})
+        arguments: dict[str, t.Any] = {"fields": fields}
+        if ids is not None:
+            arguments["ids"] = ids
+
+        key: str = json.dumps(arguments, sort_keys=True)
+        response: dict[str, t.Any] = self.flight.do(
+            key, lambda: self._upstream("torrent-get", arguments)
+        )
+
+        if response.get("result") == "success":
+            torrents: list[dict] = response["arguments"].get("torrents", [])
+            self.cache.merge(torrents, fields, full_list=ids is None)
+            if ids == "recently-active":
+                for torrent_id in response["arguments"].get("removed", []):
+                    self.cache.invalidate("torrent-remove", [torrent_id])
+
+        return response
+
+    def _torrent_get(self, arguments: dict[str, t.Any]) -> dict[str, t.Any]:
+        fields: list[str] = list(arguments.get("fields", []))
+        ids: t.Any = arguments.get("ids")
+
+        ## Table format & recently-active deltas are relayed as-is
+        if arguments.get("format", "objects") != "objects" or not fields:
+            return self._upstream("torrent-get", arguments)
+        if ids == "recently-active":
+            return self._fetch_torrents(fields, ids)
+
+        if ids is None:
+            stale: list[str] = self.cache.stale_list_fields(fields)
+            if stale:
+                response = self._fetch_torrents(stale)
+                if response.get("result") != "success":
+                    return response
+
+            ## Changed & new torrents, after the full-list fetch found the new ones
+            incomplete: list[int] = self.cache.incomplete(fields)
+            if incomplete:
+                response = self._fetch_torrents(fields, incomplete)
+                if response.get("result") != "success":
+                    return response
+
+            return {
+                "result": "success",
+                "arguments": {"torrents": self.cache.get(fields)},
+            }
+
+        resolved: list[int] | None = self.cache.resolve_ids(ids)
+        if resolved is None:
+            ## Unknown ids, let the daemon resolve them
+            response = self._fetch_torrents(fields, ids)
+            if response.get("result") != "success":
+                return response
+
+            resolved = self.cache.resolve_ids(ids) or []
+        else:
+            stale = self.cache.stale_torrent_fields(resolved, fields)
+            if stale:
+                response = self._fetch_torrents(stale, resolved)
+                if response.get("result") != "success":
+                    return response
+
+        return {
+            "result": "success",
+            "arguments": {"torrents": self.cache.get(fields, resolved)},
+        }
+
+    def handle(self, request: dict[str, t.Any]) -> dict[str, t.Any]:
+        """Answer a single RPC request (`{"method": ..., "arguments": ..., "tag": ...}`)."""
+        method: str = request.get("method", "")
+        arguments: dict[str, t.Any] = request.get("arguments") or {}
+        with self._counter_lock:
+            self.requests_served += 1
+
+        try:
+            if method == "torrent-get":
+                response = self._torrent_get(arguments)
+            else:
+                if method not in READ_ONLY_RPC_METHODS:
+                    self.cache.invalidate(method, arguments.get("ids"))
+                response = self._upstream(method, arguments)
+        except Exception as exc:
+            log.error(
+                f"({type(exc)}) Error proxying '{method}' request. Details: {exc}"
+            )
+            response = {"result": f"proxy error: {exc}", "arguments": {}}
+
+        if "tag" in request:
+            response = dict(response, tag=request["tag"])
+
+        return response
+
+
+def _is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def serve_proxy(
+    proxy: RPCProxy,
+    host: str = "127.0.0.1",
+    port: int = 9092,
+    path: str = "/transmission/rpc",
+    username: str | None = None,
+    password: str | None = None,
+) -> None:
+    """Serve the Transmission RPC protocol for `proxy` over HTTP until interrupted.
+
+    Clients go through the same `X-Transmission-Session-Id` handshake as with a
+    real daemon (the proxy issues its own session id), and, if `username` &
+    `password` are set, the same HTTP basic auth.
+
+    Raises:
+        ValueError: If `host` is not a loopback address and no credentials are set.
+
+    """
+    if (username is None) != (password is None):
+        raise ValueError("Set both a proxy username & password, or neither")
+    if username is None and not _is_loopback(host):
+        raise ValueError(
+            f"Refusing to listen on non-loopback address '{host}' without proxy credentials"
+        )
+
+    session_id: str = secrets.token_urlsafe(24)
+    rpc_paths: set[str] = {path.rstrip("/"), path.rstrip("/") + "/"}
+    authorization: str | None = (
+        None
+        if username is None
+        else "Basic "
+        + base64.b64encode(f"{username}:{password}".encode("utf-8")).decode("ascii")
+    )
+
+    class ProxyHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status: int, body: bytes = b"") -> None:
+            self.send_response(status)
+            if status == 401:
+                self.send_header("WWW-Authenticate", 'Basic realm="Transmission"')
+            self.send_header(_SESSION_HEADER, session_id)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self) -> None:
+            body: bytes = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            if self.path.split("?", 1)[0] not in rpc_paths:
+                self._reply(404)
+                return
+            if authorization is not None and not secrets.compare_digest(
+                self.headers.get("Authorization", ""), authorization
+            ):
+                self._reply(401)
+                return
+            if self.headers.get(_SESSION_HEADER) != session_id:
+                self._reply(409)
+                return
+
+            try:
+                request: dict = json.loads(body)
+            except json.JSONDecodeError:
+                self._reply(400)
+                return
+
+            response: dict = proxy.handle(request)
+            self._reply(200, json.dumps(response).encode("utf-8"))
+
+        def log_message(self, format: str, *args: t.Any) -> None:
+            log.debug(f"{self.address_string()} - {format % args}")
+
+    server = ThreadingHTTPServer((host, port), ProxyHandler)
+    server.daemon_threads = True
+    log.info(
+        f"Proxying Transmission RPC for '{proxy.controller.host}' on http://{host}:{port}{path}"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,448 @@
+"""Plan & apply free-space-aware torrent data moves across several destinations.
+
+`plan_relocation()` bin-packs torrents (largest first) into destination paths by
+`totalSize`, so no destination's free space drops below `headroom`. The plan is a
+plain JSON file: write it on a dry run, review it, then apply it. `apply_plan()`
+moves torrents with `torrent-set-location`, keeping at most `concurrency` moves in
+flight so the daemon's disks are not saturated, and records each move's state in
+the plan file as it goes, so an interrupted run can be resumed from the file.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+import typing as t
+
+from .localcopy import LOCAL_COPY_FIELDS, local_move_torrent
+
+if t.TYPE_CHECKING:
+    from .controllers import TransmissionRPCController
+    from .localcopy import LocalCopyEngine
+
+    from transmission_rpc.torrent import Torrent
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "PLAN_STRATEGIES",
+    "RELOCATION_FIELDS",
+    "RelocationMove",
+    "RelocationPlan",
+    "get_destination_free_space",
+    "plan_relocation",
+    "apply_plan",
+]
+
+## pack: fill the fullest destination that fits (keeps large free areas intact).
+#  spread: use the destination with the most free space (balances disk usage).
+PLAN_STRATEGIES: list[str] = ["pack", "spread"]
+## RPC fields needed to plan a relocation
+RELOCATION_FIELDS: list[str] = ["id", "hashString", "name", "totalSize", "downloadDir"]
+
+## Move states, in plan files
+PENDING: str = "pending"
+MOVING: str = "moving"
+DONE: str = "done"
+FAILED: str = "failed"
+## Torrent `error` value for local (i.e. disk) errors
+_LOCAL_ERROR: int = 3
+
+
+def _same_path(a: str, b: str) -> bool:
+    return a.rstrip("/") == b.rstrip("/")
+
+
+@dataclass
+class RelocationMove:
+    """A single torrent's move in a `RelocationPlan`.
+
+    Attributes:
+        id (int): Torrent ID.
+        hash (str): Torrent hash string, used to find the torrent again on resume.
+        name (str): Torrent name.
+        size (int): Torrent size in bytes.
+        source (str): Download dir when the plan was made.
+        dest (str): Destination download dir.
+        state (str): `pending`, `moving`, `done` or `failed`.
+        error (str|None): Why the move failed.
+
+    """
+
+    id: int = field(default=None)
+    hash: str = field(default=None)
+    name: str = field(default=None)
+    size: int = field(default=0)
+    source: str = field(default=None)
+    dest: str = field(default=None)
+    state: str = field(default=PENDING)
+    error: str | None = field(default=None)
+
+
+@dataclass
+class RelocationPlan:
+    """Torrent moves to destination paths, with the free space they were planned against.
+
+    Attributes:
+        host (str): Host the plan was made for.
+        headroom (int): Bytes kept free on each destination.
+        free_space (dict[str, int]): Free bytes per destination when the plan was made.
+        moves (list[RelocationMove]): Planned moves.
+        unplaced (list[RelocationMove]): Torrents that did not fit on any destination (`dest` is None).
+        created_at (float): Unix timestamp of the plan.
+
+    """
+
+    host: str = field(default=None)
+    headroom: int = field(default=0)
+    free_space: dict[str, int] = field(default_factory=dict)
+    moves: list[RelocationMove] = field(default_factory=list)
+    unplaced: list[RelocationMove] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def remaining(self) -> list[RelocationMove]:
+        """Moves that are not done (pending, interrupted or failed)."""
+        return [move for move in self.moves if move.state != DONE]
+
+    def planned_bytes(self) -> dict[str, int]:
+        """Return the bytes planned per destination."""
+        planned: dict[str, int] = {dest: 0 for dest in self.free_space}
+        for move in self.moves:
+            planned[move.dest] = planned.get(move.dest, 0) + move.size
+
+        return planned
+
+    def summary(self) -> dict[str, int]:
+        """Return the number of moves per state."""
+        counts: dict[str, int] = {}
+        for move in self.moves:
+            counts[move.state] = counts.get(move.state, 0) + 1
+
+        return counts
+
+    def to_dict(self) -> dict[str, t.Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, t.Any]) -> "RelocationPlan":
+        return cls(
+            host=data.get("host"),
+            headroom=data.get("headroom", 0),
+            free_space=data.get("free_space", {}),
+            moves=[RelocationMove(**move) for move in data.get("moves", [])],
+            unplaced=[RelocationMove(**move) for move in data.get("unplaced", [])],
+            created_at=data.get("created_at", 0),
+        )
+
+    def save(self, path: str | Path) -> None:
+        """Write the plan to `path`, atomically so an interrupted write never loses it."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp: Path = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "RelocationPlan":
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def get_destination_free_space(
+    controller: TransmissionRPCController, destinations: list[str], concurrency: int = 4
+) -> dict[str, int]:
+    """Query the daemon's free space for each destination, concurrently.
+
+    Raises:
+        ValueError: If the daemon cannot report free space for a destination (i.e. it does not exist).
+
+    """
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(concurrency, len(destinations)))
+    ) as pool:
+        sizes: list[int | None] = list(
+            pool.map(controller.get_free_space, destinations)
+        )
+
+    free_space: dict[str, int] = {}
+    for dest, size in zip(destinations, sizes):
+        if size is None:
+            raise ValueError(f"Could not get free space for destination '{dest}'")
+        free_space[dest] = size
+
+    return free_space
+
+
+def plan_relocation(
+    torrents: t.Iterable[Torrent],
+    free_space: dict[str, int],
+    headroom: int = 0,
+    strategy: str = "pack",
+    host: str | None = None,
+) -> RelocationPlan:
+    """Assign torrents to destinations, largest first, keeping `headroom` bytes free on each.
+
+    Torrents already in one of the destinations are left where they are.
+
+    Params:
+        torrents (Iterable[Torrent]): Candidate torrents, with `RELOCATION_FIELDS`.
+        free_space (dict[str, int]): Free bytes per destination.
+        headroom (int): Bytes to keep free on each destination.
+        strategy (str): One of `PLAN_STRATEGIES`.
+        host (str|None): Host name recorded in the plan.
+
+    Returns:
+        (RelocationPlan): The plan. Torrents that do not fit are in `unplaced`.
+
+    """
+    if strategy not in PLAN_STRATEGIES:
+        raise ValueError(
+            f"Invalid strategy: {strategy}. Must be one of: {PLAN_STRATEGIES}"
+        )
+
+    capacity: dict[str, int] = {
+        dest: max(0, size - headroom) for dest, size in free_space.items()
+    }
+    plan = RelocationPlan(host=host, headroom=headroom, free_space=dict(free_space))
+
+    candidates: list[Torrent] = sorted(
+        (
+            torrent
+            for torrent in torrents
+            if not any(_same_path(torrent.download_dir, dest) for dest in free_space)
+        ),
+        key=lambda torrent: torrent.total_size,
+        reverse=True,
+    )
+
+    for torrent in candidates:
+        move = RelocationMove(
+            id=torrent.id,
+            hash=torrent.hashString,
+            name=torrent.name,
+            size=torrent.total_size,
+            source=torrent.download_dir,
+        )
+
+        fits: list[str] = [dest for dest, free in capacity.items() if free >= move.size]
+        if not fits:
+            plan.unplaced.append(move)
+            continue
+
+        if strategy == "pack":
+            move.dest = min(fits, key=lambda dest: capacity[dest])
+        else:
+            move.dest = max(fits, key=lambda dest: capacity[dest])
+
+        capacity[move.dest] -= move.size
+        plan.moves.append(move)
+
+    return plan
+
+
+def apply_plan(
+    controller: TransmissionRPCController,
+    plan: RelocationPlan,
+    plan_file: str | Path | None = None,
+    concurrency: int = 2,
+    poll_interval: float = 2.0,
+    move_timeout: float | None = None,
+    on_progress: t.Callable[[RelocationMove], None] | None = None,
+    copy_engine: LocalCopyEngine | None = None,
+) -> RelocationPlan:
+    """Move torrents as planned, with at most `concurrency` moves in flight.
+
+    Transmission moves data in the background after `torrent-set-location` returns;
+    a move is done once the torrent's `downloadDir` is its destination, and failed once
+    it reports a local error it did not have when the move started. With
+    `copy_engine` (only when running on the daemon's host), files are copied locally
+    & the torrent is pointed at the copy instead, see `local_move_torrent()`. Moves left
+    `moving` or `failed` by an earlier run are retried, unless the torrent already
+    arrived at its destination. The plan file, if given, is saved after every change.
+
+    Params:
+        controller (TransmissionRPCController): Controller for the plan's host.
+        plan (RelocationPlan): The plan to apply, updated in place.
+        plan_file (str|Path|None): Where to save progress.
+        concurrency (int): Max number of torrents being moved at a time.
+        poll_interval (float): Seconds between checks of in-flight moves.
+        move_timeout (float|None): Mark a move failed after this many seconds. `None` to wait forever.
+        on_progress (Callable[[RelocationMove], None]|None): Called when a move is done or fails.
+        copy_engine (LocalCopyEngine|None): Copy files locally with this engine.
+
+    Returns:
+        (RelocationPlan): The updated plan.
+
+    """
+    if concurrency < 1:
+        raise ValueError(
+            f"Invalid concurrency: {concurrency}. Must be a positive integer"
+        )
+
+    def _save() -> None:
+        if plan_file is not None:
+            plan.save(plan_file)
+
+    def _finish(move: RelocationMove, state: str, error: str | None = None) -> None:
+        move.state = state
+        move.error = error
+        if on_progress is not None:
+            on_progress(move)
+
+    remaining: list[RelocationMove] = plan.remaining
+    if not remaining:
+        return plan
+
+    ## Torrent IDs change when the daemon restarts, find the torrents by hash
+    current: dict[str, Torrent] = {
+        torrent.hashString: torrent
+        for torrent in controller.get_multiple_torrents(
+            ids=[move.hash for move in remaining],
+            fields=["id", "hashString", "downloadDir"],
+        )
+    }
+
+    queue: list[RelocationMove] = []
+    for move in remaining:
+        torrent: Torrent | None = current.get(move.hash)
+        if torrent is None:
+            _finish(move, FAILED, "Torrent not found")
+        elif _same_path(torrent.download_dir, move.dest):
+            _finish(move, DONE)
+        else:
+            move.id = torrent.id
+            move.state = PENDING
+            move.error = None
+            queue.append(move)
+    _save()
+
+    if copy_engine is not None:
+        _apply_locally(controller, queue, copy_engine, concurrency, _finish, _save)
+        return plan
+
+    ## {torrent id: (move, started at, (error, errorString) when started)}
+    in_flight: dict[int, tuple[RelocationMove, float, tuple[int, str]]] = {}
+
+    while queue or in_flight:
+        ## Fill free slots, one set-location request per destination
+        started: list[RelocationMove] = queue[: concurrency - len(in_flight)]
+        del queue[: len(started)]
+
+        ## Torrents may already have a local error (i.e. "No data found"), only a new
+        #  or changed one means the move failed
+        errors: dict[int, tuple[int, str]] = {}
+        if started:
+            errors = {
+                torrent.id: (torrent.error, torrent.error_string)
+                for torrent in controller.get_multiple_torrents(
+                    ids=[move.id for move in started],
+                    fields=["id", "error", "errorString"],
+                )
+            }
+
+        by_dest: dict[str, list[RelocationMove]] = {}
+        for move in started:
+            by_dest.setdefault(move.dest, []).append(move)
+
+        for dest, moves in by_dest.items():
+            log.info(f"Moving {len(moves)} torrent(s) to '{dest}'")
+            if not controller.move_torrent_data(
+                ids=[move.id for move in moves], dest=dest
+            ):
+                for move in moves:
+                    _finish(move, FAILED, "torrent-set-location failed")
+                continue
+
+            now: float = time.monotonic()
+            for move in moves:
+                move.state = MOVING
+                in_flight[move.id] = (move, now, errors.get(move.id, (0, "")))
+        _save()
+
+        if not in_flight:
+            continue
+
+        time.sleep(poll_interval)
+
+        torrents: dict[int, Torrent] = {
+            torrent.id: torrent
+            for torrent in controller.get_multiple_torrents(
+                ids=list(in_flight),
+                fields=["id", "downloadDir", "error", "errorString"],
+            )
+        }
+
+        for torrent_id, (move, started_at, error) in list(in_flight.items()):
+            torrent = torrents.get(torrent_id)
+
+            if torrent is None:
+                del in_flight[torrent_id]
+                _finish(move, FAILED, "Torrent removed while moving")
+            elif _same_path(torrent.download_dir, move.dest):
+                del in_flight[torrent.id]
+                _finish(move, DONE)
+            elif (
+                torrent.error == _LOCAL_ERROR
+                and (torrent.error, torrent.error_string) != error
+            ):
+                del in_flight[torrent.id]
+                _finish(move, FAILED, torrent.error_string)
+            elif (
+                move_timeout is not None
+                and time.monotonic() - started_at > move_timeout
+            ):
+                del in_flight[torrent.id]
+                _finish(move, FAILED, f"Not moved after {move_timeout}s")
+
+        _save()
+
+    return plan
+
+
+def _apply_locally(
+    controller: TransmissionRPCController,
+    queue: list[RelocationMove],
+    copy_engine: LocalCopyEngine,
+    concurrency: int,
+    finish: t.Callable[..., None],
+    save: t.Callable[[], None],
+) -> None:
+    torrents: dict[int, Torrent] = {
+        torrent.id: torrent
+        for torrent in controller.get_multiple_torrents(
+            ids=[move.id for move in queue], fields=LOCAL_COPY_FIELDS
+        )
+    }
+    lock = threading.Lock()
+
+    def _move(move: RelocationMove) -> None:
+        with lock:
+            move.state = MOVING
+            save()
+
+        try:
+            local_move_torrent(controller, torrents[move.id], move.dest, copy_engine)
+        except Exception as exc:
+            log.error(
+                f"({type(exc)}) Error copying torrent '{move.name}'. Details: {exc}"
+            )
+            with lock:
+                finish(move, FAILED, str(exc))
+                save()
+            return
+
+        with lock:
+            finish(move, DONE)
+            save()
+
+    ## Each torrent's files are copied in parallel by the engine, on top of this
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in as_completed([pool.submit(_move, move) for move in queue]):
+            future.result()
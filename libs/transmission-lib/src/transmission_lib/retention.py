@@ -0,0 +1,249 @@
+"""Pick finished torrents to remove until a target amount of disk space is freed.
+
+Each candidate gets a removal score from a weighted sum of normalized terms:
+
+- `age`: days since the torrent finished (`doneDate`).
+- `ratio`: upload ratio.
+- `seeding`: days spent seeding.
+- `idle`: days since the torrent was last active, so recently active torrents are kept longer.
+
+Terms are divided by their scale (`RetentionWeights.scales`), so a weight of 1 means
+"one scale unit counts as 1 point". Torrents with the highest score are taken from
+a heap until the target is reached, then torrents the target does not need are put
+back (lowest score first), so the selection is as small as the ranking allows.
+
+Protected torrents (by label or tracker host) are never selected.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import heapq
+import logging
+import time
+import typing as t
+from urllib.parse import urlparse
+
+if t.TYPE_CHECKING:
+    from transmission_rpc.torrent import Torrent
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "RETENTION_FIELDS",
+    "RetentionWeights",
+    "RetentionCandidate",
+    "RetentionPlan",
+    "score_torrent",
+    "plan_retention",
+]
+
+## RPC fields needed to score torrents
+RETENTION_FIELDS: list[str] = [
+    "id",
+    "hashString",
+    "name",
+    "sizeWhenDone",
+    "leftUntilDone",
+    "doneDate",
+    "uploadRatio",
+    "secondsSeeding",
+    "activityDate",
+    "labels",
+    "trackers",
+]
+
+_DAY: float = 86400.0
+
+
+@dataclass
+class RetentionWeights:
+    """Weights of the removal score's terms. Higher scores are removed first.
+
+    Attributes:
+        age (float): Weight of days since the torrent finished.
+        ratio (float): Weight of the upload ratio.
+        seeding (float): Weight of days spent seeding.
+        idle (float): Weight of days since the torrent was last active.
+        scales (dict[str, float]): Value of each term that counts as 1 point.
+
+    """
+
+    age: float = field(default=1.0)
+    ratio: float = field(default=1.0)
+    seeding: float = field(default=0.5)
+    idle: float = field(default=1.0)
+    scales: dict[str, float] = field(
+        default_factory=lambda: {
+            "age": 30.0,
+            "ratio": 1.0,
+            "seeding": 30.0,
+            "idle": 7.0,
+        }
+    )
+
+    @classmethod
+    def parse(cls, weights: list[str]) -> "RetentionWeights":
+        """Build weights from `term=value` strings, i.e. `["age=2", "ratio=0.5"]`."""
+        parsed = cls()
+        for weight in weights:
+            term, sep, value = weight.partition("=")
+            term = term.strip()
+            if not sep or term not in parsed.scales:
+                raise ValueError(
+                    f"Invalid weight: '{weight}'. Expected <term>=<number>, terms: {list(parsed.scales)}"
+                )
+            setattr(parsed, term, float(value))
+
+        return parsed
+
+
+@dataclass
+class RetentionCandidate:
+    """A torrent that may be removed.
+
+    Attributes:
+        id (int): Torrent ID.
+        hash (str): Torrent hash.
+        name (str): Torrent name.
+        size (int): Bytes freed by removing the torrent & its data.
+        score (float): Removal score, higher is removed first.
+        terms (dict[str, float]): The score's unweighted terms.
+
+    """
+
+    id: int = field(default=None)
+    hash: str = field(default=None)
+    name: str = field(default=None)
+    size: int = field(default=0)
+    score: float = field(default=0.0)
+    terms: dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class RetentionPlan:
+    """Torrents selected to free `target` bytes.
+
+    Attributes:
+        target (int): Bytes to free.
+        selected (list[RetentionCandidate]): Torrents to remove, highest score first.
+        candidates (int): Number of torrents that could have been removed.
+        protected (int): Number of finished torrents skipped as protected.
+
+    """
+
+    target: int = field(default=0)
+    selected: list[RetentionCandidate] = field(default_factory=list)
+    candidates: int = field(default=0)
+    protected: int = field(default=0)
+
+    @property
+    def freed(self) -> int:
+        return sum(candidate.size for candidate in self.selected)
+
+    @property
+    def reached(self) -> bool:
+        return self.freed >= self.target
+
+
+def score_torrent(
+    torrent: Torrent, weights: RetentionWeights, now: float | None = None
+) -> tuple[float, dict[str, float]]:
+    """Return a torrent's removal score & its unweighted terms (in days & ratio)."""
+    now = time.time() if now is None else now
+    fields: dict[str, t.Any] = torrent.fields
+
+    terms: dict[str, float] = {
+        "age": max(0.0, now - fields["doneDate"]) / _DAY if fields["doneDate"] else 0.0,
+        ## Negative ratios mean "not available"
+        "ratio": max(0.0, fields["uploadRatio"]),
+        "seeding": fields["secondsSeeding"] / _DAY,
+        "idle": max(0.0, now - fields["activityDate"]) / _DAY
+        if fields["activityDate"]
+        else 0.0,
+    }
+    score: float = sum(
+        getattr(weights, term) * value / weights.scales[term]
+        for term, value in terms.items()
+    )
+
+    return score, terms
+
+
+def _is_protected(
+    torrent: Torrent, protected_labels: set[str], protected_trackers: list[str]
+) -> bool:
+    if protected_labels & {label.lower() for label in torrent.fields.get("labels", [])}:
+        return True
+
+    for tracker in torrent.fields.get("trackers", []):
+        hostname: str = (urlparse(tracker.get("announce", "")).hostname or "").lower()
+        if any(hostname == p or hostname.endswith("." + p) for p in protected_trackers):
+            return True
+
+    return False
+
+
+def plan_retention(
+    torrents: t.Iterable[Torrent],
+    target: int,
+    weights: RetentionWeights | None = None,
+    protected_labels: list[str] | None = None,
+    protected_trackers: list[str] | None = None,
+) -> RetentionPlan:
+    """Select finished torrents to remove until `target` bytes are freed.
+
+    Params:
+        torrents (Iterable[Torrent]): Candidate torrents, with `RETENTION_FIELDS`. Unfinished torrents are ignored.
+        target (int): Bytes to free.
+        weights (RetentionWeights|None): Score weights. `None` for the defaults.
+        protected_labels (list[str]|None): Never remove torrents with one of these labels.
+        protected_trackers (list[str]|None): Never remove torrents on these tracker hosts (or their subdomains).
+
+    Returns:
+        (RetentionPlan): The selection. `reached` is `False` if all candidates together free less than `target`.
+
+    """
+    weights = weights or RetentionWeights()
+    labels: set[str] = {label.lower() for label in protected_labels or []}
+    trackers: list[str] = [tracker.lower() for tracker in protected_trackers or []]
+    now: float = time.time()
+
+    plan = RetentionPlan(target=target)
+    ## Max-heap on score: (-score, id, candidate)
+    heap: list[tuple[float, int, RetentionCandidate]] = []
+
+    for torrent in torrents:
+        if not torrent.fields["doneDate"] or torrent.fields["leftUntilDone"]:
+            continue
+        if _is_protected(torrent, labels, trackers):
+            plan.protected += 1
+            continue
+
+        score, terms = score_torrent(torrent, weights, now=now)
+        candidate = RetentionCandidate(
+            id=torrent.id,
+            hash=torrent.hashString,
+            name=torrent.name,
+            size=torrent.fields["sizeWhenDone"],
+            score=score,
+            terms=terms,
+        )
+        heap.append((-score, torrent.id, candidate))
+
+    plan.candidates = len(heap)
+    heapq.heapify(heap)
+
+    freed: int = 0
+    while heap and freed < target:
+        _, _, candidate = heapq.heappop(heap)
+        plan.selected.append(candidate)
+        freed += candidate.size
+
+    ## Put back torrents the target does not need, keeping those with the lowest scores
+    for candidate in sorted(plan.selected, key=lambda c: c.score):
+        if freed - candidate.size >= target:
+            plan.selected.remove(candidate)
+            freed -= candidate.size
+
+    return plan
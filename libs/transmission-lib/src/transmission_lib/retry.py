@@ -0,0 +1,237 @@
+"""Retries, backoff, circuit breaking & adaptive timeouts for RPC calls.
+
+`TransmissionRPCController._call()` uses these to make transient failures (an
+overloaded daemon, a dropped connection) cost a few seconds instead of failing
+a whole run:
+
+- `RetryPolicy`: retries idempotent RPC methods that fail with a connection error
+  or timeout, with exponential backoff & full jitter, within an optional deadline.
+- `CircuitBreaker`: after repeated failures, calls to the host fail fast until a
+  cool-down has passed & a probe call succeeds.
+- `AdaptiveTimeout`: per-method timeouts derived from recently observed latencies.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+import logging
+import random
+import threading
+import time
+
+from transmission_rpc.error import TransmissionConnectError, TransmissionTimeoutError
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "IDEMPOTENT_RPC_METHODS",
+    "RETRYABLE_EXCEPTIONS",
+    "CircuitOpenError",
+    "RetryPolicy",
+    "CircuitBreaker",
+    "AdaptiveTimeout",
+]
+
+## RPC methods that are safe to send again if a request failed or timed out.
+#  Removing, adding & relocating torrents are not retried.
+IDEMPOTENT_RPC_METHODS: frozenset[str] = frozenset(
+    [
+        "torrent-get",
+        "session-get",
+        "session-stats",
+        "free-space",
+        "port-test",
+        "group-get",
+        "torrent-start",
+        "torrent-start-now",
+        "torrent-stop",
+        "torrent-verify",
+        "torrent-reannounce",
+        "torrent-set",
+        "queue-move-top",
+        "queue-move-bottom",
+    ]
+)
+## Failures that are worth retrying. Other errors (i.e. auth) are raised immediately.
+RETRYABLE_EXCEPTIONS: tuple[type[Exception], ...] = (
+    TransmissionConnectError,
+    TransmissionTimeoutError,
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the host's circuit breaker is open."""
+
+
+@dataclass
+class RetryPolicy:
+    """Retry settings for idempotent RPC calls.
+
+    Attributes:
+        retries (int): Extra attempts after a retryable failure.
+        backoff (float): Base delay in seconds. Retry `n` waits a random delay in
+            `[0, min(backoff_max, backoff * 2**n)]`.
+        backoff_max (float): Upper bound for a single delay.
+        deadline (float|None): Max seconds for a call, including retries. `None` for no deadline.
+
+    """
+
+    retries: int = field(default=2)
+    backoff: float = field(default=0.5)
+    backoff_max: float = field(default=10.0)
+    deadline: float | None = field(default=None)
+
+    def delay(self, attempt: int) -> float:
+        """Return the delay before retry number `attempt` (starting at 0)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2**attempt))
+
+
+class CircuitBreaker:
+    """Fail fast while a host keeps failing.
+
+    After `failure_threshold` consecutive failures the breaker opens, and calls
+    raise `CircuitOpenError` without contacting the host. Once `reset_timeout`
+    seconds have passed, a single probe call is let through: if it succeeds the
+    breaker closes, otherwise it opens again.
+
+    Params:
+        failure_threshold (int): Consecutive failures that open the breaker.
+        reset_timeout (float): Seconds the breaker stays open before a probe call.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold: int = failure_threshold
+        self.reset_timeout: float = reset_timeout
+
+        self.failures: int = 0
+        self._opened_at: float | None = None
+        self._probing: bool = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """One of `closed`, `open` or `half-open`."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+
+            return "open"
+
+    def before_call(self) -> bool:
+        """Raise `CircuitOpenError` if a call may not be made right now.
+
+        Returns:
+            (bool): Whether the call is the half-open probe, which must end in `record_success()`, `record_failure()` or `release()`.
+
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return False
+
+            remaining: float = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if remaining > 0 or self._probing:
+                raise CircuitOpenError(
+                    f"Circuit breaker is open after {self.failures} consecutive failure(s), retry in {max(remaining, 0):.1f}s"
+                )
+
+            ## Let a single probe call through
+            self._probing = True
+
+            return True
+
+    def release(self) -> None:
+        """End a call without a verdict on the host (i.e. a non-retryable error, or an abandoned stream).
+
+        Frees the probe slot, so the next call probes instead of every call
+        failing fast for good. Only call it for the probe (see `before_call()`).
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                log.info("Circuit breaker closed")
+            self.failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+
+            if self.failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    log.warning(
+                        f"Circuit breaker opened after {self.failures} consecutive failure(s)"
+                    )
+                self._opened_at = time.monotonic()
+
+
+class AdaptiveTimeout:
+    """Per-method timeouts derived from recently observed latencies.
+
+    Once `min_samples` latencies have been observed for a method, its timeout is
+    `percentile` of the recent latencies times `multiplier`, clamped to
+    `[min_timeout, max_timeout]`. Until then, `base` is used.
+
+    Params:
+        base (float): Timeout used until enough latencies have been observed.
+        percentile (float): Latency percentile the timeout is derived from (0-1).
+        multiplier (float): Headroom applied to the percentile.
+        min_timeout (float): Lower bound for adapted timeouts.
+        max_timeout (float): Upper bound for adapted (and escalated) timeouts.
+        window (int): Number of recent latencies kept per method.
+        min_samples (int): Latencies needed before the timeout adapts.
+    """
+
+    def __init__(
+        self,
+        base: float = 30.0,
+        percentile: float = 0.99,
+        multiplier: float = 3.0,
+        min_timeout: float = 5.0,
+        max_timeout: float = 120.0,
+        window: int = 200,
+        min_samples: int = 20,
+    ) -> None:
+        self.base: float = base
+        self.percentile: float = percentile
+        self.multiplier: float = multiplier
+        self.min_timeout: float = min_timeout
+        self.max_timeout: float = max(max_timeout, base)
+        self.window: int = window
+        self.min_samples: int = min_samples
+
+        self._latencies: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, seconds: float) -> None:
+        with self._lock:
+            latencies = self._latencies.get(method)
+            if latencies is None:
+                latencies = self._latencies[method] = deque(maxlen=self.window)
+            latencies.append(seconds)
+
+    def timeout(self, method: str) -> float:
+        """Return the timeout for the next `method` call."""
+        with self._lock:
+            latencies: list[float] = sorted(self._latencies.get(method, ()))
+
+        if len(latencies) < self.min_samples:
+            return self.base
+
+        index: int = min(len(latencies) - 1, int(self.percentile * len(latencies)))
+
+        return min(
+            self.max_timeout,
+            max(self.min_timeout, latencies[index] * self.multiplier),
+        )
+
+    def escalate(self, timeout: float) -> float:
+        """Return the timeout for a retry after a call timed out after `timeout` seconds."""
+        return min(self.max_timeout, timeout * 2)
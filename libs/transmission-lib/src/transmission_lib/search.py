@@ -0,0 +1,441 @@
+"""A persistent name (and file path) search index over the torrents on every host.
+
+The index is a SQLite database (stdlib `sqlite3`, no server) with an FTS5 table
+using the `trigram` tokenizer: every 3-character sequence of a name is an index
+term, so substring searches are index lookups instead of scans, and stay in the
+milliseconds with hundreds of thousands of torrents.
+
+- Substring search: every word of the query must appear in the name (or a file
+  path), case-insensitively, i.e. `s01e02 1080` finds `Show.S01E02.1080p.mkv`.
+- Fuzzy search: candidates sharing the most (and rarest) trigrams with the
+  query are ranked by FTS5, then re-scored by the fraction of the query's
+  trigrams they contain, so typos & re-ordered words still match.
+
+`SearchIndex.refresh()` updates the index incrementally: each host is fetched
+with one projected `torrent-get`, compared against the stored rows, and only
+added, changed & removed torrents are written. File paths (optional) are only
+fetched for torrents new to the index.
+
+Requires SQLite 3.34+ (FTS5 `trigram` tokenizer).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import logging
+from pathlib import Path
+import sqlite3
+import time
+import typing as t
+
+from .duplicates import fetch_host_torrents
+
+if t.TYPE_CHECKING:
+    from .controllers import TransmissionRPCController
+
+    from transmission_rpc.torrent import Torrent
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "SEARCH_FIELDS",
+    "SearchHit",
+    "IndexUpdate",
+    "SearchIndex",
+]
+
+## RPC fields stored in the index
+SEARCH_FIELDS: list[str] = ["id", "hashString", "name", "totalSize", "downloadDir"]
+## Torrents per `torrent-get` when fetching file lists
+_FILES_CHUNK_SIZE: int = 200
+## Fuzzy candidates ranked by FTS5 per requested result, before re-scoring
+_FUZZY_CANDIDATES: int = 20
+## Characters treated as word separators when splitting queries & names into trigrams
+_SEPARATORS: dict[int, str] = str.maketrans({c: " " for c in "._-[](){}+/"})
+
+_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS hosts (
+    host TEXT PRIMARY KEY,
+    refreshed_at REAL NOT NULL,
+    files INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS torrents (
+    rowid INTEGER PRIMARY KEY,
+    host TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    id INTEGER,
+    name TEXT NOT NULL,
+    size INTEGER,
+    download_dir TEXT,
+    UNIQUE (host, hash)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(name, paths, tokenize='trigram');
+"""
+
+
+def _trigrams(text: str) -> set[str]:
+    """Trigrams of each word of `text`, lowercased. Words shorter than 3 characters are kept whole."""
+    grams: set[str] = set()
+    for word in text.lower().translate(_SEPARATORS).split():
+        if len(word) < 3:
+            grams.add(word)
+        else:
+            grams.update(word[i : i + 3] for i in range(len(word) - 2))
+
+    return grams
+
+
+def _quote(term: str) -> str:
+    """Quote a term as an FTS5 string."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+@dataclass
+class SearchHit:
+    """A torrent matching a search.
+
+    Attributes:
+        host (str): Host name.
+        id (int): Torrent ID on the host, as of the last refresh.
+        hash (str): Info hash.
+        name (str): Torrent name.
+        size (int): Total size in bytes.
+        download_dir (str): Download dir on the host.
+        score (float): 1.0 for substring matches, the fraction of the query's trigrams found for fuzzy matches.
+
+    """
+
+    host: str = field(default=None)
+    id: int = field(default=None)
+    hash: str = field(default=None)
+    name: str = field(default=None)
+    size: int = field(default=0)
+    download_dir: str = field(default=None)
+    score: float = field(default=1.0)
+
+
+@dataclass
+class IndexUpdate:
+    """Changes written to the index for a host.
+
+    Attributes:
+        added (int): Torrents new to the index.
+        updated (int): Torrents whose ID, name or download dir changed.
+        removed (int): Torrents no longer on the host.
+        seconds (float): Time taken, including fetching.
+
+    """
+
+    added: int = field(default=0)
+    updated: int = field(default=0)
+    removed: int = field(default=0)
+    seconds: float = field(default=0.0)
+
+
+class SearchIndex:
+    """Persistent trigram index of torrent names & file paths, across hosts.
+
+    Params:
+        path (str|Path): SQLite database file, created if missing.
+    """
+
+    def __init__(self, path: str | Path = "search-index.db") -> None:
+        self.path: Path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        ## Refreshes may run on worker threads, writes are serialized by SQLite
+        self.conn: sqlite3.Connection = sqlite3.connect(
+            self.path, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            self.conn.executescript(_SCHEMA)
+        except sqlite3.OperationalError as exc:
+            raise RuntimeError(
+                f"The search index needs SQLite 3.34+ with FTS5 (this is {sqlite3.sqlite_version}). Details: {exc}"
+            ) from exc
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def hosts(self) -> dict[str, float]:
+        """Indexed hosts, with the time (epoch seconds) they were last refreshed."""
+        return dict(self.conn.execute("SELECT host, refreshed_at FROM hosts"))
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM torrents").fetchone()[0]
+
+    def update_host(
+        self,
+        host: str,
+        torrents: t.Iterable[Torrent],
+        files: dict[str, list[str]] | None = None,
+    ) -> tuple[IndexUpdate, list[str]]:
+        """Bring a host's rows in line with its current torrents.
+
+        Params:
+            host (str): Host name.
+            torrents (Iterable[Torrent]): Every torrent on the host, with `SEARCH_FIELDS`.
+            files (dict[str, list[str]]|None): File paths by hash, for torrents that have them already.
+
+        Returns:
+            (tuple[IndexUpdate, list[str]]): The changes, and hashes of torrents new to the index
+                (whose file paths are not known yet).
+
+        """
+        stored: dict[str, tuple[int, int, str, str]] = {
+            row[0]: row[1:]
+            for row in self.conn.execute(
+                "SELECT hash, rowid, id, name, download_dir FROM torrents WHERE host = ?",
+                (host,),
+            )
+        }
+        update = IndexUpdate()
+        added: list[tuple] = []
+        changed: list[tuple] = []
+        renamed: list[tuple] = []
+
+        for torrent in torrents:
+            f: dict[str, t.Any] = torrent.fields
+            row: tuple[int, int, str, str] | None = stored.pop(f["hashString"], None)
+            if row is None:
+                added.append(
+                    (
+                        host,
+                        f["hashString"],
+                        f["id"],
+                        f["name"],
+                        f["totalSize"],
+                        f["downloadDir"],
+                    )
+                )
+            elif row[1:] != (f["id"], f["name"], f["downloadDir"]):
+                changed.append((f["id"], f["name"], f["downloadDir"], row[0]))
+                if row[2] != f["name"]:
+                    renamed.append((f["name"], row[0]))
+
+        with self.conn:
+            for values in added:
+                rowid: int = self.conn.execute(
+                    "INSERT INTO torrents (host, hash, id, name, size, download_dir) VALUES (?, ?, ?, ?, ?, ?)",
+                    values,
+                ).lastrowid
+                self.conn.execute(
+                    "INSERT INTO names (rowid, name, paths) VALUES (?, ?, ?)",
+                    (rowid, values[3], "\n".join((files or {}).get(values[1], []))),
+                )
+            self.conn.executemany(
+                "UPDATE torrents SET id = ?, name = ?, download_dir = ? WHERE rowid = ?",
+                changed,
+            )
+            self.conn.executemany("UPDATE names SET name = ? WHERE rowid = ?", renamed)
+
+            ## Left over rows are torrents that are gone from the host
+            gone: list[tuple[int]] = [(row[0],) for row in stored.values()]
+            self.conn.executemany("DELETE FROM torrents WHERE rowid = ?", gone)
+            self.conn.executemany("DELETE FROM names WHERE rowid = ?", gone)
+
+            self.conn.execute(
+                "INSERT INTO hosts (host, refreshed_at) VALUES (?, ?) ON CONFLICT (host) DO UPDATE SET refreshed_at = excluded.refreshed_at",
+                (host, time.time()),
+            )
+
+        update.added, update.updated, update.removed = (
+            len(added),
+            len(changed),
+            len(gone),
+        )
+
+        return update, [values[1] for values in added]
+
+    def set_paths(self, host: str, paths: dict[str, list[str]]) -> None:
+        """Store file paths (relative to the download dir) for a host's torrents, by hash."""
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE names SET paths = ? WHERE rowid = (SELECT rowid FROM torrents WHERE host = ? AND hash = ?)",
+                [
+                    ("\n".join(files), host, info_hash)
+                    for info_hash, files in paths.items()
+                ],
+            )
+            self.conn.execute("UPDATE hosts SET files = 1 WHERE host = ?", (host,))
+
+    def _has_paths(self, host: str) -> bool:
+        row = self.conn.execute(
+            "SELECT files FROM hosts WHERE host = ?", (host,)
+        ).fetchone()
+
+        return bool(row and row[0])
+
+    def refresh(
+        self,
+        controllers: dict[str, TransmissionRPCController],
+        max_age: float = 0,
+        files: bool = False,
+    ) -> dict[str, IndexUpdate]:
+        """Update the index from every host, concurrently.
+
+        Params:
+            controllers (dict[str, TransmissionRPCController]): Controllers by host name.
+            max_age (float): Skip hosts refreshed less than this many seconds ago.
+            files (bool): Also index file paths. Only fetched for torrents new to the index,
+                or for every torrent the first time a host is indexed with files.
+
+        Returns:
+            (dict[str, IndexUpdate]): Changes per refreshed host. Hosts that could not be
+                fetched are left as they were, & logged.
+
+        """
+        refreshed_at: dict[str, float] = self.hosts()
+        now: float = time.time()
+        stale: dict[str, TransmissionRPCController] = {
+            name: controller
+            for name, controller in controllers.items()
+            if now - refreshed_at.get(name, 0) >= max_age
+            or (files and not self._has_paths(name))
+        }
+        if not stale:
+            return {}
+
+        started: float = time.perf_counter()
+        torrents, _ = fetch_host_torrents(stale, fields=SEARCH_FIELDS)
+
+        updates: dict[str, IndexUpdate] = {}
+        for name, host_torrents in torrents.items():
+            update, new_hashes = self.update_host(name, host_torrents)
+
+            if files:
+                if not self._has_paths(name):
+                    new_hashes = [
+                        torrent.fields["hashString"] for torrent in host_torrents
+                    ]
+                self.set_paths(name, self._fetch_paths(stale[name], new_hashes))
+
+            update.seconds = time.perf_counter() - started
+            updates[name] = update
+
+        return updates
+
+    @staticmethod
+    def _fetch_paths(
+        controller: TransmissionRPCController, hashes: list[str]
+    ) -> dict[str, list[str]]:
+        paths: dict[str, list[str]] = {}
+        for i in range(0, len(hashes), _FILES_CHUNK_SIZE):
+            for torrent in controller.get_multiple_torrents(
+                ids=hashes[i : i + _FILES_CHUNK_SIZE], fields=["hashString", "files"]
+            ):
+                ## Raw records, Torrent.get_files() needs more fields than the names
+                paths[torrent.fields["hashString"]] = [
+                    torrent_file["name"]
+                    for torrent_file in torrent.fields.get("files", [])
+                ]
+
+        return paths
+
+    def search(
+        self,
+        query: str,
+        hosts: list[str] | None = None,
+        fuzzy: bool = False,
+        paths: bool = False,
+        limit: int = 50,
+        min_score: float = 0.5,
+    ) -> list[SearchHit]:
+        """Search torrent names (and file paths, with `paths`).
+
+        Params:
+            query (str): Words that must all appear in a name (substring search), or text to match approximately (`fuzzy`).
+            hosts (list[str]|None): Only return torrents on these hosts.
+            fuzzy (bool): Rank by trigram similarity instead of requiring every word.
+            paths (bool): Also match file paths (if they were indexed).
+            limit (int): Max results.
+            min_score (float): With `fuzzy`, the fraction of the query's trigrams a result must contain.
+
+        Returns:
+            (list[SearchHit]): Matches, best first for fuzzy searches. Otherwise the first `limit` matches, by host & name.
+
+        """
+        columns: str = "{name paths}" if paths else "name"
+        where: list[str] = []
+        params: list[t.Any] = []
+
+        if fuzzy:
+            grams: set[str] = _trigrams(query)
+            terms: list[str] = [_quote(gram) for gram in grams if len(gram) == 3]
+            if not terms:
+                ## Too short for trigrams, an exact substring is the best guess
+                return self.search(query, hosts=hosts, paths=paths, limit=limit)
+            where.append("names MATCH ?")
+            params.append(f"{columns} : ({' OR '.join(terms)})")
+        else:
+            words: list[str] = query.split()
+            if not words:
+                return []
+            ## FTS5 trigram terms need 3+ characters, shorter words fall back to LIKE
+            long_words: list[str] = [word for word in words if len(word) >= 3]
+            if long_words:
+                where.append("names MATCH ?")
+                params.append(
+                    f"{columns} : ({' AND '.join(_quote(w) for w in long_words)})"
+                )
+            for word in words:
+                if len(word) < 3:
+                    pattern: str = (
+                        "%"
+                        + word.replace("\\", "\\\\")
+                        .replace("%", "\\%")
+                        .replace("_", "\\_")
+                        + "%"
+                    )
+                    if paths:
+                        where.append(
+                            "(names.name LIKE ? ESCAPE '\\' OR names.paths LIKE ? ESCAPE '\\')"
+                        )
+                        params.extend([pattern, pattern])
+                    else:
+                        where.append("names.name LIKE ? ESCAPE '\\'")
+                        params.append(pattern)
+
+        if hosts:
+            where.append(f"t.host IN ({', '.join('?' for _ in hosts)})")
+            params.extend(hosts)
+
+        sql: str = (
+            "SELECT t.host, t.id, t.hash, t.name, t.size, t.download_dir"
+            + (", names.paths" if fuzzy and paths else "")
+            + " FROM names JOIN torrents t ON t.rowid = names.rowid WHERE "
+            + " AND ".join(where)
+        )
+        if fuzzy:
+            sql += " ORDER BY names.rank LIMIT ?"
+            params.append(max(limit * _FUZZY_CANDIDATES, 200))
+        else:
+            ## No ORDER BY, so scans (i.e. for short words) stop at the limit
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        rows: list[tuple] = self.conn.execute(sql, params).fetchall()
+        if not fuzzy:
+            return sorted(
+                (SearchHit(*row) for row in rows), key=lambda hit: (hit.host, hit.name)
+            )
+
+        hits: list[SearchHit] = []
+        for row in rows:
+            text: str = row[3] + ("\n" + row[6] if paths and row[6] else "")
+            score: float = len(grams & _trigrams(text)) / len(grams)
+            if score >= min_score:
+                hits.append(SearchHit(*row[:6], score=score))
+
+        ## Best score first, shorter (closer) names first on ties
+        hits.sort(key=lambda hit: (-hit.score, len(hit.name)))
+
+        return hits[:limit]
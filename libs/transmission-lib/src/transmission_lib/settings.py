@@ -8,7 +8,11 @@ import json
 
 log = logging.getLogger(__name__)
 
-__all__ = ["TransmissionClientSettings", "get_transmission_settings"]
+__all__ = [
+    "TransmissionClientSettings",
+    "get_transmission_settings",
+    "get_transmission_hosts",
+]
 
 
 @dataclass
@@ -22,6 +26,13 @@ class TransmissionClientSettings:
         path (str): RPC URL of Transmission RPC server.
         username (str): Username of Transmission RPC server.
         password (str): Password of Transmission RPC server.
+        pool_size (int): Max number of concurrent connections to the Transmission RPC server.
+        timeout (float): Initial request timeout in seconds. Adapts to observed latencies
+            unless `adaptive_timeout` is `False`.
+        adaptive_timeout (bool): Derive request timeouts from recently observed latencies.
+        retries (int): Retries for idempotent requests that fail with a connection error or timeout.
+        retry_backoff (float): Base delay in seconds between retries (exponential, with jitter).
+        deadline (float): Max seconds for a single request, including retries. `None` for no deadline.
 
     """
 
@@ -31,6 +42,12 @@ class TransmissionClientSettings:
     path: str = field(default="/transmission/rpc")
     username: str = field(default=None)
     password: str = field(default=None, repr=False)
+    pool_size: int = field(default=4)
+    timeout: t.Optional[float] = field(default=None)
+    adaptive_timeout: bool = field(default=True)
+    retries: int = field(default=2)
+    retry_backoff: float = field(default=0.5)
+    deadline: t.Optional[float] = field(default=None)
 
 
 def load_config(config_file: str) -> dict:
@@ -49,3 +66,28 @@ def get_transmission_settings(config_file: str) -> TransmissionClientSettings:
     transmission_settings = TransmissionClientSettings(**config)
 
     return transmission_settings
+
+
+def get_transmission_hosts(config_file: str) -> dict[str, TransmissionClientSettings]:
+    """Load settings for every host defined in a config file.
+
+    A config file may describe a single host (see `configs/example.config.json`),
+    or several hosts under a `hosts` key, mapping a host name to its connection
+    settings (see `configs/example.multi-host.config.json`).
+
+    Returns:
+        (dict[str, TransmissionClientSettings]): Settings keyed by host name. Single-host
+            configs are keyed by their `host` value.
+
+    """
+    config = load_config(config_file)
+
+    if "hosts" not in config:
+        transmission_settings = TransmissionClientSettings(**config)
+
+        return {str(transmission_settings.host): transmission_settings}
+
+    return {
+        name: TransmissionClientSettings(**host_config)
+        for name, host_config in config["hosts"].items()
+    }
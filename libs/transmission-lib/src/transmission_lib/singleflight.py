@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import logging
+import threading
+import typing as t
+
+log = logging.getLogger(__name__)
+
+__all__ = ["SingleFlight"]
+
+T = t.TypeVar("T")
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: t.Any = None
+        self.error: BaseException | None = None
+        self.waiters: int = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into a single execution.
+
+    The first caller for a key runs the function; callers that arrive while it is
+    in flight wait for it and receive the same result (or exception). Once the
+    call completes the key is forgotten, so later calls run the function again.
+
+    Usage:
+        flight = SingleFlight()
+        torrents = flight.do(("torrent-get", fields), fetch_torrents)
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[t.Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: t.Hashable, func: t.Callable[[], T]) -> T:
+        with self._lock:
+            call: _Call | None = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader: bool = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            if call.waiters:
+                log.debug(f"Coalesced {call.waiters} call(s) for key {key!r}")
+            call.done.set()
+
+        return call.result
@@ -0,0 +1,229 @@
+"""Columnar torrent snapshots, with `--where` filters evaluated a column at a time.
+
+A `TorrentSnapshot` stores one column per filter property (i.e. `ratio`, `added`)
+instead of one object per torrent. A filter clause is evaluated over a whole
+column with C-level `map()`s (`operator.ge`, a compiled regex's `search`, ...),
+so no Python code runs per torrent, and its result is a row mask: an `int` with
+one byte per row, set to 1 for matching rows. Masks are combined with `&`, `|`
+and `^`, and each distinct clause is only evaluated once per snapshot, so many
+filters sharing clauses cost little more than one.
+"""
+
+from __future__ import annotations
+
+from itertools import compress, repeat
+import logging
+import math
+import operator
+import re
+import typing as t
+
+from .filters import FILTER_PROPERTIES, TorrentFilter, WhereClause
+
+if t.TYPE_CHECKING:
+    from transmission_rpc.torrent import Torrent
+
+log = logging.getLogger(__name__)
+
+__all__ = ["TorrentSnapshot"]
+
+## Joins the elements of list properties (labels, trackers) in a column
+_LIST_SEPARATOR: str = "\n"
+_NUMBER_OPS: dict[str, t.Callable[[t.Any, t.Any], bool]] = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+
+def _to_mask(values: t.Iterable[t.Any]) -> int:
+    ## One byte per row: bytes() turns True/False into 1/0
+    return int.from_bytes(bytes(values), "little")
+
+
+class TorrentSnapshot:
+    """A columnar snapshot of torrents, for evaluating many filters at once.
+
+    Params:
+        properties (Iterable[str]): Filter properties (see `FILTER_PROPERTIES`) to store as columns.
+        extra_fields (Iterable[str]): Raw RPC fields to keep per row, i.e. `labels` for relabeling.
+    """
+
+    def __init__(
+        self, properties: t.Iterable[str] = (), extra_fields: t.Iterable[str] = ()
+    ) -> None:
+        self.properties: list[str] = sorted(set(properties))
+        for prop in self.properties:
+            if prop not in FILTER_PROPERTIES:
+                raise ValueError(
+                    f"Unknown filter property: '{prop}'. Must be one of: {list(FILTER_PROPERTIES)}"
+                )
+        self.extra_fields: list[str] = sorted(set(extra_fields))
+
+        self.ids: list[int] = []
+        self.hashes: list[str] = []
+        self.names: list[str] = []
+        self.statuses: list[str] = []
+        self.done_dates: list[int] = []
+        self.columns: dict[str, list[t.Any]] = {prop: [] for prop in self.properties}
+        self.extra: dict[str, list[t.Any]] = {name: [] for name in self.extra_fields}
+
+        self._masks: dict[t.Hashable, int] = {}
+        self._lower: dict[str, list[str]] = {}
+
+    @staticmethod
+    def fields_for(
+        properties: t.Iterable[str] = (), extra_fields: t.Iterable[str] = ()
+    ) -> list[str]:
+        """RPC fields to fetch to build a snapshot with these columns."""
+        fields: set[str] = {"id", "hashString", "name", "status", "doneDate"}
+        fields.update(extra_fields)
+        for prop in properties:
+            fields.update(FILTER_PROPERTIES[prop].fields)
+
+        return sorted(fields)
+
+    @classmethod
+    def collect(
+        cls,
+        torrents: t.Iterable[Torrent],
+        properties: t.Iterable[str] = (),
+        extra_fields: t.Iterable[str] = (),
+    ) -> "TorrentSnapshot":
+        """Build a snapshot from torrents, i.e. from `TransmissionRPCController.iter_torrents()`."""
+        snapshot = cls(properties, extra_fields)
+        for torrent in torrents:
+            snapshot.append(torrent)
+
+        return snapshot
+
+    def append(self, torrent: Torrent) -> None:
+        fields: dict[str, t.Any] = torrent.fields
+
+        self.ids.append(torrent.id)
+        self.hashes.append(fields["hashString"])
+        self.names.append(fields["name"])
+        self.statuses.append(torrent.status)
+        self.done_dates.append(fields["doneDate"])
+
+        for prop in self.properties:
+            spec = FILTER_PROPERTIES[prop]
+            value: t.Any = spec.get(fields)
+            if spec.kind == "list":
+                value = _LIST_SEPARATOR.join(str(v) for v in value)
+            elif spec.kind == "text":
+                value = value or ""
+            elif value is None:
+                ## Comparisons with NaN are False, like WhereClause.matches() with no value
+                value = math.nan
+            self.columns[prop].append(value)
+
+        for name in self.extra_fields:
+            self.extra[name].append(fields.get(name))
+
+        ## Masks are only valid for the rows they were evaluated on
+        self._masks.clear()
+        self._lower.clear()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def all(self) -> int:
+        """Mask with every row set."""
+        return _to_mask(repeat(1, len(self)))
+
+    def count(self, mask: int) -> int:
+        return mask.bit_count()
+
+    def indices(self, mask: int) -> list[int]:
+        """Row indices set in `mask`."""
+        return list(compress(range(len(self)), mask.to_bytes(len(self), "little")))
+
+    def _lowercase(self, prop: str) -> list[str]:
+        if prop not in self._lower:
+            self._lower[prop] = [value.lower() for value in self.columns[prop]]
+
+        return self._lower[prop]
+
+    def status_mask(self, status: str) -> int:
+        """Mask of rows with `status` (`all`, `finished`/`completed`, or a torrent status)."""
+        status = status.lower()
+        key = ("status", status)
+        if key not in self._masks:
+            if status == "all":
+                mask: int = self.all
+            elif status in ("finished", "completed"):
+                mask = _to_mask(map(bool, self.done_dates))
+            else:
+                mask = _to_mask(map(operator.eq, self.statuses, repeat(status)))
+            self._masks[key] = mask
+
+        return self._masks[key]
+
+    def clause_mask(self, clause: WhereClause) -> int:
+        """Mask of rows matching a parsed `--where` clause."""
+        value: t.Any = clause.value
+        key = (
+            "where",
+            clause.prop,
+            clause.op,
+            (value.pattern, value.flags) if isinstance(value, re.Pattern) else value,
+        )
+        if key in self._masks:
+            return self._masks[key]
+
+        if clause.prop not in self.columns:
+            raise ValueError(f"Property '{clause.prop}' is not in this snapshot")
+        column: list[t.Any] = self.columns[clause.prop]
+        kind: str = FILTER_PROPERTIES[clause.prop].kind
+
+        if clause.op in ("~", "!~"):
+            pattern: re.Pattern = value
+            if kind == "list":
+                ## ^ & $ anchor to each element of the joined list
+                pattern = re.compile(value.pattern, value.flags | re.MULTILINE)
+            mask: int = _to_mask(map(bool, map(pattern.search, column)))
+            if clause.op == "!~":
+                mask ^= self.all
+        elif isinstance(value, str):
+            if kind == "list":
+                pattern = re.compile(f"^{re.escape(value)}$", re.MULTILINE)
+                mask = _to_mask(
+                    map(bool, map(pattern.search, self._lowercase(clause.prop)))
+                )
+            else:
+                mask = _to_mask(
+                    map(operator.eq, self._lowercase(clause.prop), repeat(value))
+                )
+            if clause.op == "!=":
+                mask ^= self.all
+        else:
+            mask = _to_mask(map(_NUMBER_OPS[clause.op], column, repeat(value)))
+            if clause.op == "!=":
+                ## NaN != x is True, but rows without a value never match
+                mask &= _to_mask(map(operator.eq, column, column))
+
+        self._masks[key] = mask
+
+        return mask
+
+    def filter_mask(self, torrent_filter: TorrentFilter) -> int:
+        """Mask of rows matching a `TorrentFilter` (status, ids & `--where` clauses)."""
+        mask: int = self.status_mask(torrent_filter.status)
+
+        if torrent_filter.ids:
+            wanted: set[int | str] = set(torrent_filter.ids)
+            mask &= _to_mask(
+                i in wanted or h in wanted for i, h in zip(self.ids, self.hashes)
+            )
+
+        for clause in torrent_filter.clauses:
+            if not mask:
+                break
+            mask &= self.clause_mask(clause)
+
+        return mask
@@ -0,0 +1,296 @@
+"""Streaming transport for large `torrent-get` responses.
+
+With `files`/`fileStats`, a single `torrent-get` response can be hundreds of MB.
+transmission_rpc holds it in memory as raw bytes, then again as a parsed dict,
+before building `Torrent` objects. `StreamingTransport` reads the response over a
+plain `http.client` connection instead, and `TorrentStreamDecoder` decodes the
+`torrents` array as it arrives, so only the torrent record currently being
+decoded is ever buffered.
+"""
+
+from __future__ import annotations
+
+import base64
+import codecs
+import http.client
+import json
+import logging
+import re
+import socket
+import typing as t
+
+from transmission_rpc.error import (
+    TransmissionAuthError,
+    TransmissionConnectError,
+    TransmissionError,
+    TransmissionTimeoutError,
+)
+
+log = logging.getLogger(__name__)
+
+__all__ = ["DEFAULT_READ_SIZE", "TorrentStreamDecoder", "StreamingTransport"]
+
+## Bytes read from the socket at a time
+DEFAULT_READ_SIZE: int = 64 * 1024
+
+_SESSION_HEADER: str = "X-Transmission-Session-Id"
+_TORRENTS_START = re.compile(r'"torrents"\s*:\s*\[')
+_RESULT = re.compile(r'"result"\s*:\s*"((?:[^"\\]|\\.)*)"')
+## Characters that matter outside & inside of JSON strings
+_STRUCTURAL = re.compile(r'["\\{}\[\]]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+class TorrentStreamDecoder:
+    """Incrementally decode the `torrents` array of a `torrent-get` response (object format).
+
+    Feed the response body in chunks with `feed()`; each call returns the torrent
+    records completed by that chunk. The rest of the body (i.e. `result`) is kept
+    as-is, it is small.
+
+    Usage:
+        decoder = TorrentStreamDecoder()
+        for chunk in chunks:
+            for record in decoder.feed(chunk):
+                ...
+        decoder.feed(b"", final=True)
+        assert decoder.result == "success"
+    """
+
+    def __init__(self) -> None:
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        ## prefix -> array -> done
+        self._state: str = "prefix"
+        self._head: str = ""
+        self._tail: str = ""
+
+        ## Scanner state, carried over between chunks
+        self._depth: int = 0
+        self._in_string: bool = False
+        self._escape: bool = False
+        ## Pieces of the record being decoded, None between records
+        self._pieces: list[str] | None = None
+
+    @property
+    def done(self) -> bool:
+        """`True` once the end of the `torrents` array has been decoded."""
+        return self._state == "done"
+
+    @property
+    def result(self) -> str | None:
+        """The response's `result`, once it has been fed."""
+        match = _RESULT.search(self._tail) or _RESULT.search(self._head)
+
+        return match.group(1) if match else None
+
+    def feed(self, data: bytes, final: bool = False) -> list[dict[str, t.Any]]:
+        text: str = self._text_decoder.decode(data, final)
+
+        if self._state == "prefix":
+            self._head += text
+            match = _TORRENTS_START.search(self._head)
+            if match is None:
+                return []
+
+            text = self._head[match.end() :]
+            self._head = self._head[: match.start()]
+            self._state = "array"
+
+        if self._state == "done":
+            self._tail += text
+            return []
+
+        return self._scan(text)
+
+    def _scan(self, text: str) -> list[dict[str, t.Any]]:
+        records: list[dict[str, t.Any]] = []
+        ## Start of the current record in `text`
+        start: int | None = 0 if self._pieces is not None else None
+        pos: int = 0
+        end: int = len(text)
+
+        while pos < end:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+
+                match = _STRING_SPECIAL.search(text, pos)
+                if match is None:
+                    break
+
+                pos = match.end()
+                if match.group() == "\\":
+                    self._escape = True
+                else:
+                    self._in_string = False
+                continue
+
+            match = _STRUCTURAL.search(text, pos)
+            if match is None:
+                break
+
+            char: str = match.group()
+            pos = match.end()
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0:
+                    start = match.start()
+                    self._pieces = []
+                self._depth += 1
+            elif self._depth == 0:
+                ## End of the torrents array
+                self._state = "done"
+                self._tail = text[pos:]
+                return records
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pieces.append(text[start:pos])
+                    records.append(json.loads("".join(self._pieces)))
+                    self._pieces = None
+                    start = None
+
+        if self._pieces is not None:
+            self._pieces.append(text[start:])
+
+        return records
+
+
+class StreamingTransport:
+    """Send `torrent-get` requests over `http.client` & decode responses as they arrive.
+
+    Params:
+        host (str): Hostname of Transmission RPC server.
+        port (int): Port of Transmission RPC server.
+        path (str): RPC URL path.
+        protocol (str): `http` or `https`.
+        username (str|None): RPC username.
+        password (str|None): RPC password.
+        timeout (float): Socket timeout in seconds, for connecting & for each read.
+        read_size (int): Bytes read from the socket at a time.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 9091,
+        path: str = "/transmission/rpc",
+        protocol: str = "http",
+        username: str | None = None,
+        password: str | None = None,
+        timeout: float = 30.0,
+        read_size: int = DEFAULT_READ_SIZE,
+    ) -> None:
+        self.host: str = host
+        self.port: int = int(port)
+        self.path: str = path
+        self.protocol: str = protocol
+        self.timeout: float = timeout
+        self.read_size: int = read_size
+
+        self._auth: str | None = None
+        if username or password:
+            credentials: bytes = f"{username or ''}:{password or ''}".encode("utf-8")
+            self._auth = "Basic " + base64.b64encode(credentials).decode("ascii")
+        self._session_id: str = "0"
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.protocol == "https":
+            return http.client.HTTPSConnection(
+                self.host, self.port, timeout=self.timeout
+            )
+
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def _open(
+        self, query: dict[str, t.Any]
+    ) -> tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        body: bytes = json.dumps(query).encode("utf-8")
+
+        ## The first request may be answered with 409 & a new session id
+        for _ in range(2):
+            headers: dict[str, str] = {
+                "Content-Type": "application/json",
+                _SESSION_HEADER: self._session_id,
+            }
+            if self._auth:
+                headers["Authorization"] = self._auth
+
+            conn: http.client.HTTPConnection = self._connect()
+            try:
+                conn.request("POST", self.path, body=body, headers=headers)
+                response: http.client.HTTPResponse = conn.getresponse()
+            except (socket.timeout, TimeoutError) as exc:
+                conn.close()
+                raise TransmissionTimeoutError(
+                    "timeout when connection to transmission daemon"
+                ) from exc
+            except OSError as exc:
+                conn.close()
+                raise TransmissionConnectError(
+                    f"can't connect to transmission daemon: {exc!s}"
+                ) from exc
+
+            if response.status == 409:
+                self._session_id = response.getheader(_SESSION_HEADER, "0")
+                response.read()
+                conn.close()
+                continue
+
+            if response.status in (401, 403):
+                conn.close()
+                raise TransmissionAuthError("transmission daemon require auth")
+            if response.status != 200:
+                conn.close()
+                raise TransmissionError(
+                    f"Unexpected HTTP status {response.status} from transmission daemon"
+                )
+
+            return conn, response
+
+        raise TransmissionError(
+            "Could not negotiate a session id with transmission daemon"
+        )
+
+    def iter_torrents(
+        self, fields: list[str], ids: t.Any = None
+    ) -> t.Iterator[dict[str, t.Any]]:
+        """Yield raw torrent records from a streamed `torrent-get` response.
+
+        Params:
+            fields (list[str]): RPC field names to request.
+            ids (Any): Torrent ids, hash strings or `recently-active`. `None` for all torrents.
+        """
+        arguments: dict[str, t.Any] = {"fields": fields}
+        if ids is not None:
+            arguments["ids"] = ids
+
+        conn, response = self._open({"method": "torrent-get", "arguments": arguments})
+        decoder = TorrentStreamDecoder()
+        try:
+            while True:
+                try:
+                    data: bytes = response.read1(self.read_size)
+                except (socket.timeout, TimeoutError) as exc:
+                    raise TransmissionTimeoutError(
+                        "timeout reading response from transmission daemon"
+                    ) from exc
+
+                if not data:
+                    break
+
+                yield from decoder.feed(data)
+
+            yield from decoder.feed(b"", final=True)
+        finally:
+            response.close()
+            conn.close()
+
+        if decoder.result != "success":
+            raise TransmissionError(f"Query failed with result '{decoder.result}'")
+        if not decoder.done:
+            raise TransmissionError("Truncated torrent-get response")
@@ -0,0 +1,419 @@
+"""Verify torrent data locally, against the piece hashes in its `.torrent` file.
+
+`torrent-verify` hashes one torrent at a time on the daemon's single thread,
+and the torrent can't seed until it is done. `PieceVerifier` instead reads the
+piece hashes from the torrent's `.torrent` file (its `torrentFile` field),
+memory-maps the data files, and SHA-1 hashes ranges of pieces across a process
+pool, without involving the daemon at all.
+
+Pieces span file boundaries, so each task is a contiguous range of pieces, sent
+with only the slices of the files it covers. Missing & short files make the
+pieces they are in bad. BEP 47 pad files are hashed as zeros, and incomplete
+files renamed with a `.part` suffix are read in place.
+
+The data & `.torrent` files must be visible on this host, at the same paths or
+mapped with `path_map` (see `orphans.map_path()`).
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+import hashlib
+import logging
+import mmap
+import os
+import time
+import typing as t
+
+from .bencode import BencodeView
+from .orphans import map_path
+
+if t.TYPE_CHECKING:
+    from transmission_rpc.torrent import Torrent
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "VERIFY_FIELDS",
+    "PieceLayout",
+    "VerifyResult",
+    "PieceVerifier",
+]
+
+## RPC fields needed to verify a torrent locally
+VERIFY_FIELDS: list[str] = ["id", "hashString", "name", "torrentFile", "downloadDir"]
+## Bytes of data hashed per task
+DEFAULT_TASK_SIZE: int = 64 * 1024 * 1024
+_SHA1_SIZE: int = 20
+_PARTIAL_SUFFIX: str = ".part"
+
+## (path, or None for a pad file, offset in the file, length), for one task's byte range
+_Segment = tuple[str | None, int, int]
+
+
+def _decode_path(parts: list[bytes]) -> str:
+    return os.path.join(*(part.decode("utf-8", "surrogateescape") for part in parts))
+
+
+@dataclass
+class PieceLayout:
+    """Piece hashes & files of a torrent, from its info dictionary.
+
+    Attributes:
+        name (str): Torrent name.
+        piece_length (int): Bytes per piece (the last one may be shorter).
+        pieces (bytes): Concatenated SHA-1 piece hashes.
+        files (list[tuple[str, int, bool]]): (path relative to the download dir, length, is a pad file), in piece order.
+
+    """
+
+    name: str = field(default=None)
+    piece_length: int = field(default=0)
+    pieces: bytes = field(default=b"", repr=False)
+    files: list[tuple[str, int, bool]] = field(default_factory=list, repr=False)
+
+    @classmethod
+    def from_info(cls, info: dict[bytes, t.Any]) -> "PieceLayout":
+        if b"pieces" not in info:
+            raise ValueError(
+                "Torrents without v1 piece hashes (BitTorrent v2 only) are not supported"
+            )
+
+        name: str = (info.get(b"name.utf-8") or info[b"name"]).decode(
+            "utf-8", "surrogateescape"
+        )
+        if b"files" in info:
+            files: list[tuple[str, int, bool]] = [
+                (
+                    os.path.join(
+                        name, _decode_path(entry.get(b"path.utf-8") or entry[b"path"])
+                    ),
+                    entry[b"length"],
+                    b"p" in entry.get(b"attr", b""),
+                )
+                for entry in info[b"files"]
+            ]
+        else:
+            files = [(name, info[b"length"], False)]
+
+        layout = cls(
+            name=name,
+            piece_length=info[b"piece length"],
+            pieces=info[b"pieces"],
+            files=files,
+        )
+        expected: int = (
+            -(-layout.total_size // layout.piece_length) if layout.total_size else 0
+        )
+        if len(layout.pieces) != expected * _SHA1_SIZE:
+            raise ValueError(
+                f"Torrent '{name}' has {len(layout.pieces) // _SHA1_SIZE} piece hashes, expected {expected}"
+            )
+
+        return layout
+
+    @classmethod
+    def from_torrent_file(cls, path: str | os.PathLike) -> "PieceLayout":
+        ## Only the info dictionary is decoded, not i.e. a hybrid torrent's piece layers
+        with open(path, "rb") as f:
+            info: dict[bytes, t.Any] = BencodeView(f.read())["info"].decode()
+
+        return cls.from_info(info)
+
+    @property
+    def total_size(self) -> int:
+        return sum(length for _, length, _ in self.files)
+
+    @property
+    def piece_count(self) -> int:
+        return len(self.pieces) // _SHA1_SIZE
+
+
+@dataclass
+class VerifyResult:
+    """Result of verifying a torrent.
+
+    Attributes:
+        hash (str|None): Info hash.
+        name (str): Torrent name.
+        pieces (int): Number of pieces.
+        bad_pieces (list[int]): Indexes of pieces that are missing or don't match their hash.
+        missing_files (list[str]): Files (relative to the download dir) that are not on disk.
+        bytes (int): Bytes hashed.
+        seconds (float): Wall time.
+        error (str|None): Why the torrent could not be verified at all, i.e. an unreadable `.torrent` file.
+
+    """
+
+    hash: str | None = field(default=None)
+    name: str = field(default=None)
+    pieces: int = field(default=0)
+    bad_pieces: list[int] = field(default_factory=list)
+    missing_files: list[str] = field(default_factory=list)
+    bytes: int = field(default=0)
+    seconds: float = field(default=0.0)
+    error: str | None = field(default=None)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.bad_pieces
+
+    @property
+    def percent_done(self) -> float:
+        """Percentage of pieces that are present & valid."""
+        if self.error is not None:
+            return 0.0
+        if not self.pieces:
+            return 100.0
+
+        return 100.0 * (self.pieces - len(self.bad_pieces)) / self.pieces
+
+
+def _hash_pieces(
+    segments: list[_Segment], piece_length: int, total: int, first: int, expected: bytes
+) -> tuple[list[int], int]:
+    """Hash the pieces of a task (in a worker process).
+
+    Params:
+        segments (list[_Segment]): File slices covering the task's bytes, in order.
+        piece_length (int): Bytes per piece.
+        total (int): Bytes in the task.
+        first (int): Index of the task's first piece.
+        expected (bytes): Concatenated expected hashes of the task's pieces.
+
+    Returns:
+        (tuple[list[int], int]): Bad piece indexes, and bytes hashed.
+
+    """
+    maps: dict[str, mmap.mmap | None] = {}
+    views: dict[str, memoryview] = {}
+
+    def _view(path: str) -> memoryview | None:
+        if path not in maps:
+            maps[path] = None
+            try:
+                with open(path, "rb") as f:
+                    if os.fstat(f.fileno()).st_size:
+                        maps[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                        views[path] = memoryview(maps[path])
+            except OSError:
+                pass
+
+        return views.get(path)
+
+    bad: list[int] = []
+    hashed: int = 0
+    segment: int = 0
+    position: int = 0
+
+    try:
+        for piece in range(len(expected) // _SHA1_SIZE):
+            remaining: int = min(piece_length, total - piece * piece_length)
+            digest = hashlib.sha1()
+            valid: bool = True
+
+            while remaining:
+                path, offset, length = segments[segment]
+                n: int = min(remaining, length - position)
+
+                if path is None:
+                    digest.update(bytes(n))
+                elif valid:
+                    view: memoryview | None = _view(path)
+                    start: int = offset + position
+                    if view is None or start + n > len(view):
+                        ## Missing or short file
+                        valid = False
+                    else:
+                        digest.update(view[start : start + n])
+                        hashed += n
+
+                remaining -= n
+                position += n
+                if position == length:
+                    segment += 1
+                    position = 0
+
+            if (
+                not valid
+                or digest.digest()
+                != expected[piece * _SHA1_SIZE : (piece + 1) * _SHA1_SIZE]
+            ):
+                bad.append(first + piece)
+    finally:
+        for view in views.values():
+            view.release()
+        for mapped in maps.values():
+            if mapped is not None:
+                mapped.close()
+
+    return bad, hashed
+
+
+class PieceVerifier:
+    """Verify torrent data against piece hashes, hashing ranges of pieces in a process pool.
+
+    Use as a context manager, so the pool is shared by every torrent verified.
+
+    Params:
+        workers (int|None): Processes. Defaults to the number of CPUs.
+        task_size (int): Bytes hashed per task.
+        path_map (dict[str, str]|None): Where daemon paths are mounted on this host.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        task_size: int = DEFAULT_TASK_SIZE,
+        path_map: dict[str, str] | None = None,
+    ) -> None:
+        self.workers: int = max(1, workers or os.cpu_count() or 1)
+        self.task_size: int = max(1, task_size)
+        self.path_map: dict[str, str] = path_map or {}
+        self._pool: ProcessPoolExecutor | None = None
+
+    def __enter__(self) -> "PieceVerifier":
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self
+
+    def __exit__(self, *exc_info: t.Any) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    @staticmethod
+    def _resolve(path: str) -> str | None:
+        """The path to read a file from: itself, its `.part` file, or `None` if neither exists."""
+        if os.path.exists(path):
+            return path
+        if os.path.exists(path + _PARTIAL_SUFFIX):
+            return path + _PARTIAL_SUFFIX
+
+        return None
+
+    def _tasks(
+        self, layout: PieceLayout, paths: list[str | None]
+    ) -> t.Iterator[tuple[list[_Segment], int, int, int, bytes]]:
+        """Split a torrent into tasks of whole pieces: (segments, piece length, bytes, first piece, hashes)."""
+        starts: list[int] = []
+        offset: int = 0
+        for _, length, _ in layout.files:
+            starts.append(offset)
+            offset += length
+
+        per_task: int = max(1, self.task_size // layout.piece_length)
+        total: int = layout.total_size
+
+        for first in range(0, layout.piece_count, per_task):
+            last: int = min(first + per_task, layout.piece_count)
+            begin: int = first * layout.piece_length
+            end: int = min(last * layout.piece_length, total)
+
+            segments: list[_Segment] = []
+            index: int = bisect_right(starts, begin) - 1
+            position: int = begin
+            while position < end:
+                _, length, pad = layout.files[index]
+                if length:
+                    n: int = min(end, starts[index] + length) - position
+                    ## Missing files keep a path that doesn't exist, so their pieces are bad
+                    segment_path: str | None = None if pad else (paths[index] or "")
+                    segments.append((segment_path, position - starts[index], n))
+                    position += n
+                index += 1
+
+            yield (
+                segments,
+                layout.piece_length,
+                end - begin,
+                first,
+                layout.pieces[first * _SHA1_SIZE : last * _SHA1_SIZE],
+            )
+
+    def verify(
+        self,
+        layout: PieceLayout,
+        download_dir: str,
+        info_hash: str | None = None,
+        on_progress: t.Callable[[int, int], None] | None = None,
+    ) -> VerifyResult:
+        """Verify a torrent's data in `download_dir` (a local path).
+
+        Params:
+            layout (PieceLayout): The torrent's pieces & files.
+            download_dir (str): Directory the torrent's files are in.
+            info_hash (str|None): Info hash, for the result.
+            on_progress (Callable[[int, int], None]|None): Called with (pieces done, pieces) after each task.
+
+        """
+        if self._pool is None:
+            raise RuntimeError("PieceVerifier must be used as a context manager")
+
+        started: float = time.perf_counter()
+        result = VerifyResult(
+            hash=info_hash, name=layout.name, pieces=layout.piece_count
+        )
+
+        paths: list[str | None] = []
+        for relative, _, pad in layout.files:
+            resolved: str | None = (
+                None if pad else self._resolve(os.path.join(download_dir, relative))
+            )
+            if resolved is None and not pad:
+                result.missing_files.append(relative)
+            paths.append(resolved)
+
+        pending: dict[Future, int] = {}
+        done_pieces: int = 0
+        tasks: t.Iterator = self._tasks(layout, paths)
+
+        ## Bounded in-flight tasks, so a huge torrent's segments aren't all queued at once
+        while True:
+            for task in tasks:
+                pending[self._pool.submit(_hash_pieces, *task)] = (
+                    len(task[4]) // _SHA1_SIZE
+                )
+                if len(pending) >= self.workers * 2:
+                    break
+
+            if not pending:
+                break
+
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                bad, hashed = future.result()
+                result.bad_pieces.extend(bad)
+                result.bytes += hashed
+                done_pieces += pending.pop(future)
+            if on_progress is not None:
+                on_progress(done_pieces, result.pieces)
+
+        result.bad_pieces.sort()
+        result.seconds = time.perf_counter() - started
+
+        return result
+
+    def verify_torrent(
+        self, torrent: Torrent, on_progress: t.Callable[[int, int], None] | None = None
+    ) -> VerifyResult:
+        """Verify a torrent fetched with `VERIFY_FIELDS`, reading its `.torrent` file & data through `path_map`."""
+        fields: dict[str, t.Any] = torrent.fields
+        torrent_file: str = map_path(fields.get("torrentFile") or "", self.path_map)
+
+        try:
+            layout: PieceLayout = PieceLayout.from_torrent_file(torrent_file)
+        except Exception as exc:
+            return VerifyResult(
+                hash=fields.get("hashString"),
+                name=fields.get("name"),
+                error=f"Could not read '{torrent_file}'. Details: {exc}",
+            )
+
+        return self.verify(
+            layout,
+            map_path(fields["downloadDir"], self.path_map),
+            info_hash=fields.get("hashString"),
+            on_progress=on_progress,
+        )
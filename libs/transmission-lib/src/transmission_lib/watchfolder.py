@@ -0,0 +1,525 @@
+"""Watch a folder for `.torrent` & `.magnet` files, and add them as they arrive.
+
+New files are picked up with inotify (through `ctypes`, no dependency) when
+available: a file is only reported once it is closed after writing
+(`IN_CLOSE_WRITE`) or moved into the folder (`IN_MOVED_TO`), so the directory is
+never rescanned, except once when the kernel's event queue overflows. Elsewhere
+(or on filesystems without inotify support, i.e. network mounts) the folder is
+polled, and a file is picked up once its size & mtime are unchanged between two
+polls.
+
+Bursts are debounced: files are submitted once no new file arrived for
+`debounce` seconds, after at most `max_delay` seconds, or as soon as `batch_size`
+files are waiting. Each batch is hashed locally & added with `add_sources()`,
+against a set of the host's info hashes that is fetched once (and refreshed
+every `refresh_interval`), so files the host already has cost no request.
+Processed files are moved to `processed_dir`, unreadable or rejected ones to
+`failed_dir` (with a timestamp before the extension if a file with the same name
+is already there); files that could not be added (i.e. the daemon was
+unreachable) are left in place & retried.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+from dataclasses import dataclass, field
+import errno
+import logging
+import os
+import select
+import struct
+import threading
+import time
+import typing as t
+
+from .ingest import MAGNET_SUFFIX, AddResult, add_sources, collect_sources, fetch_hashes
+
+if t.TYPE_CHECKING:
+    from .controllers import TransmissionRPCController
+
+log = logging.getLogger(__name__)
+
+__all__ = [
+    "WATCH_SUFFIXES",
+    "FolderWatcher",
+    "WatchFolderStats",
+    "WatchFolderService",
+]
+
+## Files picked up from a watch folder
+WATCH_SUFFIXES: tuple[str, ...] = (".torrent", MAGNET_SUFFIX)
+
+## inotify flags, from <sys/inotify.h>
+_IN_CLOSE_WRITE: int = 0x00000008
+_IN_MOVED_TO: int = 0x00000080
+_IN_Q_OVERFLOW: int = 0x00004000
+_IN_IGNORED: int = 0x00008000
+_IN_ISDIR: int = 0x40000000
+_IN_NONBLOCK: int = 0o4000
+_IN_CLOEXEC: int = 0o2000000
+## struct inotify_event: int wd; uint32_t mask, cookie, len; char name[len]
+_EVENT = struct.Struct("iIII")
+_READ_SIZE: int = 64 * 1024
+
+
+class _Inotify:
+    """Non-blocking inotify watch of a single directory."""
+
+    def __init__(self, directory: str) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+
+        self.fd: int = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            err: int = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+        wd: int = libc.inotify_add_watch(
+            self.fd, os.fsencode(directory), _IN_CLOSE_WRITE | _IN_MOVED_TO
+        )
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, os.strerror(err), directory)
+
+    def read(self, timeout: float) -> tuple[list[str], bool]:
+        """Names of files written or moved into the directory, and whether events were lost (queue overflow)."""
+        ready, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not ready:
+            return [], False
+
+        try:
+            data: bytes = os.read(self.fd, _READ_SIZE)
+        except BlockingIOError:
+            return [], False
+
+        names: list[str] = []
+        overflow: bool = False
+        i: int = 0
+        while i < len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, i)
+            i += _EVENT.size
+            if mask & _IN_Q_OVERFLOW:
+                overflow = True
+            elif length and not mask & (_IN_ISDIR | _IN_IGNORED):
+                names.append(os.fsdecode(data[i : i + length].rstrip(b"\0")))
+            i += length
+
+        return names, overflow
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """Report new `.torrent` & `.magnet` files in a directory, in debounced batches.
+
+    Files already in the directory are reported in the first batch (with
+    polling, once they are stable). A path is only reported again after
+    `forget()`, i.e. once it was moved aside, or `requeue()`.
+
+    Params:
+        directory (str): Directory to watch (not recursive).
+        debounce (float): Seconds without a new file before a batch is reported.
+        max_delay (float): Max seconds a file waits during a steady stream of new files.
+        batch_size (int): Report a batch as soon as this many files are waiting.
+        poll_interval (float): Seconds between polls, without inotify.
+        use_inotify (bool|None): Use inotify. `None` uses it when available, falling back to polling.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        debounce: float = 1.0,
+        max_delay: float = 10.0,
+        batch_size: int = 500,
+        poll_interval: float = 2.0,
+        use_inotify: bool | None = None,
+    ) -> None:
+        self.directory: str = os.path.abspath(directory)
+        self.debounce: float = debounce
+        self.max_delay: float = max_delay
+        self.batch_size: int = batch_size
+        self.poll_interval: float = poll_interval
+
+        self._inotify: _Inotify | None = None
+        if use_inotify is not False:
+            try:
+                self._inotify = _Inotify(self.directory)
+            except (OSError, AttributeError) as exc:
+                if use_inotify:
+                    raise
+                log.info(
+                    f"inotify unavailable, polling '{self.directory}' every {poll_interval}s. Details: {exc}"
+                )
+
+        ## Paths waiting to be reported, in arrival order
+        self._pending: dict[str, None] = {}
+        ## Paths reported & not forgotten
+        self._reported: set[str] = set()
+        ## Polling only: (size, mtime_ns) of files not yet stable
+        self._unstable: dict[str, tuple[int, int]] = {}
+        self._first_pending: float | None = None
+        self._last_event: float = 0.0
+        self._last_poll: float = 0.0
+        self._needs_scan: bool = True
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._inotify is not None
+
+    def __enter__(self) -> "FolderWatcher":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def forget(self, paths: t.Iterable[str]) -> None:
+        """Stop tracking reported paths, i.e. once they are moved out of the directory."""
+        self._reported.difference_update(paths)
+
+    def requeue(self, paths: t.Iterable[str]) -> None:
+        """Report paths again with the next batch, i.e. to retry them."""
+        paths = list(paths)
+        self.forget(paths)
+        self._queue(paths, time.monotonic())
+
+    def _queue(self, paths: t.Iterable[str], now: float) -> None:
+        for path in paths:
+            if path in self._reported or path in self._pending:
+                continue
+            if not path.lower().endswith(WATCH_SUFFIXES):
+                continue
+            self._pending[path] = None
+            self._last_event = now
+            if self._first_pending is None:
+                self._first_pending = now
+
+    def _scan(self) -> list[str]:
+        """Files in the directory, for the first batch, after an inotify overflow, and for each poll."""
+        paths: list[str] = []
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.lower().endswith(WATCH_SUFFIXES) and entry.is_file(
+                        follow_symlinks=False
+                    ):
+                        paths.append(entry.path)
+        except OSError as exc:
+            log.warning(f"Could not list '{self.directory}'. Details: {exc}")
+
+        return paths
+
+    def _poll(self) -> list[str]:
+        """Files whose size & mtime did not change since the previous poll."""
+        stable: list[str] = []
+        seen: dict[str, tuple[int, int]] = {}
+        for path in self._scan():
+            if path in self._reported or path in self._pending:
+                continue
+            try:
+                stat: os.stat_result = os.stat(path)
+            except OSError:
+                continue
+            signature: tuple[int, int] = (stat.st_size, stat.st_mtime_ns)
+            if self._unstable.get(path) == signature:
+                stable.append(path)
+            else:
+                seen[path] = signature
+        self._unstable = seen
+
+        return stable
+
+    def _due(self, now: float) -> bool:
+        if not self._pending:
+            return False
+
+        return (
+            len(self._pending) >= self.batch_size
+            or now - self._last_event >= self.debounce
+            or now - self._first_pending >= self.max_delay
+        )
+
+    def next_batch(self, timeout: float | None = None) -> list[str]:
+        """Wait for the next batch of new files. Returns an empty list if `timeout` seconds pass first."""
+        deadline: float | None = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            now: float = time.monotonic()
+            if self._needs_scan:
+                self._needs_scan = False
+                if self._inotify is not None:
+                    self._queue(self._scan(), now)
+                    ## Existing files don't need debouncing
+                    self._last_event = now - self.debounce
+
+            if self._due(now):
+                batch: list[str] = list(self._pending)[: self.batch_size]
+                for path in batch:
+                    del self._pending[path]
+                self._reported.update(batch)
+                self._first_pending = now if self._pending else None
+
+                return batch
+
+            if deadline is not None and now >= deadline:
+                return []
+
+            ## Sleep until the batch is due, the deadline, the next poll, or an event
+            wait: float = (
+                60.0
+                if self._inotify is not None
+                else self._last_poll + self.poll_interval - now
+            )
+            if self._pending:
+                wait = min(
+                    wait,
+                    self._last_event + self.debounce - now,
+                    self._first_pending + self.max_delay - now,
+                )
+            if deadline is not None:
+                wait = min(wait, deadline - now)
+            wait = max(wait, 0.0)
+
+            if self._inotify is not None:
+                names, overflow = self._inotify.read(wait)
+                if overflow:
+                    log.warning(
+                        f"inotify queue overflowed, rescanning '{self.directory}'"
+                    )
+                    self._needs_scan = True
+                self._queue(
+                    (os.path.join(self.directory, name) for name in names),
+                    time.monotonic(),
+                )
+            else:
+                time.sleep(wait)
+                if time.monotonic() - self._last_poll >= self.poll_interval:
+                    self._last_poll = time.monotonic()
+                    self._queue(self._poll(), self._last_poll)
+
+
+@dataclass
+class WatchFolderStats:
+    """Counters of a watch folder service.
+
+    Attributes:
+        batches (int): Batches submitted.
+        files (int): Files picked up.
+        added (int): Torrents added.
+        skipped (int): Files skipped, already on the host or duplicates.
+        failed (int): Files moved to the failed dir (unreadable, or rejected by the daemon).
+        retried (int): Files left in place to retry (i.e. the daemon was unreachable).
+
+    """
+
+    batches: int = field(default=0)
+    files: int = field(default=0)
+    added: int = field(default=0)
+    skipped: int = field(default=0)
+    failed: int = field(default=0)
+    retried: int = field(default=0)
+
+
+def _unique_path(directory: str, name: str) -> str:
+    """A path for `name` in `directory` that does not exist yet.
+
+    A file dropped again with the same name as one moved earlier gets a timestamp
+    (and a counter, if needed) before its extension, i.e. `a.20240101-120000.torrent`.
+    """
+    target: str = os.path.join(directory, name)
+    if not os.path.lexists(target):
+        return target
+
+    stem, ext = os.path.splitext(name)
+    stamp: str = time.strftime("%Y%m%d-%H%M%S")
+    target = os.path.join(directory, f"{stem}.{stamp}{ext}")
+    counter: int = 1
+    while os.path.lexists(target):
+        target = os.path.join(directory, f"{stem}.{stamp}-{counter}{ext}")
+        counter += 1
+
+    return target
+
+
+class WatchFolderService:
+    """Add `.torrent` & `.magnet` files dropped in a folder to a host, until stopped.
+
+    Params:
+        controller (TransmissionRPCController): The host to add to.
+        directory (str): Watched directory.
+        processed_dir (str|None): Where processed files are moved. Defaults to `<directory>/processed`.
+        failed_dir (str|None): Where unreadable & rejected files are moved. Defaults to `<directory>/failed`.
+        refresh_interval (float): Seconds between refreshes of the host's info hashes, i.e. to notice removed torrents.
+        retry_delay (float): Seconds before files that could not be added are retried.
+        concurrency (int): `torrent-add` requests in flight.
+        download_dir (str|None): Download dir. Defaults to the daemon's.
+        paused (bool|None): Add torrents stopped.
+        labels (list[str]|None): Labels to set on added torrents.
+        watcher_options (Any): `FolderWatcher` options (`debounce`, `max_delay`, `batch_size`, `poll_interval`, `use_inotify`).
+    """
+
+    def __init__(
+        self,
+        controller: TransmissionRPCController,
+        directory: str,
+        processed_dir: str | None = None,
+        failed_dir: str | None = None,
+        refresh_interval: float = 600.0,
+        retry_delay: float = 60.0,
+        concurrency: int = 4,
+        download_dir: str | None = None,
+        paused: bool | None = None,
+        labels: list[str] | None = None,
+        **watcher_options: t.Any,
+    ) -> None:
+        self.controller: TransmissionRPCController = controller
+        self.directory: str = os.path.abspath(directory)
+        self.processed_dir: str = processed_dir or os.path.join(
+            self.directory, "processed"
+        )
+        self.failed_dir: str = failed_dir or os.path.join(self.directory, "failed")
+        self.refresh_interval: float = refresh_interval
+        self.retry_delay: float = retry_delay
+        self.concurrency: int = concurrency
+        self.download_dir: str | None = download_dir
+        self.paused: bool | None = paused
+        self.labels: list[str] | None = labels
+        self.watcher = FolderWatcher(self.directory, **watcher_options)
+        self.stats = WatchFolderStats()
+
+        os.makedirs(self.processed_dir, exist_ok=True)
+        os.makedirs(self.failed_dir, exist_ok=True)
+
+        self._known: set[str] = set()
+        self._refreshed: float | None = None
+        ## Files to retry: {path: monotonic time due}
+        self._retry: dict[str, float] = {}
+        self._stop = threading.Event()
+
+    def stop(self) -> None:
+        """Stop after the current batch."""
+        self._stop.set()
+
+    def _refresh(self) -> None:
+        now: float = time.monotonic()
+        if (
+            self._refreshed is not None
+            and now - self._refreshed < self.refresh_interval
+        ):
+            return
+
+        self._known = fetch_hashes(self.controller)
+        self._refreshed = now
+        log.debug(f"Host has {len(self._known)} torrent(s)")
+
+    def _move(self, paths: t.Iterable[str], destination: str) -> None:
+        moved: list[str] = []
+        for path in paths:
+            try:
+                os.replace(path, _unique_path(destination, os.path.basename(path)))
+            except FileNotFoundError:
+                pass
+            except OSError as exc:
+                log.warning(
+                    f"Could not move '{path}' to '{destination}'. Details: {exc}"
+                )
+                continue
+            moved.append(path)
+        self.watcher.forget(moved)
+
+    def process(self, paths: list[str]) -> AddResult:
+        """Hash, dedupe & add a batch of files, then move them aside."""
+        self._refresh()
+
+        sources, errors = collect_sources(paths, recursive=False, workers=1)
+        result: AddResult = add_sources(
+            self.controller,
+            sources,
+            existing=self._known,
+            concurrency=self.concurrency,
+            batch_size=max(1, len(sources)),
+            download_dir=self.download_dir,
+            paused=self.paused,
+            labels=self.labels,
+        )
+        self._known.update(
+            source.hash for source in result.added + result.existing if source.hash
+        )
+
+        for path, error in errors.items():
+            log.warning(f"Could not read '{path}'. Details: {error}")
+        for path, error in result.rejected.items():
+            log.warning(f"Host rejected '{path}'. Details: {error}")
+        for path, error in result.failed.items():
+            log.warning(
+                f"Could not add '{path}', retrying in {self.retry_delay:.0f}s. Details: {error}"
+            )
+
+        self._move(
+            (source.path for source in result.added + result.skipped + result.existing),
+            self.processed_dir,
+        )
+        self._move(list(errors) + list(result.rejected), self.failed_dir)
+        due: float = time.monotonic() + self.retry_delay
+        self._retry.update((path, due) for path in result.failed)
+
+        self.stats.batches += 1
+        self.stats.files += len(paths)
+        self.stats.added += len(result.added)
+        self.stats.skipped += len(result.skipped) + len(result.existing)
+        self.stats.failed += len(errors) + len(result.rejected)
+        self.stats.retried += len(result.failed)
+
+        return result
+
+    def run(
+        self, on_batch: t.Callable[[AddResult], None] | None = None
+    ) -> WatchFolderStats:
+        """Process batches until `stop()` is called (or interrupted)."""
+        log.info(
+            f"Watching '{self.directory}' ({'inotify' if self.watcher.uses_inotify else 'polling'}) for '{self.controller.host}'"
+        )
+        try:
+            while not self._stop.is_set():
+                now: float = time.monotonic()
+                due: list[str] = [
+                    path for path, when in self._retry.items() if when <= now
+                ]
+                if due:
+                    for path in due:
+                        del self._retry[path]
+                    self.watcher.requeue(due)
+
+                timeout: float = 1.0
+                if self._retry:
+                    timeout = min(timeout, max(0.0, min(self._retry.values()) - now))
+                batch: list[str] = self.watcher.next_batch(timeout=timeout)
+                if not batch:
+                    continue
+
+                try:
+                    result: AddResult = self.process(batch)
+                except Exception as exc:
+                    log.error(
+                        f"Error processing batch of {len(batch)} file(s), retrying in {self.retry_delay:.0f}s. Details: {exc}"
+                    )
+                    due_at: float = time.monotonic() + self.retry_delay
+                    self._retry.update((path, due_at) for path in batch)
+                    continue
+
+                if on_batch is not None:
+                    on_batch(result)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.watcher.close()
+
+        return self.stats
@@ -45,6 +45,29 @@ VENV_DIR = Path("./.venv").resolve()
 LINT_PATHS: list[str] = ["src", "packages", "applications", "sandbox"]
 IGNORED_LINT_PATHS: list[str] = [".venv", ".nox", "alembic", "versions"]
 
+## Invocations checked by the import-budget session
+IMPORT_BUDGET_COMMANDS: list[list[str]] = [
+    ["cli.py", "--help"],
+    ["cli.py", "transmission", "--help"],
+    ["-c", "import core_utils, core_utils.df_utils"],
+]
+## Modules that must not be imported by any of the commands above, i.e. just
+#  to parse CLI args/render help, or by importing core_utils
+IMPORT_BUDGET_FORBIDDEN: list[str] = [
+    "transmission_rpc",
+    "requests",
+    "transmission_lib.controllers",
+    "pandas",
+    "pyarrow",
+    "sqlalchemy",
+]
+## Max total import time of a CLI invocation, in microseconds (as reported by
+#  -X importtime, which inflates real import time). The forbidden-module check
+#  above is the strict guard, this catches gradual regressions.
+IMPORT_BUDGET_US: int = 450_000
+## Number of runs per command; the median cumulative time is checked
+IMPORT_BUDGET_RUNS: int = 5
+
 
 def install_uv_project(session: nox.Session, external: bool = False) -> None:
     """Method to install uv and the current project in a nox session."""
@@ -128,6 +151,72 @@ Double check imports in _init_.py files, ruff removes unused imports by default.
         session.run("ruff", "format", str(py_file))
 
 
+def parse_importtime(output: str) -> tuple[dict[str, int], int]:
+    """Parse `python -X importtime` output.
+
+    Returns:
+        (tuple[dict[str, int], int]): `{module: cumulative_us}`, and the total import
+            time in microseconds (the sum of all top-level imports).
+
+    """
+    imports: dict[str, int] = {}
+    total_us: int = 0
+
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+
+        _self, cumulative, name = line[len("import time:") :].split("|")
+        if not cumulative.strip().isdigit():
+            ## Header line
+            continue
+
+        imports[name.strip()] = int(cumulative)
+        ## Nested imports are indented by 2 spaces per level
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative)
+
+    return imports, total_us
+
+
+@nox.session(python=[DEFAULT_PYTHON], name="import-budget", tags=["quality", "perf"])
+def check_import_budget(session: nox.Session):
+    """Fail when CLI startup imports regress.
+
+    Checks that no heavy RPC module is imported to parse args/render help, and that
+    the median total import time of each command stays under `IMPORT_BUDGET_US`.
+    """
+    install_uv_project(session)
+
+    failures: list[str] = []
+
+    for command in IMPORT_BUDGET_COMMANDS:
+        samples: list[int] = []
+
+        for _ in range(IMPORT_BUDGET_RUNS):
+            output: str = session.run(
+                "python", "-X", "importtime", *command, silent=True
+            )
+            imports, total_us = parse_importtime(output)
+
+            forbidden: list[str] = [m for m in IMPORT_BUDGET_FORBIDDEN if m in imports]
+            if forbidden:
+                failures.append(f"'{' '.join(command)}' imported {forbidden}")
+
+            samples.append(total_us)
+
+        median_us: int = sorted(samples)[len(samples) // 2]
+        log.info(f"'{' '.join(command)}': imports took {median_us}us")
+
+        if median_us > IMPORT_BUDGET_US:
+            failures.append(
+                f"'{' '.join(command)}': imports took {median_us}us (budget: {IMPORT_BUDGET_US}us)"
+            )
+
+    if failures:
+        session.error("Import budget exceeded:\n" + "\n".join(sorted(set(failures))))
+
+
 @nox.session(python=[DEFAULT_PYTHON], name="vulture-check", tags=["quality"])
 def run_vulture_check(session: nox.Session):
     session.install(f"vulture")